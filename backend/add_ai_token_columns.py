@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para añadir la contabilidad de tokens a ai_interactions
+
+- Añade prompt_tokens, completion_tokens y tokens_exact
+- Crea ai_usage_rollups (db.create_all) y la recalcula desde el histórico
+
+Uso:
+    python add_ai_token_columns.py [--days 90]
+"""
+
+import sys
+from datetime import datetime, timedelta
+from app import create_app, db
+from sqlalchemy import text
+
+COLUMNS = {
+    'prompt_tokens': "INT NULL AFTER tokens_used",
+    'completion_tokens': "INT NULL AFTER prompt_tokens",
+    'tokens_exact': "TINYINT(1) DEFAULT 0 AFTER completion_tokens",
+}
+
+
+def add_ai_token_columns(days=None):
+    """Añade las columnas de tokens y reconstruye los agregados diarios"""
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("=" * 60)
+            print("🔧 CONTABILIDAD DE TOKENS EN ai_interactions")
+            print("=" * 60)
+
+            for column, definition in COLUMNS.items():
+                result = db.session.execute(text(f"SHOW COLUMNS FROM ai_interactions LIKE '{column}'"))
+                if result.fetchone() is None:
+                    print(f"\n📋 Añadiendo columna '{column}'...")
+                    db.session.execute(text(f"ALTER TABLE ai_interactions ADD COLUMN {column} {definition}"))
+                    print(f"✅ Columna '{column}' añadida")
+                else:
+                    print(f"ℹ️  Columna '{column}' ya existe")
+
+            db.session.commit()
+
+            # Tabla de agregados (create_all solo crea las que faltan)
+            db.create_all()
+
+            from app.services.ai.usage_stats import rebuild_rollups
+            start = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+            print("\n📊 Recalculando ai_usage_rollups...")
+            processed = rebuild_rollups(start=start)
+            print(f"✅ {processed} interacciones agregadas")
+
+            print("\n" + "=" * 60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+
+        except Exception as e:
+            print(f"\n❌ ERROR: {e}")
+            db.session.rollback()
+            import traceback
+            traceback.print_exc()
+
+if __name__ == '__main__':
+    days = int(sys.argv[sys.argv.index('--days') + 1]) if '--days' in sys.argv else None
+    add_ai_token_columns(days)
@@ -0,0 +1,44 @@
+"""
+Script para añadir el índice (user_id, course_id, evaluated_at) a writing_evaluations
+Lo usan el historial y las tendencias de escritura por curso
+(/api/academic/tools/writing-history/<user_id>/trends)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from sqlalchemy import text
+
+INDEX_NAME = 'ix_writing_evaluations_user_course_date'
+
+app = create_app()
+
+with app.app_context():
+    print("=" * 80)
+    print(f"🔧 AÑADIENDO ÍNDICE {INDEX_NAME} A TABLA writing_evaluations")
+    print("=" * 80)
+
+    try:
+        result = db.session.execute(text("""
+            SELECT COUNT(*) as count
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'writing_evaluations'
+            AND INDEX_NAME = :name
+        """), {'name': INDEX_NAME})
+
+        if result.fetchone()[0] > 0:
+            print(f"✅ El índice '{INDEX_NAME}' ya existe")
+        else:
+            print("📝 Creando índice...")
+            db.session.execute(text(f"""
+                CREATE INDEX {INDEX_NAME}
+                ON writing_evaluations (user_id, course_id, evaluated_at)
+            """))
+            db.session.commit()
+            print(f"✅ Índice '{INDEX_NAME}' creado exitosamente")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.session.rollback()
@@ -77,6 +77,18 @@ def create_app(config_name='development'):
         except Exception as e:
             print(f"\n⚠️  Error al inicializar BD: {e}")
     
+    # Ejecutor de trabajos en segundo plano
+    from app.services.job_runner import job_runner
+    job_runner.init_app(app)
+    
+    # Pipeline de análisis de documentos
+    from app.services.document_processing.document_pipeline import document_pipeline
+    document_pipeline.init_app(app)
+    
+    # Registro de interacciones con IA por lotes en segundo plano
+    from app.services.ai.interaction_logger import interaction_logger
+    interaction_logger.init_app(app)
+    
     return app
 
 
@@ -140,6 +152,16 @@ def register_blueprints(app):
     except Exception as e:
         print(f"   ❌ Error al registrar Dashboard routes: {e}")
     
+    # ========== MÓDULO 1: Documentos ==========
+    try:
+        from app.routes.document_routes import document_bp
+        app.register_blueprint(document_bp, url_prefix='/api/documents')
+        print("   ✅ Document routes: /api/documents")
+    except ImportError as e:
+        print(f"   ⚠️  Document routes no disponible: {e}")
+    except Exception as e:
+        print(f"   ❌ Error al registrar Document routes: {e}")
+    
     # ========== MÓDULO 1: Análisis de Documentos ==========
     try:
         from app.routes.analysis_routes import analysis_bp
@@ -170,6 +192,16 @@ def register_blueprints(app):
     except Exception as e:
         print(f"   ❌ Error al registrar Report routes: {e}")
     
+    # ========== TRABAJOS EN SEGUNDO PLANO ==========
+    try:
+        from app.routes.job_routes import job_bp
+        app.register_blueprint(job_bp, url_prefix='/api/jobs')
+        print("   ✅ Job routes: /api/jobs")
+    except ImportError as e:
+        print(f"   ⚠️  Job routes no disponible: {e}")
+    except Exception as e:
+        print(f"   ❌ Error al registrar Job routes: {e}")
+    
     # ========== AUTENTICACIÓN ==========
     try:
         from app.routes.auth_routes import auth_bp
@@ -222,6 +254,7 @@ def register_blueprints(app):
                 'video': '/api/video',
                 'audio': '/api/audio',
                 'dashboard': '/api/dashboard',
+                'documents': '/api/documents',
                 'analysis': '/api/analysis',
                 'profile': '/api/profile',
                 'reports': '/api/reports',
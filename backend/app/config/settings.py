@@ -58,6 +58,40 @@ class BaseConfig:
     GEMINI_VISION_MODEL = os.getenv('GEMINI_VISION_MODEL', 'gemini-pro-vision')
     GEMINI_MAX_TOKENS = int(os.getenv('GEMINI_MAX_TOKENS', 2048))
     GEMINI_TEMPERATURE = float(os.getenv('GEMINI_TEMPERATURE', 0.7))
+    GEMINI_BATCH_PROMPT_TOKENS = int(os.getenv('GEMINI_BATCH_PROMPT_TOKENS', 6000))
+    GEMINI_ANALYSIS_INPUT_TOKENS = int(os.getenv('GEMINI_ANALYSIS_INPUT_TOKENS', 1500))
+    GEMINI_SENTIMENT_INPUT_TOKENS = int(os.getenv('GEMINI_SENTIMENT_INPUT_TOKENS', 600))
+    GEMINI_CHUNK_TOKENS = int(os.getenv('GEMINI_CHUNK_TOKENS', 2000))
+    GEMINI_MAX_INPUT_TOKENS = os.getenv('GEMINI_MAX_INPUT_TOKENS')
+    AI_PRICING_JSON = os.getenv('AI_PRICING_JSON')
+    GEMINI_FALLBACK_MODELS = os.getenv('GEMINI_FALLBACK_MODELS')
+    GEMINI_MODEL_PROBE_TTL = int(os.getenv('GEMINI_MODEL_PROBE_TTL', 3600))
+    AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'True').lower() == 'true'
+    AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', 7 * 24 * 3600))
+    GEMINI_MAX_IN_FLIGHT = int(os.getenv('GEMINI_MAX_IN_FLIGHT', 4))
+    GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', 60))
+    GEMINI_TOKENS_PER_MINUTE = int(os.getenv('GEMINI_TOKENS_PER_MINUTE', 250000))
+    GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', 4))
+    AI_LOG_BATCH_SIZE = int(os.getenv('AI_LOG_BATCH_SIZE', 50))
+    AI_LOG_FLUSH_SECONDS = float(os.getenv('AI_LOG_FLUSH_SECONDS', 2.0))
+    AI_LOG_QUEUE_SIZE = int(os.getenv('AI_LOG_QUEUE_SIZE', 5000))
+    AI_LOG_BLOCK_MS = int(os.getenv('AI_LOG_BLOCK_MS', 50))
+    LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini')
+    LLM_FAKE_LATENCY = os.getenv('LLM_FAKE_LATENCY', 'lognormal:800:3000')
+    LLM_FAKE_ERRORS = os.getenv('LLM_FAKE_ERRORS')
+    LLM_FAKE_TIMEOUT_MS = int(os.getenv('LLM_FAKE_TIMEOUT_MS', 10000))
+    LLM_FAKE_SEED = int(os.getenv('LLM_FAKE_SEED', 42))
+    WRITING_INCREMENTAL_MAX_CHANGE = float(os.getenv('WRITING_INCREMENTAL_MAX_CHANGE', 0.5))
+    WRITING_REVISION_INPUT_TOKENS = int(os.getenv('WRITING_REVISION_INPUT_TOKENS', 3000))
+    WRITING_SPELL_DICTIONARY = os.getenv('WRITING_SPELL_DICTIONARY', '')
+    WRITING_SPELL_MAX_DISTANCE = int(os.getenv('WRITING_SPELL_MAX_DISTANCE', 2))
+    WRITING_REPETITION_MIN = int(os.getenv('WRITING_REPETITION_MIN', 3))
+    WRITING_LOCAL_MAX_ERRORS = int(os.getenv('WRITING_LOCAL_MAX_ERRORS', 25))
+    PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 24))
+    PDF_CACHE_ENTRIES = int(os.getenv('PDF_CACHE_ENTRIES', 32))
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), '.pdf_cache'))
+    WRITING_PDF_CACHE_DIR = os.getenv('WRITING_PDF_CACHE_DIR', os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), '.writing_pdf_cache'))
     
     # OpenAI API (opcional)
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -80,6 +114,27 @@ class BaseConfig:
     SPEECH_RECOGNITION_LANGUAGE = os.getenv('SPEECH_RECOGNITION_LANGUAGE', 'es-ES')
     TRANSCRIPTION_ACCURACY_THRESHOLD = float(os.getenv('TRANSCRIPTION_ACCURACY_THRESHOLD', 0.7))
     
+    # Trabajos en segundo plano
+    JOB_RUNNER_WORKERS = int(os.getenv('JOB_RUNNER_WORKERS', 4))
+    JOB_TIMEOUT_SECONDS = int(os.getenv('JOB_TIMEOUT_SECONDS', 1800))
+    
+    # Pipeline de análisis de documentos
+    DOCUMENT_PIPELINE_WORKERS = int(os.getenv('DOCUMENT_PIPELINE_WORKERS', 2))
+    DOCUMENT_PIPELINE_QUEUE_SIZE = int(os.getenv('DOCUMENT_PIPELINE_QUEUE_SIZE', 50))
+    DOCUMENT_PIPELINE_DIR = os.getenv('DOCUMENT_PIPELINE_DIR', os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), '.pipeline'))
+    DOCUMENT_PIPELINE_TIMEOUT_SECONDS = int(os.getenv('DOCUMENT_PIPELINE_TIMEOUT_SECONDS', 1800))
+    DOCUMENT_MAX_SIZE_MB = int(os.getenv('DOCUMENT_MAX_SIZE_MB', 50))
+    
+    # Detección de entregas casi duplicadas
+    SIMILARITY_NUM_PERM = int(os.getenv('SIMILARITY_NUM_PERM', 128))
+    SIMILARITY_BANDS = int(os.getenv('SIMILARITY_BANDS', 32))
+    SIMILARITY_SHINGLE_WORDS = int(os.getenv('SIMILARITY_SHINGLE_WORDS', 4))
+    SIMILARITY_SEGMENT_WORDS = int(os.getenv('SIMILARITY_SEGMENT_WORDS', 150))
+    SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', 0.4))
+    SIMILARITY_MAX_RESULTS = int(os.getenv('SIMILARITY_MAX_RESULTS', 5))
+    SIMILARITY_MIN_PASSAGE_WORDS = int(os.getenv('SIMILARITY_MIN_PASSAGE_WORDS', 12))
+    SIMILARITY_NEAR_DUPLICATE = float(os.getenv('SIMILARITY_NEAR_DUPLICATE', 0.8))
+    
     # NLP
     SPACY_MODEL = os.getenv('SPACY_MODEL', 'es_core_news_md')
     MIN_WORD_LENGTH = int(os.getenv('MIN_WORD_LENGTH', 3))
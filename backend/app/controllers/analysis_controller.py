@@ -0,0 +1,140 @@
+"""
+Controlador de Análisis (Módulo 1)
+Consultas sobre el índice de vocabulario de los documentos del estudiante
+(ver app.services.document_processing.vocabulary_analyzer) y sobre el
+índice de similitud entre entregas
+(ver app.services.document_processing.similarity_detector)
+"""
+
+from datetime import datetime
+from flask import jsonify
+from app.models.similarity import SUBMISSION_SOURCES
+from app.models.vocabulary import TERM_KINDS
+from app.services.document_processing.similarity_detector import similarity_detector
+from app.services.document_processing.vocabulary_analyzer import vocabulary_analyzer
+
+
+def _validate_kind(kind):
+    if kind and kind not in TERM_KINDS:
+        return jsonify({
+            'success': False,
+            'error': f"kind inválido. Permitidos: {', '.join(TERM_KINDS)}"
+        }), 400
+    return None
+
+
+def get_vocabulary_growth(user_id, since=None):
+    """
+    Curva de crecimiento del vocabulario (un punto por documento)
+    """
+    try:
+        since_date = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since debe ser una fecha ISO (YYYY-MM-DD)'}), 400
+
+    try:
+        return jsonify({
+            'success': True,
+            'user_id': user_id,
+            'summary': vocabulary_analyzer.summary(user_id),
+            'growth': vocabulary_analyzer.growth_curve(user_id, since_date)
+        }), 200
+    except Exception as e:
+        print(f"❌ Error obteniendo crecimiento de vocabulario: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def search_vocabulary(user_id, query, kind=None, limit=20):
+    """
+    Búsqueda por prefijo en el vocabulario del estudiante
+    """
+    invalid = _validate_kind(kind)
+    if invalid:
+        return invalid
+    if not query:
+        return jsonify({'success': False, 'error': 'q es requerido'}), 400
+
+    try:
+        terms = vocabulary_analyzer.search(user_id, query, kind, min(max(limit, 1), 100))
+        return jsonify({'success': True, 'terms': terms, 'total': len(terms)}), 200
+    except Exception as e:
+        print(f"❌ Error buscando vocabulario: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def get_term_documents(user_id, term, kind=None):
+    """
+    Documentos del estudiante en que aparece un término
+    """
+    invalid = _validate_kind(kind)
+    if invalid:
+        return invalid
+
+    try:
+        result = vocabulary_analyzer.term_documents(user_id, term, kind)
+        if result is None:
+            return jsonify({'success': False, 'error': 'Término no encontrado'}), 404
+        return jsonify({'success': True, **result}), 200
+    except Exception as e:
+        print(f"❌ Error obteniendo documentos del término: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def get_document_new_terms(user_id, document_id, kind=None):
+    """
+    Términos que el estudiante usó por primera vez en un documento
+    """
+    invalid = _validate_kind(kind)
+    if invalid:
+        return invalid
+
+    try:
+        terms = vocabulary_analyzer.new_terms(user_id, document_id, kind)
+        return jsonify({
+            'success': True,
+            'document_id': document_id,
+            'terms': terms,
+            'total': len(terms)
+        }), 200
+    except Exception as e:
+        print(f"❌ Error obteniendo términos nuevos: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def get_similarity_report(source, source_id, refresh=False):
+    """
+    Entregas anteriores parecidas a una entrega (y posteriores que la reutilizan)
+
+    Con refresh vuelve a indexar la entrega desde su texto; una entrega aún
+    no indexada se indexa en la consulta. De las coincidencias con entregas
+    de otros estudiantes solo se devuelven la relación y los scores.
+    """
+    if source not in SUBMISSION_SOURCES:
+        return jsonify({
+            'success': False,
+            'error': f"source inválido. Permitidos: {', '.join(SUBMISSION_SOURCES)}"
+        }), 400
+
+    try:
+        report = None if refresh else similarity_detector.get_report(source, source_id)
+        if report is None:
+            result = similarity_detector.index_source(source, source_id, refresh=refresh)
+            if not result['success']:
+                code = 404 if result['error'] == 'Entrega no encontrada' else 409
+                return jsonify(result), code
+            report = {key: value for key, value in result.items() if key not in ('success', 'indexed')}
+        return jsonify({'success': True, **report}), 200
+    except Exception as e:
+        print(f"❌ Error obteniendo reporte de similitud: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def get_similarity_stats():
+    """
+    Tamaño del índice de similitud y coincidencias por relación
+    """
+    try:
+        return jsonify({'success': True, 'stats': similarity_detector.stats()}), 200
+    except Exception as e:
+        print(f"❌ Error obteniendo estadísticas de similitud: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
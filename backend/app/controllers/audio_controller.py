@@ -14,6 +14,7 @@ from app import db
 # Importación condicional de servicios de audio
 try:
     from app.services.ai.audio_service import AudioService
+    from app.services.audio_processing.transcription_cache import transcription_cache
     AUDIO_SERVICE_AVAILABLE = True
 except Exception as e:
     print(f"⚠️  Audio service no disponible: {e}")
@@ -67,12 +68,24 @@ class AudioController:
             original_filepath = os.path.join(self.upload_folder, original_filename)
             audio_file.save(original_filepath)
 
+            # Buscar transcripción previa del mismo audio (reintentos / re-subidas)
+            cache_key = transcription_cache.make_key(
+                transcription_cache.hash_file(original_filepath),
+                kind='audio_service',
+                language=self.audio_service.language,
+                backend=self.audio_service.backend.name
+            )
+            transcription_result = transcription_cache.get(cache_key)
+
             # Convertir a WAV si es necesario
             wav_filename = secure_filename(f"audio_{video_session_id}_{timestamp}.wav")
             wav_filepath = os.path.join(self.upload_folder, wav_filename)
             
             try:
-                if PYDUB_AVAILABLE:
+                if transcription_result is not None:
+                    logger.info("♻️  Transcripción recuperada de caché, se omite la conversión")
+                    wav_filepath = original_filepath
+                elif PYDUB_AVAILABLE:
                     logger.info(f"🔄 Convirtiendo audio a WAV: {original_filepath}")
                     audio = AudioSegment.from_file(original_filepath)
                     audio.export(wav_filepath, format='wav')
@@ -102,8 +115,11 @@ class AudioController:
                 db.session.commit()
 
             # Transcribir audio
-            logger.info(f"🎤 Transcribiendo audio: {wav_filepath}")
-            transcription_result = self.audio_service.transcribe(wav_filepath)
+            if transcription_result is None:
+                logger.info(f"🎤 Transcribiendo audio: {wav_filepath}")
+                transcription_result = self.audio_service.transcribe(wav_filepath)
+                if transcription_result.get('success'):
+                    transcription_cache.set(cache_key, transcription_result)
             
             text = transcription_result.get('text', '').strip()
             
@@ -258,19 +274,25 @@ Genera el resumen en formato JSON con esta estructura:
 """
                 
                 logger.info("🤖 Generando resumen con IA...")
-                summary_response = gemini_service.generate_content(prompt)
+                summary_response = gemini_service.generate_content(
+                    prompt,
+                    interaction_type='audio_summary',
+                    related_entity_type='audio_session',
+                    related_entity_id=audio_session.id
+                )
+                if not summary_response['success']:
+                    raise Exception(summary_response['error'])
                 
-                import json
-                import re
+                from app.utils.response_schemas import parse_response
+                from app.utils.json_stream import JSONExtractionError
                 
                 # Extraer JSON del response
-                json_match = re.search(r'\{.*\}', summary_response, re.DOTALL)
-                if json_match:
-                    summary_data = json.loads(json_match.group())
-                else:
+                try:
+                    summary_data = parse_response(summary_response['content'], 'audio_summary')
+                except JSONExtractionError:
                     # Si no hay JSON, crear estructura básica
                     summary_data = {
-                        "resumen_texto": summary_response,
+                        "resumen_texto": summary_response['content'],
                         "temas_principales": [],
                         "puntos_clave": [],
                         "dudas": [],
@@ -210,6 +210,31 @@ def get_system_health():
         # Verificar conexión a la base de datos
         db.session.execute(db.text('SELECT 1'))
         
+        # Métricas de la caché de respuestas y del control de admisión de IA
+        try:
+            from app.services.ai.prompt_cache import prompt_cache
+            from app.services.ai.rate_limiter import admission_controller
+            from app.services.ai.interaction_logger import interaction_logger
+            ai_cache = prompt_cache.stats()
+            ai_admission = admission_controller.stats()
+            ai_logging = interaction_logger.stats()
+        except Exception:
+            ai_cache = None
+            ai_admission = None
+            ai_logging = None
+        
+        try:
+            from app.services.document_processing.pdf_extractor import PDFExtractor
+            pdf_cache = PDFExtractor.cache_stats()
+        except Exception:
+            pdf_cache = None
+        
+        try:
+            from app.services.document_processing.document_pipeline import document_pipeline
+            pipeline_stats = document_pipeline.stats()
+        except Exception:
+            pipeline_stats = None
+        
         return jsonify({
             'success': True,
             'status': 'healthy',
@@ -219,6 +244,11 @@ def get_system_health():
                 'speech_recognition': 'operational',
                 'gemini': 'operational'
             },
+            'ai_cache': ai_cache,
+            'ai_admission': ai_admission,
+            'ai_logging': ai_logging,
+            'pdf_cache': pdf_cache,
+            'document_pipeline': pipeline_stats,
             'timestamp': datetime.now().isoformat()
         }), 200
         
@@ -290,4 +320,36 @@ def get_processing_statistics(user_id):
         return jsonify({
             'error': True,
             'message': f'Error: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+def get_ai_usage(group_by, start=None, end=None, user_id=None, interaction_type=None):
+    """
+    Tokens, costo y percentiles de latencia de IA desde los agregados
+    diarios (ai_usage_rollups), por tipo de interacción, usuario o día
+    """
+    try:
+        from app.services.ai.usage_stats import usage_report
+        
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        
+        report = usage_report(
+            group_by=group_by,
+            start=start_date,
+            end=end_date,
+            user_id=user_id,
+            interaction_type=interaction_type
+        )
+        
+        return jsonify({'success': True, **report}), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al obtener uso de IA: {str(e)}'
+        }), 500
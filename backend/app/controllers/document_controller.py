@@ -0,0 +1,223 @@
+"""
+Controlador de Documentos (Módulo 1)
+Subida de documentos académicos y su análisis en segundo plano
+(ver app.services.document_processing.document_pipeline)
+"""
+
+import os
+from flask import jsonify, request
+from app import db
+from app.models.document import Document
+from app.services.document_processing import document_reader
+from app.services.document_processing.document_pipeline import document_pipeline
+from app.services.document_processing.similarity_detector import similarity_detector
+from app.services.document_processing.vocabulary_analyzer import vocabulary_analyzer
+from app.utils.file_handler import FileHandler
+
+
+ALLOWED_EXTENSIONS = [ext.lstrip('.') for ext in document_reader.SUPPORTED_EXTENSIONS]
+MAX_FILE_SIZE_MB = int(os.getenv('DOCUMENT_MAX_SIZE_MB', 50))
+DOCUMENT_TYPES = ('informe', 'trabajo_final', 'proyecto', 'ensayo', 'monografia', 'otro')
+
+
+def _find_document(document_id, user_id=None):
+    """Documento por ID (del usuario indicado, si se indica)"""
+    query = Document.query.filter_by(id=document_id)
+    if user_id:
+        query = query.filter_by(user_id=user_id)
+    return query.first()
+
+
+def upload_document():
+    """
+    Guarda el documento subido y lo encola para su análisis
+    """
+    try:
+        file = request.files.get('file')
+        is_valid, error = FileHandler.validate_file(file, ALLOWED_EXTENSIONS, MAX_FILE_SIZE_MB)
+        if not is_valid:
+            return jsonify({'success': False, 'error': error}), 400
+
+        user_id = request.form.get('user_id', type=int)
+        cycle = request.form.get('cycle', type=int)
+        if not user_id:
+            return jsonify({'success': False, 'error': 'user_id es requerido'}), 400
+        if not cycle or not 1 <= cycle <= 10:
+            return jsonify({'success': False, 'error': 'cycle debe estar entre 1 y 10'}), 400
+
+        document_type = request.form.get('document_type', 'informe')
+        if document_type not in DOCUMENT_TYPES:
+            return jsonify({
+                'success': False,
+                'error': f"document_type inválido. Permitidos: {', '.join(DOCUMENT_TYPES)}"
+            }), 400
+
+        saved = FileHandler.save_file(file, FileHandler.get_upload_path('documents'), prefix=f"doc_{user_id}")
+        extension = saved['filename'].rsplit('.', 1)[1].lower()
+
+        document = Document(
+            user_id=user_id,
+            title=request.form.get('title') or os.path.splitext(saved['original_filename'])[0],
+            file_name=saved['original_filename'],
+            file_path=saved['filepath'],
+            file_type=extension,
+            file_size=saved['file_size'],
+            cycle=cycle,
+            mime_type=saved['mime_type'],
+            course_name=request.form.get('course_name'),
+            document_type=document_type
+        )
+        db.session.add(document)
+        db.session.commit()
+        print(f"📄 Documento {document.id} guardado: {document.file_name}")
+
+        queued = document_pipeline.submit(document.id)
+        db.session.refresh(document)
+
+        return jsonify({
+            'success': True,
+            'document': document.to_dict(),
+            'pipeline': document_pipeline.status(document),
+            'queued': queued['success'],
+            'queue_error': queued.get('error')
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error subiendo documento: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def list_documents(user_id, status=None):
+    """
+    Lista los documentos del usuario (más recientes primero)
+    """
+    try:
+        query = Document.query.filter_by(user_id=user_id)
+        if status:
+            query = query.filter_by(processing_status=status)
+        documents = query.order_by(Document.upload_date.desc()).all()
+
+        return jsonify({
+            'success': True,
+            'documents': [document.to_dict() for document in documents],
+            'total': len(documents)
+        }), 200
+
+    except Exception as e:
+        print(f"❌ Error listando documentos: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def get_document(document_id, user_id=None):
+    """
+    Documento con el estado de su pipeline
+    """
+    document = _find_document(document_id, user_id)
+    if document is None:
+        return jsonify({'success': False, 'error': 'Documento no encontrado'}), 404
+
+    return jsonify({
+        'success': True,
+        'document': document.to_dict(),
+        'pipeline': document_pipeline.status(document)
+    }), 200
+
+
+def delete_document(document_id, user_id=None):
+    """
+    Elimina el documento, su archivo, su análisis, su punto de control y
+    sus entradas en los índices de vocabulario y de similitud
+    """
+    try:
+        document = _find_document(document_id, user_id)
+        if document is None:
+            return jsonify({'success': False, 'error': 'Documento no encontrado'}), 404
+        if document.is_processing:
+            return jsonify({'success': False, 'error': 'El documento se está procesando'}), 409
+
+        file_path = document.file_path
+        vocabulary_analyzer.remove_document(document.id, commit=False)
+        similarity_detector.remove_submission('document', document.id, commit=False)
+        db.session.delete(document)
+        db.session.commit()
+
+        FileHandler.delete_file(file_path)
+        document_pipeline.forget(document_id)
+
+        return jsonify({'success': True, 'message': 'Documento eliminado'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error eliminando documento: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def get_document_analysis(document_id, user_id=None):
+    """
+    Análisis de texto de un documento procesado
+    """
+    document = _find_document(document_id, user_id)
+    if document is None:
+        return jsonify({'success': False, 'error': 'Documento no encontrado'}), 404
+
+    if not document.has_analysis:
+        return jsonify({
+            'success': False,
+            'error': 'El documento aún no tiene análisis',
+            'processing_status': document.processing_status,
+            'pipeline': document_pipeline.status(document)
+        }), 409
+
+    return jsonify({
+        'success': True,
+        'document_id': document.id,
+        'analysis': document.text_analysis.to_dict()
+    }), 200
+
+
+def process_document(document_id, user_id=None, restart=False):
+    """
+    Encola (o reanuda) el procesamiento de un documento
+
+    Sin restart retoma en la etapa que falló; con restart procesa desde la
+    extracción.
+    """
+    document = _find_document(document_id, user_id)
+    if document is None:
+        return jsonify({'success': False, 'error': 'Documento no encontrado'}), 404
+
+    result = document_pipeline.submit(document.id, restart=restart)
+    if not result['success']:
+        return jsonify(result), 503
+
+    db.session.refresh(document)
+    return jsonify({
+        'success': True,
+        'already_queued': result.get('already_queued', False),
+        'pipeline': document_pipeline.status(document)
+    }), 202
+
+
+def get_pipeline_status(document_id, user_id=None):
+    """
+    Etapas, tiempos y errores del procesamiento de un documento
+    """
+    document = _find_document(document_id, user_id)
+    if document is None:
+        return jsonify({'success': False, 'error': 'Documento no encontrado'}), 404
+
+    return jsonify({
+        'success': True,
+        'document_id': document.id,
+        'processing_status': document.processing_status,
+        'error_message': document.error_message,
+        'pipeline': document_pipeline.status(document)
+    }), 200
+
+
+def get_pipeline_stats():
+    """
+    Métricas globales del pipeline (tiempos por etapa, cola)
+    """
+    return jsonify({'success': True, 'stats': document_pipeline.stats()}), 200
@@ -61,12 +61,13 @@ from app.models import (
 )
 
 # En app/models/__init__.py, agregar al final:
-from app.models.ai_interactions import AIInteraction
+from app.models.ai_interactions import AIInteraction, AIResponseCache, AIUsageRollup
 
 # Y agregarlo también a __all__:
 __all__ = [
     # ... todos los anteriores
-    'AIInteraction'  # ← Agregar esta línea
+    'AIInteraction',  # ← Agregar esta línea
+    'AIResponseCache'
 ]
 
 # 🆕 NUEVOS MODELOS ACADÉMICOS
@@ -77,6 +78,9 @@ from app.models.timeline import Timeline
 from app.models.timeline_step import TimelineStep
 from app.models.syllabus import SyllabusAnalysis
 from app.models.writing_evaluation import WritingEvaluation
+from app.models.background_job import BackgroundJob
+from app.models.vocabulary import VocabularyTerm, VocabularyPosting, VocabularySnapshot
+from app.models.similarity import SubmissionFingerprint, SubmissionSegment, SubmissionBucket, SubmissionMatch
 
 __all__ = [
     'User',
@@ -84,6 +88,8 @@ __all__ = [
     'Report',
     'GeneratedTemplate',
     'AIInteraction',
+    'AIResponseCache',
+    'AIUsageRollup',
     'AcademicCourse', # 🆕
     'AcademicTask',   # 🆕
     'StudyTimer',     # 🆕
@@ -92,14 +98,24 @@ __all__ = [
     'Timeline',       # 🆕
     'TimelineStep',   # 🆕
     'SyllabusAnalysis', # 🆕
-    'WritingEvaluation' # 🆕
+    'WritingEvaluation', # 🆕
+    'BackgroundJob',
+    'VocabularyTerm',
+    'VocabularyPosting',
+    'VocabularySnapshot',
+    'SubmissionFingerprint',
+    'SubmissionSegment',
+    'SubmissionBucket',
+    'SubmissionMatch'
 ]
 
 # ... import final ...
 from app.models import (
     User, Document, TextAnalysis, VideoSession, EmotionData,
     AttentionMetrics, AudioSession, AudioTranscription,
-    StudentProfile, Report, GeneratedTemplate, AIInteraction,
-    AcademicCourse, AcademicTask, StudyTimer, Project, TimeSession,
-    Timeline, TimelineStep, SyllabusAnalysis, WritingEvaluation # 🆕
+    StudentProfile, Report, GeneratedTemplate, AIInteraction, AIResponseCache,
+    AIUsageRollup, AcademicCourse, AcademicTask, StudyTimer, Project, TimeSession,
+    Timeline, TimelineStep, SyllabusAnalysis, WritingEvaluation, # 🆕
+    BackgroundJob, VocabularyTerm, VocabularyPosting, VocabularySnapshot,
+    SubmissionFingerprint, SubmissionSegment, SubmissionBucket, SubmissionMatch
 )
\ No newline at end of file
@@ -37,6 +37,9 @@ class AIInteraction(db.Model):
     
     # Métricas
     tokens_used = db.Column(db.Integer)
+    prompt_tokens = db.Column(db.Integer)
+    completion_tokens = db.Column(db.Integer)
+    tokens_exact = db.Column(db.Boolean, default=False)  # True si vienen de usage_metadata
     processing_time_ms = db.Column(db.Integer)
     cost_estimate = db.Column(db.Numeric(10, 6))  # Costo estimado en USD
     
@@ -52,4 +55,77 @@ class AIInteraction(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
-        return f'<AIInteraction {self.id} - {self.ai_service} - {self.interaction_type}>'
\ No newline at end of file
+        return f'<AIInteraction {self.id} - {self.ai_service} - {self.interaction_type}>'
+
+class AIResponseCache(db.Model):
+    """
+    Caché persistente de respuestas de IA
+
+    Nivel persistente de app.services.ai.prompt_cache. Cada fila guarda la
+    respuesta de un prompt indexada por el hash de (modelo, plantilla,
+    entradas normalizadas, configuración de generación).
+    """
+
+    __tablename__ = 'ai_response_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False, index=True)
+
+    # Contexto de la entrada
+    template_id = db.Column(db.String(100), nullable=False, index=True)
+    model_used = db.Column(db.String(100))
+
+    # Respuesta
+    response_text = db.Column(db.Text().with_variant(db.Text(length=2 ** 24), 'mysql'))
+    tokens_used = db.Column(db.Integer)
+
+    # Vigencia
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, index=True)
+
+    def __repr__(self):
+        return f'<AIResponseCache {self.template_id} - {self.cache_key[:12]}>'
+
+
+class AIUsageRollup(db.Model):
+    """
+    Agregado diario de uso de IA
+
+    Una fila por (día, tipo de interacción, usuario). La actualiza
+    app.services.ai.interaction_logger en la misma transacción en que
+    inserta cada lote de ai_interactions, de modo que los reportes de
+    tokens, costo y latencia no recorren ai_interactions.
+
+    La latencia se guarda como histograma (cubetas de
+    app.services.ai.usage_stats.LATENCY_BUCKETS_MS) para poder calcular
+    percentiles combinando días, usuarios o tipos.
+    """
+
+    __tablename__ = 'ai_usage_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'interaction_type', 'user_id', name='uq_ai_usage_rollup'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    interaction_type = db.Column(db.String(100), nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False, default=0, index=True)  # 0 = sin usuario
+
+    # Contadores
+    calls = db.Column(db.Integer, default=0)
+    failures = db.Column(db.Integer, default=0)
+    exact_calls = db.Column(db.Integer, default=0)  # Llamadas con tokens reales
+    prompt_tokens = db.Column(db.BigInteger, default=0)
+    completion_tokens = db.Column(db.BigInteger, default=0)
+    total_tokens = db.Column(db.BigInteger, default=0)
+    cost_usd = db.Column(db.Numeric(14, 6), default=0)
+
+    # Latencia
+    latency_sum_ms = db.Column(db.BigInteger, default=0)
+    latency_max_ms = db.Column(db.Integer, default=0)
+    latency_histogram = db.Column(db.JSON)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AIUsageRollup {self.day} - {self.interaction_type} - {self.user_id}>'
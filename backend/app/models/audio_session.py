@@ -117,6 +117,23 @@ class AudioSession(db.Model):
         self.error_message = error_message
         self.processing_completed_at = datetime.utcnow()
     
+    def set_prosody_features(self, compact_prosody):
+        """
+        Guardar métricas prosódicas compactas en meta_info['prosody']
+        
+        Args:
+            compact_prosody (dict): Resultado de speech_analyzer.compact_features
+        """
+        # Reasignar el dict para que SQLAlchemy detecte el cambio en la columna JSON
+        meta_info = dict(self.meta_info or {})
+        meta_info['prosody'] = compact_prosody
+        self.meta_info = meta_info
+    
+    @property
+    def prosody_summary(self):
+        """Resumen prosódico del audio (velocidad, pausas, tono, muletillas)"""
+        return (self.meta_info or {}).get('prosody', {}).get('summary')
+    
     @property
     def duration_formatted(self):
         """Obtener duración formateada en MM:SS"""
@@ -205,7 +222,7 @@ class AudioSession(db.Model):
         words = text.split()
         sentences = [s.strip() for s in text.split('.') if s.strip()]
         
-        return {
+        statistics = {
             'total_words': len(words),
             'total_sentences': len(sentences),
             'avg_words_per_sentence': round(len(words) / len(sentences), 2) if sentences else 0,
@@ -213,6 +230,12 @@ class AudioSession(db.Model):
             'unique_words': len(set(word.lower() for word in words)),
             'vocabulary_richness': round(len(set(word.lower() for word in words)) / len(words) * 100, 2) if words else 0
         }
+        
+        # Métricas del habla calculadas sobre el audio (si existen)
+        if self.prosody_summary:
+            statistics['prosody'] = self.prosody_summary
+        
+        return statistics
     
     def to_dict(self, include_transcription=True):
         """
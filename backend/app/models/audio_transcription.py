@@ -5,6 +5,7 @@ Plataforma Integral de Rendimiento Estudiantil - Módulo 2
 
 from datetime import datetime
 from app import db
+from app.utils import text_scoring
 
 
 class AudioTranscription(db.Model):
@@ -95,41 +96,9 @@ class AudioTranscription(db.Model):
             self.sentiment_score = 0
             return
         
-        text_lower = self.text.lower()
-        
-        # Palabras positivas en español
-        positive_words = [
-            'excelente', 'bien', 'bueno', 'genial', 'perfecto', 'me gusta',
-            'interesante', 'increíble', 'fantástico', 'maravilloso', 'claro',
-            'entiendo', 'comprendo', 'sí', 'correcto', 'gracias'
-        ]
-        
-        # Palabras negativas en español
-        negative_words = [
-            'mal', 'malo', 'terrible', 'difícil', 'complicado', 'confuso',
-            'no entiendo', 'problema', 'error', 'fallo', 'aburrido',
-            'cansado', 'frustrado', 'no', 'nunca', 'imposible'
-        ]
-        
-        # Contar ocurrencias
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        # Calcular score
-        total = positive_count + negative_count
-        if total == 0:
-            self.sentiment = 'neutral'
-            self.sentiment_score = 0
-        else:
-            score = ((positive_count - negative_count) / total) * 100
-            self.sentiment_score = round(score, 2)
-            
-            if score > 30:
-                self.sentiment = 'positive'
-            elif score < -30:
-                self.sentiment = 'negative'
-            else:
-                self.sentiment = 'neutral'
+        result = text_scoring.score_sentiment(text_scoring.tokenize(self.text))
+        self.sentiment = result['sentiment']
+        self.sentiment_score = result['sentiment_score']
     
     def extract_keywords_basic(self, top_n=5):
         """
@@ -143,36 +112,26 @@ class AudioTranscription(db.Model):
             self.keywords = []
             return
         
-        # Palabras comunes a ignorar (stop words básicos en español)
-        stop_words = {
-            'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'ser', 'se', 'no',
-            'haber', 'por', 'con', 'su', 'para', 'como', 'estar', 'tener',
-            'le', 'lo', 'todo', 'pero', 'más', 'hacer', 'o', 'poder', 'decir',
-            'este', 'ir', 'otro', 'ese', 'la', 'si', 'me', 'ya', 'ver', 'porque',
-            'dar', 'cuando', 'él', 'muy', 'sin', 'vez', 'mucho', 'saber', 'qué',
-            'sobre', 'mi', 'alguno', 'mismo', 'yo', 'también', 'hasta', 'año',
-            'dos', 'querer', 'entre', 'así', 'primero', 'desde', 'grande', 'eso',
-            'ni', 'nos', 'llegar', 'pasar', 'tiempo', 'ella', 'sí', 'día', 'uno',
-            'bien', 'poco', 'deber', 'entonces', 'poner', 'cosa', 'tanto', 'hombre',
-            'parecer', 'nuestro', 'tan', 'donde', 'ahora', 'parte', 'después', 'vida',
-            'es', 'son', 'del', 'los', 'las', 'una', 'al'
-        }
-        
-        # Tokenizar y limpiar
-        words = self.text.lower().split()
-        words = [w.strip('.,;:!?()[]{}\"\'') for w in words]
+        self.keywords = text_scoring.extract_keywords(text_scoring.tokenize(self.text), top_n)
+    
+    @classmethod
+    def analyze_batch(cls, transcriptions, top_n=5):
+        """
+        Sentimiento y palabras clave para un lote de segmentos
         
-        # Filtrar palabras cortas y stop words
-        words = [w for w in words if len(w) > 3 and w not in stop_words]
+        Tokeniza cada segmento una sola vez para ambos análisis.
         
-        # Contar frecuencias
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
+        Args:
+            transcriptions (list): Instancias de AudioTranscription
+            top_n (int): Número de palabras clave por segmento
+        """
+        transcriptions = list(transcriptions)
+        results = text_scoring.score_texts((t.text or '' for t in transcriptions), top_n)
         
-        # Obtener top N palabras más frecuentes
-        top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:top_n]
-        self.keywords = [word for word, freq in top_words]
+        for transcription, result in zip(transcriptions, results):
+            transcription.sentiment = result['sentiment']
+            transcription.sentiment_score = result['sentiment_score']
+            transcription.keywords = result['keywords']
     
     @property
     def timestamp_formatted(self):
@@ -0,0 +1,71 @@
+"""
+app/models/background_job.py - Modelo de Trabajos en Segundo Plano
+Plataforma Integral de Rendimiento Estudiantil
+
+Persiste el estado de los trabajos ejecutados por app.services.job_runner
+(evaluación de escritura, mapas mentales, líneas de tiempo, sílabos y
+reportes) para que el cliente pueda consultarlos por ID.
+"""
+
+from datetime import datetime
+from app import db
+
+
+class BackgroundJob(db.Model):
+    """
+    Trabajo asíncrono
+
+    Estados: pending → running → completed | failed
+    """
+
+    __tablename__ = 'background_jobs'
+
+    # Identificadores
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    job_type = db.Column(db.String(50), nullable=False, index=True)
+    dedup_key = db.Column(db.String(64), index=True)  # Hash de las entradas (coalescencia)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='SET NULL'),
+        nullable=True,
+        index=True
+    )
+
+    # Estado
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+
+    # Resultado (cuerpo y código HTTP de la respuesta equivalente síncrona)
+    result = db.Column(db.JSON)
+    result_status = db.Column(db.Integer)
+    error_message = db.Column(db.Text)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self, include_result: bool = True):
+        """Convertir a diccionario"""
+        data = {
+            'job_id': self.id,
+            'job_type': self.job_type,
+            'user_id': self.user_id,
+            'status': self.status,
+            'error': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+        if include_result and self.is_finished:
+            data['result'] = self.result
+            data['result_status'] = self.result_status
+
+        return data
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} - {self.job_type} - {self.status}>'
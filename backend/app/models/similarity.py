@@ -0,0 +1,196 @@
+"""
+app/models/similarity.py - Índice de Similitud entre Entregas
+Plataforma Integral de Rendimiento Estudiantil - Módulo 1
+
+Índice MinHash/LSH persistente de los textos entregados (documentos y
+evaluaciones de escritura) para detectar reentregas casi idénticas y
+secciones reutilizadas (ver
+app.services.document_processing.similarity_detector):
+
+- submission_fingerprints: una fila por entrega con la firma MinHash del
+  texto completo.
+- submission_segments: ventanas de palabras de cada entrega con su firma.
+- submission_lsh_buckets: (banda, clave) → segmento. El índice por
+  (band, bucket) hace que buscar candidatos sea una consulta por claves,
+  sin recorrer las entregas guardadas.
+- submission_matches: coincidencias detectadas al indexar cada entrega
+  (similitud estimada, fracción del texto cubierta y pasajes).
+
+Fuentes: 'document' (Document.id) y 'writing_evaluation'
+(WritingEvaluation.id).
+"""
+
+from datetime import datetime
+from app import db
+
+
+SUBMISSION_SOURCES = ('document', 'writing_evaluation')
+
+# Relación entre dos entregas coincidentes
+MATCH_RELATIONS = ('revision', 'self_reuse', 'other_user')
+
+
+class SubmissionFingerprint(db.Model):
+    """
+    Entrega indexada con la firma MinHash de su texto completo
+    """
+
+    __tablename__ = 'submission_fingerprints'
+    __table_args__ = (
+        db.UniqueConstraint('source', 'source_id', name='uq_submission_fingerprint'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    source = db.Column(db.String(30), nullable=False)
+    source_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255))
+
+    # Contenido indexado (el hash evita reindexar el mismo texto)
+    text_hash = db.Column(db.String(64), nullable=False)
+    word_count = db.Column(db.Integer, default=0)
+    segment_count = db.Column(db.Integer, default=0)
+    signature = db.Column(db.LargeBinary, nullable=False)
+    # Parámetros de la firma (permutaciones, bandas, shingle, ventana)
+    params = db.Column(db.String(40), nullable=False)
+
+    submitted_at = db.Column(db.DateTime, nullable=False)
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'source': self.source,
+            'source_id': self.source_id,
+            'title': self.title,
+            'word_count': self.word_count,
+            'segment_count': self.segment_count,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'indexed_at': self.indexed_at.isoformat() if self.indexed_at else None
+        }
+
+    def __repr__(self):
+        return f'<SubmissionFingerprint {self.source}:{self.source_id}>'
+
+
+class SubmissionSegment(db.Model):
+    """
+    Ventana de palabras de una entrega con su firma MinHash
+    """
+
+    __tablename__ = 'submission_segments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('submission_fingerprints.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    position = db.Column(db.Integer, nullable=False)
+    start_word = db.Column(db.Integer, nullable=False)
+    end_word = db.Column(db.Integer, nullable=False)
+    signature = db.Column(db.LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f'<SubmissionSegment {self.fingerprint_id}#{self.position}>'
+
+
+class SubmissionBucket(db.Model):
+    """
+    Clave LSH de una banda de la firma de un segmento
+    """
+
+    __tablename__ = 'submission_lsh_buckets'
+
+    band = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    segment_id = db.Column(
+        db.Integer,
+        db.ForeignKey('submission_segments.id', ondelete='CASCADE'),
+        primary_key=True,
+        autoincrement=False
+    )
+    fingerprint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('submission_fingerprints.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+
+    def __repr__(self):
+        return f'<SubmissionBucket {self.band}:{self.bucket} → {self.segment_id}>'
+
+
+class SubmissionMatch(db.Model):
+    """
+    Coincidencia entre una entrega y otra indexada antes
+    """
+
+    __tablename__ = 'submission_matches'
+    __table_args__ = (
+        db.UniqueConstraint('fingerprint_id', 'matched_fingerprint_id', name='uq_submission_match'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('submission_fingerprints.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    matched_fingerprint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('submission_fingerprints.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    relation = db.Column(db.String(20), nullable=False)  # revision, self_reuse, other_user
+
+    # Similitud de Jaccard estimada de los textos completos (0-1)
+    similarity = db.Column(db.Float, default=0)
+    # Fracción de las palabras de la entrega dentro de pasajes coincidentes (0-1)
+    containment = db.Column(db.Float, default=0)
+    matched_segments = db.Column(db.Integer, default=0)
+    # [{'text', 'matched_text', 'words', 'start_word', 'matched_start_word'}]
+    passages = db.Column(db.JSON)
+
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    submission = db.relationship('SubmissionFingerprint', foreign_keys=[fingerprint_id], lazy='joined')
+    matched = db.relationship('SubmissionFingerprint', foreign_keys=[matched_fingerprint_id], lazy='joined')
+
+    def to_dict(self, full=False):
+        """
+        Convertir a diccionario
+
+        Args:
+            full (bool): Incluir la entrega coincidente y sus pasajes también
+                si es de otro estudiante. Sin full, una coincidencia
+                'other_user' solo muestra la relación y los scores: el
+                estudiante no ve el archivo, el usuario ni el texto ajeno.
+        """
+        if self.relation == 'other_user' and not full:
+            return {
+                'relation': self.relation,
+                'similarity': round(self.similarity or 0, 3),
+                'containment': round(self.containment or 0, 3)
+            }
+        return {
+            'matched': self.matched.to_dict() if self.matched else None,
+            'relation': self.relation,
+            'similarity': round(self.similarity or 0, 3),
+            'containment': round(self.containment or 0, 3),
+            'matched_segments': self.matched_segments,
+            'passages': self.passages or [],
+            'detected_at': self.detected_at.isoformat() if self.detected_at else None
+        }
+
+    def __repr__(self):
+        return f'<SubmissionMatch {self.fingerprint_id} ~ {self.matched_fingerprint_id}>'
@@ -5,6 +5,7 @@ Plataforma Integral de Rendimiento Estudiantil - Módulo 1
 
 from datetime import datetime
 from app import db
+from app.utils.text_metrics import compute_metrics
 
 
 class TextAnalysis(db.Model):
@@ -108,39 +109,60 @@ class TextAnalysis(db.Model):
         """
         Establecer métricas básicas a partir del texto
         
+        Usa el mismo motor de una pasada que WritingEvaluator, de modo que
+        ambas métricas son comparables.
+        
         Args:
-            text (str): Texto completo del documento
+            text (str | iterable): Texto completo del documento o generador
+                de sus fragmentos
         """
         if not text:
             return
         
-        # Contar palabras
-        words = text.split()
-        self.total_words = len(words)
-        self.unique_words = len(set(word.lower() for word in words))
+        self.apply_metrics(compute_metrics(text))
+    
+    def apply_metrics(self, metrics):
+        """
+        Establecer métricas básicas ya calculadas (ver app.utils.text_metrics)
         
-        # Calcular longitud promedio de palabra
-        if words:
-            self.avg_word_length = round(
-                sum(len(word) for word in words) / len(words), 2
-            )
+        Args:
+            metrics (dict): Resultado de compute_metrics
+        """
+        self.total_words = metrics['word_count']
+        self.unique_words = metrics['vocabulary_size']
+        self.avg_word_length = metrics['avg_word_length']
+        self.sentence_count = metrics['sentence_count']
+        self.avg_sentence_length = metrics['avg_words_per_sentence']
+        self.paragraph_count = metrics['paragraph_count']
+        self.readability_score = metrics['readability_score']
         
-        # Contar oraciones (aproximación simple)
-        sentences = [s.strip() for s in text.split('.') if s.strip()]
-        self.sentence_count = len(sentences)
+        # Calcular riqueza de vocabulario
+        self.calculate_vocabulary_richness()
+    
+    def apply_ai_analysis(self, analysis):
+        """
+        Establecer los campos del análisis semántico con IA
         
-        # Longitud promedio de oración
-        if sentences:
-            self.avg_sentence_length = round(
-                sum(len(s.split()) for s in sentences) / len(sentences), 2
-            )
+        La legibilidad se conserva de las métricas locales (es determinista
+        y comparable con las evaluaciones de escritura).
         
-        # Contar párrafos (aproximación)
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        self.paragraph_count = len(paragraphs)
+        Args:
+            analysis (dict): JSON del análisis (esquema 'text_analysis')
+        """
+        analysis = analysis or {}
+        terms = analysis.get('technical_terms') or []
         
-        # Calcular riqueza de vocabulario
-        self.calculate_vocabulary_richness()
+        self.writing_quality_score = analysis.get('writing_quality_score')
+        self.academic_level_assessment = analysis.get('academic_level')
+        self.main_topics = analysis.get('main_topics') or []
+        self.key_concepts = analysis.get('key_concepts') or []
+        self.technical_terms = terms
+        self.technical_terms_count = len(terms)
+        self.coherence_score = analysis.get('coherence_score')
+        self.cohesion_score = analysis.get('cohesion_score')
+        self.sentence_complexity_score = analysis.get('sentence_complexity_score')
+        self.ai_analysis_summary = analysis.get('summary')
+        self.ai_recommendations = '\n'.join(str(item) for item in analysis.get('recommendations') or []) or None
     
     def compare_with_previous(self, previous_analysis):
         """
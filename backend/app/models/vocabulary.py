@@ -0,0 +1,162 @@
+"""
+app/models/vocabulary.py - Índice de Vocabulario por Estudiante
+Plataforma Integral de Rendimiento Estudiantil - Módulo 1
+
+Índice invertido incremental del vocabulario de los documentos de cada
+estudiante (ver app.services.document_processing.vocabulary_analyzer):
+
+- vocabulary_terms: un término por (usuario, tipo, término) con la fecha y
+  el documento en que apareció por primera vez, número de documentos y
+  frecuencia total.
+- vocabulary_postings: término → documentos (con la frecuencia en cada uno).
+- vocabulary_snapshots: una fila por documento indexado con los términos
+  nuevos y el total acumulado; es la curva de crecimiento ya calculada.
+
+Tipos de término: 'word' (palabras del texto), 'technical' (términos
+técnicos detectados por la IA) y 'concept' (conceptos clave).
+"""
+
+from datetime import datetime
+from app import db
+
+
+TERM_KINDS = ('word', 'technical', 'concept')
+
+
+class VocabularyTerm(db.Model):
+    """
+    Término del vocabulario de un estudiante
+    """
+
+    __tablename__ = 'vocabulary_terms'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'kind', 'term', name='uq_vocabulary_term'),
+        db.Index('ix_vocabulary_user_term', 'user_id', 'term'),
+        db.Index('ix_vocabulary_user_first_document', 'user_id', 'first_document_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    kind = db.Column(db.String(20), nullable=False, default='word')
+    # Normalizado (minúsculas); binario para distinguir acentos en la clave única
+    term = db.Column(db.String(100, collation='utf8mb4_bin'), nullable=False)
+
+    # Primera aparición
+    first_seen_at = db.Column(db.DateTime, nullable=False)
+    first_document_id = db.Column(
+        db.Integer,
+        db.ForeignKey('documents.id', ondelete='SET NULL')
+    )
+    last_seen_at = db.Column(db.DateTime, nullable=False)
+
+    # Agregados
+    document_count = db.Column(db.Integer, nullable=False, default=0)
+    frequency = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'term': self.term,
+            'kind': self.kind,
+            'first_seen_at': self.first_seen_at.isoformat() if self.first_seen_at else None,
+            'first_document_id': self.first_document_id,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None,
+            'document_count': self.document_count,
+            'frequency': self.frequency
+        }
+
+    def __repr__(self):
+        return f'<VocabularyTerm {self.user_id} {self.kind}:{self.term}>'
+
+
+class VocabularyPosting(db.Model):
+    """
+    Aparición de un término en un documento
+    """
+
+    __tablename__ = 'vocabulary_postings'
+    __table_args__ = (
+        db.UniqueConstraint('term_id', 'document_id', name='uq_vocabulary_posting'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    term_id = db.Column(
+        db.Integer,
+        db.ForeignKey('vocabulary_terms.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    document_id = db.Column(
+        db.Integer,
+        db.ForeignKey('documents.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    frequency = db.Column(db.Integer, nullable=False, default=1)
+    seen_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<VocabularyPosting term={self.term_id} document={self.document_id}>'
+
+
+class VocabularySnapshot(db.Model):
+    """
+    Estado del vocabulario tras indexar un documento (punto de la curva de
+    crecimiento)
+    """
+
+    __tablename__ = 'vocabulary_snapshots'
+    __table_args__ = (
+        db.Index('ix_vocabulary_snapshot_user_date', 'user_id', 'document_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    document_id = db.Column(
+        db.Integer,
+        db.ForeignKey('documents.id', ondelete='CASCADE'),
+        nullable=False,
+        unique=True
+    )
+    document_date = db.Column(db.DateTime, nullable=False)
+
+    # Palabras del documento (tokens y distintas)
+    document_words = db.Column(db.Integer, default=0)
+    document_unique_words = db.Column(db.Integer, default=0)
+
+    # Términos nuevos en este documento y total acumulado del estudiante
+    new_words = db.Column(db.Integer, default=0)
+    total_words = db.Column(db.Integer, default=0)
+    new_technical = db.Column(db.Integer, default=0)
+    total_technical = db.Column(db.Integer, default=0)
+    new_concepts = db.Column(db.Integer, default=0)
+    total_concepts = db.Column(db.Integer, default=0)
+
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'document_id': self.document_id,
+            'document_date': self.document_date.isoformat() if self.document_date else None,
+            'document_words': self.document_words,
+            'document_unique_words': self.document_unique_words,
+            'new_words': self.new_words,
+            'total_words': self.total_words,
+            'new_technical': self.new_technical,
+            'total_technical': self.total_technical,
+            'new_concepts': self.new_concepts,
+            'total_concepts': self.total_concepts,
+            'indexed_at': self.indexed_at.isoformat() if self.indexed_at else None
+        }
+
+    def __repr__(self):
+        return f'<VocabularySnapshot {self.user_id} document={self.document_id}>'
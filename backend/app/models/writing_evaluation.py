@@ -8,7 +8,7 @@ incluyendo scores, métricas, feedback de IA y archivos asociados.
 
 from app import db
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 
 
@@ -24,6 +24,10 @@ class WritingEvaluation(db.Model):
     - Archivos originales
     """
     __tablename__ = 'writing_evaluations'
+    __table_args__ = (
+        # Historial y tendencias por curso (ver app.services.academic.writing_analytics)
+        Index('ix_writing_evaluations_user_course_date', 'user_id', 'course_id', 'evaluated_at'),
+    )
     
     # Identificación
     id = Column(Integer, primary_key=True)
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from app import db
 from app.models.academic import AcademicCourse, AcademicTask
 from app.models.syllabus import SyllabusAnalysis
@@ -9,6 +9,10 @@ from io import BytesIO
 import json
 from datetime import datetime
 
+from app.routes.job_routes import dispatch_job
+from app.services.job_runner import job_runner
+from app.utils.helpers import sse_event, sse_response
+
 # Importaciones de servicios de IA - ACTIVAS CON TODAS LAS DEPENDENCIAS INSTALADAS
 try:
     from app.services.academic.syllabus_processor import SyllabusProcessor
@@ -176,6 +180,12 @@ def delete_course(course_id):
 
 # --- 3. NUEVAS HERRAMIENTAS IA (Mapas y Resúmenes) ---
 
+def _mindmap_job(text, context):
+    """Genera el mapa mental (síncrono o en segundo plano)"""
+    result = StudyToolsService.generate_mind_map(text, context)
+    print(f"✅ Mapa mental generado exitosamente")
+    return {"mindmap": result}, 200
+
 @academic_bp.route('/tools/mindmap', methods=['POST'])
 def create_mindmap():
     if not STUDY_TOOLS_AVAILABLE:
@@ -190,15 +200,52 @@ def create_mindmap():
 
     try:
         print(f"📊 Generando mapa mental. Texto: {text[:100]}... Contexto: {context}")
-        result = StudyToolsService.generate_mind_map(text, context)
-        print(f"✅ Mapa mental generado exitosamente")
-        return jsonify({"mindmap": result})
+        return dispatch_job(
+            'mindmap',
+            _mindmap_job,
+            {'text': text, 'context': context},
+            user_id=data.get('user_id'),
+            dedup_key=job_runner.make_key('mindmap', text, context)
+        )
     except Exception as e:
         print(f"❌ Error generando mapa mental: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": f"Error interno en la IA: {str(e)}"}), 500
 
+@academic_bp.route('/tools/mindmap/stream', methods=['POST'])
+def stream_mindmap():
+    """
+    Genera el mapa mental en stream (Server-Sent Events)
+    
+    Eventos:
+    - field: {"key", "value"} por cada campo de primer nivel completado
+    - done: {"mindmap"} con el mapa completo
+    - error: {"error"}
+    """
+    if not STUDY_TOOLS_AVAILABLE:
+        return jsonify({"error": "Servicio de herramientas de estudio no disponible"}), 503
+    
+    data = request.json or {}
+    text = data.get('text')
+    context = data.get('context', 'General')
+    
+    if not text:
+        return jsonify({"error": "El texto es obligatorio"}), 400
+    
+    def generate():
+        try:
+            for event, payload in StudyToolsService.generate_mind_map_stream(text, context):
+                if event == 'mindmap':
+                    yield sse_event('done', {"mindmap": payload})
+                else:
+                    yield sse_event(event, payload)
+        except Exception as e:
+            print(f"❌ Error generando mapa mental en stream: {e}")
+            yield sse_event('error', {"error": str(e)})
+    
+    return sse_response(generate())
+
 @academic_bp.route('/tools/summary', methods=['POST'])
 def create_summary():
     if not STUDY_TOOLS_AVAILABLE:
@@ -222,6 +269,64 @@ def create_summary():
         traceback.print_exc()
         return jsonify({"error": f"Error interno en la IA: {str(e)}"}), 500
 
+def _timeline_job(topic, timeline_type, user_id, project_id, course_id, save_timeline):
+    """Genera la línea de tiempo con IA y opcionalmente la guarda (síncrono o en segundo plano)"""
+    # Generar la línea de tiempo con IA
+    result = StudyToolsService.generate_timeline(topic, timeline_type)
+    
+    # Si se debe guardar y se proporciona user_id
+    if save_timeline and user_id:
+        # Preparar los pasos en el formato correcto
+        steps = []
+        if isinstance(result, dict) and 'steps' in result:
+            steps = result['steps']
+        elif isinstance(result, list):
+            steps = result
+        else:
+            # Intentar parsear si es string
+            try:
+                parsed = json.loads(result) if isinstance(result, str) else result
+                steps = parsed.get('steps', parsed) if isinstance(parsed, dict) else parsed
+            except:
+                steps = []
+        
+        # Asegurar que cada paso tenga 'completed': false
+        for step in steps:
+            if 'completed' not in step:
+                step['completed'] = False
+        
+        # Determinar descripción según el contexto
+        if course_id:
+            description = f"Línea de tiempo generada para el curso"
+        elif project_id:
+            description = f"Línea de tiempo generada para el proyecto"
+        else:
+            description = f"Línea de tiempo libre sobre {topic}"
+        
+        # Crear el registro en la BD (course_id ahora puede ser None)
+        new_timeline = Timeline(
+            user_id=user_id,
+            project_id=project_id,
+            course_id=course_id,  # Puede ser None - sin curso asociado
+            title=topic,
+            description=description,
+            timeline_type=timeline_type,
+            course_topic=topic if not course_id else None,  # Guardar tema si no hay curso
+            steps_json=json.dumps(steps)
+        )
+        
+        db.session.add(new_timeline)
+        db.session.commit()
+        
+        return {
+            "timeline": result,
+            "saved": True,
+            "timeline_id": new_timeline.id,
+            "timeline_data": new_timeline.to_dict()
+        }, 200
+    
+    return {"timeline": result, "saved": False}, 200
+
 @academic_bp.route('/tools/timeline', methods=['POST'])
 def create_timeline():
     """Genera una línea de tiempo para un proyecto/curso y opcionalmente la guarda
@@ -233,6 +338,7 @@ def create_timeline():
     - project_id: ID del proyecto (opcional)
     - course_id: ID del curso (opcional - permite crear sin curso)
     - save: Si debe guardarse en BD (default: False)
+    - async: Ejecutar en segundo plano y devolver job_id (default: False)
     """
     if not STUDY_TOOLS_AVAILABLE:
         return jsonify({"error": "Servicio de herramientas de estudio no disponible"}), 503
@@ -249,61 +355,20 @@ def create_timeline():
         return jsonify({"error": "El tema es obligatorio"}), 400
     
     try:
-        # Generar la línea de tiempo con IA
-        result = StudyToolsService.generate_timeline(topic, timeline_type)
-        
-        # Si se debe guardar y se proporciona user_id
-        if save_timeline and user_id:
-            # Preparar los pasos en el formato correcto
-            steps = []
-            if isinstance(result, dict) and 'steps' in result:
-                steps = result['steps']
-            elif isinstance(result, list):
-                steps = result
-            else:
-                # Intentar parsear si es string
-                try:
-                    parsed = json.loads(result) if isinstance(result, str) else result
-                    steps = parsed.get('steps', parsed) if isinstance(parsed, dict) else parsed
-                except:
-                    steps = []
-            
-            # Asegurar que cada paso tenga 'completed': false
-            for step in steps:
-                if 'completed' not in step:
-                    step['completed'] = False
-            
-            # Determinar descripción según el contexto
-            if course_id:
-                description = f"Línea de tiempo generada para el curso"
-            elif project_id:
-                description = f"Línea de tiempo generada para el proyecto"
-            else:
-                description = f"Línea de tiempo libre sobre {topic}"
-            
-            # Crear el registro en la BD (course_id ahora puede ser None)
-            new_timeline = Timeline(
-                user_id=user_id,
-                project_id=project_id,
-                course_id=course_id,  # Puede ser None - sin curso asociado
-                title=topic,
-                description=description,
-                timeline_type=timeline_type,
-                course_topic=topic if not course_id else None,  # Guardar tema si no hay curso
-                steps_json=json.dumps(steps)
-            )
-            
-            db.session.add(new_timeline)
-            db.session.commit()
-            
-            return jsonify({
-                "timeline": result,
-                "saved": True,
-                "timeline_id": new_timeline.id,
-                "timeline_data": new_timeline.to_dict()
-            })
-        
-        return jsonify({"timeline": result, "saved": False})
+        return dispatch_job(
+            'timeline',
+            _timeline_job,
+            {
+                'topic': topic,
+                'timeline_type': timeline_type,
+                'user_id': user_id,
+                'project_id': project_id,
+                'course_id': course_id,
+                'save_timeline': save_timeline
+            },
+            user_id=user_id,
+            dedup_key=job_runner.make_key('timeline', topic, timeline_type, user_id, project_id, course_id, save_timeline)
+        )
         
     except Exception as e:
         db.session.rollback()
@@ -679,11 +744,78 @@ def delete_syllabus(syllabus_id):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+def _save_syllabus_upload(file, course_id):
+    """Guarda el PDF del sílabo y devuelve su ruta y nombre"""
+    if FILE_HANDLER_AVAILABLE:
+        upload_folder = FileHandler.get_upload_path('syllabi')
+        saved_info = FileHandler.save_file(file, upload_folder, prefix=f"syllabus_{course_id}")
+        file_path = saved_info['filepath']
+        file_name = saved_info['filename']
+    else:
+        # Fallback manual
+        upload_folder = os.path.join('uploads', 'syllabi')
+        os.makedirs(upload_folder, exist_ok=True)
+        file_name = f"syllabus_{course_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        file_path = os.path.join(upload_folder, file_name)
+        file.save(file_path)
+    
+    return {'file_path': file_path, 'file_name': file_name}
+
+def _syllabus_job(course_id, user_id, file_path, file_name):
+    """Procesa el sílabo con IA y guarda el análisis (síncrono o en segundo plano)"""
+    # Intentar procesar con IA si está disponible
+    analysis_result = {}
+    topics = []
+    course_info = {}
+    tasks_created = 0
+    
+    if SYLLABUS_PROCESSOR_AVAILABLE:
+        try:
+            result = SyllabusProcessor.process_syllabus(user_id, course_id, file_path)
+            analysis_result = result.get('syllabus_analysis', {})
+            topics = analysis_result.get('topics', [])
+            course_info = analysis_result.get('course_info', {})
+            tasks_created = result.get('tasks_created', 0)
+        except Exception as e:
+            print(f"Error procesando con IA: {e}")
+            # Continuar sin análisis de IA
+    
+    # Crear registro en la BD
+    new_analysis = SyllabusAnalysis(
+        user_id=int(user_id),
+        course_id=course_id,
+        file_path=file_path,
+        file_name=file_name
+    )
+    
+    # Guardar información si fue analizada
+    if course_info:
+        new_analysis.set_course_info(course_info)
+    if topics:
+        # Asegurar que cada tema tenga el campo 'completed'
+        for topic in topics:
+            if 'completed' not in topic:
+                topic['completed'] = False
+        new_analysis.set_topics(topics)
+    
+    db.session.add(new_analysis)
+    db.session.commit()
+    
+    return {
+        "message": "Sílabo cargado exitosamente",
+        "syllabus_id": new_analysis.id,
+        "syllabus_analysis": analysis_result,
+        "tasks_created": tasks_created,
+        "ai_processed": SYLLABUS_PROCESSOR_AVAILABLE
+    }, 201
+
 @academic_bp.route('/course/<int:course_id>/upload-syllabus', methods=['POST'])
 def upload_syllabus_improved(course_id):
     """
     Versión mejorada de upload-syllabus que siempre guarda el análisis en la BD
     Aunque SyllabusProcessor no esté disponible, guarda información básica
+    
+    Con `async=true` responde 202 con un job_id (ver /api/jobs/<job_id>)
     """
     if 'file' not in request.files:
         return jsonify({"error": "No se envió ningún archivo"}), 400
@@ -695,66 +827,15 @@ def upload_syllabus_improved(course_id):
         return jsonify({"error": "user_id es requerido"}), 400
     
     try:
-        # Guardar archivo
-        if FILE_HANDLER_AVAILABLE:
-            upload_folder = FileHandler.get_upload_path('syllabi')
-            saved_info = FileHandler.save_file(file, upload_folder, prefix=f"syllabus_{course_id}")
-            file_path = saved_info['filepath']
-            file_name = saved_info['filename']
-        else:
-            # Fallback manual
-            upload_folder = os.path.join('uploads', 'syllabi')
-            os.makedirs(upload_folder, exist_ok=True)
-            file_name = f"syllabus_{course_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            file_path = os.path.join(upload_folder, file_name)
-            file.save(file_path)
-        
-        # Intentar procesar con IA si está disponible
-        analysis_result = {}
-        topics = []
-        course_info = {}
-        tasks_created = 0
-        
-        if SYLLABUS_PROCESSOR_AVAILABLE:
-            try:
-                result = SyllabusProcessor.process_syllabus(user_id, course_id, file_path)
-                analysis_result = result.get('syllabus_analysis', {})
-                topics = analysis_result.get('topics', [])
-                course_info = analysis_result.get('course_info', {})
-                tasks_created = result.get('tasks_created', 0)
-            except Exception as e:
-                print(f"Error procesando con IA: {e}")
-                # Continuar sin análisis de IA
-        
-        # Crear registro en la BD
-        new_analysis = SyllabusAnalysis(
+        return dispatch_job(
+            'syllabus',
+            _syllabus_job,
+            {'course_id': course_id, 'user_id': user_id},
             user_id=int(user_id),
-            course_id=course_id,
-            file_path=file_path,
-            file_name=file_name
+            dedup_key=job_runner.make_key('syllabus', course_id, user_id, job_runner.hash_upload(file)),
+            prepare=lambda: _save_syllabus_upload(file, course_id)
         )
         
-        # Guardar información si fue analizada
-        if course_info:
-            new_analysis.set_course_info(course_info)
-        if topics:
-            # Asegurar que cada tema tenga el campo 'completed'
-            for topic in topics:
-                if 'completed' not in topic:
-                    topic['completed'] = False
-            new_analysis.set_topics(topics)
-        
-        db.session.add(new_analysis)
-        db.session.commit()
-        
-        return jsonify({
-            "message": "Sílabo cargado exitosamente",
-            "syllabus_id": new_analysis.id,
-            "syllabus_analysis": analysis_result,
-            "tasks_created": tasks_created,
-            "ai_processed": SYLLABUS_PROCESSOR_AVAILABLE
-        }), 201
-        
     except Exception as e:
         db.session.rollback()
         print(f"Error en upload_syllabus_improved: {e}")
@@ -772,6 +853,173 @@ except Exception as e:
     WRITING_EVALUATOR_AVAILABLE = False
 
 
+def _save_writing_uploads(current_file, previous_file, allowed_extensions):
+    """Guarda el documento actual (y el anterior, si es válido) para evaluarlos"""
+    # Crear carpeta para guardar archivos
+    upload_dir = os.path.join('uploads', 'writing')
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    # Generar nombres únicos
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    current_filename = f"current_{timestamp}_{current_file.filename}"
+    current_path = os.path.join(upload_dir, current_filename)
+    
+    # Guardar archivo actual
+    current_file.save(current_path)
+    print(f"💾 Guardado: {current_path}")
+    
+    # Guardar archivo anterior si existe
+    previous_path = None
+    if previous_file and previous_file.filename != '':
+        previous_ext = os.path.splitext(previous_file.filename)[1].lower()
+        
+        if previous_ext in allowed_extensions:
+            previous_filename = f"previous_{timestamp}_{previous_file.filename}"
+            previous_path = os.path.join(upload_dir, previous_filename)
+            previous_file.save(previous_path)
+            print(f"💾 Guardado (anterior): {previous_path}")
+        else:
+            print(f"⚠️  Archivo anterior ignorado (formato inválido)")
+    
+    return {
+        'current_path': current_path,
+        'previous_path': previous_path,
+        'timestamp': timestamp
+    }
+
+def _save_writing_evaluation(report, file_name, current_path, previous_path, user_id, course_id):
+    """Guarda el reporte de escritura en el historial; devuelve el ID o None"""
+    evaluation_id = None
+    try:
+        from app.models.writing_evaluation import WritingEvaluation
+        
+        evaluation = WritingEvaluation(
+            user_id=user_id,
+            course_id=course_id,
+            file_name=file_name,
+            file_path=current_path,
+            previous_file_path=previous_path,
+            
+            # Métricas del documento
+            word_count=report['metrics']['current']['word_count'],
+            sentence_count=report['metrics']['current']['sentence_count'],
+            paragraph_count=report['metrics']['current']['paragraph_count'],
+            vocabulary_size=report['metrics']['current']['vocabulary_size'],
+            readability_score=report['metrics']['current']['readability_score'],
+            
+            # Scores de evaluación
+            overall_score=report['evaluation']['overall_score'],
+            grammar_score=report['evaluation']['grammar_score'],
+            coherence_score=report['evaluation']['coherence_score'],
+            vocabulary_score=report['evaluation']['vocabulary_score'],
+            structure_score=report['evaluation']['structure_score'],
+            
+            # Análisis adicional
+            tone_analysis=report['evaluation'].get('tone_analysis'),
+            formality_score=report['evaluation'].get('formality_score'),
+            complexity_level=report['evaluation'].get('complexity_level'),
+            
+            # Comparación
+            improvement_percentage=report['evaluation'].get('improvement_percentage'),
+            improvements_made=report['evaluation'].get('improvements_made'),
+            
+            # Feedback
+            strengths=report['evaluation']['strengths'],
+            weaknesses=report['evaluation']['weaknesses'],
+            recommendations=report['evaluation']['recommendations'],
+            specific_errors=report['evaluation'].get('specific_errors'),
+            suggestions=report['evaluation'].get('suggestions'),
+            summary=report['evaluation']['summary'],
+            
+            # Métricas adicionales
+            additional_metrics=report['metrics']
+        )
+        
+        db.session.add(evaluation)
+        db.session.commit()
+        evaluation_id = evaluation.id
+        
+        print(f"✅ Evaluación guardada en BD con ID: {evaluation_id}")
+        
+    except Exception as e:
+        print(f"⚠️  Error guardando en BD: {e}")
+        db.session.rollback()
+    
+    return evaluation_id
+
+def _check_writing_similarity(evaluation_id, current_path, user_id, file_name):
+    """Busca entregas anteriores parecidas e indexa la evaluación guardada (o None)"""
+    try:
+        from app.services.document_processing.similarity_detector import similarity_detector
+        
+        result = similarity_detector.check_submission(
+            'writing_evaluation',
+            evaluation_id,
+            user_id,
+            WritingEvaluator.extract_text(current_path),
+            title=file_name
+        )
+        if not result['success']:
+            return None
+        return {
+            'matches': result['matches'],
+            'max_similarity': result['max_similarity'],
+            'max_containment': result['max_containment'],
+            'near_duplicate': result['near_duplicate']
+        }
+    except Exception as e:
+        print(f"⚠️  Error revisando similitud: {e}")
+        return None
+
+def _find_writing_base(user_id, file_name, course_id, previous_evaluation_id, incremental):
+    """Evaluación guardada de la versión anterior para reevaluar solo los cambios (o None)"""
+    if not incremental or not user_id:
+        return None
+    try:
+        from app.services.academic.writing_revisions import find_base_evaluation
+        return find_base_evaluation(user_id, file_name, course_id, previous_evaluation_id)
+    except Exception as e:
+        print(f"⚠️  No se pudo cargar la evaluación anterior: {e}")
+        return None
+
+def _evaluate_writing_job(current_path, previous_path, timestamp, file_name, user_id, course_id, save_to_history,
+                          previous_evaluation_id=None, incremental=True):
+    """Genera el reporte de escritura y lo guarda en el historial (síncrono o en segundo plano)"""
+    # Generar reporte
+    metadata = {
+        'user_id': user_id,
+        'course_id': course_id,
+        'timestamp': timestamp
+    }
+    
+    report = WritingEvaluator.generate_report(
+        current_file=current_path,
+        previous_file=previous_path,
+        metadata=metadata,
+        base_evaluation=_find_writing_base(user_id, file_name, course_id, previous_evaluation_id, incremental)
+    )
+    
+    # Guardar en base de datos si se solicita
+    evaluation_id = None
+    similarity = None
+    if save_to_history and user_id:
+        evaluation_id = _save_writing_evaluation(
+            report, file_name, current_path, previous_path, user_id, course_id
+        )
+        if evaluation_id:
+            similarity = _check_writing_similarity(evaluation_id, current_path, user_id, file_name)
+    
+    print(f"✅ Reporte generado exitosamente")
+    
+    return {
+        "message": "Evaluación completada",
+        "report": report,
+        "evaluation_id": evaluation_id,
+        "saved_to_history": save_to_history and evaluation_id is not None,
+        "similarity": similarity
+    }, 200
+
+
 @academic_bp.route('/tools/evaluate-writing', methods=['POST'])
 def evaluate_writing():
     """
@@ -783,10 +1031,17 @@ def evaluate_writing():
     - user_id: ID del usuario
     - course_id: ID del curso (opcional)
     - save_to_history: Si guardar en historial (default: true)
+    - async: Ejecutar en segundo plano (default: false)
+    - previous_evaluation_id: Evaluación guardada de la versión anterior (opcional;
+      por defecto la última del mismo archivo y curso)
+    - incremental: Reevaluar solo los párrafos que cambiaron (default: true)
     
     Retorna:
     - Reporte con métricas, scores y recomendaciones
+    - report.revision: párrafos reutilizados/reevaluados (si fue incremental)
     - ID de evaluación guardada
+    - similarity: entregas anteriores parecidas (de otros estudiantes solo relación y scores)
+    - Con async=true: 202 con job_id (ver /api/jobs/<job_id>)
     """
     try:
         print("=" * 80)
@@ -823,115 +1078,36 @@ def evaluate_writing():
         user_id = request.form.get('user_id', type=int)
         course_id = request.form.get('course_id', type=int)
         save_to_history = request.form.get('save_to_history', 'true').lower() == 'true'
+        previous_evaluation_id = request.form.get('previous_evaluation_id', type=int)
+        incremental = request.form.get('incremental', 'true').lower() == 'true'
         
         print(f"👤 Usuario: {user_id}, 📚 Curso: {course_id}, 💾 Guardar: {save_to_history}")
         
-        # Crear carpeta para guardar archivos
-        upload_dir = os.path.join('uploads', 'writing')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generar nombres únicos
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        current_filename = f"current_{timestamp}_{current_file.filename}"
-        current_path = os.path.join(upload_dir, current_filename)
-        
-        # Guardar archivo actual
-        current_file.save(current_path)
-        print(f"💾 Guardado: {current_path}")
-        
-        # Guardar archivo anterior si existe
-        previous_path = None
-        if previous_file and previous_file.filename != '':
-            previous_ext = os.path.splitext(previous_file.filename)[1].lower()
-            
-            if previous_ext in allowed_extensions:
-                previous_filename = f"previous_{timestamp}_{previous_file.filename}"
-                previous_path = os.path.join(upload_dir, previous_filename)
-                previous_file.save(previous_path)
-                print(f"💾 Guardado (anterior): {previous_path}")
-            else:
-                print(f"⚠️  Archivo anterior ignorado (formato inválido)")
-        
-        # Generar reporte
-        metadata = {
-            'user_id': user_id,
-            'course_id': course_id,
-            'timestamp': timestamp
-        }
-        
-        report = WritingEvaluator.generate_report(
-            current_file=current_path,
-            previous_file=previous_path,
-            metadata=metadata
+        return dispatch_job(
+            'evaluate_writing',
+            _evaluate_writing_job,
+            {
+                'file_name': current_file.filename,
+                'user_id': user_id,
+                'course_id': course_id,
+                'save_to_history': save_to_history,
+                'previous_evaluation_id': previous_evaluation_id,
+                'incremental': incremental
+            },
+            user_id=user_id,
+            dedup_key=job_runner.make_key(
+                'evaluate_writing',
+                job_runner.hash_upload(current_file),
+                job_runner.hash_upload(previous_file),
+                user_id,
+                course_id,
+                save_to_history,
+                previous_evaluation_id,
+                incremental
+            ),
+            prepare=lambda: _save_writing_uploads(current_file, previous_file, allowed_extensions)
         )
         
-        # Guardar en base de datos si se solicita
-        evaluation_id = None
-        if save_to_history and user_id:
-            try:
-                from app.models.writing_evaluation import WritingEvaluation
-                
-                evaluation = WritingEvaluation(
-                    user_id=user_id,
-                    course_id=course_id,
-                    file_name=current_file.filename,
-                    file_path=current_path,
-                    previous_file_path=previous_path,
-                    
-                    # Métricas del documento
-                    word_count=report['metrics']['current']['word_count'],
-                    sentence_count=report['metrics']['current']['sentence_count'],
-                    paragraph_count=report['metrics']['current']['paragraph_count'],
-                    vocabulary_size=report['metrics']['current']['vocabulary_size'],
-                    readability_score=report['metrics']['current']['readability_score'],
-                    
-                    # Scores de evaluación
-                    overall_score=report['evaluation']['overall_score'],
-                    grammar_score=report['evaluation']['grammar_score'],
-                    coherence_score=report['evaluation']['coherence_score'],
-                    vocabulary_score=report['evaluation']['vocabulary_score'],
-                    structure_score=report['evaluation']['structure_score'],
-                    
-                    # Análisis adicional
-                    tone_analysis=report['evaluation'].get('tone_analysis'),
-                    formality_score=report['evaluation'].get('formality_score'),
-                    complexity_level=report['evaluation'].get('complexity_level'),
-                    
-                    # Comparación
-                    improvement_percentage=report['evaluation'].get('improvement_percentage'),
-                    improvements_made=report['evaluation'].get('improvements_made'),
-                    
-                    # Feedback
-                    strengths=report['evaluation']['strengths'],
-                    weaknesses=report['evaluation']['weaknesses'],
-                    recommendations=report['evaluation']['recommendations'],
-                    specific_errors=report['evaluation'].get('specific_errors'),
-                    suggestions=report['evaluation'].get('suggestions'),
-                    summary=report['evaluation']['summary'],
-                    
-                    # Métricas adicionales
-                    additional_metrics=report['metrics']
-                )
-                
-                db.session.add(evaluation)
-                db.session.commit()
-                evaluation_id = evaluation.id
-                
-                print(f"✅ Evaluación guardada en BD con ID: {evaluation_id}")
-                
-            except Exception as e:
-                print(f"⚠️  Error guardando en BD: {e}")
-                db.session.rollback()
-        
-        print(f"✅ Reporte generado exitosamente")
-        
-        return jsonify({
-            "message": "Evaluación completada",
-            "report": report,
-            "evaluation_id": evaluation_id,
-            "saved_to_history": save_to_history and evaluation_id is not None
-        }), 200
-        
     except Exception as e:
         print(f"❌ Error evaluando escritura: {e}")
         import traceback
@@ -939,6 +1115,94 @@ def evaluate_writing():
         return jsonify({"error": str(e)}), 500
 
 
+@academic_bp.route('/tools/evaluate-writing/stream', methods=['POST'])
+def stream_evaluate_writing():
+    """
+    Evalúa la escritura de un documento en stream (Server-Sent Events)
+    
+    Acepta los mismos campos que /tools/evaluate-writing.
+    
+    Eventos:
+    - metrics: {"current", "previous"} métricas básicas (antes de llamar a la IA)
+    - local_errors: {"errors"} errores de ortografía y estilo de la revisión local
+    - field: {"key", "value"} por cada campo de la evaluación completado
+    - done: {"report", "evaluation_id", "saved_to_history", "similarity"} al terminar
+    - error: {"error"}
+    """
+    if not WRITING_EVALUATOR_AVAILABLE:
+        return jsonify({
+            "error": "Servicio de evaluación de escritura no disponible"
+        }), 503
+    
+    if 'document' not in request.files:
+        return jsonify({"error": "No se envió ningún documento"}), 400
+    
+    current_file = request.files['document']
+    previous_file = request.files.get('previous_document')
+    
+    if current_file.filename == '':
+        return jsonify({"error": "Nombre de archivo vacío"}), 400
+    
+    allowed_extensions = {'.txt', '.pdf', '.docx', '.md'}
+    current_ext = os.path.splitext(current_file.filename)[1].lower()
+    
+    if current_ext not in allowed_extensions:
+        return jsonify({
+            "error": f"Formato no soportado: {current_ext}. Use: {', '.join(allowed_extensions)}"
+        }), 400
+    
+    file_name = current_file.filename
+    user_id = request.form.get('user_id', type=int)
+    course_id = request.form.get('course_id', type=int)
+    save_to_history = request.form.get('save_to_history', 'true').lower() == 'true'
+    previous_evaluation_id = request.form.get('previous_evaluation_id', type=int)
+    incremental = request.form.get('incremental', 'true').lower() == 'true'
+    
+    uploads = _save_writing_uploads(current_file, previous_file, allowed_extensions)
+    metadata = {
+        'user_id': user_id,
+        'course_id': course_id,
+        'timestamp': uploads['timestamp']
+    }
+    base_evaluation = _find_writing_base(user_id, file_name, course_id, previous_evaluation_id, incremental)
+    
+    def generate():
+        try:
+            for event, payload in WritingEvaluator.generate_report_stream(
+                current_file=uploads['current_path'],
+                previous_file=uploads['previous_path'],
+                metadata=metadata,
+                base_evaluation=base_evaluation
+            ):
+                if event != 'report':
+                    yield sse_event(event, payload)
+                    continue
+                
+                evaluation_id = None
+                similarity = None
+                if save_to_history and user_id:
+                    evaluation_id = _save_writing_evaluation(
+                        payload, file_name, uploads['current_path'],
+                        uploads['previous_path'], user_id, course_id
+                    )
+                    if evaluation_id:
+                        similarity = _check_writing_similarity(
+                            evaluation_id, uploads['current_path'], user_id, file_name
+                        )
+                
+                yield sse_event('done', {
+                    "message": "Evaluación completada",
+                    "report": payload,
+                    "evaluation_id": evaluation_id,
+                    "saved_to_history": save_to_history and evaluation_id is not None,
+                    "similarity": similarity
+                })
+        except Exception as e:
+            print(f"❌ Error evaluando escritura en stream: {e}")
+            yield sse_event('error', {"error": str(e)})
+    
+    return sse_response(generate())
+
 @academic_bp.route('/tools/writing-history/<int:user_id>', methods=['GET'])
 def get_writing_history(user_id):
     """
@@ -951,6 +1215,7 @@ def get_writing_history(user_id):
     
     Retorna:
     - Lista de evaluaciones con resumen
+    - Para gráficos de evolución ver /tools/writing-history/<user_id>/trends
     """
     try:
         from app.models.writing_evaluation import WritingEvaluation
@@ -985,6 +1250,53 @@ def get_writing_history(user_id):
         return jsonify({"error": str(e)}), 500
 
 
+@academic_bp.route('/tools/writing-history/<int:user_id>/trends', methods=['GET'])
+def get_writing_trends(user_id):
+    """
+    Tendencias del historial de escritura por curso (calculadas en SQL)
+    
+    Query params:
+    - metric: overall, grammar, coherence, vocabulary o structure (default: overall)
+    - window: Evaluaciones del promedio móvil (default: 3)
+    - course_id: Filtrar por curso (opcional)
+    - since: Fecha inicial YYYY-MM-DD (opcional)
+    - points: Últimas evaluaciones por curso (default: 50)
+    
+    Retorna:
+    - Por curso: resumen (cantidad, promedio, mejor, peor, último, cambio) y
+      series en columnas (id, date, score, moving_average, delta, percentile)
+    """
+    try:
+        from app.services.academic.writing_analytics import SCORE_COLUMNS, writing_trends
+        
+        metric = request.args.get('metric', 'overall')
+        if metric not in SCORE_COLUMNS:
+            return jsonify({
+                "error": f"metric inválido. Permitidos: {', '.join(SCORE_COLUMNS)}"
+            }), 400
+        
+        since = request.args.get('since')
+        try:
+            since_date = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return jsonify({"error": "since debe ser una fecha ISO (YYYY-MM-DD)"}), 400
+        
+        trends = writing_trends(
+            user_id,
+            metric=metric,
+            window=request.args.get('window', 3, type=int),
+            course_id=request.args.get('course_id', type=int),
+            since=since_date,
+            points=request.args.get('points', 50, type=int)
+        )
+        
+        return jsonify({"user_id": user_id, **trends}), 200
+        
+    except Exception as e:
+        print(f"❌ Error obteniendo tendencias de escritura: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @academic_bp.route('/tools/writing-evaluation/<int:evaluation_id>', methods=['GET'])
 def get_writing_evaluation(evaluation_id):
     """
@@ -1023,182 +1335,42 @@ def download_writing_evaluation_pdf(evaluation_id):
     - Sugerencias de mejora
     - Recomendaciones
     
+    El PDF se genera una vez por versión de la evaluación y se guarda en
+    disco (ver app.services.academic.writing_report_pdf). La respuesta lleva
+    ETag: con If-None-Match igual a la versión actual retorna 304.
+    
     Retorna:
     - PDF descargable
     """
     try:
         from app.models.writing_evaluation import WritingEvaluation
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib import colors
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-        from reportlab.lib.units import inch
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
-        from io import BytesIO
+        from app.services.academic.writing_report_pdf import writing_report_pdf
         
         evaluation = WritingEvaluation.query.get(evaluation_id)
         
         if not evaluation:
             return jsonify({"error": "Evaluación no encontrada"}), 404
         
-        # Crear PDF en memoria
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, 
-                              rightMargin=72, leftMargin=72,
-                              topMargin=72, bottomMargin=18)
-        
-        # Contenedor para elementos
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Estilos personalizados
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#4F46E5'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
+        # El cliente ya tiene esta versión
+        version = writing_report_pdf.version(evaluation)
+        if request.if_none_match.contains(version):
+            response = current_app.response_class(status=304)
+            response.set_etag(version)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#7C3AED'),
-            spaceAfter=12,
-            spaceBefore=20
-        )
+        pdf, version = writing_report_pdf.get(evaluation)
         
-        # Título
-        elements.append(Paragraph("Reporte de Evaluación de Escritura", title_style))
-        elements.append(Spacer(1, 12))
-        
-        # Información general
-        info_data = [
-            ['Documento:', evaluation.file_name],
-            ['Fecha:', evaluation.evaluated_at.strftime('%d/%m/%Y %H:%M')],
-            ['Palabras:', str(evaluation.word_count)],
-            ['Score General:', f"{evaluation.overall_score}/100"]
-        ]
-        
-        info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#EEF2FF')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        elements.append(info_table)
-        elements.append(Spacer(1, 20))
-        
-        # Scores
-        elements.append(Paragraph("Puntuaciones Detalladas", heading_style))
-        
-        scores_data = [
-            ['Aspecto', 'Puntuación'],
-            ['Gramática', f"{evaluation.grammar_score}/100"],
-            ['Coherencia', f"{evaluation.coherence_score}/100"],
-            ['Vocabulario', f"{evaluation.vocabulary_score}/100"],
-            ['Estructura', f"{evaluation.structure_score}/100"]
-        ]
-        
-        scores_table = Table(scores_data, colWidths=[3*inch, 2*inch])
-        scores_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4F46E5')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(scores_table)
-        elements.append(Spacer(1, 20))
-        
-        # Análisis adicional
-        if evaluation.tone_analysis:
-            elements.append(Paragraph("Análisis de Estilo", heading_style))
-            style_data = [
-                ['Tono:', evaluation.tone_analysis],
-                ['Formalidad:', f"{evaluation.formality_score}/100" if evaluation.formality_score else 'N/A'],
-                ['Complejidad:', evaluation.complexity_level or 'N/A']
-            ]
-            style_table = Table(style_data, colWidths=[2*inch, 4*inch])
-            style_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#FEF3C7')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ]))
-            elements.append(style_table)
-            elements.append(Spacer(1, 20))
-        
-        # Fortalezas
-        elements.append(Paragraph("✓ Fortalezas", heading_style))
-        for strength in evaluation.strengths:
-            elements.append(Paragraph(f"• {strength}", styles['Normal']))
-        elements.append(Spacer(1, 15))
-        
-        # Áreas de mejora
-        elements.append(Paragraph("⚠ Áreas de Mejora", heading_style))
-        for weakness in evaluation.weaknesses:
-            elements.append(Paragraph(f"• {weakness}", styles['Normal']))
-        elements.append(Spacer(1, 15))
-        
-        # Errores específicos (nueva página si es necesario)
-        if evaluation.specific_errors:
-            elements.append(PageBreak())
-            elements.append(Paragraph("Errores Específicos Detectados", heading_style))
-            
-            for error in evaluation.specific_errors[:10]:  # Máximo 10 errores
-                error_text = f"<b>{error.get('type', 'Error').upper()}:</b> {error.get('error', '')} → {error.get('correction', '')}"
-                elements.append(Paragraph(error_text, styles['Normal']))
-                
-                if error.get('explanation'):
-                    elements.append(Paragraph(f"<i>{error['explanation']}</i>", styles['Italic']))
-                elements.append(Spacer(1, 10))
-        
-        # Sugerencias
-        if evaluation.suggestions:
-            elements.append(Spacer(1, 15))
-            elements.append(Paragraph("💡 Sugerencias de Mejora", heading_style))
-            
-            for suggestion in evaluation.suggestions[:8]:  # Máximo 8 sugerencias
-                sugg_text = f"<b>[{suggestion.get('category', 'General').upper()}]</b> {suggestion.get('suggestion', '')}"
-                elements.append(Paragraph(sugg_text, styles['Normal']))
-                
-                if suggestion.get('example'):
-                    elements.append(Paragraph(f"Ejemplo: <i>{suggestion['example']}</i>", styles['Italic']))
-                elements.append(Spacer(1, 10))
-        
-        # Recomendaciones
-        elements.append(PageBreak())
-        elements.append(Paragraph("Recomendaciones para Mejorar", heading_style))
-        for i, rec in enumerate(evaluation.recommendations, 1):
-            elements.append(Paragraph(f"{i}. {rec}", styles['Normal']))
-            elements.append(Spacer(1, 8))
-        
-        # Resumen final
-        elements.append(Spacer(1, 20))
-        elements.append(Paragraph("Resumen General", heading_style))
-        elements.append(Paragraph(evaluation.summary, styles['Normal']))
-        
-        # Generar PDF
-        doc.build(elements)
-        
-        # Preparar para descarga
-        buffer.seek(0)
-        
-        filename = f"evaluacion_{evaluation.id}_{evaluation.file_name.rsplit('.', 1)[0]}.pdf"
-        
-        return send_file(
-            buffer,
+        response = send_file(
+            pdf,
             as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
+            download_name=writing_report_pdf.download_name(evaluation),
+            mimetype='application/pdf',
+            etag=version
         )
+        response.cache_control.private = True
+        return response
         
     except ImportError as e:
         print(f"❌ Error: ReportLab no instalado: {e}")
@@ -1235,10 +1407,14 @@ def delete_writing_evaluation(evaluation_id):
                 os.remove(evaluation.file_path)
             if evaluation.previous_file_path and os.path.exists(evaluation.previous_file_path):
                 os.remove(evaluation.previous_file_path)
+            from app.services.academic.writing_report_pdf import writing_report_pdf
+            writing_report_pdf.invalidate(evaluation.id)
         except Exception as e:
             print(f"⚠️  Error eliminando archivos: {e}")
         
-        # Eliminar registro de BD
+        # Eliminar registro de BD (y su entrada en el índice de similitud)
+        from app.services.document_processing.similarity_detector import similarity_detector
+        similarity_detector.remove_submission('writing_evaluation', evaluation.id, commit=False)
         db.session.delete(evaluation)
         db.session.commit()
         
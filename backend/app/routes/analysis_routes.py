@@ -2,7 +2,15 @@
 # app/routes/analysis_routes.py
 # ============================================
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+from app.controllers.analysis_controller import (
+    get_vocabulary_growth,
+    search_vocabulary,
+    get_term_documents,
+    get_document_new_terms,
+    get_similarity_report,
+    get_similarity_stats
+)
 
 analysis_bp = Blueprint('analysis', __name__)
 
@@ -21,6 +29,47 @@ def compare_documents():
     }), 501
 
 
+@analysis_bp.route('/vocabulary/<int:user_id>/growth', methods=['GET'])
+def vocabulary_growth(user_id):
+    '''Curva de crecimiento del vocabulario (?since=YYYY-MM-DD)'''
+    return get_vocabulary_growth(user_id, request.args.get('since'))
+
+@analysis_bp.route('/vocabulary/<int:user_id>/search', methods=['GET'])
+def vocabulary_search(user_id):
+    '''Buscar términos por prefijo (?q=, ?kind=word|technical|concept, ?limit=)'''
+    return search_vocabulary(
+        user_id,
+        request.args.get('q', ''),
+        request.args.get('kind'),
+        request.args.get('limit', 20, type=int)
+    )
+
+@analysis_bp.route('/vocabulary/<int:user_id>/terms/<path:term>', methods=['GET'])
+def vocabulary_term(user_id, term):
+    '''Documentos en que aparece un término (?kind=)'''
+    return get_term_documents(user_id, term, request.args.get('kind'))
+
+@analysis_bp.route('/vocabulary/<int:user_id>/documents/<int:document_id>/new-terms', methods=['GET'])
+def vocabulary_new_terms(user_id, document_id):
+    '''Términos usados por primera vez en un documento (?kind=)'''
+    return get_document_new_terms(user_id, document_id, request.args.get('kind'))
+
+
+@analysis_bp.route('/similarity/<source>/<int:source_id>', methods=['GET'])
+def similarity_report(source, source_id):
+    '''Entregas parecidas y pasajes coincidentes (source=document|writing_evaluation, ?refresh=true)'''
+    return get_similarity_report(
+        source,
+        source_id,
+        request.args.get('refresh', 'false').lower() == 'true'
+    )
+
+@analysis_bp.route('/similarity/stats', methods=['GET'])
+def similarity_stats():
+    '''Tamaño del índice de similitud y coincidencias por relación'''
+    return get_similarity_stats()
+
+
 @analysis_bp.route('/test', methods=['GET'])
 def test():
     return {'message': 'Analysis routes working'}
\ No newline at end of file
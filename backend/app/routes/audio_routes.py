@@ -148,6 +148,106 @@ def upload_audio(audio_session_id):
         }), 500
 
 
+@audio_bp.route('/session/<int:audio_session_id>/process', methods=['POST'])
+def process_audio_session(audio_session_id):
+    """
+    Transcribir por segmentos el audio subido y calcular métricas del habla
+    
+    Reemplaza los segmentos existentes de la sesión, analiza su sentimiento y
+    palabras clave, y guarda las métricas prosódicas compactas por segmento.
+    
+    Body (JSON, opcional):
+    {
+        "min_silence_len": 500,
+        "silence_thresh": -40
+    }
+    
+    Returns:
+        200: Audio procesado
+        400: La sesión no tiene audio
+        404: Sesión no encontrada
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        audio_session = AudioSession.query.get(audio_session_id)
+        if not audio_session:
+            return jsonify({'error': 'Sesión de audio no encontrada'}), 404
+        
+        if not audio_session.audio_file_path:
+            return jsonify({'error': 'La sesión no tiene archivo de audio'}), 400
+        
+        audio_session.start_processing()
+        db.session.commit()
+        
+        from app.services.audio_processing.transcription import transcription_service
+        from app.services.audio_processing.speech_analyzer import compact_features
+        
+        result = transcription_service.transcribe_with_segments(
+            audio_session.audio_file_path,
+            min_silence_len=data.get('min_silence_len', 500),
+            silence_thresh=data.get('silence_thresh', -40)
+        )
+        
+        if not result['success']:
+            audio_session.fail_processing(result.get('error'))
+            db.session.commit()
+            return jsonify({
+                'error': True,
+                'message': f"Error al procesar audio: {result.get('error')}"
+            }), 500
+        
+        # Reemplazar segmentos anteriores
+        audio_session.transcriptions.delete()
+        
+        transcriptions = [
+            AudioTranscription(
+                audio_session_id=audio_session_id,
+                user_id=audio_session.user_id,
+                start_time=segment['start_time'],
+                end_time=segment['end_time'],
+                text=segment['text'],
+                confidence=segment['confidence']
+            )
+            for segment in result['segments']
+        ]
+        AudioTranscription.analyze_batch(transcriptions)
+        db.session.add_all(transcriptions)
+        
+        if result.get('prosody'):
+            audio_session.set_prosody_features(compact_features({
+                'segments': [segment.get('prosody') for segment in result['segments']],
+                'summary': result['prosody']
+            }))
+        
+        if result['segments']:
+            audio_session.audio_duration_seconds = int(result['segments'][-1]['end_time'])
+        audio_session.language_detected = transcription_service.language
+        audio_session.complete_processing(
+            transcription_text=result['full_text'],
+            confidence=result['avg_confidence'],
+            accuracy=result['accuracy_percentage']
+        )
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Audio procesado correctamente',
+            'total_segments': result['total_segments'],
+            'cached_segments': result.get('cached_segments', 0),
+            'prosody': result.get('prosody'),
+            'audio_session': audio_session.to_dict(include_transcription=True)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': True,
+            'message': f'Error al procesar audio: {str(e)}'
+        }), 500
+
+
 @audio_bp.route('/session/<int:audio_session_id>/transcription', methods=['GET'])
 def get_transcription(audio_session_id):
     """
@@ -228,11 +328,8 @@ def add_transcription_segment(audio_session_id):
             confidence=data.get('confidence', 0)
         )
         
-        # Analizar sentimiento básico
-        transcription.analyze_sentiment_basic()
-        
-        # Extraer palabras clave básicas
-        transcription.extract_keywords_basic()
+        # Analizar sentimiento y extraer palabras clave (una sola tokenización)
+        AudioTranscription.analyze_batch([transcription])
         
         db.session.add(transcription)
         db.session.commit()
@@ -358,6 +455,51 @@ def get_audio_sentiment(audio_session_id):
         }), 500
 
 
+@audio_bp.route('/session/<int:audio_session_id>/sentiment/ai', methods=['POST'])
+def analyze_audio_sentiment_ai(audio_session_id):
+    """
+    Analizar el sentimiento de todos los segmentos con Gemini en lote
+    
+    Agrupa los segmentos en pocas llamadas a la API y guarda sentiment,
+    sentiment_score y keywords en cada segmento.
+    
+    Returns:
+        200: Análisis completado
+        404: Sesión no encontrada
+    """
+    try:
+        audio_session = AudioSession.query.get(audio_session_id)
+        if not audio_session:
+            return jsonify({'error': 'Sesión de audio no encontrada'}), 404
+        
+        transcriptions = AudioTranscription.query.filter_by(
+            audio_session_id=audio_session_id
+        ).order_by(AudioTranscription.start_time).all()
+        
+        from app.services.audio_processing.transcription import transcription_service
+        summary = transcription_service.analyze_segments_with_ai(
+            transcriptions,
+            user_id=audio_session.user_id,
+            audio_session_id=audio_session_id
+        )
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'audio_session_id': audio_session_id,
+            'summary': summary,
+            'segments': [t.to_dict() for t in transcriptions]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': True,
+            'message': f'Error al analizar sentimiento: {str(e)}'
+        }), 500
+
+
 @audio_bp.route('/session/<int:audio_session_id>', methods=['GET'])
 def get_audio_session(audio_session_id):
     """
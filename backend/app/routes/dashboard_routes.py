@@ -2,11 +2,12 @@
 Rutas del Dashboard - Núcleo de Comando
 """
 
-from flask import Blueprint
+from flask import Blueprint, request
 from app.controllers.dashboard_controller import (
     get_dashboard_metrics,
     get_system_health,
-    get_processing_statistics
+    get_processing_statistics,
+    get_ai_usage
 )
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -44,6 +45,26 @@ def processing_statistics():
     return get_processing_statistics(user_id)
 
 
+@dashboard_bp.route('/ai-usage', methods=['GET'])
+def ai_usage():
+    """
+    GET /api/dashboard/ai-usage
+    Tokens, costo y latencia (p50/p95/p99) de las llamadas a IA
+    
+    Query params:
+        group_by: interaction_type (defecto) | user_id | day
+        start, end: YYYY-MM-DD (por defecto últimos 30 días)
+        user_id, interaction_type: filtros opcionales
+    """
+    return get_ai_usage(
+        group_by=request.args.get('group_by', 'interaction_type'),
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+        user_id=request.args.get('user_id', type=int),
+        interaction_type=request.args.get('interaction_type')
+    )
+
+
 @dashboard_bp.route('/pipeline/<int:modulo_id>', methods=['GET'])
 def pipeline_status(modulo_id):
     """
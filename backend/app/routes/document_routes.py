@@ -1,12 +1,29 @@
 """
 app/routes/document_routes.py - Rutas de Documentos (Módulo 1)
 Plataforma Integral de Rendimiento Estudiantil
+
+Endpoints:
+- POST   /api/documents/upload                  - Subir y encolar un documento
+- GET    /api/documents/?user_id=               - Listar documentos del usuario
+- GET    /api/documents/<id>                    - Documento y estado del pipeline
+- DELETE /api/documents/<id>                    - Eliminar documento
+- GET    /api/documents/<id>/analysis           - Análisis de texto
+- POST   /api/documents/<id>/process            - Reanudar (o reiniciar) el procesamiento
+- GET    /api/documents/<id>/pipeline           - Etapas y tiempos del procesamiento
+- GET    /api/documents/pipeline/stats          - Métricas globales del pipeline
 """
 
 from flask import Blueprint, request, jsonify
-# from app import db
-# from app.models.document import Document
-# from app.utils.file_handler import save_file, validate_file
+from app.controllers.document_controller import (
+    upload_document as upload_document_controller,
+    list_documents as list_documents_controller,
+    get_document as get_document_controller,
+    delete_document as delete_document_controller,
+    get_document_analysis as get_document_analysis_controller,
+    process_document as process_document_controller,
+    get_pipeline_status,
+    get_pipeline_stats
+)
 
 # Crear blueprint
 document_bp = Blueprint('documents', __name__)
@@ -16,29 +33,34 @@ document_bp = Blueprint('documents', __name__)
 def upload_document():
     """
     Subir un documento académico para análisis
-    
+
     Form data esperado:
-    - file: archivo PDF o DOCX
-    - title: título del documento
+    - file: archivo PDF, DOCX, TXT o MD
+    - user_id: ID del usuario
+    - title: título del documento (opcional, por defecto el nombre del archivo)
     - cycle: ciclo académico (1-10)
     - course_name: nombre del curso
     - document_type: tipo de documento (informe, trabajo_final, etc.)
+
+    El análisis se ejecuta en segundo plano; responde 202 con el documento
+    y el estado del pipeline (consultar GET /<id>/pipeline).
     """
-    # TODO: Implementar subida de archivos
-    return jsonify({
-        'message': 'Endpoint de subida de documentos - A implementar en Módulo 1'
-    }), 501
+    return upload_document_controller()
 
 
 @document_bp.route('/', methods=['GET'])
 def list_documents():
     """
     Listar todos los documentos del usuario
+
+    Query params:
+    - user_id: ID del usuario (requerido)
+    - status: pending | processing | completed | failed (opcional)
     """
-    # TODO: Implementar listado de documentos
-    return jsonify({
-        'message': 'Endpoint de listado de documentos - A implementar en Módulo 1'
-    }), 501
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify({'success': False, 'error': 'user_id es requerido'}), 400
+    return list_documents_controller(user_id, request.args.get('status'))
 
 
 @document_bp.route('/<int:document_id>', methods=['GET'])
@@ -46,9 +68,7 @@ def get_document(document_id):
     """
     Obtener información de un documento específico
     """
-    return jsonify({
-        'message': f'Endpoint de documento {document_id} - A implementar en Módulo 1'
-    }), 501
+    return get_document_controller(document_id, request.args.get('user_id', type=int))
 
 
 @document_bp.route('/<int:document_id>', methods=['DELETE'])
@@ -56,9 +76,7 @@ def delete_document(document_id):
     """
     Eliminar un documento
     """
-    return jsonify({
-        'message': f'Endpoint de eliminación de documento {document_id} - A implementar en Módulo 1'
-    }), 501
+    return delete_document_controller(document_id, request.args.get('user_id', type=int))
 
 
 @document_bp.route('/<int:document_id>/analysis', methods=['GET'])
@@ -66,10 +84,38 @@ def get_document_analysis(document_id):
     """
     Obtener el análisis de un documento específico
     """
-    return jsonify({
-        'message': f'Endpoint de análisis de documento {document_id} - A implementar en Módulo 1'
-    }), 501
+    return get_document_analysis_controller(document_id, request.args.get('user_id', type=int))
+
+
+@document_bp.route('/<int:document_id>/process', methods=['POST'])
+def process_document(document_id):
+    """
+    Reanudar el procesamiento desde la etapa que falló
+
+    Query params:
+    - restart: true para descartar los puntos de control y procesar desde
+      la extracción
+    """
+    restart = request.args.get('restart', 'false').lower() == 'true'
+    return process_document_controller(document_id, request.args.get('user_id', type=int), restart)
+
+
+@document_bp.route('/<int:document_id>/pipeline', methods=['GET'])
+def document_pipeline_status(document_id):
+    """
+    Estado, intentos y duración de cada etapa del procesamiento
+    """
+    return get_pipeline_status(document_id, request.args.get('user_id', type=int))
+
+
+@document_bp.route('/pipeline/stats', methods=['GET'])
+def pipeline_stats():
+    """
+    Tiempos por etapa y ocupación de la cola del pipeline
+    """
+    return get_pipeline_stats()
+
 
 @document_bp.route('/test', methods=['GET'])
 def test():
-    return {'message': 'Document routes working'}
\ No newline at end of file
+    return {'message': 'Document routes working'}
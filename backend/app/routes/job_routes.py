@@ -0,0 +1,130 @@
+"""
+app/routes/job_routes.py
+Rutas de API para trabajos en segundo plano
+
+Endpoints:
+- GET /api/jobs/<job_id>          - Estado (y resultado) de un trabajo
+- GET /api/jobs/<job_id>/events   - Stream SSE hasta que el trabajo termine
+
+Los endpoints lentos (evaluación de escritura, mapa mental, línea de tiempo,
+sílabo y reportes) responden con 202 y un job_id cuando el cliente lo pide
+con `?async=true` (o el campo `async` del cuerpo / cabecera
+`Prefer: respond-async`). Sin esa opción se mantiene la respuesta síncrona.
+"""
+
+import os
+import time
+from flask import Blueprint, jsonify, request, url_for
+from app import db
+from app.services.job_runner import job_runner
+from app.utils.helpers import sse_event, sse_response
+
+# Crear blueprint
+job_bp = Blueprint('jobs', __name__)
+
+# Intervalo de heartbeat y duración máxima del stream SSE
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_SECONDS = int(os.getenv('JOB_SSE_MAX_SECONDS', 600))
+
+
+def wants_async() -> bool:
+    """Indica si el cliente pidió ejecución asíncrona"""
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+
+    value = request.args.get('async') or request.form.get('async')
+    if value is None and request.is_json:
+        value = (request.get_json(silent=True) or {}).get('async')
+
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def dispatch_job(job_type, func, kwargs=None, user_id=None, dedup_key=None, prepare=None):
+    """
+    Ejecutar `func` en segundo plano (si se pidió) o de forma síncrona
+
+    Args:
+        job_type (str): Tipo de trabajo
+        func (callable): Devuelve (cuerpo, código HTTP)
+        kwargs (dict): Argumentos para func
+        user_id (int, optional): Usuario propietario
+        dedup_key (str, optional): Clave de coalescencia
+        prepare (callable, optional): Preparación que solo se ejecuta si no
+            hay un trabajo equivalente en curso (p. ej. guardar archivos);
+            devuelve kwargs adicionales para func
+
+    Returns:
+        Response: 202 con el trabajo, o la respuesta síncrona de func
+    """
+    if not wants_async():
+        kwargs = dict(kwargs or {})
+        if prepare is not None:
+            kwargs.update(prepare())
+        body, status_code = func(**kwargs)
+        return jsonify(body), status_code
+
+    job, coalesced = job_runner.submit(
+        job_type, func, kwargs, user_id=user_id, dedup_key=dedup_key, prepare=prepare
+    )
+    return jsonify({
+        **job,
+        'coalesced': coalesced,
+        'status_url': url_for('jobs.get_job', job_id=job['job_id']),
+        'events_url': url_for('jobs.job_events', job_id=job['job_id'])
+    }), 202
+
+
+@job_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Obtiene el estado de un trabajo
+
+    Response:
+        200: Trabajo (incluye 'result' y 'result_status' al terminar)
+        404: Trabajo no existe
+    """
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    return jsonify({'success': True, 'job': job}), 200
+
+
+@job_bp.route('/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Stream Server-Sent Events con el estado del trabajo
+
+    Emite `status` en cada cambio y `completed` (con el resultado) al terminar.
+    """
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    def generate():
+        deadline = time.monotonic() + SSE_MAX_SECONDS
+        last_status = None
+
+        while True:
+            current = job_runner.get(job_id)
+            if current['status'] != last_status:
+                last_status = current['status']
+                event = 'completed' if current['status'] in ('completed', 'failed') else 'status'
+                yield sse_event(event, current)
+                if event == 'completed':
+                    return
+
+            if time.monotonic() >= deadline:
+                yield sse_event('timeout', {})
+                return
+
+            # Liberar la conexión mientras se espera
+            db.session.remove()
+            if job_runner.is_local(job_id):
+                if not job_runner.wait(job_id, SSE_HEARTBEAT_SECONDS):
+                    yield ": heartbeat\n\n"
+            else:
+                # Trabajo de otro proceso: sondear la BD
+                time.sleep(1)
+
+    return sse_response(generate())
@@ -4,6 +4,7 @@ Rutas de API para Módulo 4: Reportes y Plantillas
 
 Endpoints:
 - POST /api/reports/generate                      - Generar reporte completo
+- POST /api/reports/content/stream                - Contenido del reporte en stream (SSE)
 - GET  /api/reports/<report_id>                   - Obtener reporte
 - GET  /api/reports/user/<user_id>                - Listar reportes de usuario
 - POST /api/reports/template/ppt                  - Generar plantilla PPT
@@ -16,7 +17,13 @@ Endpoints:
 from flask import Blueprint, jsonify, request, send_file
 from app.services.report_service import report_service
 from app.models.user import User
+from app.models.student_profile import StudentProfile
+from app.services.ai.gemini_service import gemini_service
 from app.utils.logger import logger
+from app.utils.helpers import sse_event, sse_response
+from app.routes.job_routes import dispatch_job
+from app.services.job_runner import job_runner
+from app.services.ai.rate_limiter import priority_scope
 import os
 
 # Crear blueprint
@@ -27,6 +34,23 @@ report_bp = Blueprint('reports', __name__)
 # GENERACIÓN DE REPORTES COMPLETOS
 # =====================================================
 
+def _generate_report_job(user_id, report_type, include_ppt, include_docx):
+    """Genera el reporte completo (síncrono o en segundo plano)"""
+    # Las llamadas a Gemini del reporte ceden el turno a las interactivas
+    with priority_scope('batch'):
+        result = report_service.generate_complete_report(
+            user_id=user_id,
+            report_type=report_type,
+            include_ppt=include_ppt,
+            include_docx=include_docx
+        )
+    
+    if not result['success']:
+        return result, 400
+    
+    return result, 201
+
+
 @report_bp.route('/generate', methods=['POST'])
 def generate_report():
     """
@@ -37,11 +61,13 @@ def generate_report():
             "user_id": 1,
             "report_type": "integral",  // integral, semestral, curso
             "include_ppt": true,
-            "include_docx": true
+            "include_docx": true,
+            "async": false       // true: responde 202 con job_id
         }
     
     Response:
         201: Reporte generado
+        202: Trabajo encolado (async=true, ver /api/jobs/<job_id>)
         400: Datos inválidos
         404: Usuario no encontrado
     """
@@ -70,18 +96,19 @@ def generate_report():
             }), 404
         
         # Generar reporte
-        result = report_service.generate_complete_report(
+        return dispatch_job(
+            'report',
+            _generate_report_job,
+            {
+                'user_id': user_id,
+                'report_type': report_type,
+                'include_ppt': include_ppt,
+                'include_docx': include_docx
+            },
             user_id=user_id,
-            report_type=report_type,
-            include_ppt=include_ppt,
-            include_docx=include_docx
+            dedup_key=job_runner.make_key('report', user_id, report_type, include_ppt, include_docx)
         )
         
-        if not result['success']:
-            return jsonify(result), 400
-        
-        return jsonify(result), 201
-        
     except Exception as e:
         logger.error(f"Error en generate_report: {str(e)}")
         logger.error(f"Tipo de error: {type(e).__name__}")
@@ -96,6 +123,71 @@ def generate_report():
         }), 500
 
 
+@report_bp.route('/content/stream', methods=['POST'])
+def stream_report_content():
+    """
+    Genera el contenido personalizado del reporte en stream (Server-Sent Events)
+    
+    Body:
+        {
+            "user_id": 1,
+            "report_type": "integral"
+        }
+    
+    Eventos:
+        field: {"key", "value"} por cada sección completada (executive_summary,
+               main_insights, ...), en cuanto Gemini la termina
+        done:  Resultado completo (report_content, tokens_used, ...)
+        error: {"error"}
+    
+    Response:
+        400: Datos inválidos o perfil no generado
+        404: Usuario no encontrado
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'error': 'user_id es requerido'
+        }), 400
+    
+    if not User.query.get(user_id):
+        return jsonify({
+            'success': False,
+            'error': 'Usuario no encontrado'
+        }), 404
+    
+    profile = StudentProfile.query.filter_by(user_id=user_id).first()
+    if not profile:
+        return jsonify({
+            'success': False,
+            'error': 'No hay perfil generado'
+        }), 400
+    
+    report_data = {
+        'report_type': data.get('report_type', 'integral'),
+        'profile': profile.to_dict(include_detailed=True)
+    }
+    personalization = {'learning_style': profile.learning_style or 'mixto'}
+    
+    def generate():
+        try:
+            for event, payload in gemini_service.generate_report_content_stream(
+                report_data, personalization, user_id
+            ):
+                if event == 'result':
+                    yield sse_event('done' if payload.get('success') else 'error', payload)
+                else:
+                    yield sse_event(event, payload)
+        except Exception as e:
+            logger.error(f"Error en stream_report_content: {str(e)}")
+            yield sse_event('error', {'success': False, 'error': str(e)})
+    
+    return sse_response(generate())
+
+
 # =====================================================
 # CONSULTA DE REPORTES
 # =====================================================
@@ -1,41 +1,15 @@
-import google.generativeai as genai
-import os
 import json
 import re
-from flask import current_app
+from app.services.ai.llm_client import llm_client
+from app.services.ai.map_reduce import CHUNK_TOKENS, analyze_document
+from app.services.ai.prompt_cache import prompt_cache
+from app.utils.json_stream import IncrementalJSONParser
+from app.utils.response_schemas import parse_response
+from app.utils.text_chunker import chunk_text
 
 class StudyToolsService:
     """Servicio unificado para todas las herramientas de estudio con IA (Gemini)"""
     
-    @staticmethod
-    def _configure_gemini():
-        """Configura la API de Gemini con la clave del entorno"""
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            api_key = current_app.config.get('GEMINI_API_KEY')
-        
-        if not api_key:
-            print("❌ Error: GEMINI_API_KEY no encontrada en variables de entorno.")
-            raise ValueError("La API Key de Gemini no está configurada.")
-            
-        genai.configure(api_key=api_key)
-
-    @staticmethod
-    def _get_model():
-      """Obtiene el modelo configurado de Gemini con fallback seguro"""
-      preferred = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
-      try:
-        return genai.GenerativeModel(preferred)
-      except Exception as _:
-        # Fallbacks por compatibilidad de librería
-        for candidate in ['gemini-1.5-flash', 'gemini-pro']:
-          try:
-            return genai.GenerativeModel(candidate)
-          except Exception:
-            continue
-        # Último recurso: relanzar
-        return genai.GenerativeModel(preferred)
-
     @staticmethod
     def generate_mind_map(topic_text, context="General"):
         """
@@ -53,17 +27,113 @@ class StudyToolsService:
             print(f"  📝 Tema: {topic_text[:100]}")
             print(f"  📚 Contexto: {context}")
             
-            StudyToolsService._configure_gemini()
+            llm_client.configure()
             print(f"  ✅ Gemini configurado")
             
-            model = StudyToolsService._get_model()
-            print(f"  ✅ Modelo obtenido: {model}")
+            print(f"  ✅ Modelo: {llm_client.resolve_model_name()}")
             
-            prompt = f"""
+            # Textos largos: un mapa por fragmento, unidos por nombre de rama
+            def analyze(chunk):
+                prompt = StudyToolsService._mind_map_prompt(chunk['text'], context)
+                print(f"  🚀 Enviando a Gemini...")
+                response_text = prompt_cache.get_or_generate('study_tools.mind_map', prompt)
+                print(f"  ✅ Respuesta recibida: {len(response_text)} caracteres")
+                try:
+                    return StudyToolsService._parse_mind_map(response_text)
+                except json.JSONDecodeError as e:
+                    prompt_cache.forget('study_tools.mind_map', prompt)
+                    print(f"❌ Error parsing JSON del mapa mental: {e}")
+                    print(f"Respuesta recibida: {response_text[:500]}")
+                    return None
+            
+            mind_map_data, _ = analyze_document(topic_text, CHUNK_TOKENS, analyze, 'study_tools.mind_map')
+            if mind_map_data is not None:
+                return mind_map_data
+            
+            # Retornar un mapa de error estructurado
+            return {
+                "root": "Error de Formato",
+                "children": [
+                    {"name": "La IA no generó un formato válido"},
+                    {"name": "Intenta reformular el tema"}
+                ]
+            }
+        except Exception as e:
+            print(f"❌ Error generando mapa mental: {e}")
+            return {
+                "root": "Error de Conexión",
+                "children": [{"name": "Verifica tu conexión y API Key"}]
+            }
+
+    @staticmethod
+    def generate_mind_map_stream(topic_text, context="General"):
+        """
+        Genera un mapa mental transmitiendo la respuesta de Gemini (stream=True)
+        
+        Args:
+            topic_text: Texto o tema para generar el mapa
+            context: Contexto académico (nombre del curso)
+            
+        Yields:
+            tuple: ('field', {'key', 'value'}) por cada campo de primer nivel
+            completado ('root' llega antes que 'children') y, al final,
+            ('mindmap', mapa mental completo)
+        """
+        prompt = None
+        response_text = ''
+        try:
+            print(f"🧠 Generando mapa mental en stream...")
+            llm_client.configure()
+            
+            if len(chunk_text(topic_text, CHUNK_TOKENS)) > 1:
+                # Texto largo: map-reduce por fragmentos (sin stream de campos parciales)
+                mind_map_data = StudyToolsService.generate_mind_map(topic_text, context)
+                for key in ('root', 'children'):
+                    if key in mind_map_data:
+                        yield 'field', {'key': key, 'value': mind_map_data[key]}
+                yield 'mindmap', mind_map_data
+                return
+            
+            prompt = StudyToolsService._mind_map_prompt(topic_text, context)
+            
+            parser = IncrementalJSONParser()
+            parts = []
+            for chunk in prompt_cache.stream_or_generate('study_tools.mind_map', prompt):
+                parts.append(chunk)
+                for key, value in parser.feed(chunk):
+                    yield 'field', {'key': key, 'value': value}
+            
+            response_text = ''.join(parts)
+            mind_map_data = StudyToolsService._parse_mind_map(response_text)
+        
+        except json.JSONDecodeError as e:
+            prompt_cache.forget('study_tools.mind_map', prompt)
+            print(f"❌ Error parsing JSON del mapa mental: {e}")
+            print(f"Respuesta recibida: {response_text[:500]}")
+            mind_map_data = {
+                "root": "Error de Formato",
+                "children": [
+                    {"name": "La IA no generó un formato válido"},
+                    {"name": "Intenta reformular el tema"}
+                ]
+            }
+        except Exception as e:
+            print(f"❌ Error generando mapa mental: {e}")
+            mind_map_data = {
+                "root": "Error de Conexión",
+                "children": [{"name": "Verifica tu conexión y API Key"}]
+            }
+        
+        yield 'mindmap', mind_map_data
+
+    @staticmethod
+    def _mind_map_prompt(topic_text, context):
+        """Prompt del mapa mental"""
+        prompt = f"""
 Eres un experto en pedagogía visual y mapas mentales académicos.
 
 CONTEXTO: {context}
-TEMA: "{topic_text[:3000]}"
+TEMA: "{topic_text}"
 
 TAREA: Crea un mapa mental estructurado y completo sobre este tema.
 
@@ -94,43 +164,18 @@ REGLAS CRÍTICAS:
 
 GENERA EL MAPA MENTAL:
 """
-            
-            print(f"  🚀 Enviando a Gemini...")
-            response = model.generate_content(prompt)
-            print(f"  ✅ Respuesta recibida: {len(response.text)} caracteres")
-            
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            print(f"  🔧 Texto limpio: {clean_text[:200]}...")
-            
-            # Intenta parsear el JSON
-            mind_map_data = json.loads(clean_text)
-            print(f"  ✅ JSON parseado correctamente")
-            
-            # Validar estructura mínima
-            if 'root' not in mind_map_data:
-                raise ValueError("El mapa mental no tiene nodo raíz")
-            
-            print(f"  ✅ Mapa mental generado con raíz: {mind_map_data.get('root')}")
-                
-            return mind_map_data
+        return prompt
 
-        except json.JSONDecodeError as e:
-            print(f"❌ Error parsing JSON del mapa mental: {e}")
-            print(f"Respuesta recibida: {response.text[:500]}")
-            # Retornar un mapa de error estructurado
-            return {
-                "root": "Error de Formato",
-                "children": [
-                    {"name": "La IA no generó un formato válido"},
-                    {"name": "Intenta reformular el tema"}
-                ]
-            }
-        except Exception as e:
-            print(f"❌ Error generando mapa mental: {e}")
-            return {
-                "root": "Error de Conexión",
-                "children": [{"name": "Verifica tu conexión y API Key"}]
-            }
+    @staticmethod
+    def _parse_mind_map(response_text):
+        """Convierte la respuesta de Gemini en el mapa mental (valida el nodo raíz)"""
+        # Extraer y validar el JSON (requiere el nodo raíz)
+        mind_map_data = parse_response(response_text, 'study_tools.mind_map')
+        print(f"  ✅ JSON parseado correctamente")
+        
+        print(f"  ✅ Mapa mental generado con raíz: {mind_map_data.get('root')}")
+            
+        return mind_map_data
 
     @staticmethod
     def generate_summary(text, summary_type="general"):
@@ -145,8 +190,7 @@ GENERA EL MAPA MENTAL:
             str: Resumen en formato Markdown
         """
         try:
-            StudyToolsService._configure_gemini()
-            model = StudyToolsService._get_model()
+            llm_client.configure()
             
             prompts = {
                 "general": "Resume el siguiente texto de manera clara y concisa:",
@@ -174,8 +218,8 @@ FORMATO DE SALIDA (Markdown):
 GENERA EL RESUMEN:
 """
 
-            response = model.generate_content(prompt)
-            return response.text.strip()
+            response_text = prompt_cache.get_or_generate('study_tools.summary', prompt)
+            return response_text.strip()
 
         except Exception as e:
             print(f"❌ Error generando resumen: {e}")
@@ -198,11 +242,10 @@ GENERA EL RESUMEN:
             print(f"  📝 Tema: {topic[:100]}")
             print(f"  📋 Tipo: {timeline_type}")
             
-            StudyToolsService._configure_gemini()
+            llm_client.configure()
             print(f"  ✅ Gemini configurado")
             
-            model = StudyToolsService._get_model()
-            print(f"  ✅ Modelo obtenido")
+            print(f"  ✅ Modelo: {llm_client.resolve_model_name()}")
             
             if timeline_type == "academic":
                 instruction = """
@@ -261,26 +304,21 @@ GENERA LA LÍNEA DE TIEMPO:
 """
             
             print(f"  🚀 Enviando a Gemini...")
-            response = model.generate_content(prompt)
-            print(f"  ✅ Respuesta recibida: {len(response.text)} caracteres")
-            
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            print(f"  🔧 Texto limpio: {clean_text[:200]}...")
+            response_text = prompt_cache.get_or_generate('study_tools.timeline', prompt)
+            print(f"  ✅ Respuesta recibida: {len(response_text)} caracteres")
             
-            timeline_data = json.loads(clean_text)
+            # Extraer y validar el JSON (requiere milestones)
+            timeline_data = parse_response(response_text, 'study_tools.timeline')
             print(f"  ✅ JSON parseado correctamente")
             
-            # Validar estructura
-            if 'milestones' not in timeline_data:
-                raise ValueError("La línea de tiempo no tiene milestones")
-            
             print(f"  ✅ Timeline generado con {len(timeline_data['milestones'])} milestones")
                 
             return timeline_data
 
         except json.JSONDecodeError as e:
+            prompt_cache.forget('study_tools.timeline', prompt)
             print(f"❌ Error parsing JSON de línea de tiempo: {e}")
-            print(f"Respuesta: {response.text[:500]}")
+            print(f"Respuesta: {response_text[:500]}")
             return {
                 "title": "Error",
                 "type": timeline_type,
@@ -311,16 +349,45 @@ GENERA LA LÍNEA DE TIEMPO:
             dict: Análisis estructurado del syllabus
         """
         try:
-            StudyToolsService._configure_gemini()
-            model = StudyToolsService._get_model()
+            llm_client.configure()
             
-            prompt = f"""
+            # Syllabus largos: un prompt por fragmento, combinados al final
+            def analyze(chunk):
+                prompt = StudyToolsService._syllabus_prompt(chunk['text'], course_name)
+                response_text = prompt_cache.get_or_generate('study_tools.syllabus', prompt)
+                try:
+                    # Extraer y validar el JSON (requiere temas)
+                    return parse_response(response_text, 'study_tools.syllabus')
+                except json.JSONDecodeError as e:
+                    prompt_cache.forget('study_tools.syllabus', prompt)
+                    print(f"❌ Error parsing JSON del análisis: {e}")
+                    return None
+
+            analysis, _ = analyze_document(syllabus_text, CHUNK_TOKENS, analyze, 'study_tools.syllabus')
+            if analysis is not None:
+                return analysis
+
+            return {
+                "error": "Error al parsear el análisis",
+                "message": "La IA no generó un formato válido"
+            }
+        except Exception as e:
+            print(f"❌ Error analizando syllabus: {e}")
+            return {
+                "error": "Error en el análisis",
+                "message": str(e)
+            }
+
+    @staticmethod
+    def _syllabus_prompt(syllabus_text, course_name=""):
+        """Prompt de análisis de syllabus (o de un fragmento)"""
+        return f"""
 Eres un asistente académico experto en análisis de syllabus universitarios.
 
 CURSO: {course_name if course_name else "No especificado"}
 
 SYLLABUS A ANALIZAR:
-{syllabus_text[:8000]}
+{syllabus_text}
 
 TAREA: Analiza este syllabus y extrae información estructurada.
 
@@ -381,27 +448,3 @@ REGLAS:
 
 GENERA EL ANÁLISIS:
 """
-
-            response = model.generate_content(prompt)
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            
-            analysis = json.loads(clean_text)
-            
-            # Validar estructura mínima
-            if 'topics' not in analysis:
-                raise ValueError("El análisis no incluye temas")
-                
-            return analysis
-
-        except json.JSONDecodeError as e:
-            print(f"❌ Error parsing JSON del análisis: {e}")
-            return {
-                "error": "Error al parsear el análisis",
-                "message": "La IA no generó un formato válido"
-            }
-        except Exception as e:
-            print(f"❌ Error analizando syllabus: {e}")
-            return {
-                "error": "Error en el análisis",
-                "message": str(e)
-            }
@@ -2,40 +2,18 @@
 Servicio para procesamiento inteligente de sílabos con IA
 Extrae tareas, fechas y estructura académica
 """
-import google.generativeai as genai
-import os
 import json
 import re
 from datetime import datetime, timedelta
-from flask import current_app
 from app import db
 from app.models.academic import AcademicTask
 from app.services.document_processing.pdf_extractor import PDFExtractor
+from app.services.ai.llm_client import llm_client
+from app.services.ai.map_reduce import CHUNK_TOKENS, analyze_document
+from app.services.ai.prompt_cache import prompt_cache
+from app.utils.response_schemas import parse_response
 
 class SyllabusProcessor:
-    @staticmethod
-    def _configure_gemini():
-        """Configura la API de Gemini"""
-        api_key = os.environ.get('GEMINI_API_KEY') or current_app.config.get('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("La API Key de Gemini no está configurada.")
-        genai.configure(api_key=api_key)
-
-    @staticmethod
-    def _get_model():
-        """Obtiene el modelo de Gemini con fallback seguro"""
-        preferred = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
-        try:
-            return genai.GenerativeModel(preferred)
-        except Exception:
-            for candidate in ['gemini-1.5-flash', 'gemini-pro']:
-                try:
-                    return genai.GenerativeModel(candidate)
-                except Exception:
-                    continue
-            # Último intento: levantar el error original del preferred
-            return genai.GenerativeModel(preferred)
-
     @staticmethod
     def process_syllabus(user_id, course_id, file_path):
         """
@@ -57,46 +35,28 @@ class SyllabusProcessor:
                 }
 
             # 2. Analizar con IA
-            SyllabusProcessor._configure_gemini()
-            model = SyllabusProcessor._get_model()
-            
-            # Prompt para extraer información completa del sílabo
-            analysis_prompt = f"""
-            Analiza este sílabo académico y extrae la siguiente información en formato JSON:
-            
-            SÍLABO:
-            {syllabus_text[:8000]}
-            
-            Devuelve ÚNICAMENTE un JSON válido (sin bloques de código Markdown) con esta estructura:
-            {{
-                "course_info": {{
-                    "professor": "Nombre del profesor",
-                    "credits": "Número de créditos",
-                    "schedule": "Horario de clases",
-                    "department": "Departamento/Facultad"
-                }},
-                "topics": [
-                    {{"name": "Tema 1", "description": "Descripción breve"}},
-                    {{"name": "Tema 2", "description": "Descripción breve"}}
-                ],
-                "tasks": [
-                    {{"title": "Tarea 1", "type": "tarea", "date": "2025-12-15", "priority": "alta"}},
-                    {{"title": "Examen Parcial", "type": "examen", "date": "2025-12-20", "priority": "critica"}}
-                ]
-            }}
+            llm_client.configure()
             
-            IMPORTANTE:
-            - Si no encuentras algún dato, usa un string vacío o array vacío
-            - Fechas en formato YYYY-MM-DD
-            - type puede ser: "tarea", "examen", "proyecto", "presentacion", "lectura"
-            - priority: "baja", "media", "alta", "critica"
-            """
+            # Sílabos largos: un prompt por fragmento (secciones/párrafos),
+            # en paralelo y con caché por fragmento; se combinan al final
+            def analyze(chunk):
+                analysis_prompt = SyllabusProcessor._analysis_prompt(chunk['text'])
+                response_text = prompt_cache.get_or_generate('syllabus.process', analysis_prompt)
+                try:
+                    # Extraer y validar el JSON de la respuesta
+                    return parse_response(response_text, 'syllabus.process')
+                except json.JSONDecodeError as e:
+                    prompt_cache.forget('syllabus.process', analysis_prompt)
+                    print(f"Error de JSON: {e}")
+                    return None
 
-            response = model.generate_content(analysis_prompt)
-            
-            # Limpieza de respuesta
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            analysis_data = json.loads(clean_text)
+            analysis_data, _ = analyze_document(syllabus_text, CHUNK_TOKENS, analyze, 'syllabus.process')
+            if analysis_data is None:
+                return {
+                    "error": "La IA no devolvió un formato válido", 
+                    "tasks_created": 0,
+                    "syllabus_analysis": {"topics": [], "course_info": {}}
+                }
 
             # 3. Guardar tareas en base de datos
             tasks_data = analysis_data.get('tasks', [])
@@ -141,13 +101,6 @@ class SyllabusProcessor:
                 "summary": f"Se extrajeron {tasks_created} tareas y {len(analysis_data.get('topics', []))} temas del sílabo"
             }
 
-        except json.JSONDecodeError as e:
-            print(f"Error de JSON: {e}")
-            return {
-                "error": "La IA no devolvió un formato válido", 
-                "tasks_created": 0,
-                "syllabus_analysis": {"topics": [], "course_info": {}}
-            }
         except Exception as e:
             print(f"Error procesando sílabo: {e}")
             db.session.rollback()
@@ -156,3 +109,37 @@ class SyllabusProcessor:
                 "tasks_created": 0,
                 "syllabus_analysis": {"topics": [], "course_info": {}}
             }
+
+    @staticmethod
+    def _analysis_prompt(syllabus_text):
+        """Prompt para extraer información completa del sílabo (o de un fragmento)"""
+        return f"""
+            Analiza este sílabo académico y extrae la siguiente información en formato JSON:
+            
+            SÍLABO:
+            {syllabus_text}
+            
+            Devuelve ÚNICAMENTE un JSON válido (sin bloques de código Markdown) con esta estructura:
+            {{
+                "course_info": {{
+                    "professor": "Nombre del profesor",
+                    "credits": "Número de créditos",
+                    "schedule": "Horario de clases",
+                    "department": "Departamento/Facultad"
+                }},
+                "topics": [
+                    {{"name": "Tema 1", "description": "Descripción breve"}},
+                    {{"name": "Tema 2", "description": "Descripción breve"}}
+                ],
+                "tasks": [
+                    {{"title": "Tarea 1", "type": "tarea", "date": "2025-12-15", "priority": "alta"}},
+                    {{"title": "Examen Parcial", "type": "examen", "date": "2025-12-20", "priority": "critica"}}
+                ]
+            }}
+            
+            IMPORTANTE:
+            - Si no encuentras algún dato, usa un string vacío o array vacío
+            - Fechas en formato YYYY-MM-DD
+            - type puede ser: "tarea", "examen", "proyecto", "presentacion", "lectura"
+            - priority: "baja", "media", "alta", "critica"
+            """
@@ -0,0 +1,154 @@
+"""
+Analítica del Historial de Escritura
+====================================
+
+Tendencias de las evaluaciones de escritura de un estudiante calculadas en
+la base de datos con funciones de ventana (MySQL 8+), sin descargar las
+evaluaciones completas:
+
+- promedio móvil de las últimas `window` evaluaciones de cada curso;
+- diferencia con la evaluación anterior del mismo curso;
+- percentil de cada evaluación dentro del historial completo del
+  estudiante (PERCENT_RANK, 0 = la peor, 100 = la mejor).
+
+Las ventanas se calculan sobre todo el historial del estudiante y los
+filtros (curso, fecha, últimos puntos) se aplican después, de modo que el
+promedio móvil y el percentil de un punto no dependen del rango pedido.
+
+Cada curso devuelve series en columnas (listas paralelas por campo), listas
+para graficar.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import func
+from app import db
+from app.models.academic import AcademicCourse
+from app.models.writing_evaluation import WritingEvaluation
+
+
+SCORE_COLUMNS = {
+    'overall': WritingEvaluation.overall_score,
+    'grammar': WritingEvaluation.grammar_score,
+    'coherence': WritingEvaluation.coherence_score,
+    'vocabulary': WritingEvaluation.vocabulary_score,
+    'structure': WritingEvaluation.structure_score
+}
+
+MAX_WINDOW = 20
+MAX_POINTS = 500
+
+
+def _round(value, digits=1):
+    return round(float(value), digits) if value is not None else None
+
+
+def writing_trends(
+    user_id: int,
+    metric: str = 'overall',
+    window: int = 3,
+    course_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    points: int = 50
+) -> Dict:
+    """
+    Series por curso de un score de escritura
+
+    Args:
+        user_id (int): Estudiante
+        metric (str): Score a graficar (ver SCORE_COLUMNS)
+        window (int): Evaluaciones del promedio móvil (1-MAX_WINDOW)
+        course_id (int): Solo este curso (opcional)
+        since (datetime): Solo evaluaciones desde esta fecha (opcional)
+        points (int): Últimos puntos por curso (1-MAX_POINTS)
+
+    Returns:
+        dict: {'metric', 'window', 'total', 'courses': [{'course_id',
+               'course_name', 'count', 'average', 'best', 'worst', 'latest',
+               'latest_moving_average', 'change' (del primer al último punto
+               de la serie), 'series': {'id', 'date',
+               'score', 'moving_average', 'delta', 'percentile'}}]}
+    """
+    score = SCORE_COLUMNS[metric]
+    window = min(max(window, 1), MAX_WINDOW)
+    points = min(max(points, 1), MAX_POINTS)
+
+    order = (WritingEvaluation.evaluated_at, WritingEvaluation.id)
+    course = WritingEvaluation.course_id
+
+    ranked = db.session.query(
+        WritingEvaluation.id.label('id'),
+        course.label('course_id'),
+        WritingEvaluation.evaluated_at.label('evaluated_at'),
+        score.label('score'),
+        func.avg(score).over(partition_by=course, order_by=order, rows=(-(window - 1), 0)).label('moving_average'),
+        (score - func.lag(score).over(partition_by=course, order_by=order)).label('delta'),
+        func.percent_rank().over(order_by=score).label('percentile'),
+        func.row_number().over(partition_by=course, order_by=(WritingEvaluation.evaluated_at.desc(),
+                                                              WritingEvaluation.id.desc())).label('recency')
+    ).filter(WritingEvaluation.user_id == user_id).subquery()
+
+    query = db.session.query(ranked).filter(ranked.c.recency <= points)
+    if course_id:
+        query = query.filter(ranked.c.course_id == course_id)
+    if since:
+        query = query.filter(ranked.c.evaluated_at >= since)
+    rows = query.order_by(ranked.c.course_id, ranked.c.evaluated_at, ranked.c.id).all()
+
+    # Resumen por curso sobre todo el historial (mismos filtros salvo el de puntos)
+    summary_query = db.session.query(
+        course,
+        func.count(WritingEvaluation.id),
+        func.avg(score),
+        func.max(score),
+        func.min(score)
+    ).filter(WritingEvaluation.user_id == user_id)
+    if course_id:
+        summary_query = summary_query.filter(course == course_id)
+    if since:
+        summary_query = summary_query.filter(WritingEvaluation.evaluated_at >= since)
+    summaries = {
+        row[0]: {'count': row[1], 'average': _round(row[2]), 'best': _round(row[3]), 'worst': _round(row[4])}
+        for row in summary_query.group_by(course).all()
+    }
+
+    course_ids = [key for key in summaries if key is not None]
+    names = dict(
+        db.session.query(AcademicCourse.id, AcademicCourse.name)
+        .filter(AcademicCourse.id.in_(course_ids)).all()
+    ) if course_ids else {}
+
+    series = {}
+    for row in rows:
+        entry = series.setdefault(row.course_id, {
+            'id': [], 'date': [], 'score': [], 'moving_average': [], 'delta': [], 'percentile': []
+        })
+        entry['id'].append(row.id)
+        entry['date'].append(row.evaluated_at.isoformat() if row.evaluated_at else None)
+        entry['score'].append(_round(row.score))
+        entry['moving_average'].append(_round(row.moving_average, 2))
+        entry['delta'].append(_round(row.delta))
+        entry['percentile'].append(_round(row.percentile * 100 if row.percentile is not None else None))
+
+    courses = []
+    for key, summary in summaries.items():
+        data = series.get(key)
+        if not data:
+            continue
+        courses.append({
+            'course_id': key,
+            'course_name': names.get(key) if key is not None else 'Sin curso',
+            **summary,
+            'latest': data['score'][-1],
+            'latest_moving_average': data['moving_average'][-1],
+            'change': _round(data['score'][-1] - data['score'][0]) if len(data['score']) > 1 else 0.0,
+            'series': data
+        })
+    courses.sort(key=lambda item: item['series']['date'][-1] or '', reverse=True)
+
+    return {
+        'metric': metric,
+        'window': window,
+        'total': sum(item['count'] for item in courses),
+        'courses': courses
+    }
@@ -9,17 +9,27 @@ Funcionalidades:
 - Extrae texto de archivos TXT, PDF, DOCX
 - Analiza gramática, ortografía, estructura, vocabulario
 - Compara versiones anteriores para medir progreso
+- Detecta con reglas locales (app.utils.style_checker) los errores
+  deterministas de ortografía, puntuación, repetición y estilo; la IA solo
+  evalúa lo que las reglas no pueden juzgar
+- Reevalúa solo los párrafos que cambiaron desde la última evaluación
+  guardada (ver writing_revisions)
 - Usa Gemini AI para análisis profundo
 - Genera reportes con métricas y recomendaciones
 """
 
 import os
 import json
-import re
 from datetime import datetime
-from typing import Dict, Optional, Tuple
-import google.generativeai as genai
-from flask import current_app
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.services.academic import writing_revisions
+from app.services.ai.llm_client import llm_client
+from app.services.document_processing import document_reader
+from app.services.ai.prompt_cache import prompt_cache
+from app.utils import style_checker
+from app.utils.json_stream import IncrementalJSONParser
+from app.utils.response_schemas import parse_response
+from app.utils.text_metrics import compute_metrics
 
 # Importar extractores de texto existentes
 try:
@@ -29,6 +39,12 @@ except ImportError:
     PDF_AVAILABLE = False
     print("⚠️  PDFExtractor no disponible")
 
+# Errores de la revisión local que se listan en el prompt
+PROMPT_LOCAL_ERRORS = 15
+
+# Tipos de error local que bajan el grammar_score de la evaluación de fallback
+FALLBACK_PENALIZED_TYPES = ('ortografía', 'gramática', 'puntuación')
+
 
 class WritingEvaluator:
     """
@@ -38,81 +54,28 @@ class WritingEvaluator:
     y genera reportes detallados con métricas y recomendaciones.
     """
     
-    @staticmethod
-    def _configure_gemini():
-        """Configura la API de Gemini"""
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            api_key = current_app.config.get('GEMINI_API_KEY')
-        
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY no configurada")
-        
-        genai.configure(api_key=api_key)
-    
-    @staticmethod
-    def _get_model():
-        """Obtiene el modelo de Gemini configurado"""
-        preferred = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
-        
-        # Lista de modelos a intentar en orden (actualizados a versiones 2024-2025)
-        models_to_try = [
-            preferred,
-            'gemini-2.5-flash',
-            'gemini-2.5-pro',
-            'gemini-2.0-flash',
-            'gemini-flash-latest',
-            'gemini-pro-latest',
-            'gemini-exp-1206'
-        ]
-        
-        # Eliminar duplicados manteniendo el orden
-        models_to_try = list(dict.fromkeys(models_to_try))
-        
-        last_error = None
-        for model_name in models_to_try:
-            try:
-                print(f"   Intentando modelo: {model_name}")
-                model = genai.GenerativeModel(model_name)
-                print(f"   ✅ Modelo seleccionado: {model_name}")
-                return model
-            except Exception as e:
-                last_error = e
-                print(f"   ⚠️ Modelo {model_name} no disponible: {e}")
-                continue
-        
-        # Si ninguno funciona, lanzar el último error
-        raise Exception(f"No se pudo cargar ningún modelo. Último error: {last_error}")
-    
     @staticmethod
     def extract_text(file_path: str) -> str:
         """
         Extrae texto de un archivo
         
         Soporta:
-        - TXT: lectura directa
+        - TXT/MD/DOCX: lector por párrafos (document_reader); el DOCX se lee
+          en streaming sin construir el documento completo
         - PDF: usa PDFExtractor si está disponible
-        - DOCX: usa python-docx si está instalado
         
         Args:
             file_path: Ruta al archivo
             
         Returns:
-            str: Texto extraído
+            str: Texto extraído (párrafos separados por una línea en blanco)
         """
         ext = os.path.splitext(file_path)[1].lower()
         
         print(f"📄 Extrayendo texto de {os.path.basename(file_path)} ({ext})")
         
-        # Archivo de texto plano
-        if ext in ['.txt', '.md']:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                text = f.read()
-                print(f"  ✅ Extraídos {len(text)} caracteres")
-                return text
-        
-        # Archivo PDF
-        elif ext == '.pdf':
+        # Archivo PDF (texto por páginas, igual que el resto de la plataforma)
+        if ext == '.pdf':
             if not PDF_AVAILABLE:
                 raise ValueError("PDFExtractor no disponible. Instala PyPDF2 o pdfplumber")
             
@@ -121,16 +84,11 @@ class WritingEvaluator:
             print(f"  ✅ Extraídos {len(text)} caracteres del PDF")
             return text
         
-        # Archivo DOCX
-        elif ext == '.docx':
-            try:
-                from docx import Document
-                doc = Document(file_path)
-                text = '\n'.join([para.text for para in doc.paragraphs])
-                print(f"  ✅ Extraídos {len(text)} caracteres del DOCX")
-                return text
-            except ImportError:
-                raise ValueError("python-docx no instalado. Usa: pip install python-docx")
+        # Texto plano, Markdown y DOCX
+        elif ext in document_reader.SUPPORTED_EXTENSIONS:
+            text = document_reader.read_text(file_path)
+            print(f"  ✅ Extraídos {len(text)} caracteres")
+            return text
         
         else:
             raise ValueError(f"Formato de archivo no soportado: {ext}")
@@ -147,75 +105,45 @@ class WritingEvaluator:
         - Promedio de palabras por oración
         - Vocabulario único
         - Palabras largas (>7 caracteres)
+        - Legibilidad (Flesch simplificado)
+        
+        Se calculan en una sola pasada (ver app.utils.text_metrics); el
+        resultado de un mismo texto se reutiliza entre llamadas.
         
         Args:
-            text: Texto a analizar
+            text: Texto a analizar (o iterable de fragmentos)
             
         Returns:
             dict: Métricas calculadas
         """
-        # Contar palabras
-        words = re.findall(r'\b\w+\b', text.lower())
-        word_count = len(words)
-        
-        # Contar oraciones (aproximado)
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        sentence_count = len(sentences)
-        
-        # Contar párrafos
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        paragraph_count = len(paragraphs)
-        
-        # Vocabulario único
-        unique_words = set(words)
-        vocabulary_size = len(unique_words)
-        
-        # Palabras largas (complejidad léxica)
-        long_words = [w for w in words if len(w) > 7]
-        long_word_count = len(long_words)
-        
-        # Promedio de palabras por oración
-        avg_words_per_sentence = word_count / sentence_count if sentence_count > 0 else 0
-        
-        # Índice de legibilidad (Flesch simplificado)
-        # Menor = más difícil, Mayor = más fácil
-        if sentence_count > 0 and word_count > 0:
-            avg_syllables = sum(WritingEvaluator._count_syllables(w) for w in words) / word_count
-            readability = 206.835 - 1.015 * avg_words_per_sentence - 84.6 * avg_syllables
-            readability = max(0, min(100, readability))  # Clamp entre 0-100
-        else:
-            readability = 50
-        
-        return {
-            'word_count': word_count,
-            'sentence_count': sentence_count,
-            'paragraph_count': paragraph_count,
-            'vocabulary_size': vocabulary_size,
-            'long_word_count': long_word_count,
-            'avg_words_per_sentence': round(avg_words_per_sentence, 2),
-            'vocabulary_richness': round(vocabulary_size / word_count * 100, 2) if word_count > 0 else 0,
-            'readability_score': round(readability, 2)
-        }
+        return compute_metrics(text)
     
     @staticmethod
-    def _count_syllables(word: str) -> int:
-        """Cuenta sílabas en una palabra (aproximado para español)"""
-        vowels = 'aeiouáéíóúü'
-        word = word.lower()
-        syllable_count = 0
-        previous_was_vowel = False
-        
-        for char in word:
-            is_vowel = char in vowels
-            if is_vowel and not previous_was_vowel:
-                syllable_count += 1
-            previous_was_vowel = is_vowel
-        
-        return max(1, syllable_count)  # Mínimo 1 sílaba
+    def check_style(text: str) -> List[Dict]:
+        """
+        Revisión local de ortografía y estilo (sin IA)
+        
+        Errores deterministas (tildes, faltas frecuentes, puntuación,
+        palabras duplicadas, muletillas, redundancias y expresiones
+        repetidas) con el formato de specific_errors.
+        
+        Args:
+            text: Texto a revisar
+            
+        Returns:
+            list: Errores en orden de párrafo
+        """
+        errors = style_checker.check_text(text)
+        print(f"  📝 Revisión local: {len(errors)} errores de ortografía y estilo")
+        return errors
     
     @staticmethod
-    def evaluate_with_ai(text: str, previous_text: Optional[str] = None) -> Dict:
+    def evaluate_with_ai(
+        text: str,
+        previous_text: Optional[str] = None,
+        revision: Optional[Dict] = None,
+        local_errors: Optional[List[Dict]] = None
+    ) -> Dict:
         """
         Evalúa el texto usando Gemini AI
         
@@ -229,22 +157,294 @@ class WritingEvaluator:
         - Sugerencias específicas de corrección
         - Comparación con versión anterior (si existe)
         
+        Con un plan de revisión (writing_revisions.plan_revision) solo se
+        envían los párrafos modificados y añadidos (y la lista de los
+        eliminados); si el documento no cambió no se llama a la IA.
+        
+        Los errores de la revisión local (check_style) se incluyen en
+        specific_errors aunque la IA falle, y el prompt le pide a la IA
+        solo lo que las reglas no pueden juzgar.
+        
         Args:
             text: Texto actual a evaluar
             previous_text: Texto de versión anterior (opcional)
+            revision: Plan de revisión incremental (opcional)
+            local_errors: Resultado de check_style (se calcula si no se pasa)
             
         Returns:
             dict: Reporte de evaluación con scores y recomendaciones detalladas
         """
+        if revision and writing_revisions.is_unchanged(revision):
+            print("♻️  Sin párrafos modificados: se reutiliza la evaluación anterior")
+            return writing_revisions.unchanged_evaluation(revision)
+        
+        if local_errors is None:
+            local_errors = WritingEvaluator.check_style(text)
+        
+        prompt = None
+        response_text = ''
         try:
             print("🤖 Evaluando con Gemini AI (Análisis Profundo)...")
             
-            WritingEvaluator._configure_gemini()
-            model = WritingEvaluator._get_model()
+            llm_client.configure()
+            
+            prompt = WritingEvaluator._build_prompt(text, previous_text, revision, local_errors)
+            
+            print("  🚀 Enviando a Gemini...")
+            response_text = prompt_cache.get_or_generate('writing.evaluate', prompt)
+            print(f"  ✅ Respuesta recibida: {len(response_text)} caracteres")
+            
+            evaluation = WritingEvaluator._parse_evaluation(response_text, local_errors)
+            return writing_revisions.merge_revision(evaluation, revision) if revision else evaluation
+        
+        except json.JSONDecodeError as e:
+            prompt_cache.forget('writing.evaluate', prompt)
+            print(f"❌ Error parseando JSON de Gemini: {e}")
+            print(f"Respuesta raw: {response_text[:500]}")
+            return WritingEvaluator._fallback_evaluation(text, previous_text, local_errors)
+        
+        except Exception as e:
+            print(f"❌ Error en evaluación con IA: {e}")
+            return WritingEvaluator._fallback_evaluation(text, previous_text, local_errors)
+    
+    @staticmethod
+    def evaluate_with_ai_stream(
+        text: str,
+        previous_text: Optional[str] = None,
+        revision: Optional[Dict] = None,
+        local_errors: Optional[List[Dict]] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Evalúa el texto con Gemini transmitiendo la respuesta (stream=True)
+        
+        Cada campo de primer nivel del JSON (scores, 'specific_errors',
+        'strengths', 'recommendations'...) se emite en cuanto se completa,
+        sin esperar al final de la respuesta.
+        
+        Args:
+            text: Texto actual a evaluar
+            previous_text: Texto de versión anterior (opcional)
+            revision: Plan de revisión incremental (opcional); los campos
+                emitidos son los de la respuesta parcial y la evaluación
+                final incluye lo reutilizado
+            local_errors: Resultado de check_style (se calcula si no se
+                pasa); la evaluación final los incluye en specific_errors
+            
+        Yields:
+            tuple: ('field', {'key', 'value'}) por cada campo completado y, al
+            final, ('evaluation', evaluación completa). Si la respuesta no es
+            válida, la evaluación final es la de fallback y reemplaza a los
+            campos ya emitidos.
+        """
+        if revision and writing_revisions.is_unchanged(revision):
+            yield 'evaluation', writing_revisions.unchanged_evaluation(revision)
+            return
+        
+        if local_errors is None:
+            local_errors = WritingEvaluator.check_style(text)
+        
+        prompt = None
+        response_text = ''
+        try:
+            print("🤖 Evaluando con Gemini AI en stream...")
+            
+            llm_client.configure()
+            prompt = WritingEvaluator._build_prompt(text, previous_text, revision, local_errors)
+            
+            parser = IncrementalJSONParser()
+            parts = []
+            for chunk in prompt_cache.stream_or_generate('writing.evaluate', prompt):
+                parts.append(chunk)
+                for key, value in parser.feed(chunk):
+                    yield 'field', {'key': key, 'value': value}
             
-            # Construir prompt según si hay comparación o no
-            if previous_text:
-                prompt = f"""
+            response_text = ''.join(parts)
+            print(f"  ✅ Respuesta recibida: {len(response_text)} caracteres")
+            evaluation = WritingEvaluator._parse_evaluation(response_text, local_errors)
+            if revision:
+                evaluation = writing_revisions.merge_revision(evaluation, revision)
+        
+        except json.JSONDecodeError as e:
+            prompt_cache.forget('writing.evaluate', prompt)
+            print(f"❌ Error parseando JSON de Gemini: {e}")
+            print(f"Respuesta raw: {response_text[:500]}")
+            evaluation = WritingEvaluator._fallback_evaluation(text, previous_text, local_errors)
+        
+        except Exception as e:
+            print(f"❌ Error en evaluación con IA: {e}")
+            evaluation = WritingEvaluator._fallback_evaluation(text, previous_text, local_errors)
+        
+        yield 'evaluation', evaluation
+    
+    @staticmethod
+    def _build_prompt(
+        text: str,
+        previous_text: Optional[str] = None,
+        revision: Optional[Dict] = None,
+        local_errors: Optional[List[Dict]] = None
+    ) -> str:
+        """Prompt de revisión incremental si hay plan; si no, el de evaluación completa"""
+        if revision:
+            return WritingEvaluator._build_revision_prompt(revision, local_errors)
+        return WritingEvaluator._build_evaluation_prompt(text, previous_text, local_errors)
+    
+    @staticmethod
+    def _local_errors_section(local_errors: Optional[List[Dict]]) -> str:
+        """
+        Sección del prompt con lo ya revisado por las reglas locales
+        
+        Lista los errores detectados (hasta PROMPT_LOCAL_ERRORS) para que la
+        IA no los repita y le indica que solo evalúe lo que las reglas no
+        pueden juzgar.
+        """
+        lines = [
+            f"- {error['type']}: \"{error['error']}\" → \"{error['correction']}\" ({error['location']})"
+            for error in (local_errors or [])[:PROMPT_LOCAL_ERRORS]
+        ]
+        if len(local_errors or []) > PROMPT_LOCAL_ERRORS:
+            lines.append(f"- ... y {len(local_errors) - PROMPT_LOCAL_ERRORS} más")
+        detected = '\n'.join(lines) if lines else '- (ninguno)'
+        return f"""REVISIÓN AUTOMÁTICA PREVIA (ya incluida en el informe, NO la repitas):
+{detected}
+La ortografía, las tildes, la puntuación, las palabras duplicadas, las muletillas, las redundancias
+y las expresiones repetidas ya se revisaron con reglas. En specific_errors reporta SOLO lo que las
+reglas no pueden juzgar: concordancia, tiempos verbales, régimen de preposiciones, ambigüedad,
+coherencia entre ideas y precisión léxica."""
+    
+    @staticmethod
+    def _build_revision_prompt(revision: Dict, local_errors: Optional[List[Dict]] = None) -> str:
+        """
+        Construye el prompt con solo los párrafos modificados y añadidos
+        
+        Incluye como contexto los scores, el resumen y las debilidades de la
+        evaluación anterior, los errores que tenía cada párrafo modificado
+        para que la IA valore si se corrigieron, los párrafos eliminados
+        (con su texto si se subió la versión anterior) y los errores que las
+        reglas locales detectaron en los párrafos mostrados.
+        """
+        base = revision['base']
+        entries = revision['entries']
+        changed_from = {new: old for old, new in revision['diff']['changed']}
+        
+        sections = []
+        for index in revision['pending']:
+            if index in changed_from:
+                previous_errors = revision['base_paragraphs'][changed_from[index]].get('errors') or []
+                label = 'MODIFICADO'
+                if previous_errors:
+                    label += ' | errores en la versión anterior: ' + '; '.join(
+                        f"{e.get('error', '')} → {e.get('correction', '')}" for e in previous_errors[:5]
+                    )
+            else:
+                label = 'NUEVO'
+            sections.append(f"[párrafo {index + 1}] ({label})\n{revision['paragraphs'][index]}")
+        changed_text = llm_client.trim_to_tokens('\n\n'.join(sections), writing_revisions.REVISION_INPUT_TOKENS) \
+            if sections else '(ninguno)'
+        
+        removed = []
+        previous_paragraphs = revision.get('previous_paragraphs')
+        for index in revision['diff']['removed']:
+            entry = revision['base_paragraphs'][index]
+            label = f"ELIMINADO | {(entry.get('metrics') or {}).get('word_count', 0)} palabras"
+            previous_errors = entry.get('errors') or []
+            if previous_errors:
+                label += ' | errores que tenía: ' + '; '.join(
+                    f"{e.get('error', '')} → {e.get('correction', '')}" for e in previous_errors[:5]
+                )
+            paragraph = previous_paragraphs[index] if previous_paragraphs else ''
+            removed.append(f"[párrafo {index + 1} anterior] ({label})" + (f"\n{paragraph}" if paragraph else ''))
+        removed_text = llm_client.trim_to_tokens('\n\n'.join(removed), writing_revisions.REVISION_INPUT_TOKENS // 3) \
+            if removed else '(ninguno)'
+        
+        previous = {
+            'overall_score': base.overall_score,
+            'grammar_score': base.grammar_score,
+            'coherence_score': base.coherence_score,
+            'vocabulary_score': base.vocabulary_score,
+            'structure_score': base.structure_score,
+            'summary': base.summary,
+            'weaknesses': base.weaknesses or []
+        }
+        diff = revision['diff']
+        pending = set(revision['pending'])
+        shown_errors = [error for error in local_errors or [] if style_checker.paragraph_of(error) in pending]
+        
+        return f"""
+Eres un profesor experto en redacción y escritura académica con enfoque en corrección detallada.
+
+TAREA: El estudiante revisó un escrito que ya evaluaste. El documento tiene ahora {len(entries)} párrafos:
+{len(diff['reused'])} sin cambios (conservan su evaluación), {len(diff['changed'])} modificados,
+{len(diff['added'])} nuevos y {len(diff['removed'])} eliminados. Solo se muestran los modificados y nuevos
+y la lista de los eliminados.
+
+EVALUACIÓN ANTERIOR DEL DOCUMENTO COMPLETO:
+{json.dumps(previous, ensure_ascii=False)}
+
+PÁRRAFOS MODIFICADOS Y NUEVOS (numeración de la versión actual):
+{changed_text}
+
+PÁRRAFOS ELIMINADOS (numeración de la versión anterior):
+{removed_text}
+
+{WritingEvaluator._local_errors_section(shown_errors)}
+
+FORMATO DE SALIDA (JSON):
+{{
+  "overall_score": 80,
+  "grammar_score": 85,
+  "coherence_score": 78,
+  "vocabulary_score": 80,
+  "structure_score": 82,
+  "improvement_percentage": 10,
+  "tone_analysis": "académico",
+  "formality_score": 80,
+  "complexity_level": "intermedio",
+  "specific_errors": [
+    {{
+      "type": "concordancia",
+      "error": "los datos muestra",
+      "correction": "los datos muestran",
+      "location": "párrafo 4",
+      "explanation": "El verbo debe concordar en plural con 'datos'"
+    }}
+  ],
+  "suggestions": [
+    {{"category": "coherencia", "suggestion": "...", "example": "...", "priority": "alta"}}
+  ],
+  "strengths": ["..."],
+  "weaknesses": ["..."],
+  "improvements_made": ["Corrigió el error de concordancia del párrafo 3"],
+  "recommendations": ["..."],
+  "summary": "..."
+}}
+
+REGLAS:
+1. Responde ÚNICAMENTE con el objeto JSON (sin ```json ni texto adicional)
+2. Scores del 0-100 para el DOCUMENTO COMPLETO: parte de la evaluación anterior y ajústala según los cambios
+3. specific_errors: SOLO errores de los párrafos mostrados no revisados por las reglas, con location "párrafo N" (numeración actual)
+4. improvements_made: mejoras concretas respecto a la versión anterior (errores corregidos, párrafos añadidos o eliminados)
+5. improvement_percentage: % de mejora respecto a la versión anterior
+6. strengths, weaknesses, recommendations y summary: del documento completo tras la revisión
+7. Sé MUY ESPECÍFICO y prioriza feedback ACCIONABLE
+
+GENERA LA EVALUACIÓN DE LA REVISIÓN:
+"""
+    
+    @staticmethod
+    def _build_evaluation_prompt(
+        text: str,
+        previous_text: Optional[str] = None,
+        local_errors: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Construye el prompt de evaluación (con o sin comparación)
+        
+        Los ejemplos y reglas de specific_errors se limitan a lo que la
+        revisión local no cubre.
+        """
+        local_section = WritingEvaluator._local_errors_section(local_errors)
+        if previous_text:
+            prompt = f"""
 Eres un profesor experto en redacción y escritura académica con enfoque en corrección detallada.
 
 TAREA: Evalúa el progreso del estudiante comparando dos versiones de su escrito. Proporciona análisis EXHAUSTIVO.
@@ -255,6 +455,8 @@ VERSIÓN ANTERIOR:
 VERSIÓN ACTUAL:
 {text[:3000]}
 
+{local_section}
+
 FORMATO DE SALIDA (JSON):
 {{
   "overall_score": 85,
@@ -269,13 +471,6 @@ FORMATO DE SALIDA (JSON):
   "complexity_level": "intermedio-avanzado",
   
   "specific_errors": [
-    {{
-      "type": "ortografía",
-      "error": "havía",
-      "correction": "había",
-      "location": "párrafo 2",
-      "explanation": "La 'h' es necesaria en el verbo haber"
-    }},
     {{
       "type": "concordancia",
       "error": "los datos muestra",
@@ -337,7 +532,7 @@ REGLAS:
 3. tone_analysis: formal/informal/académico/técnico/narrativo
 4. formality_score: 0-100 (0=muy informal, 100=muy formal)
 5. complexity_level: básico/intermedio/intermedio-avanzado/avanzado
-6. specific_errors: mínimo 3, máximo 10 errores más relevantes
+6. specific_errors: máximo 8 errores no revisados por las reglas (vacío si no hay)
 7. suggestions: mínimo 3 sugerencias prácticas con ejemplos
 8. improvement_percentage: % de mejora respecto a versión anterior
 9. Sé MUY ESPECÍFICO: localiza errores, da ejemplos concretos
@@ -345,8 +540,8 @@ REGLAS:
 
 GENERA LA EVALUACIÓN EXHAUSTIVA:
 """
-            else:
-                prompt = f"""
+        else:
+            prompt = f"""
 Eres un profesor experto en redacción y escritura académica con enfoque en corrección detallada.
 
 TAREA: Evalúa la calidad del siguiente escrito del estudiante. Proporciona análisis EXHAUSTIVO con todos los detalles.
@@ -354,6 +549,8 @@ TAREA: Evalúa la calidad del siguiente escrito del estudiante. Proporciona aná
 TEXTO A EVALUAR:
 {text[:4000]}
 
+{local_section}
+
 FORMATO DE SALIDA (JSON):
 {{
   "overall_score": 75,
@@ -367,20 +564,6 @@ FORMATO DE SALIDA (JSON):
   "complexity_level": "intermedio",
   
   "specific_errors": [
-    {{
-      "type": "ortografía",
-      "error": "aver",
-      "correction": "haber",
-      "location": "párrafo 1, línea 3",
-      "explanation": "'Haber' como verbo auxiliar siempre lleva 'h'"
-    }},
-    {{
-      "type": "puntuación",
-      "error": "...idea sin embargo...",
-      "correction": "...idea. Sin embargo, ...",
-      "location": "párrafo 2",
-      "explanation": "Los conectores entre oraciones requieren punto antes y coma después"
-    }},
     {{
       "type": "concordancia",
       "error": "el grupo de estudiantes participaron",
@@ -452,7 +635,7 @@ REGLAS:
 3. tone_analysis: formal/informal/académico/técnico/narrativo/persuasivo
 4. formality_score: 0-100 (0=muy informal, 100=muy formal)
 5. complexity_level: básico/intermedio/intermedio-avanzado/avanzado
-6. specific_errors: mínimo 3, máximo 12 errores concretos con ubicación
+6. specific_errors: máximo 10 errores no revisados por las reglas, con ubicación (vacío si no hay)
 7. suggestions: mínimo 4 sugerencias con ejemplos específicos
 8. Sé MUY ESPECÍFICO: localiza errores, da ejemplos de corrección
 9. En recommendations: mínimo 6 recomendaciones prácticas y accionables
@@ -460,68 +643,53 @@ REGLAS:
 
 GENERA LA EVALUACIÓN EXHAUSTIVA:
 """
-            
-            print("  🚀 Enviando a Gemini...")
-            response = model.generate_content(prompt)
-            print(f"  ✅ Respuesta recibida: {len(response.text)} caracteres")
-            
-            # Limpiar respuesta de marcadores de código
-            clean_text = response.text.strip()
-            
-            # Remover bloques de código markdown si existen
-            if clean_text.startswith("```"):
-                # Buscar el primer { y el último }
-                start = clean_text.find("{")
-                end = clean_text.rfind("}") + 1
-                if start != -1 and end > start:
-                    clean_text = clean_text[start:end]
-            
-            # Intentar parsear JSON
-            try:
-                evaluation = json.loads(clean_text)
-            except json.JSONDecodeError as e:
-                # Si falla, intentar reparar JSON común
-                print(f"⚠️  Error JSON, intentando reparar: {e}")
-                
-                # Buscar el JSON válido más largo
-                import re
-                json_match = re.search(r'\{[^}]*(?:\{[^}]*\}[^}]*)*\}', clean_text, re.DOTALL)
-                if json_match:
-                    clean_text = json_match.group(0)
-                    evaluation = json.loads(clean_text)
-                else:
-                    raise
-            
-            print(f"  ✅ Evaluación completada - Score: {evaluation.get('overall_score', 'N/A')}/100")
-            print(f"  📊 Errores detectados: {len(evaluation.get('specific_errors', []))}")
-            print(f"  💡 Sugerencias: {len(evaluation.get('suggestions', []))}")
-            print(f"  🎯 Tono: {evaluation.get('tone_analysis', 'N/A')}")
-            print(f"  📏 Formalidad: {evaluation.get('formality_score', 'N/A')}/100")
-            
-            return evaluation
         
-        except json.JSONDecodeError as e:
-            print(f"❌ Error parseando JSON de Gemini: {e}")
-            print(f"Respuesta raw: {response.text[:500]}")
-            return WritingEvaluator._fallback_evaluation(text, previous_text)
+        return prompt
+    
+    @staticmethod
+    def _parse_evaluation(response_text: str, local_errors: Optional[List[Dict]] = None) -> Dict:
+        """
+        Convierte la respuesta de Gemini en el diccionario de evaluación
         
-        except Exception as e:
-            print(f"❌ Error en evaluación con IA: {e}")
-            return WritingEvaluator._fallback_evaluation(text, previous_text)
+        specific_errors combina los errores de la revisión local con los de
+        la IA (sin duplicados, en orden de párrafo).
+        
+        Raises:
+            json.JSONDecodeError: Si la respuesta no contiene JSON válido
+        """
+        evaluation = parse_response(response_text, 'writing.evaluate')
+        evaluation['specific_errors'] = style_checker.merge_errors(local_errors, evaluation.get('specific_errors'))
+        
+        print(f"  ✅ Evaluación completada - Score: {evaluation.get('overall_score', 'N/A')}/100")
+        print(f"  📊 Errores detectados: {len(evaluation.get('specific_errors', []))}")
+        print(f"  💡 Sugerencias: {len(evaluation.get('suggestions', []))}")
+        print(f"  🎯 Tono: {evaluation.get('tone_analysis', 'N/A')}")
+        print(f"  📏 Formalidad: {evaluation.get('formality_score', 'N/A')}/100")
+        
+        return evaluation
     
     @staticmethod
-    def _fallback_evaluation(text: str, previous_text: Optional[str] = None) -> Dict:
+    def _fallback_evaluation(
+        text: str,
+        previous_text: Optional[str] = None,
+        local_errors: Optional[List[Dict]] = None
+    ) -> Dict:
         """
         Evaluación básica de fallback si Gemini falla
         
-        Usa métricas heurísticas simples.
+        Usa métricas heurísticas simples y los errores de la revisión local
+        (check_style) como specific_errors.
         """
         print("⚠️  Usando evaluación heurística de fallback")
         
         metrics = WritingEvaluator.calculate_basic_metrics(text)
+        if local_errors is None:
+            local_errors = WritingEvaluator.check_style(text)
         
-        # Calcular scores basados en métricas
-        grammar_score = min(100, metrics['readability_score'] + 20)
+        # Calcular scores basados en métricas (los errores locales restan por cada 100 palabras)
+        mechanical = sum(1 for error in local_errors if error.get('type') in FALLBACK_PENALIZED_TYPES)
+        penalty = min(40, mechanical * 500 / max(metrics['word_count'], 100))
+        grammar_score = max(0, min(100, metrics['readability_score'] + 20) - penalty)
         vocabulary_score = min(100, metrics['vocabulary_richness'] * 2)
         structure_score = 70 if metrics['paragraph_count'] >= 3 else 50
         coherence_score = 65
@@ -536,7 +704,7 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
             'tone_analysis': 'neutro',
             'formality_score': 50,
             'complexity_level': 'intermedio',
-            'specific_errors': [
+            'specific_errors': local_errors or [
                 {
                     'type': 'sistema',
                     'error': 'Análisis de IA no disponible',
@@ -567,7 +735,8 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
             'weaknesses': [
                 "Evaluación limitada (IA no disponible)",
                 "Se recomienda revisión manual completa",
-                "No se pudieron detectar errores específicos"
+                f"{len(local_errors)} errores de ortografía y estilo detectados por la revisión automática"
+                if local_errors else "La revisión automática no detectó errores de ortografía ni estilo"
             ],
             'recommendations': [
                 "Revisar gramática y ortografía manualmente",
@@ -604,7 +773,8 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
     def generate_report(
         current_file: str,
         previous_file: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        base_evaluation=None
     ) -> Dict:
         """
         Genera reporte completo de evaluación
@@ -612,14 +782,17 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
         Flujo:
         1. Extraer texto de archivo(s)
         2. Calcular métricas básicas
-        3. Evaluar con IA
-        4. Combinar resultados
-        5. Generar reporte final
+        3. Comparar por párrafos con la evaluación guardada (si hay)
+        4. Evaluar con IA (solo los párrafos que cambiaron, si es posible)
+        5. Combinar resultados
+        6. Generar reporte final
         
         Args:
             current_file: Ruta al archivo actual
             previous_file: Ruta al archivo anterior (opcional)
             metadata: Datos adicionales (user_id, course_id, etc.)
+            base_evaluation: WritingEvaluation de la versión anterior
+                (opcional); habilita la reevaluación incremental
             
         Returns:
             dict: Reporte completo con métricas, evaluación y recomendaciones
@@ -628,7 +801,82 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
         print("📊 GENERANDO REPORTE DE EVALUACIÓN DE ESCRITURA")
         print("=" * 80)
         
-        # 1. Extraer texto
+        # 1-3. Extraer texto, calcular métricas básicas y comparar con la evaluación guardada
+        current_text, previous_text, current_metrics, previous_metrics, revision = \
+            WritingEvaluator._extract_and_measure(current_file, previous_file, base_evaluation)
+        
+        # 4. Evaluar con IA
+        print(f"\n🤖 Evaluando calidad con IA...")
+        ai_evaluation = WritingEvaluator.evaluate_with_ai(current_text, previous_text, revision)
+        
+        # 5-6. Generar reporte final
+        report = WritingEvaluator._build_report(
+            current_file, current_metrics, previous_metrics, ai_evaluation, metadata,
+            text=current_text, revision=revision
+        )
+
+        print("\n" + "=" * 80)
+        print(f"✅ REPORTE GENERADO - Score General: {ai_evaluation.get('overall_score', 'N/A')}/100")
+        print("=" * 80)
+
+        return report
+    
+    @staticmethod
+    def generate_report_stream(
+        current_file: str,
+        previous_file: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        base_evaluation=None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Versión en stream de generate_report
+        
+        Emite eventos a medida que avanza la evaluación:
+        - ('metrics', {'current', 'previous'}) tras calcular las métricas
+        - ('local_errors', {'errors'}) con la revisión local, antes de
+          llamar a la IA
+        - ('field', {'key', 'value'}) por cada campo de la evaluación de IA
+        - ('report', reporte) con el mismo contenido que generate_report
+        
+        Args:
+            current_file: Ruta al archivo actual
+            previous_file: Ruta al archivo anterior (opcional)
+            metadata: Datos adicionales (user_id, course_id, etc.)
+            base_evaluation: WritingEvaluation de la versión anterior (opcional)
+        """
+        current_text, previous_text, current_metrics, previous_metrics, revision = \
+            WritingEvaluator._extract_and_measure(current_file, previous_file, base_evaluation)
+        yield 'metrics', {'current': current_metrics, 'previous': previous_metrics}
+        
+        local_errors = WritingEvaluator.check_style(current_text)
+        yield 'local_errors', {'errors': local_errors}
+        
+        ai_evaluation = None
+        for event, data in WritingEvaluator.evaluate_with_ai_stream(current_text, previous_text, revision, local_errors):
+            if event == 'evaluation':
+                ai_evaluation = data
+            else:
+                yield event, data
+        
+        yield 'report', WritingEvaluator._build_report(
+            current_file, current_metrics, previous_metrics, ai_evaluation, metadata,
+            text=current_text, revision=revision
+        )
+    
+    @staticmethod
+    def _extract_and_measure(
+        current_file: str,
+        previous_file: Optional[str] = None,
+        base_evaluation=None
+    ) -> Tuple[str, Optional[str], Dict, Optional[Dict], Optional[Dict]]:
+        """
+        Extrae el texto de los archivos, calcula sus métricas básicas y,
+        si hay evaluación guardada, prepara la revisión incremental
+        
+        Returns:
+            tuple: (texto actual, texto anterior, métricas actuales,
+                    métricas anteriores, plan de revisión o None)
+        """
         current_text = WritingEvaluator.extract_text(current_file)
         previous_text = None
         
@@ -636,7 +884,6 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
             print(f"\n📄 Comparando con versión anterior...")
             previous_text = WritingEvaluator.extract_text(previous_file)
         
-        # 2. Calcular métricas básicas
         print(f"\n📈 Calculando métricas básicas...")
         current_metrics = WritingEvaluator.calculate_basic_metrics(current_text)
         print(f"  ✅ Palabras: {current_metrics['word_count']}")
@@ -651,24 +898,51 @@ GENERA LA EVALUACIÓN EXHAUSTIVA:
             print(f"  Palabras: {previous_metrics['word_count']} → {current_metrics['word_count']}")
             print(f"  Vocabulario: {previous_metrics['vocabulary_size']} → {current_metrics['vocabulary_size']}")
         
-        # 3. Evaluar con IA
-        print(f"\n🤖 Evaluando calidad con IA...")
-        ai_evaluation = WritingEvaluator.evaluate_with_ai(current_text, previous_text)
+        revision = None
+        if base_evaluation is not None:
+            print(f"\n🔍 Comparando por párrafos con la evaluación #{base_evaluation.id}...")
+            revision = writing_revisions.plan_revision(current_text, base_evaluation, previous_text)
+            if revision and previous_metrics is None:
+                # Las métricas de la versión evaluada están guardadas: no hace falta el archivo
+                stored = (base_evaluation.additional_metrics or {}).get('current')
+                previous_metrics = stored if isinstance(stored, dict) else None
+        
+        return current_text, previous_text, current_metrics, previous_metrics, revision
+    
+    @staticmethod
+    def _build_report(
+        current_file: str,
+        current_metrics: Dict,
+        previous_metrics: Optional[Dict],
+        ai_evaluation: Dict,
+        metadata: Optional[Dict] = None,
+        text: Optional[str] = None,
+        revision: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Combina métricas y evaluación en el reporte final
+        
+        metrics['paragraphs'] guarda el índice por párrafo (hash, métricas
+        y errores) que permite reevaluar solo los cambios de la próxima
+        versión.
+        """
+        if revision:
+            paragraphs, entries = revision['paragraphs'], revision['entries']
+        else:
+            paragraphs, entries = writing_revisions.index_paragraphs(text or '')
+        writing_revisions.attribute_errors(paragraphs, entries, ai_evaluation.get('specific_errors'))
         
-        # 4. Generar reporte final
         report = {
             'evaluated_at': datetime.utcnow().isoformat(),
             'file_name': os.path.basename(current_file),
             'metrics': {
                 'current': current_metrics,
-                'previous': previous_metrics
+                'previous': previous_metrics,
+                'paragraphs': entries
             },
             'evaluation': ai_evaluation,
             'metadata': metadata or {}
         }
-        
-        print("\n" + "=" * 80)
-        print(f"✅ REPORTE GENERADO - Score General: {ai_evaluation.get('overall_score', 'N/A')}/100")
-        print("=" * 80)
-        
+        if revision:
+            report['revision'] = writing_revisions.revision_stats(revision)
         return report
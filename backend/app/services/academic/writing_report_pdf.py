@@ -0,0 +1,324 @@
+"""
+app/services/academic/writing_report_pdf.py - PDF de Evaluaciones de Escritura
+Plataforma Integral de Rendimiento Estudiantil
+
+Genera el reporte PDF de una WritingEvaluation y lo guarda en disco:
+
+- Los estilos de párrafo y de tabla se crean una sola vez por proceso.
+- La versión del PDF es un hash de los campos que se imprimen (más
+  TEMPLATE_VERSION): si la evaluación cambia, cambia la versión y el PDF
+  se vuelve a generar; las versiones anteriores se borran al generar la
+  nueva.
+- La versión sirve también de ETag: una descarga repetida con
+  If-None-Match responde 304 sin leer el archivo, y si no coincide se
+  envía el PDF ya generado.
+
+Configuración (variables de entorno):
+- WRITING_PDF_CACHE_DIR: carpeta de los PDFs generados (defecto
+  uploads/.writing_pdf_cache; vacío = generar en memoria en cada descarga)
+"""
+
+import os
+import glob
+import json
+import hashlib
+import threading
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Tuple
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+
+# Subir al cambiar el diseño del reporte (invalida los PDFs guardados)
+TEMPLATE_VERSION = 1
+
+MAX_ERRORS = 10
+MAX_SUGGESTIONS = 8
+
+
+@lru_cache(maxsize=1)
+def _styles() -> Dict:
+    """Estilos del reporte (se crean una vez por proceso)"""
+    sample = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=sample['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#4F46E5'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=sample['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#7C3AED'),
+            spaceAfter=12,
+            spaceBefore=20
+        ),
+        'normal': sample['Normal'],
+        'italic': sample['Italic'],
+        'info_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#EEF2FF')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+        'scores_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4F46E5')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'style_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#FEF3C7')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ])
+    }
+
+
+class WritingReportPDF:
+    """PDFs de evaluaciones de escritura guardados por evaluación y versión"""
+
+    def __init__(self, cache_dir: str = None):
+        """
+        Args:
+            cache_dir (str): Carpeta de los PDFs ('' = sin caché en disco)
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv(
+                'WRITING_PDF_CACHE_DIR',
+                os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), '.writing_pdf_cache')
+            )
+        # Ruta absoluta: send_file resuelve las relativas desde la carpeta de la app
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else ''
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Versión / ETag
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def version(evaluation) -> str:
+        """Hash de los campos impresos en el reporte (cambia si cambia la evaluación)"""
+        fields = [
+            TEMPLATE_VERSION,
+            evaluation.id,
+            evaluation.file_name,
+            evaluation.evaluated_at.isoformat() if evaluation.evaluated_at else None,
+            evaluation.word_count,
+            evaluation.overall_score,
+            evaluation.grammar_score,
+            evaluation.coherence_score,
+            evaluation.vocabulary_score,
+            evaluation.structure_score,
+            evaluation.tone_analysis,
+            evaluation.formality_score,
+            evaluation.complexity_level,
+            evaluation.strengths,
+            evaluation.weaknesses,
+            (evaluation.specific_errors or [])[:MAX_ERRORS],
+            (evaluation.suggestions or [])[:MAX_SUGGESTIONS],
+            evaluation.recommendations,
+            evaluation.summary
+        ]
+        payload = json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+    @staticmethod
+    def download_name(evaluation) -> str:
+        return f"evaluacion_{evaluation.id}_{evaluation.file_name.rsplit('.', 1)[0]}.pdf"
+
+    # ------------------------------------------------------------------
+    # Caché en disco
+    # ------------------------------------------------------------------
+
+    def get(self, evaluation) -> Tuple[object, str]:
+        """
+        PDF de la evaluación en su versión actual
+
+        Returns:
+            tuple: (ruta del PDF guardado, o BytesIO si no hay caché en
+            disco; versión)
+        """
+        version = self.version(evaluation)
+        if not self.cache_dir:
+            return BytesIO(self.render(evaluation)), version
+
+        path = self._path(evaluation.id, version)
+        if os.path.exists(path):
+            return path, version
+
+        # Una sola generación por evaluación aunque lleguen descargas simultáneas
+        with self._lock(evaluation.id):
+            if os.path.exists(path):
+                return path, version
+
+            content = self.render(evaluation)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self._remove_versions(evaluation.id, keep=path)
+
+        print(f"📄 PDF de la evaluación {evaluation.id} generado ({len(content) / 1024:.0f} KB)")
+        return path, version
+
+    def invalidate(self, evaluation_id: int):
+        """Borrar los PDFs guardados de una evaluación (al eliminarla)"""
+        self._remove_versions(evaluation_id)
+
+    def _path(self, evaluation_id: int, version: str) -> str:
+        return os.path.join(self.cache_dir, f"evaluation_{evaluation_id}_{version}.pdf")
+
+    def _remove_versions(self, evaluation_id: int, keep: str = None):
+        if not self.cache_dir:
+            return
+        for path in glob.glob(os.path.join(self.cache_dir, f"evaluation_{evaluation_id}_*.pdf")):
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _lock(self, evaluation_id: int) -> threading.Lock:
+        with self._locks_guard:
+            if len(self._locks) > 1000:
+                self._locks = {key: lock for key, lock in self._locks.items() if lock.locked()}
+            return self._locks.setdefault(evaluation_id, threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Generación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def render(evaluation) -> bytes:
+        """
+        Generar el PDF con información general, puntuaciones, estilo,
+        fortalezas, áreas de mejora, errores, sugerencias, recomendaciones
+        y resumen
+        """
+        styles = _styles()
+        heading_style = styles['heading']
+        normal_style = styles['normal']
+        italic_style = styles['italic']
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter,
+                                rightMargin=72, leftMargin=72,
+                                topMargin=72, bottomMargin=18)
+        elements = []
+
+        # Título
+        elements.append(Paragraph("Reporte de Evaluación de Escritura", styles['title']))
+        elements.append(Spacer(1, 12))
+
+        # Información general
+        info_data = [
+            ['Documento:', evaluation.file_name],
+            ['Fecha:', evaluation.evaluated_at.strftime('%d/%m/%Y %H:%M')],
+            ['Palabras:', str(evaluation.word_count)],
+            ['Score General:', f"{evaluation.overall_score}/100"]
+        ]
+        info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+        info_table.setStyle(styles['info_table'])
+        elements.append(info_table)
+        elements.append(Spacer(1, 20))
+
+        # Scores
+        elements.append(Paragraph("Puntuaciones Detalladas", heading_style))
+        scores_data = [
+            ['Aspecto', 'Puntuación'],
+            ['Gramática', f"{evaluation.grammar_score}/100"],
+            ['Coherencia', f"{evaluation.coherence_score}/100"],
+            ['Vocabulario', f"{evaluation.vocabulary_score}/100"],
+            ['Estructura', f"{evaluation.structure_score}/100"]
+        ]
+        scores_table = Table(scores_data, colWidths=[3*inch, 2*inch])
+        scores_table.setStyle(styles['scores_table'])
+        elements.append(scores_table)
+        elements.append(Spacer(1, 20))
+
+        # Análisis adicional
+        if evaluation.tone_analysis:
+            elements.append(Paragraph("Análisis de Estilo", heading_style))
+            style_data = [
+                ['Tono:', evaluation.tone_analysis],
+                ['Formalidad:', f"{evaluation.formality_score}/100" if evaluation.formality_score else 'N/A'],
+                ['Complejidad:', evaluation.complexity_level or 'N/A']
+            ]
+            style_table = Table(style_data, colWidths=[2*inch, 4*inch])
+            style_table.setStyle(styles['style_table'])
+            elements.append(style_table)
+            elements.append(Spacer(1, 20))
+
+        # Fortalezas
+        elements.append(Paragraph("✓ Fortalezas", heading_style))
+        for strength in evaluation.strengths:
+            elements.append(Paragraph(f"• {strength}", normal_style))
+        elements.append(Spacer(1, 15))
+
+        # Áreas de mejora
+        elements.append(Paragraph("⚠ Áreas de Mejora", heading_style))
+        for weakness in evaluation.weaknesses:
+            elements.append(Paragraph(f"• {weakness}", normal_style))
+        elements.append(Spacer(1, 15))
+
+        # Errores específicos (nueva página si es necesario)
+        if evaluation.specific_errors:
+            elements.append(PageBreak())
+            elements.append(Paragraph("Errores Específicos Detectados", heading_style))
+
+            for error in evaluation.specific_errors[:MAX_ERRORS]:
+                error_text = f"<b>{error.get('type', 'Error').upper()}:</b> {error.get('error', '')} → {error.get('correction', '')}"
+                elements.append(Paragraph(error_text, normal_style))
+
+                if error.get('explanation'):
+                    elements.append(Paragraph(f"<i>{error['explanation']}</i>", italic_style))
+                elements.append(Spacer(1, 10))
+
+        # Sugerencias
+        if evaluation.suggestions:
+            elements.append(Spacer(1, 15))
+            elements.append(Paragraph("💡 Sugerencias de Mejora", heading_style))
+
+            for suggestion in evaluation.suggestions[:MAX_SUGGESTIONS]:
+                sugg_text = f"<b>[{suggestion.get('category', 'General').upper()}]</b> {suggestion.get('suggestion', '')}"
+                elements.append(Paragraph(sugg_text, normal_style))
+
+                if suggestion.get('example'):
+                    elements.append(Paragraph(f"Ejemplo: <i>{suggestion['example']}</i>", italic_style))
+                elements.append(Spacer(1, 10))
+
+        # Recomendaciones
+        elements.append(PageBreak())
+        elements.append(Paragraph("Recomendaciones para Mejorar", heading_style))
+        for i, rec in enumerate(evaluation.recommendations, 1):
+            elements.append(Paragraph(f"{i}. {rec}", normal_style))
+            elements.append(Spacer(1, 8))
+
+        # Resumen final
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph("Resumen General", heading_style))
+        elements.append(Paragraph(evaluation.summary, normal_style))
+
+        doc.build(elements)
+        return buffer.getvalue()
+
+
+# Instancia global
+writing_report_pdf = WritingReportPDF()
@@ -0,0 +1,326 @@
+"""
+Revisiones Incrementales de Escritura
+=====================================
+
+Cuando un estudiante vuelve a evaluar un borrador ya evaluado, solo los
+párrafos nuevos o modificados se envían a la IA; los demás conservan las
+métricas y los errores de la evaluación guardada.
+
+Cada reporte guarda en additional_metrics['paragraphs'] un índice por
+párrafo: hash del contenido, métricas y errores específicos atribuidos a
+ese párrafo. En la siguiente versión:
+
+1. Se dividen ambos textos en párrafos y se comparan por hash
+   (difflib.SequenceMatcher): reutilizados, modificados, añadidos y
+   eliminados.
+2. Los párrafos sin cambios reutilizan métricas y errores (con la
+   ubicación actualizada a su nueva posición).
+3. Solo los modificados y añadidos van en el prompt, junto con los scores
+   y el resumen anteriores y la lista de párrafos eliminados como
+   contexto; la IA devuelve la evaluación global actualizada y los
+   errores de esos párrafos. Si solo se eliminaron párrafos también se
+   llama a la IA: los scores del documento completo pueden cambiar.
+4. Se combinan en una evaluación completa con el mismo esquema que la
+   evaluación de un solo prompt.
+
+Si cambió más de WRITING_INCREMENTAL_MAX_CHANGE de las palabras se evalúa
+el documento completo.
+"""
+
+import os
+import re
+import hashlib
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+from app.models.writing_evaluation import WritingEvaluation
+from app.utils.text_chunker import split_paragraphs
+from app.utils.text_metrics import TextMetrics
+
+
+# Fracción máxima de palabras modificadas para evaluar solo los cambios
+MAX_CHANGE_RATIO = float(os.getenv('WRITING_INCREMENTAL_MAX_CHANGE', 0.5))
+
+# Presupuesto de tokens de los párrafos modificados en el prompt de revisión
+REVISION_INPUT_TOKENS = int(os.getenv('WRITING_REVISION_INPUT_TOKENS', 3000))
+
+PARAGRAPH_METRICS = ('word_count', 'sentence_count', 'long_word_count', 'syllable_count', 'readability_score')
+
+_LOCATION = re.compile(r'p[áa]rrafo\s+(\d+)', re.IGNORECASE)
+
+
+def paragraph_hash(paragraph: str) -> str:
+    """Hash del contenido de un párrafo (ignora diferencias de espacios)"""
+    normalized = ' '.join(paragraph.split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def paragraph_metrics(paragraph: str) -> Dict:
+    """Métricas de un párrafo (subconjunto de TextMetrics)"""
+    metrics = TextMetrics().feed(paragraph).result()
+    return {key: metrics[key] for key in PARAGRAPH_METRICS}
+
+
+def index_paragraphs(text: str, base_entries: Optional[List[Dict]] = None) -> Tuple[List[str], List[Dict]]:
+    """
+    Dividir el texto en párrafos con su hash y métricas
+
+    Las métricas de los párrafos que ya estaban en base_entries (mismo hash)
+    se reutilizan en lugar de recalcularse.
+
+    Returns:
+        tuple: (párrafos, [{'index', 'hash', 'metrics', 'errors'}, ...])
+    """
+    known = {entry['hash']: entry.get('metrics') for entry in base_entries or [] if entry.get('metrics')}
+    paragraphs = split_paragraphs(text or '')
+    entries = []
+    for index, paragraph in enumerate(paragraphs):
+        digest = paragraph_hash(paragraph)
+        entries.append({
+            'index': index,
+            'hash': digest,
+            'metrics': known.get(digest) or paragraph_metrics(paragraph),
+            'errors': []
+        })
+    return paragraphs, entries
+
+
+def diff_paragraphs(base_entries: List[Dict], entries: List[Dict]) -> Dict[str, List]:
+    """
+    Comparar dos versiones por hash de párrafo
+
+    Returns:
+        dict: {
+            'reused': [(índice anterior, índice actual)],
+            'changed': [(índice anterior, índice actual)],
+            'added': [índice actual],
+            'removed': [índice anterior]
+        }
+    """
+    diff = {'reused': [], 'changed': [], 'added': [], 'removed': []}
+    matcher = SequenceMatcher(
+        None,
+        [entry['hash'] for entry in base_entries],
+        [entry['hash'] for entry in entries],
+        autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            diff['reused'].extend(zip(range(i1, i2), range(j1, j2)))
+        elif tag == 'replace':
+            pairs = min(i2 - i1, j2 - j1)
+            diff['changed'].extend(zip(range(i1, i1 + pairs), range(j1, j1 + pairs)))
+            diff['removed'].extend(range(i1 + pairs, i2))
+            diff['added'].extend(range(j1 + pairs, j2))
+        elif tag == 'delete':
+            diff['removed'].extend(range(i1, i2))
+        elif tag == 'insert':
+            diff['added'].extend(range(j1, j2))
+    return diff
+
+
+def attribute_errors(paragraphs: List[str], entries: List[Dict], errors: Optional[List]) -> List[Dict]:
+    """
+    Asignar cada error específico al párrafo que lo contiene
+
+    Se busca el fragmento erróneo en los párrafos; si no aparece, se usa la
+    ubicación "párrafo N". Los errores sin párrafo no se guardan en el
+    índice (no se pueden reutilizar con seguridad).
+
+    Returns:
+        list: entries con 'errors' rellenado
+    """
+    folded = [paragraph.casefold() for paragraph in paragraphs]
+    for entry in entries:
+        entry['errors'] = []
+
+    for error in errors or []:
+        if not isinstance(error, dict):
+            continue
+        index = None
+        snippet = str(error.get('error') or '').strip(' .…"\'').casefold()
+        if snippet:
+            index = next((i for i, paragraph in enumerate(folded) if snippet in paragraph), None)
+        if index is None:
+            match = _LOCATION.search(str(error.get('location') or ''))
+            if match and 0 < int(match.group(1)) <= len(entries):
+                index = int(match.group(1)) - 1
+        if index is not None:
+            entries[index]['errors'].append(error)
+    return entries
+
+
+def find_base_evaluation(
+    user_id: int,
+    file_name: str,
+    course_id: Optional[int] = None,
+    evaluation_id: Optional[int] = None
+) -> Optional[WritingEvaluation]:
+    """
+    Evaluación anterior de la que partir
+
+    La indicada explícitamente (del mismo usuario) o la más reciente del
+    mismo archivo y curso que tenga índice de párrafos.
+    """
+    if evaluation_id:
+        evaluation = WritingEvaluation.query.filter_by(id=evaluation_id, user_id=user_id).first()
+        return evaluation if evaluation and base_entries(evaluation) else None
+
+    query = WritingEvaluation.query.filter_by(user_id=user_id, file_name=file_name)
+    if course_id:
+        query = query.filter_by(course_id=course_id)
+    for evaluation in query.order_by(WritingEvaluation.evaluated_at.desc()).limit(5):
+        if base_entries(evaluation):
+            return evaluation
+    return None
+
+
+def base_entries(evaluation: WritingEvaluation) -> Optional[List[Dict]]:
+    """Índice de párrafos guardado en una evaluación (o None si es anterior a esta función)"""
+    metrics = evaluation.additional_metrics or {}
+    paragraphs = metrics.get('paragraphs') if isinstance(metrics, dict) else None
+    return paragraphs if isinstance(paragraphs, list) and paragraphs else None
+
+
+def plan_revision(
+    text: str,
+    base: Optional[WritingEvaluation],
+    previous_text: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Preparar la reevaluación incremental de text respecto a base
+
+    Args:
+        text: Texto actual
+        base: Evaluación guardada de la versión anterior
+        previous_text: Versión anterior subida explícitamente (opcional);
+            si no es la que se evaluó en base, no se usa base
+
+    Returns:
+        dict | None: Plan con párrafos, diff y errores reutilizados, o None
+        si hay que evaluar el documento completo
+    """
+    entries_before = base_entries(base) if base is not None else None
+    if not entries_before:
+        return None
+
+    previous_paragraphs = None
+    if previous_text:
+        previous_paragraphs, previous_entries = index_paragraphs(previous_text, entries_before)
+        if [e['hash'] for e in previous_entries] != [e['hash'] for e in entries_before]:
+            print("  ℹ️  La versión anterior subida no coincide con la evaluación guardada; evaluación completa")
+            return None
+
+    paragraphs, entries = index_paragraphs(text, entries_before)
+    diff = diff_paragraphs(entries_before, entries)
+
+    total_words = sum(entry['metrics']['word_count'] for entry in entries) or 1
+    pending = [new for _, new in diff['changed']] + diff['added']
+    changed_words = sum(entries[i]['metrics']['word_count'] for i in pending)
+    change_ratio = changed_words / total_words
+    if pending and change_ratio > MAX_CHANGE_RATIO:
+        print(f"  ℹ️  Cambió el {change_ratio:.0%} del texto; evaluación completa")
+        return None
+
+    # Errores de los párrafos sin cambios, con la ubicación en la versión actual
+    reused_errors = []
+    for old, new in diff['reused']:
+        for error in entries_before[old].get('errors') or []:
+            location = str(error.get('location') or '')
+            location = _LOCATION.sub(f'párrafo {new + 1}', location) if _LOCATION.search(location) else f'párrafo {new + 1}'
+            relocated = dict(error, location=location)
+            reused_errors.append((new, relocated))
+
+    print(f"  ♻️  Revisión incremental: {len(diff['reused'])} párrafos reutilizados, "
+          f"{len(diff['changed'])} modificados, {len(diff['added'])} añadidos, {len(diff['removed'])} eliminados")
+
+    return {
+        'base': base,
+        'base_paragraphs': entries_before,
+        'previous_paragraphs': previous_paragraphs,
+        'paragraphs': paragraphs,
+        'entries': entries,
+        'diff': diff,
+        'pending': sorted(pending),
+        'reused_errors': reused_errors,
+        'change_ratio': round(change_ratio, 4),
+        'changed_words': changed_words,
+        'total_words': total_words
+    }
+
+
+def revision_stats(plan: Dict) -> Dict:
+    """Resumen de la revisión para el reporte"""
+    diff = plan['diff']
+    return {
+        'base_evaluation_id': plan['base'].id,
+        'paragraphs': len(plan['entries']),
+        'reused': len(diff['reused']),
+        'changed': len(diff['changed']),
+        'added': len(diff['added']),
+        'removed': len(diff['removed']),
+        'reanalyzed_words': plan['changed_words'],
+        'total_words': plan['total_words'],
+        'change_ratio': plan['change_ratio']
+    }
+
+
+def is_unchanged(plan: Dict) -> bool:
+    """True si el documento tiene los mismos párrafos que la versión evaluada"""
+    return not plan['pending'] and not plan['diff']['removed']
+
+
+def unchanged_evaluation(plan: Dict) -> Dict:
+    """Evaluación de un documento idéntico al ya evaluado (sin llamar a la IA)"""
+    base = plan['base']
+    return {
+        'overall_score': base.overall_score,
+        'grammar_score': base.grammar_score,
+        'coherence_score': base.coherence_score,
+        'vocabulary_score': base.vocabulary_score,
+        'structure_score': base.structure_score,
+        'tone_analysis': base.tone_analysis,
+        'formality_score': base.formality_score,
+        'complexity_level': base.complexity_level,
+        'improvement_percentage': 0,
+        'improvements_made': ["Sin cambios en el contenido respecto a la versión evaluada"],
+        'specific_errors': [error for _, error in plan['reused_errors']],
+        'suggestions': base.suggestions or [],
+        'strengths': base.strengths or [],
+        'weaknesses': base.weaknesses or [],
+        'recommendations': base.recommendations or [],
+        'summary': base.summary
+    }
+
+
+def merge_revision(evaluation: Dict, plan: Dict) -> Dict:
+    """
+    Combinar la evaluación de los párrafos modificados con lo reutilizado
+
+    Los scores, listas y resumen vienen de la respuesta (la IA los
+    actualiza con la evaluación anterior como contexto); los errores
+    específicos son los reutilizados más los nuevos, en orden de párrafo.
+    """
+    base = plan['base']
+    pending = set(plan['pending'])
+
+    new_errors = []
+    for error in evaluation.get('specific_errors') or []:
+        if not isinstance(error, dict):
+            continue
+        match = _LOCATION.search(str(error.get('location') or ''))
+        index = int(match.group(1)) - 1 if match else None
+        # Un error nuevo en un párrafo sin cambios sería una reevaluación de lo ya revisado
+        if index is not None and index not in pending and 0 <= index < len(plan['entries']):
+            continue
+        new_errors.append((index if index is not None else len(plan['entries']), error))
+
+    merged_errors = sorted(plan['reused_errors'] + new_errors, key=lambda item: item[0])
+
+    for field in ('strengths', 'weaknesses', 'recommendations', 'suggestions'):
+        if not evaluation.get(field):
+            evaluation[field] = getattr(base, field) or []
+    for field in ('tone_analysis', 'formality_score', 'complexity_level'):
+        if evaluation.get(field) is None:
+            evaluation[field] = getattr(base, field)
+    evaluation['specific_errors'] = [error for _, error in merged_errors]
+    return evaluation
@@ -4,7 +4,10 @@
 """
 Servicios de IA
 """
+from app.services.ai.rate_limiter import admission_controller
+from app.services.ai.llm_client import llm_client
+from app.services.ai.prompt_cache import prompt_cache
 from app.services.ai.gemini_service import gemini_service
 
-__all__ = ['gemini_service']
+__all__ = ['admission_controller', 'llm_client', 'prompt_cache', 'gemini_service']
 
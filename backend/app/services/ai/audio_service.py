@@ -4,11 +4,15 @@
 import speech_recognition as sr
 from pydub import AudioSegment
 import os
+from app.services.audio_processing.recognizers import get_recognizer_backend
+from app.utils import text_scoring
 
 class AudioService:
     def __init__(self):
         self.recognizer = sr.Recognizer()
         self.language = 'es-ES'  # Español
+        # Backend de reconocimiento (SPEECH_RECOGNIZER_BACKEND)
+        self.backend = get_recognizer_backend(language=self.language)
 
     def transcribe(self, audio_file_path):
         """
@@ -48,17 +52,15 @@ class AudioService:
                     'success': False
                 }
 
-            # Transcribir con Google Speech Recognition
+            # Transcribir con el backend configurado
             try:
-                text = self.recognizer.recognize_google(
-                    audio_data,
-                    language=self.language
-                )
+                result = self.backend.recognize(audio_data)
                 
                 return {
-                    'text': text,
-                    'confidence': 0.85,  # Google no devuelve confidence
+                    'text': result['text'],
+                    'confidence': result['confidence'] or 0,
                     'language': self.language,
+                    'backend': result['backend'],
                     'success': True
                 }
 
@@ -104,14 +106,9 @@ class AudioService:
         Analiza el sentimiento de un texto
         (Simplificado, puedes mejorarlo con Gemini)
         """
-        # Palabras positivas y negativas (simplificado)
-        positive_words = ['bien', 'bueno', 'excelente', 'feliz', 'genial', 'perfecto']
-        negative_words = ['mal', 'malo', 'triste', 'horrible', 'terrible', 'pésimo']
-
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        result = text_scoring.score_sentiment(text_scoring.tokenize(text), text_scoring.SERVICE_LEXICON)
+        positive_count = result['positive_count']
+        negative_count = result['negative_count']
 
         if positive_count > negative_count:
             return {'sentiment': 'positive', 'score': 0.7}
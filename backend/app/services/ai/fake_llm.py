@@ -0,0 +1,480 @@
+"""
+app/services/ai/fake_llm.py - Proveedor LLM Simulado
+Plataforma Integral de Rendimiento Estudiantil
+
+Sustituto local y determinista de Gemini para pruebas de carga, CI y
+regresión sin red ni GEMINI_API_KEY. Se activa con LLM_PROVIDER=fake:
+LLMClient entrega FakeGenerativeModel en lugar de genai.GenerativeModel,
+así que todas las rutas que usan el cliente compartido (GeminiService,
+WritingEvaluator, SyllabusProcessor, StudyToolsService, ReportService)
+funcionan sin cambios, incluidos caché, admisión, reintentos y registro.
+
+Configuración (variables de entorno):
+- LLM_FAKE_LATENCY: distribución de latencia por llamada
+    'lognormal:<mediana_ms>:<p95_ms>' (defecto 'lognormal:800:3000'),
+    'uniform:<min_ms>:<max_ms>', 'fixed:<ms>' o 'normal:<media_ms>:<desv_ms>'
+- LLM_FAKE_ERRORS: probabilidad de cada fallo inyectado, p. ej.
+    '429:0.05,500:0.02,timeout:0.01,malformed:0.03'
+- LLM_FAKE_TIMEOUT_MS: espera antes de un error de timeout (defecto 10000)
+- LLM_FAKE_SEED: semilla (misma semilla y mismo orden de llamadas ->
+    mismas latencias, errores y respuestas)
+
+Las respuestas son JSON válido según app.utils.response_schemas para cada
+tipo de prompt, detectado por los campos que el prompt pide.
+"""
+
+import os
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# ----------------------------------------------------------------------
+# Errores con los mismos nombres que google.api_core.exceptions (LLMClient
+# los clasifica por nombre de clase)
+# ----------------------------------------------------------------------
+
+class ResourceExhausted(Exception):
+    """429 simulado"""
+
+
+class InternalServerError(Exception):
+    """500 simulado"""
+
+
+class DeadlineExceeded(Exception):
+    """Timeout simulado"""
+
+
+ERROR_KINDS = ('429', '500', 'timeout', 'malformed')
+
+
+def parse_latency(spec: str) -> Tuple[str, Tuple[float, ...]]:
+    """
+    Interpretar LLM_FAKE_LATENCY
+
+    Returns:
+        tuple: (distribución, parámetros en ms)
+
+    Raises:
+        ValueError: Si la especificación no es válida
+    """
+    name, *params = spec.strip().lower().split(':')
+    expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+    if name not in expected or len(params) != expected[name]:
+        raise ValueError(f"LLM_FAKE_LATENCY inválida: '{spec}'")
+    return name, tuple(float(p) for p in params)
+
+
+def parse_errors(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Interpretar LLM_FAKE_ERRORS ('429:0.05,500:0.02,...')
+
+    Raises:
+        ValueError: Si hay tipos desconocidos o probabilidades fuera de rango
+    """
+    rates = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        kind, _, rate = item.strip().partition(':')
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"Tipo de error simulado desconocido: '{kind}' (use {', '.join(ERROR_KINDS)})")
+        rates[kind] = float(rate)
+    if sum(rates.values()) > 1:
+        raise ValueError("La suma de probabilidades de LLM_FAKE_ERRORS no puede superar 1")
+    return rates
+
+
+# ----------------------------------------------------------------------
+# Respuestas de ejemplo por tipo de prompt
+# ----------------------------------------------------------------------
+
+def _scores(rng: random.Random, *fields: str) -> Dict[str, int]:
+    return {field: rng.randint(55, 95) for field in fields}
+
+
+def _writing_evaluation(rng, prompt):
+    return {
+        **_scores(rng, 'overall_score', 'grammar_score', 'coherence_score', 'vocabulary_score', 'structure_score'),
+        'improvement_percentage': rng.randint(0, 20) if 'VERSIÓN ANTERIOR' in prompt else 0,
+        'tone_analysis': 'Formal y académico',
+        'formality_score': rng.randint(60, 90),
+        'complexity_level': rng.choice(['básico', 'intermedio', 'avanzado']),
+        'specific_errors': [{
+            'type': 'ortografía', 'error': 'havía', 'correction': 'había',
+            'location': 'párrafo 2', 'explanation': 'El verbo haber se escribe con h y sin v'
+        }],
+        'strengths': ['Ideas bien organizadas', 'Vocabulario variado'],
+        'weaknesses': ['Oraciones extensas', 'Conectores repetidos'],
+        'recommendations': ['Dividir oraciones largas', 'Variar los conectores'],
+        'suggestions': ['Revisar la puntuación del segundo párrafo'],
+        'summary': 'El texto es claro y coherente; mejora con oraciones más breves.'
+    }
+
+
+def _mind_map(rng, prompt):
+    branches = ['Conceptos básicos', 'Procesos', 'Aplicaciones', 'Ejemplos', 'Evaluación']
+    return {
+        'root': 'Tema central',
+        'children': [
+            {'name': name, 'children': [
+                {'name': f'{name} {i}', 'children': [{'name': f'Detalle {i}.{j}'} for j in range(1, 3)]}
+                for i in range(1, rng.randint(2, 4))
+            ]}
+            for name in branches[:rng.randint(3, 5)]
+        ]
+    }
+
+
+def _timeline(rng, prompt):
+    count = rng.randint(4, 6)
+    return {
+        'title': 'Plan de trabajo',
+        'type': 'academic',
+        'milestones': [{
+            'id': i, 'title': f'Fase {i}', 'description': 'Actividades de la fase',
+            'duration': f'{rng.randint(1, 3)} semanas', 'dependencies': [i - 1] if i > 1 else [],
+            'tasks': ['Investigar', 'Redactar'], 'order': i
+        } for i in range(1, count + 1)],
+        'estimated_total_time': f'{count * 2} semanas',
+        'recommendations': ['Empezar con anticipación', 'Revisar avances semanalmente']
+    }
+
+
+def _study_syllabus(rng, prompt):
+    return {
+        'course_info': {'name': 'Curso', 'description': 'Descripción del curso', 'credits': '4', 'prerequisites': []},
+        'topics': [{
+            'id': i, 'name': f'Tema {i}', 'week': f'Semana {i}', 'description': 'Contenido del tema',
+            'subtopics': ['Subtema A', 'Subtema B'], 'dependencies': [i - 1] if i > 1 else [],
+            'difficulty': rng.choice(['Baja', 'Media', 'Alta'])
+        } for i in range(1, rng.randint(4, 8))],
+        'learning_path': {'foundational_topics': ['Tema 1'], 'intermediate_topics': ['Tema 2'], 'advanced_topics': ['Tema 3']},
+        'dependencies_map': [{'topic': 'Tema 3', 'requires': ['Tema 1', 'Tema 2'], 'reason': 'Usa sus conceptos'}],
+        'study_recommendations': ['Repasar cada semana'],
+        'estimated_weekly_hours': '6',
+        'assessment_methods': ['Examen parcial', 'Proyecto final'],
+        'key_dates': [{'date': 'Semana 8', 'event': 'Examen parcial', 'description': 'Temas 1-4'}]
+    }
+
+
+def _syllabus_process(rng, prompt):
+    return {
+        'course_info': {'professor': 'Docente', 'credits': '4', 'schedule': 'Lunes 8:00', 'department': 'Ciencias'},
+        'topics': [{'name': f'Tema {i}', 'description': 'Contenido del tema'} for i in range(1, rng.randint(3, 7))],
+        'tasks': [
+            {'title': 'Tarea 1', 'type': 'tarea', 'date': '2025-12-15', 'priority': 'alta'},
+            {'title': 'Examen Parcial', 'type': 'examen', 'date': '2025-12-20', 'priority': 'critica'}
+        ]
+    }
+
+
+def _text_analysis(rng, prompt):
+    return {
+        **_scores(rng, 'writing_quality_score', 'coherence_score', 'cohesion_score',
+                  'sentence_complexity_score', 'readability_score'),
+        'academic_level': rng.choice(['básico', 'intermedio', 'avanzado']),
+        'main_topics': ['Metodología', 'Resultados'],
+        'key_concepts': ['Hipótesis', 'Variables'],
+        'technical_terms': ['Muestra', 'Correlación'],
+        'strengths': ['Buena estructura'],
+        'weaknesses': ['Pocas referencias'],
+        'recommendations': ['Ampliar la discusión'],
+        'summary': 'Texto académico con estructura adecuada.'
+    }
+
+
+def _sentiment(rng, prompt):
+    score = rng.randint(-60, 80)
+    return {
+        'sentiment': 'positive' if score > 20 else 'negative' if score < -20 else 'neutral',
+        'sentiment_score': score,
+        'emotions_detected': ['interés'],
+        'confidence': rng.randint(60, 95),
+        'keywords': ['clase', 'tema'],
+        'summary': 'Tono general del texto.'
+    }
+
+
+def _segment_sentiment(rng, prompt):
+    ids = [int(i) for i in re.findall(r'"id":\s*(\d+)', prompt)]
+    return [{
+        'segment_id': segment_id,
+        'sentiment': rng.choice(['positive', 'neutral', 'negative']),
+        'sentiment_score': rng.randint(-80, 80),
+        'keywords': ['tema']
+    } for segment_id in ids]
+
+
+def _profile(rng, prompt):
+    return {
+        'profile_summary': 'Estudiante constante con buen desempeño en escritura.',
+        'personalized_advice': ['Mantener sesiones de estudio cortas', 'Practicar exposiciones orales']
+    }
+
+
+def _report(rng, prompt):
+    return {
+        'executive_summary': 'El estudiante muestra un progreso sostenido.',
+        'main_insights': ['Mejora en coherencia', 'Atención estable'],
+        'detailed_analysis': 'Análisis detallado del periodo.',
+        'key_recommendations': ['Reforzar vocabulario técnico'],
+        'areas_of_excellence': ['Organización'],
+        'areas_for_improvement': ['Puntuación'],
+        'action_plan': ['Semana 1: repaso', 'Semana 2: práctica']
+    }
+
+
+def _audio_summary(rng, prompt):
+    return {
+        'temas_principales': ['Tema de la sesión'],
+        'puntos_clave': ['Punto clave 1', 'Punto clave 2'],
+        'dudas': [],
+        'nivel_comprension': rng.choice(['bajo', 'medio', 'alto']),
+        'recomendaciones': ['Repasar las notas']
+    }
+
+
+def _presentation(rng, prompt):
+    match = re.search(r'presentación de (\d+) slides', prompt)
+    count = int(match.group(1)) if match else 5
+    return '\n'.join(
+        f"Slide {i}: Título {i} | Punto 1 | Punto 2 | Punto 3 | Diagrama" for i in range(1, count + 1)
+    )
+
+
+def _summary(rng, prompt):
+    return (
+        "## Resumen\n\n"
+        "• **Idea principal**: síntesis del texto.\n"
+        "• **Conceptos clave**: definiciones y relaciones.\n"
+        "• **Conclusión**: puntos a repasar."
+    )
+
+
+# (detector, generador). Se usa el primero cuyo detector coincide.
+PROMPT_TYPES = (
+    ('segment_sentiment', lambda p: '"segment_id"' in p, _segment_sentiment),
+    ('writing.evaluate', lambda p: '"overall_score"' in p, _writing_evaluation),
+    ('study_tools.mind_map', lambda p: '"root"' in p, _mind_map),
+    ('study_tools.timeline', lambda p: '"milestones"' in p, _timeline),
+    ('study_tools.syllabus', lambda p: '"learning_path"' in p, _study_syllabus),
+    ('syllabus.process', lambda p: '"tasks"' in p and '"course_info"' in p, _syllabus_process),
+    ('text_analysis', lambda p: '"writing_quality_score"' in p, _text_analysis),
+    ('sentiment_analysis', lambda p: '"sentiment"' in p, _sentiment),
+    ('profile_generation', lambda p: 'profile_summary' in p, _profile),
+    ('report_generation', lambda p: 'executive_summary' in p, _report),
+    ('audio_summary', lambda p: 'temas_principales' in p, _audio_summary),
+    ('presentation', lambda p: 'Slide N:' in p, _presentation),
+)
+
+
+def canned_response(prompt: str, rng: random.Random) -> Tuple[str, str]:
+    """
+    Respuesta de ejemplo para un prompt
+
+    Returns:
+        tuple: (tipo de prompt, texto de la respuesta)
+    """
+    for prompt_type, detect, generate in PROMPT_TYPES:
+        if detect(prompt):
+            value = generate(rng, prompt)
+            text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, indent=2)
+            return prompt_type, text
+    return 'text', _summary(rng, prompt)
+
+
+def malform(text: str, rng: random.Random) -> str:
+    """Estropear un JSON como lo hacen los modelos (truncado, comas, prosa)"""
+    choice = rng.choice(('truncate', 'trailing_comma', 'prose', 'fence'))
+    if choice == 'truncate':
+        return text[:max(1, int(len(text) * rng.uniform(0.3, 0.9)))]
+    if choice == 'trailing_comma':
+        return re.sub(r'(["\d\]}])(\s*[}\]])', r'\1,\2', text, count=2)
+    if choice == 'prose':
+        return "Lo siento, no puedo generar ese formato en este momento."
+    return f"Aquí tienes el resultado:\n```json\n{text}\n```\nEspero que te sirva."
+
+
+# ----------------------------------------------------------------------
+# Modelo simulado (misma interfaz que genai.GenerativeModel)
+# ----------------------------------------------------------------------
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = completion_tokens
+        self.total_token_count = prompt_tokens + completion_tokens
+
+
+class FakeResponse:
+    """Respuesta con .text y .usage_metadata (o iterable de fragmentos en stream)"""
+
+    def __init__(self, text: str, prompt_tokens: int, chunks: Optional[List[Tuple[str, float]]] = None):
+        self.text = text
+        self.usage_metadata = _Usage(prompt_tokens, len(text) // 4)
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator['FakeResponse']:
+        for text, delay in self._chunks or [(self.text, 0.0)]:
+            if delay:
+                time.sleep(delay)
+            yield _Chunk(text)
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _TokenCount:
+    def __init__(self, total_tokens: int):
+        self.total_tokens = total_tokens
+
+
+class FakeGenerativeModel:
+    """Sustituto de genai.GenerativeModel para LLM_PROVIDER=fake"""
+
+    def __init__(self, model_name: str, provider: 'FakeLLMProvider'):
+        self.model_name = f'models/{model_name}'
+        self._provider = provider
+
+    def generate_content(self, prompt: Any, generation_config: Any = None, stream: bool = False, **kwargs):
+        prompt_text = _prompt_text(prompt)
+        latency, error, text = self._provider.plan(prompt_text)
+        prompt_tokens = len(prompt_text) // 4
+
+        if not stream:
+            time.sleep(latency)
+            self._provider.raise_if_error(error)
+            return FakeResponse(text, prompt_tokens)
+
+        # Primer token a mitad de la latencia; el resto repartido entre fragmentos
+        time.sleep(latency / 2)
+        self._provider.raise_if_error(error)
+        pieces = [text[i:i + 40] for i in range(0, len(text), 40)] or ['']
+        delay = latency / 2 / len(pieces)
+        return FakeResponse(text, prompt_tokens, [(piece, delay) for piece in pieces])
+
+    async def generate_content_async(self, prompt: Any, generation_config: Any = None, **kwargs):
+        prompt_text = _prompt_text(prompt)
+        latency, error, text = self._provider.plan(prompt_text)
+        await asyncio.sleep(latency)
+        self._provider.raise_if_error(error)
+        return FakeResponse(text, len(prompt_text) // 4)
+
+    def count_tokens(self, prompt: Any) -> _TokenCount:
+        return _TokenCount(len(_prompt_text(prompt)) // 4)
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, (list, tuple)):
+        return '\n'.join(part for part in prompt if isinstance(part, str))
+    return str(prompt)
+
+
+class FakeLLMProvider:
+    """
+    Decide latencia, error y respuesta de cada llamada con un RNG sembrado
+    """
+
+    def __init__(
+        self,
+        latency: Optional[str] = None,
+        errors: Optional[str] = None,
+        seed: Optional[int] = None,
+        timeout_ms: Optional[float] = None
+    ):
+        """
+        Inicializar proveedor
+
+        Args:
+            latency (str): Ver LLM_FAKE_LATENCY
+            errors (str): Ver LLM_FAKE_ERRORS
+            seed (int): Ver LLM_FAKE_SEED
+            timeout_ms (float): Ver LLM_FAKE_TIMEOUT_MS
+        """
+        self.latency = parse_latency(latency or os.getenv('LLM_FAKE_LATENCY', 'lognormal:800:3000'))
+        self.error_rates = parse_errors(errors if errors is not None else os.getenv('LLM_FAKE_ERRORS'))
+        self.seed = seed if seed is not None else int(os.getenv('LLM_FAKE_SEED', 42))
+        self.timeout_ms = timeout_ms or float(os.getenv('LLM_FAKE_TIMEOUT_MS', 10000))
+
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, **{kind: 0 for kind in ERROR_KINDS}}
+        self._by_type = {}
+
+    def get_model(self, model_name: str) -> FakeGenerativeModel:
+        return FakeGenerativeModel(model_name, self)
+
+    def plan(self, prompt: str) -> Tuple[float, Optional[str], str]:
+        """
+        Latencia (s), error a inyectar y texto de la respuesta de una llamada
+
+        Todo se decide bajo el mismo lock para que la secuencia sea
+        reproducible con la misma semilla.
+        """
+        with self._lock:
+            latency = self._sample_latency()
+            error = self._sample_error()
+            prompt_type, text = canned_response(prompt, self._rng)
+            if error == 'malformed':
+                text = malform(text, self._rng)
+            elif error == 'timeout':
+                latency = self.timeout_ms / 1000
+
+            self._counters['calls'] += 1
+            if error:
+                self._counters[error] += 1
+            self._by_type[prompt_type] = self._by_type.get(prompt_type, 0) + 1
+        return latency, error, text
+
+    @staticmethod
+    def raise_if_error(error: Optional[str]):
+        if error == '429':
+            raise ResourceExhausted("429 Resource has been exhausted (simulado). Please retry in 1s")
+        if error == '500':
+            raise InternalServerError("500 Internal error encountered (simulado)")
+        if error == 'timeout':
+            raise DeadlineExceeded("504 Deadline Exceeded (simulado)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                'by_prompt_type': dict(self._by_type),
+                'latency': {'distribution': self.latency[0], 'params_ms': list(self.latency[1])},
+                'error_rates': dict(self.error_rates),
+                'seed': self.seed
+            }
+
+    def _sample_latency(self) -> float:
+        name, params = self.latency
+        if name == 'fixed':
+            ms = params[0]
+        elif name == 'uniform':
+            ms = self._rng.uniform(*params)
+        elif name == 'normal':
+            ms = self._rng.gauss(*params)
+        else:
+            median, p95 = params
+            sigma = math.log(max(p95, median + 1) / median) / 1.645 if median > 0 else 0
+            ms = self._rng.lognormvariate(math.log(max(median, 1)), sigma)
+        return max(ms, 0) / 1000
+
+    def _sample_error(self) -> Optional[str]:
+        roll = self._rng.random()
+        cumulative = 0.0
+        for kind in ERROR_KINDS:
+            cumulative += self.error_rates.get(kind, 0)
+            if roll < cumulative:
+                return kind
+        return None
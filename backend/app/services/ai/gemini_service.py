@@ -9,10 +9,18 @@ para análisis de texto, generación de contenido y análisis de sentimientos.
 import os
 import json
 import time
-from typing import Dict, List, Optional, Any
-import google.generativeai as genai
-from app import db
-from app.models.ai_interactions import AIInteraction
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from app.services.ai.interaction_logger import interaction_logger
+from app.services.ai.llm_client import llm_client
+from app.services.ai.map_reduce import analyze_document
+from app.services.ai.prompt_cache import prompt_cache
+from app.utils.json_stream import IncrementalJSONParser, JSONExtractionError
+from app.utils.response_schemas import parse_response
+
+
+# Tokens máximos del texto por prompt; los textos más largos se dividen (map_reduce)
+ANALYSIS_INPUT_TOKENS = int(os.getenv('GEMINI_ANALYSIS_INPUT_TOKENS', 1500))
+SENTIMENT_INPUT_TOKENS = int(os.getenv('GEMINI_SENTIMENT_INPUT_TOKENS', 600))
 
 
 class GeminiService:
@@ -26,19 +34,21 @@ class GeminiService:
     def __init__(self):
         """Inicializar servicio de Gemini"""
         api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
+        if not api_key and not llm_client.is_fake:
             raise ValueError("GEMINI_API_KEY no está configurada en las variables de entorno")
         
-        # Configurar Gemini
-        genai.configure(api_key=api_key)
+        # Configurar Gemini (una sola vez por proceso, compartido)
+        self.client = llm_client
+        self.client.configure()
         
         # Configuración del modelo
-        self.model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
-        self.max_tokens = int(os.getenv('GEMINI_MAX_TOKENS', 8192))
-        self.temperature = float(os.getenv('GEMINI_TEMPERATURE', 0.7))
-        
-        # Inicializar modelo
-        self.model = genai.GenerativeModel(self.model_name)
+        self.max_tokens = self.client.max_tokens
+        self.temperature = self.client.temperature
+    
+    @property
+    def model_name(self) -> str:
+        """Modelo en uso (resuelto por el cliente compartido)"""
+        return self.client.model_name
     
     def generate_content(
         self,
@@ -59,6 +69,8 @@ class GeminiService:
             related_entity_type (str, optional): Tipo de entidad relacionada
             related_entity_id (int, optional): ID de entidad relacionada
             **kwargs: Parámetros adicionales para la generación
+                (max_tokens, temperature, use_cache, cache_template,
+                cache_inputs, cache_ttl)
         
         Returns:
             dict: Respuesta con contenido generado y metadata
@@ -67,13 +79,35 @@ class GeminiService:
         
         try:
             # Configuración de generación
-            generation_config = genai.types.GenerationConfig(
-                max_output_tokens=kwargs.get('max_tokens', self.max_tokens),
-                temperature=kwargs.get('temperature', self.temperature),
-            )
+            config = {
+                'max_tokens': kwargs.get('max_tokens', self.max_tokens),
+                'temperature': kwargs.get('temperature', self.temperature),
+            }
+            generation_config = self.client.build_generation_config(**config)
+            
+            # Consultar caché de respuestas (plantilla = tipo de interacción por defecto)
+            cache_key = None
+            template_id = kwargs.get('cache_template') or interaction_type
+            if kwargs.get('use_cache', True):
+                cache_key = prompt_cache.make_key(
+                    self.client.resolve_model_name(),
+                    template_id,
+                    kwargs.get('cache_inputs', prompt),
+                    config
+                )
+                cached = prompt_cache.get(cache_key, template_id)
+                if cached is not None:
+                    return {
+                        'success': True,
+                        'content': cached['content'],
+                        'tokens_used': 0,
+                        'processing_time_ms': int((time.time() - start_time) * 1000),
+                        'model': cached['model'] or self.model_name,
+                        'cached': True
+                    }
             
             # Generar contenido
-            response = self.model.generate_content(
+            response = self.client.generate(
                 prompt,
                 generation_config=generation_config
             )
@@ -84,8 +118,19 @@ class GeminiService:
             # Extraer texto de respuesta
             response_text = response.text
             
-            # Estimar tokens (aproximación: 1 token ≈ 4 caracteres)
-            tokens_used = len(prompt + response_text) // 4
+            # Tokens reales (usage_metadata) o estimación si el SDK no los da
+            usage = self.client.usage(response, prompt, response_text)
+            tokens_used = usage['total_tokens']
+            
+            if cache_key:
+                prompt_cache.set(
+                    cache_key,
+                    response_text,
+                    template_id=template_id,
+                    model=self.model_name,
+                    tokens_used=tokens_used,
+                    ttl=kwargs.get('cache_ttl')
+                )
             
             # Registrar interacción en BD
             self._log_interaction(
@@ -96,6 +141,7 @@ class GeminiService:
                 tokens_used=tokens_used,
                 processing_time_ms=processing_time_ms,
                 success=True,
+                usage=usage,
                 related_entity_type=related_entity_type,
                 related_entity_id=related_entity_id
             )
@@ -105,7 +151,8 @@ class GeminiService:
                 'content': response_text,
                 'tokens_used': tokens_used,
                 'processing_time_ms': processing_time_ms,
-                'model': self.model_name
+                'model': self.model_name,
+                'cached': False
             }
             
         except Exception as e:
@@ -130,7 +177,135 @@ class GeminiService:
                 'error': str(e),
                 'processing_time_ms': processing_time_ms
             }
-    
+
+    def generate_content_stream(
+        self,
+        prompt: str,
+        user_id: Optional[int] = None,
+        interaction_type: str = 'content_generation',
+        related_entity_type: Optional[str] = None,
+        related_entity_id: Optional[int] = None,
+        result: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Generar contenido con Gemini en stream (stream=True)
+
+        Usa la misma caché y el mismo registro en BD que generate_content;
+        una respuesta cacheada se entrega en un único fragmento.
+
+        Args:
+            prompt (str): Prompt para Gemini
+            user_id (int, optional): ID del usuario
+            interaction_type (str): Tipo de interacción
+            related_entity_type (str, optional): Tipo de entidad relacionada
+            related_entity_id (int, optional): ID de entidad relacionada
+            result (dict, optional): Se completa al terminar con el mismo
+                formato que devuelve generate_content
+            **kwargs: Parámetros de generación (ver generate_content)
+
+        Yields:
+            str: Fragmentos de texto
+        """
+        start_time = time.time()
+        result = result if result is not None else {}
+        config = {
+            'max_tokens': kwargs.get('max_tokens', self.max_tokens),
+            'temperature': kwargs.get('temperature', self.temperature),
+        }
+        template_id = kwargs.get('cache_template') or interaction_type
+        parts = []
+
+        try:
+            cache_key = None
+            if kwargs.get('use_cache', True):
+                cache_key = prompt_cache.make_key(
+                    self.client.resolve_model_name(),
+                    template_id,
+                    kwargs.get('cache_inputs', prompt),
+                    config
+                )
+                cached = prompt_cache.get(cache_key, template_id)
+                if cached is not None:
+                    yield cached['content']
+                    result.update({
+                        'success': True,
+                        'content': cached['content'],
+                        'tokens_used': 0,
+                        'processing_time_ms': int((time.time() - start_time) * 1000),
+                        'model': cached['model'] or self.model_name,
+                        'cached': True
+                    })
+                    return
+
+            usage = {}
+            for chunk in self.client.generate_stream(
+                prompt,
+                generation_config=self.client.build_generation_config(**config),
+                usage=usage
+            ):
+                parts.append(chunk)
+                yield chunk
+
+            processing_time_ms = int((time.time() - start_time) * 1000)
+            response_text = ''.join(parts)
+            usage = usage or self.client.usage(None, prompt, response_text)
+            tokens_used = usage['total_tokens']
+
+            if cache_key:
+                prompt_cache.set(
+                    cache_key,
+                    response_text,
+                    template_id=template_id,
+                    model=self.model_name,
+                    tokens_used=tokens_used,
+                    ttl=kwargs.get('cache_ttl')
+                )
+
+            self._log_interaction(
+                user_id=user_id,
+                interaction_type=interaction_type,
+                prompt_text=prompt,
+                response_text=response_text,
+                tokens_used=tokens_used,
+                processing_time_ms=processing_time_ms,
+                success=True,
+                usage=usage,
+                related_entity_type=related_entity_type,
+                related_entity_id=related_entity_id
+            )
+
+            result.update({
+                'success': True,
+                'content': response_text,
+                'tokens_used': tokens_used,
+                'processing_time_ms': processing_time_ms,
+                'model': self.model_name,
+                'cached': False
+            })
+
+        except Exception as e:
+            processing_time_ms = int((time.time() - start_time) * 1000)
+
+            self._log_interaction(
+                user_id=user_id,
+                interaction_type=interaction_type,
+                prompt_text=prompt,
+                response_text=''.join(parts) or None,
+                tokens_used=0,
+                processing_time_ms=processing_time_ms,
+                success=False,
+                error_message=str(e),
+                related_entity_type=related_entity_type,
+                related_entity_id=related_entity_id
+            )
+
+            result.update({
+                'success': False,
+                'error': str(e),
+                'processing_time_ms': processing_time_ms
+            })
+
     def analyze_text(
         self,
         text: str,
@@ -141,6 +316,10 @@ class GeminiService:
         """
         Analizar texto académico con Gemini
         
+        Los textos que exceden GEMINI_ANALYSIS_INPUT_TOKENS se dividen por
+        secciones y párrafos, se analizan en paralelo y los resultados se
+        combinan en el mismo esquema (ver map_reduce).
+        
         Args:
             text (str): Texto a analizar
             user_id (int, optional): ID del usuario
@@ -150,11 +329,26 @@ class GeminiService:
         Returns:
             dict: Análisis completo del texto
         """
-        prompt = f"""
+        return self._analyze_chunked(
+            text,
+            max_tokens=ANALYSIS_INPUT_TOKENS,
+            build_prompt=self._text_analysis_prompt,
+            schema_id='text_analysis',
+            result_key='analysis',
+            user_id=user_id,
+            interaction_type='text_analysis',
+            related_entity_type='document',
+            related_entity_id=document_id
+        )
+    
+    @staticmethod
+    def _text_analysis_prompt(text: str) -> str:
+        """Prompt de análisis de texto académico"""
+        return f"""
 Analiza el siguiente texto académico y proporciona un análisis detallado en formato JSON.
 
 TEXTO A ANALIZAR:
-{text[:5000]}  # Limitar a 5000 caracteres para no exceder límites
+{text}
 
 INSTRUCCIONES:
 Proporciona el análisis en formato JSON con la siguiente estructura:
@@ -177,47 +371,6 @@ Proporciona el análisis en formato JSON con la siguiente estructura:
 
 IMPORTANTE: Responde ÚNICAMENTE con el JSON, sin texto adicional.
 """
-        
-        result = self.generate_content(
-            prompt=prompt,
-            user_id=user_id,
-            interaction_type='text_analysis',
-            related_entity_type='document',
-            related_entity_id=document_id
-        )
-        
-        if result['success']:
-            try:
-                content = result['content'].strip()
-                
-                # Intentar parsear directamente
-                analysis = json.loads(content)
-                result['analysis'] = analysis
-                
-            except json.JSONDecodeError:
-                # Intentar extraer JSON de bloques markdown
-                try:
-                    if '```json' in content:
-                        json_str = content.split('```json')[1].split('```')[0].strip()
-                    elif '```' in content:
-                        json_str = content.split('```')[1].split('```')[0].strip()
-                    else:
-                        # Buscar JSON entre llaves
-                        import re
-                        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                        if json_match:
-                            json_str = json_match.group()
-                        else:
-                            json_str = content
-                    
-                    analysis = json.loads(json_str)
-                    result['analysis'] = analysis
-                    
-                except Exception as e:
-                    result['analysis'] = None
-                    result['parse_error'] = f'No se pudo parsear JSON: {str(e)}'
-        
-        return result
     
     def analyze_sentiment(
         self,
@@ -228,6 +381,8 @@ IMPORTANTE: Responde ÚNICAMENTE con el JSON, sin texto adicional.
         """
         Analizar sentimiento de texto/transcripción
         
+        Las transcripciones largas se analizan por fragmentos (ver analyze_text).
+        
         Args:
             text (str): Texto a analizar
             user_id (int, optional): ID del usuario
@@ -236,11 +391,26 @@ IMPORTANTE: Responde ÚNICAMENTE con el JSON, sin texto adicional.
         Returns:
             dict: Análisis de sentimiento
         """
-        prompt = f"""
+        return self._analyze_chunked(
+            text,
+            max_tokens=SENTIMENT_INPUT_TOKENS,
+            build_prompt=self._sentiment_prompt,
+            schema_id='sentiment_analysis',
+            result_key='sentiment',
+            user_id=user_id,
+            interaction_type='sentiment_analysis',
+            related_entity_type='audio_session',
+            related_entity_id=audio_session_id
+        )
+    
+    @staticmethod
+    def _sentiment_prompt(text: str) -> str:
+        """Prompt de análisis de sentimiento"""
+        return f"""
 Analiza el sentimiento del siguiente texto y proporciona el resultado en formato JSON.
 
 TEXTO:
-{text[:2000]}
+{text}
 
 Proporciona el análisis en este formato JSON:
 
@@ -255,48 +425,239 @@ Proporciona el análisis en este formato JSON:
 
 IMPORTANTE: Responde ÚNICAMENTE con el JSON, sin texto adicional ni bloques de código markdown.
 """
+    
+    def _analyze_chunked(
+        self,
+        text: str,
+        max_tokens: int,
+        build_prompt,
+        schema_id: str,
+        result_key: str,
+        **generate_kwargs
+    ) -> Dict[str, Any]:
+        """
+        Analizar un texto en uno o varios prompts y combinar el JSON
         
-        result = self.generate_content(
-            prompt=prompt,
-            user_id=user_id,
-            interaction_type='sentiment_analysis',
-            related_entity_type='audio_session',
-            related_entity_id=audio_session_id
-        )
+        Cada fragmento pasa por generate_content (caché y registro por
+        fragmento). El resultado mantiene el formato de generate_content
+        más result_key con el JSON combinado y 'chunks'.
+        """
+        start_time = time.time()
+        calls = []
+        parse_errors = []
         
-        if result['success']:
+        def analyze(chunk):
+            result = self.generate_content(prompt=build_prompt(chunk['text']), **generate_kwargs)
+            calls.append(result)
+            if not result['success']:
+                raise Exception(result['error'])
             try:
-                content = result['content'].strip()
-                
-                # Intentar parsear directamente
-                sentiment = json.loads(content)
-                result['sentiment'] = sentiment
-                
-            except json.JSONDecodeError:
-                # Intentar extraer JSON de bloques markdown
-                try:
-                    if '```json' in content:
-                        json_str = content.split('```json')[1].split('```')[0].strip()
-                    elif '```' in content:
-                        json_str = content.split('```')[1].split('```')[0].strip()
-                    else:
-                        # Buscar JSON entre llaves
-                        import re
-                        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                        if json_match:
-                            json_str = json_match.group()
-                        else:
-                            json_str = content
-                    
-                    sentiment = json.loads(json_str)
-                    result['sentiment'] = sentiment
-                    
-                except Exception as e:
-                    result['sentiment'] = None
-                    result['parse_error'] = f'No se pudo parsear JSON: {str(e)}'
+                return parse_response(result['content'], schema_id)
+            except JSONExtractionError as e:
+                parse_errors.append(str(e))
+                return None
+        
+        try:
+            data, info = analyze_document(text, max_tokens, analyze, schema_id)
+        except Exception:
+            # Ningún fragmento respondió: el error queda en calls
+            data, info = None, {'chunks': len(calls)}
+        succeeded = [call for call in calls if call['success']]
         
+        if not succeeded:
+            return {
+                'success': False,
+                'error': calls[0]['error'] if calls else 'Texto vacío',
+                'processing_time_ms': int((time.time() - start_time) * 1000),
+                'chunks': info['chunks']
+            }
+        
+        result = {
+            'success': True,
+            'content': succeeded[0]['content'] if len(calls) == 1 else json.dumps(data, ensure_ascii=False),
+            'tokens_used': sum(call.get('tokens_used', 0) for call in succeeded),
+            'processing_time_ms': int((time.time() - start_time) * 1000),
+            'model': succeeded[0].get('model', self.model_name),
+            'cached': all(call.get('cached') for call in succeeded),
+            'chunks': info['chunks'],
+            result_key: data
+        }
+        if data is None or parse_errors:
+            result['parse_error'] = f'No se pudo parsear JSON: {parse_errors[0] if parse_errors else "sin datos"}'
         return result
     
+    def analyze_segments_sentiment(
+        self,
+        segments: List[Dict[str, Any]],
+        user_id: Optional[int] = None,
+        audio_session_id: Optional[int] = None,
+        max_prompt_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Analizar sentimiento de muchos segmentos con pocas llamadas a Gemini
+        
+        Empaqueta los segmentos en prompts estructurados (con su ID) sin
+        exceder el presupuesto de tokens de entrada ni de salida, y parsea
+        un arreglo JSON por lote.
+        
+        Args:
+            segments (list): [{'id': int, 'text': str}, ...]
+            user_id (int, optional): ID del usuario
+            audio_session_id (int, optional): ID de sesión de audio
+            max_prompt_tokens (int, optional): Presupuesto de tokens por prompt
+                (por defecto GEMINI_BATCH_PROMPT_TOKENS)
+        
+        Returns:
+            dict: {
+                'success': bool,
+                'results': {segment_id: {'sentiment', 'sentiment_score', 'keywords'}},
+                'missing_ids': list,
+                'api_calls': int,
+                'tokens_used': int,
+                'processing_time_ms': int
+            }
+        """
+        max_prompt_tokens = max_prompt_tokens or int(os.getenv('GEMINI_BATCH_PROMPT_TOKENS', 6000))
+        
+        batches = self._pack_segments(segments, max_prompt_tokens)
+        
+        results = {}
+        api_calls = 0
+        tokens_used = 0
+        processing_time_ms = 0
+        
+        for batch in batches:
+            payload = json.dumps(
+                [{'id': seg['id'], 'text': seg['text']} for seg in batch],
+                ensure_ascii=False
+            )
+            prompt = f"""
+Analiza el sentimiento de cada segmento de una transcripción de audio de un estudiante.
+
+SEGMENTOS (arreglo JSON con id y texto):
+{payload}
+
+Responde con un arreglo JSON con un objeto por segmento, en el mismo orden:
+
+[
+    {{
+        "segment_id": id del segmento,
+        "sentiment": "positive|negative|neutral|mixed",
+        "sentiment_score": -100 a +100,
+        "keywords": ["palabra_clave1", "palabra_clave2"]
+    }}
+]
+
+IMPORTANTE: Responde ÚNICAMENTE con el arreglo JSON, sin texto adicional ni bloques de código markdown.
+"""
+            
+            result = self.generate_content(
+                prompt=prompt,
+                user_id=user_id,
+                interaction_type='sentiment_analysis',
+                related_entity_type='audio_session',
+                related_entity_id=audio_session_id
+            )
+            
+            api_calls += 1
+            tokens_used += result.get('tokens_used', 0)
+            processing_time_ms += result.get('processing_time_ms', 0)
+            
+            if not result['success']:
+                continue
+            
+            batch_ids = {seg['id'] for seg in batch}
+            for item in self._parse_json_array(result['content']):
+                parsed = self._normalize_segment_sentiment(item)
+                if parsed and parsed[0] in batch_ids:
+                    results[parsed[0]] = parsed[1]
+        
+        missing_ids = [seg['id'] for seg in segments if seg['id'] not in results]
+        
+        return {
+            'success': bool(results) or not segments,
+            'results': results,
+            'missing_ids': missing_ids,
+            'api_calls': api_calls,
+            'tokens_used': tokens_used,
+            'processing_time_ms': processing_time_ms
+        }
+    
+    def _pack_segments(
+        self,
+        segments: List[Dict[str, Any]],
+        max_prompt_tokens: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Agrupar segmentos en lotes que respeten el presupuesto de tokens
+        
+        Limita los tokens de entrada de cada lote a max_prompt_tokens y la
+        cantidad de segmentos para que la respuesta quepa en max_tokens.
+        Un segmento que por sí solo excede el presupuesto se recorta.
+        """
+        # Estimación: 1 token ≈ 4 caracteres (igual que generate_content)
+        base_prompt_tokens = 200
+        per_segment_overhead = 15
+        output_tokens_per_segment = 60
+        
+        text_budget = max(max_prompt_tokens - base_prompt_tokens - per_segment_overhead, 50)
+        max_segments = max(self.max_tokens // output_tokens_per_segment, 1)
+        
+        batches = []
+        current = []
+        current_tokens = base_prompt_tokens
+        
+        for seg in segments:
+            text = (seg.get('text') or '')[:text_budget * 4]
+            seg_tokens = len(text) // 4 + per_segment_overhead
+            
+            if current and (current_tokens + seg_tokens > max_prompt_tokens or len(current) >= max_segments):
+                batches.append(current)
+                current = []
+                current_tokens = base_prompt_tokens
+            
+            current.append({'id': seg['id'], 'text': text})
+            current_tokens += seg_tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    @staticmethod
+    def _parse_json_array(content: str) -> List[Any]:
+        """Extraer un arreglo JSON de la respuesta del modelo"""
+        try:
+            return parse_response(content, 'segment_sentiment')
+        except JSONExtractionError:
+            return []
+    
+    @staticmethod
+    def _normalize_segment_sentiment(item: Any) -> Optional[tuple]:
+        """Validar un objeto de sentimiento por segmento -> (segment_id, datos)"""
+        if not isinstance(item, dict) or 'segment_id' not in item:
+            return None
+        
+        try:
+            segment_id = int(item['segment_id'])
+            score = float(item.get('sentiment_score', 0))
+        except (TypeError, ValueError):
+            return None
+        
+        sentiment = str(item.get('sentiment', 'neutral')).lower()
+        if sentiment not in ('positive', 'negative', 'neutral', 'mixed'):
+            sentiment = 'neutral'
+        
+        keywords = item.get('keywords') or []
+        if not isinstance(keywords, list):
+            keywords = []
+        
+        return segment_id, {
+            'sentiment': sentiment,
+            'sentiment_score': round(max(-100.0, min(100.0, score)), 2),
+            'keywords': [str(k) for k in keywords][:10]
+        }
+    
     def generate_student_profile_summary(
         self,
         profile_data: Dict[str, Any],
@@ -343,7 +704,7 @@ Responde en formato JSON:
         
         if result['success']:
             try:
-                profile_summary = json.loads(result['content'])
+                profile_summary = parse_response(result['content'], 'profile_generation')
                 result['profile_summary'] = profile_summary
             except json.JSONDecodeError:
                 result['profile_summary'] = None
@@ -367,6 +728,71 @@ Responde en formato JSON:
         Returns:
             dict: Contenido generado para el reporte
         """
+        prompt = self._report_content_prompt(report_data, personalization)
+        
+        result = self.generate_content(
+            prompt=prompt,
+            user_id=user_id,
+            interaction_type='report_generation',
+            related_entity_type='report'
+        )
+        
+        if result['success']:
+            try:
+                report_content = parse_response(result['content'], 'report_generation')
+                result['report_content'] = report_content
+            except json.JSONDecodeError:
+                result['report_content'] = None
+        
+        return result
+    
+    def generate_report_content_stream(
+        self,
+        report_data: Dict[str, Any],
+        personalization: Dict[str, Any],
+        user_id: int
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generar contenido de reporte transmitiendo la respuesta (stream=True)
+        
+        Args:
+            report_data (dict): Datos para el reporte
+            personalization (dict): Perfil de personalización
+            user_id (int): ID del usuario
+        
+        Yields:
+            tuple: ('field', {'key', 'value'}) por cada sección completada
+            ('executive_summary', 'main_insights'...) y, al final,
+            ('result', mismo dict que generate_report_content)
+        """
+        prompt = self._report_content_prompt(report_data, personalization)
+        parser = IncrementalJSONParser()
+        result = {}
+        
+        for chunk in self.generate_content_stream(
+            prompt=prompt,
+            user_id=user_id,
+            interaction_type='report_generation',
+            related_entity_type='report',
+            result=result
+        ):
+            for key, value in parser.feed(chunk):
+                yield 'field', {'key': key, 'value': value}
+        
+        if result.get('success'):
+            try:
+                result['report_content'] = parse_response(result['content'], 'report_generation')
+            except json.JSONDecodeError:
+                result['report_content'] = None
+        
+        yield 'result', result
+    
+    def _report_content_prompt(
+        self,
+        report_data: Dict[str, Any],
+        personalization: Dict[str, Any]
+    ) -> str:
+        """Prompt de contenido para reporte personalizado"""
         learning_style = personalization.get('learning_style', 'mixto')
         
         prompt = f"""
@@ -392,21 +818,7 @@ Genera el contenido en formato JSON con:
 IMPORTANTE: Adapta el lenguaje al estilo de aprendizaje {learning_style}.
 """
         
-        result = self.generate_content(
-            prompt=prompt,
-            user_id=user_id,
-            interaction_type='report_generation',
-            related_entity_type='report'
-        )
-        
-        if result['success']:
-            try:
-                report_content = json.loads(result['content'])
-                result['report_content'] = report_content
-            except json.JSONDecodeError:
-                result['report_content'] = None
-        
-        return result
+        return prompt
     
     def _log_interaction(
         self,
@@ -419,36 +831,37 @@ IMPORTANTE: Adapta el lenguaje al estilo de aprendizaje {learning_style}.
         success: bool,
         error_message: Optional[str] = None,
         related_entity_type: Optional[str] = None,
-        related_entity_id: Optional[int] = None
+        related_entity_id: Optional[int] = None,
+        usage: Optional[Dict[str, Any]] = None
     ):
         """
-        Registrar interacción con IA en la base de datos
-        
+        Registrar interacción con IA
+
+        Se encola en interaction_logger, que la inserta por lotes en segundo
+        plano con su propia conexión: no añade un viaje a la base de datos a
+        la respuesta ni comparte la sesión del llamador.
+
         Args:
-            Todos los parámetros de la interacción
+            Todos los parámetros de la interacción; usage es el dict de
+            LLMClient.usage (tokens de entrada/salida y si son reales)
         """
-        try:
-            interaction = AIInteraction(
-                user_id=user_id,
-                interaction_type=interaction_type,
-                ai_service='gemini',
-                model_used=self.model_name,
-                prompt_text=prompt_text[:10000],  # Limitar tamaño
-                response_text=response_text[:10000] if response_text else None,
-                tokens_used=tokens_used,
-                processing_time_ms=processing_time_ms,
-                success=success,
-                error_message=error_message,
-                related_entity_type=related_entity_type,
-                related_entity_id=related_entity_id
-            )
-            
-            db.session.add(interaction)
-            db.session.commit()
-        except Exception as e:
-            print(f"Error al registrar interacción: {e}")
-            db.session.rollback()
-
+        usage = usage or {}
+        interaction_logger.log(
+            user_id=user_id,
+            interaction_type=interaction_type,
+            model_used=self.model_name,
+            prompt_text=prompt_text,
+            response_text=response_text,
+            tokens_used=tokens_used,
+            processing_time_ms=processing_time_ms,
+            success=success,
+            error_message=error_message,
+            related_entity_type=related_entity_type,
+            related_entity_id=related_entity_id,
+            prompt_tokens=usage.get('prompt_tokens'),
+            completion_tokens=usage.get('completion_tokens'),
+            tokens_exact=usage.get('exact', False)
+        )
 
 # Instancia global del servicio
 gemini_service = GeminiService()
\ No newline at end of file
@@ -0,0 +1,313 @@
+"""
+app/services/ai/interaction_logger.py - Registro de Interacciones con IA
+Plataforma Integral de Rendimiento Estudiantil
+
+Registro asíncrono y por lotes de la tabla ai_interactions. Antes cada
+llamada a Gemini hacía db.session.add() + commit() sobre la sesión de la
+petición: un viaje extra a la base de datos por respuesta y, si el registro
+fallaba, el rollback deshacía también el trabajo del llamador.
+
+Ahora log() solo encola un dict; un hilo trabajador inserta en bloque
+(executemany) cada AI_LOG_BATCH_SIZE registros o cada AI_LOG_FLUSH_SECONDS
+segundos, con una conexión propia del engine (no toca db.session). En la
+misma transacción se actualizan los agregados diarios de ai_usage_rollups
+(ver usage_stats).
+
+- Contrapresión: la cola está acotada (AI_LOG_QUEUE_SIZE). Si está llena,
+  log() espera como máximo AI_LOG_BLOCK_MS y después descarta el registro.
+- Contadores: encolados, escritos, descartados (cola llena) y perdidos
+  (lotes que no se pudieron insertar tras reintentar).
+- Apagado: atexit vacía la cola antes de terminar el proceso.
+"""
+
+import os
+import queue
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from app import db
+from app.models.ai_interactions import AIInteraction
+from app.services.ai.usage_stats import apply_rollups, estimate_cost
+
+
+MAX_TEXT_LENGTH = 10000
+
+
+class InteractionLogger:
+    """
+    Cola acotada + hilo trabajador que inserta interacciones por lotes
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        queue_size: Optional[int] = None,
+        block_ms: Optional[int] = None
+    ):
+        """
+        Inicializar registrador
+
+        Args:
+            batch_size (int): Registros por inserción
+            flush_seconds (float): Espera máxima antes de insertar un lote incompleto
+            queue_size (int): Capacidad de la cola en memoria
+            block_ms (int): Espera máxima de log() con la cola llena antes de descartar
+        """
+        self.batch_size = batch_size or int(os.getenv('AI_LOG_BATCH_SIZE', 50))
+        self.flush_seconds = flush_seconds or float(os.getenv('AI_LOG_FLUSH_SECONDS', 2.0))
+        self.queue_size = queue_size or int(os.getenv('AI_LOG_QUEUE_SIZE', 5000))
+        self.block_ms = int(os.getenv('AI_LOG_BLOCK_MS', 50)) if block_ms is None else block_ms
+
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._app = None
+        self._worker = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0
+        }
+        self._last_flush_ms = 0.0
+        self._last_error = None
+
+    def init_app(self, app):
+        """Vincular la aplicación (el trabajador usa su engine) y arrancar el hilo"""
+        self._app = app
+        app.extensions['interaction_logger'] = self
+        self._start()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def log(
+        self,
+        user_id: Optional[int],
+        interaction_type: str,
+        model_used: Optional[str],
+        prompt_text: str,
+        response_text: Optional[str],
+        tokens_used: int,
+        processing_time_ms: int,
+        success: bool,
+        error_message: Optional[str] = None,
+        related_entity_type: Optional[str] = None,
+        related_entity_id: Optional[int] = None,
+        ai_service: str = 'gemini',
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        tokens_exact: bool = False
+    ) -> bool:
+        """
+        Encolar una interacción (no bloquea salvo con la cola llena)
+
+        Args:
+            prompt_tokens / completion_tokens (int, optional): Tokens de
+                entrada y salida (usage_metadata); con ellos se calcula
+                cost_estimate
+            tokens_exact (bool): True si los tokens son reales y no estimados
+
+        Returns:
+            bool: False si se descartó por falta de espacio
+        """
+        record = {
+            'user_id': user_id,
+            'interaction_type': interaction_type,
+            'ai_service': ai_service,
+            'model_used': model_used,
+            'prompt_text': prompt_text[:MAX_TEXT_LENGTH] if prompt_text else prompt_text,
+            'response_text': response_text[:MAX_TEXT_LENGTH] if response_text else None,
+            'tokens_used': tokens_used,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'tokens_exact': tokens_exact,
+            'cost_estimate': estimate_cost(model_used, prompt_tokens, completion_tokens)
+            if prompt_tokens is not None else None,
+            'processing_time_ms': processing_time_ms,
+            'success': success,
+            'error_message': error_message,
+            'related_entity_type': related_entity_type,
+            'related_entity_id': related_entity_id,
+            'created_at': datetime.utcnow()
+        }
+
+        if self._app is None:
+            self._bind_current_app()
+
+        try:
+            if self.block_ms > 0:
+                self._queue.put(record, timeout=self.block_ms / 1000)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._counters['dropped'] += 1
+                dropped = self._counters['dropped']
+            if dropped == 1 or dropped % 100 == 0:
+                print(f"⚠️  Cola de registro de IA llena: {dropped} interacciones descartadas")
+            return False
+
+        with self._lock:
+            self._counters['enqueued'] += 1
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Esperar a que la cola se vacíe (scripts, pruebas, apagado)
+
+        Returns:
+            bool: True si todo lo encolado se procesó a tiempo
+        """
+        if self._worker is None or not self._worker.is_alive():
+            # Sin trabajador (p. ej. tras shutdown): escribir en este hilo
+            self._drain_inline()
+            return self._queue.unfinished_tasks == 0
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._queue.unfinished_tasks == 0
+
+    def shutdown(self, timeout: float = 10.0):
+        """Detener el trabajador tras escribir lo pendiente"""
+        if self._worker is None:
+            return
+        self._stopping.set()
+        self._worker.join(timeout)
+        self._worker = None
+        pending = self._queue.qsize()
+        if pending:
+            self._drain_inline()
+        print(f"🧾 Registro de IA detenido ({self._counters['written']} escritas, "
+              f"{self._counters['dropped']} descartadas, {self._counters['failed']} perdidas)")
+
+    def stats(self) -> Dict:
+        """
+        Métricas del registro
+
+        Returns:
+            dict: Contadores, tamaño de cola y duración del último lote
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                'queued': self._queue.qsize(),
+                'queue_size': self.queue_size,
+                'batch_size': self.batch_size,
+                'flush_seconds': self.flush_seconds,
+                'last_flush_ms': round(self._last_flush_ms, 2),
+                'last_error': self._last_error,
+                'running': bool(self._worker and self._worker.is_alive())
+            }
+
+    # ------------------------------------------------------------------
+    # Trabajador
+    # ------------------------------------------------------------------
+
+    def _start(self):
+        """Arrancar el hilo trabajador (idempotente)"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopping.clear()
+            self._worker = threading.Thread(
+                target=self._run, name='ai-interaction-logger', daemon=True
+            )
+            self._worker.start()
+
+    def _bind_current_app(self):
+        """Tomar la aplicación activa si init_app() no se llamó"""
+        try:
+            from flask import current_app
+            self._app = current_app._get_current_object()
+        except RuntimeError:
+            return
+        self._start()
+
+    def _run(self):
+        """Bucle del trabajador: juntar hasta batch_size o flush_seconds e insertar"""
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self) -> List[Dict]:
+        """Sacar de la cola un lote completo o lo acumulado en flush_seconds"""
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if self._stopping.is_set():
+                remaining = 0
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_inline(self):
+        """Escribir lo pendiente en el hilo actual"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch: List[Dict], attempts: int = 2):
+        """
+        Insertar un lote con una conexión propia del engine
+
+        Se reintenta una vez (p. ej. conexión caída); si vuelve a fallar el
+        lote se cuenta como perdido y nunca afecta a la sesión de la petición.
+        """
+        started = time.perf_counter()
+        try:
+            for attempt in range(attempts):
+                try:
+                    if self._app is None:
+                        raise RuntimeError('InteractionLogger sin aplicación (falta init_app)')
+                    with self._app.app_context():
+                        with db.engine.begin() as conn:
+                            conn.execute(AIInteraction.__table__.insert(), batch)
+                            apply_rollups(conn, batch)
+                    with self._lock:
+                        self._counters['written'] += len(batch)
+                        self._counters['batches'] += 1
+                        self._last_flush_ms = (time.perf_counter() - started) * 1000
+                    return
+                except Exception as e:
+                    error = str(e)
+                    if attempt + 1 < attempts:
+                        time.sleep(0.5)
+
+            with self._lock:
+                self._counters['failed'] += len(batch)
+                self._last_error = error[:500]
+            print(f"⚠️  No se pudieron registrar {len(batch)} interacciones de IA: {error[:200]}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+# Instancia global del registrador
+interaction_logger = InteractionLogger()
+
+
+@atexit.register
+def _flush_on_exit():
+    """Vaciar la cola al terminar el proceso"""
+    interaction_logger.shutdown()
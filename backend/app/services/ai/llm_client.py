@@ -0,0 +1,637 @@
+"""
+app/services/ai/llm_client.py - Cliente LLM Compartido
+Plataforma Integral de Rendimiento Estudiantil
+
+Cliente único por proceso para Google Gemini. Configura la API una sola vez,
+resuelve el modelo disponible con una prueba de salud cacheada (en lugar de
+recorrer la lista de modelos en cada llamada) y reutiliza las instancias de
+GenerativeModel, de modo que todas las llamadas comparten el mismo canal.
+
+Lo usan GeminiService, WritingEvaluator, SyllabusProcessor y
+StudyToolsService.
+
+Con LLM_PROVIDER=fake entrega modelos simulados (app.services.ai.fake_llm)
+en lugar de Gemini, para pruebas de carga y regresión sin red.
+"""
+
+import os
+import re
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Iterator, Optional
+import google.generativeai as genai
+from app.services.ai.rate_limiter import admission_controller, backoff_delay, current_priority
+
+
+# Modelos a intentar en orden si el preferido no está disponible
+DEFAULT_FALLBACK_MODELS = (
+    'gemini-2.5-flash',
+    'gemini-2.5-pro',
+    'gemini-2.0-flash',
+    'gemini-flash-latest',
+    'gemini-pro-latest',
+    'gemini-exp-1206'
+)
+
+
+# "Please retry in 12.5s" / "retry_delay { seconds: 12 }"
+_RETRY_AFTER = re.compile(r'retry(?:_delay)?\W+(?:in\s+|seconds:\s*)?(\d+(?:\.\d+)?)\s*s?', re.IGNORECASE)
+
+
+class LLMClient:
+    """
+    Cliente de Gemini compartido por todo el proceso
+
+    La configuración y la resolución del modelo son perezosas: importar el
+    módulo no requiere GEMINI_API_KEY ni hace llamadas de red.
+    """
+
+    def __init__(self):
+        """Inicializar cliente (sin configurar todavía la API)"""
+        self.provider = os.getenv('LLM_PROVIDER', 'gemini').strip().lower()
+        self.preferred_model = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+        fallback = os.getenv('GEMINI_FALLBACK_MODELS')
+        fallback_models = [m.strip() for m in fallback.split(',') if m.strip()] if fallback else DEFAULT_FALLBACK_MODELS
+        self.models_to_try = list(dict.fromkeys([self.preferred_model, *fallback_models]))
+
+        self.max_tokens = int(os.getenv('GEMINI_MAX_TOKENS', 8192))
+        self.temperature = float(os.getenv('GEMINI_TEMPERATURE', 0.7))
+        self.probe_ttl = int(os.getenv('GEMINI_MODEL_PROBE_TTL', 3600))
+        self.max_retries = int(os.getenv('GEMINI_MAX_RETRIES', 4))
+        self.retry_base_delay = float(os.getenv('GEMINI_RETRY_BASE_DELAY', 1.0))
+
+        self._api_key = None
+        self._model_name = None
+        self._resolved_at = 0.0
+        self._unavailable = set()
+        self._models = {}
+        self._input_limits = {}  # modelo -> input_token_limit de sus metadatos
+        self._fake = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Configuración
+    # ------------------------------------------------------------------
+
+    def _resolve_api_key(self) -> Optional[str]:
+        api_key = os.environ.get('GEMINI_API_KEY')
+        if api_key:
+            return api_key
+
+        try:
+            from flask import current_app
+            return current_app.config.get('GEMINI_API_KEY')
+        except RuntimeError:
+            # Fuera de un contexto de aplicación
+            return None
+
+    def configure(self):
+        """
+        Configurar la API de Gemini una sola vez por proceso
+
+        Raises:
+            ValueError: Si GEMINI_API_KEY no está configurada
+        """
+        if self._api_key:
+            return
+
+        with self._lock:
+            if self._api_key:
+                return
+
+            if self.is_fake:
+                from app.services.ai.fake_llm import FakeLLMProvider
+                self._fake = FakeLLMProvider()
+                self._api_key = 'fake'
+                print(f"   🧪 LLM simulado activo (latencia {self._fake.latency[0]}, errores {self._fake.error_rates or 'ninguno'})")
+                return
+
+            api_key = self._resolve_api_key()
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY no configurada")
+
+            genai.configure(api_key=api_key)
+            self._api_key = api_key
+
+    @property
+    def is_configured(self) -> bool:
+        return self._api_key is not None
+
+    @property
+    def is_fake(self) -> bool:
+        """True si se usa el proveedor simulado (LLM_PROVIDER=fake)"""
+        return self.provider == 'fake'
+
+    # ------------------------------------------------------------------
+    # Resolución del modelo
+    # ------------------------------------------------------------------
+
+    @property
+    def model_name(self) -> str:
+        """Modelo resuelto, o el preferido si todavía no se ha resuelto"""
+        return self._model_name or self.preferred_model
+
+    def resolve_model_name(self) -> str:
+        """
+        Obtener el nombre del modelo disponible
+
+        La primera llamada prueba los modelos en orden con `genai.get_model`
+        (consulta de metadatos, sin generar tokens); el resultado se reutiliza
+        durante GEMINI_MODEL_PROBE_TTL segundos.
+
+        Returns:
+            str: Nombre del modelo seleccionado
+        """
+        if self._model_name and time.monotonic() - self._resolved_at < self.probe_ttl:
+            return self._model_name
+
+        with self._lock:
+            if self._model_name and time.monotonic() - self._resolved_at < self.probe_ttl:
+                return self._model_name
+
+            self.configure()
+
+            if self.is_fake:
+                self._model_name = self.preferred_model
+                self._resolved_at = time.monotonic()
+                return self._model_name
+
+            last_error = None
+            for model_name in self.models_to_try:
+                if model_name in self._unavailable:
+                    continue
+                try:
+                    info = genai.get_model(f'models/{model_name}')
+                    self._input_limits[model_name] = getattr(info, 'input_token_limit', None)
+                except Exception as e:
+                    last_error = e
+                    if self._is_not_found(e):
+                        self._unavailable.add(model_name)
+                        print(f"   ⚠️ Modelo {model_name} no disponible: {e}")
+                        continue
+                    # Error de red/cuota: no se puede sondear, usar el modelo sin descartarlo
+                    print(f"   ⚠️ No se pudo verificar {model_name}: {e}")
+
+                self._model_name = model_name
+                self._resolved_at = time.monotonic()
+                print(f"   ✅ Modelo Gemini seleccionado: {model_name}")
+                return model_name
+
+            raise Exception(f"No se pudo cargar ningún modelo. Último error: {last_error}")
+
+    def invalidate_model(self, model_name: Optional[str] = None):
+        """
+        Marcar un modelo como no disponible y forzar una nueva resolución
+
+        Args:
+            model_name (str, optional): Modelo a descartar (por defecto el actual)
+        """
+        with self._lock:
+            model_name = model_name or self._model_name
+            if model_name:
+                self._unavailable.add(model_name)
+                self._models.pop(model_name, None)
+            self._model_name = None
+            self._resolved_at = 0.0
+
+    def get_model(self, model_name: Optional[str] = None) -> genai.GenerativeModel:
+        """
+        Obtener la instancia reutilizable de GenerativeModel
+
+        Args:
+            model_name (str, optional): Modelo explícito; por defecto el resuelto
+
+        Returns:
+            GenerativeModel: Instancia compartida
+        """
+        model_name = model_name or self.resolve_model_name()
+
+        model = self._models.get(model_name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    self.configure()
+                    model = self._fake.get_model(model_name) if self._fake else genai.GenerativeModel(model_name)
+                    self._models[model_name] = model
+        return model
+
+    # ------------------------------------------------------------------
+    # Generación
+    # ------------------------------------------------------------------
+
+    def build_generation_config(self, **config) -> Optional[genai.types.GenerationConfig]:
+        """
+        Construir GenerationConfig a partir de parámetros simples
+
+        Args:
+            **config: max_tokens, temperature, top_p, top_k, response_mime_type...
+
+        Returns:
+            GenerationConfig | None: None si no se indicó ningún parámetro
+        """
+        if not config:
+            return None
+
+        params = dict(config)
+        if 'max_tokens' in params:
+            params['max_output_tokens'] = params.pop('max_tokens')
+        return genai.types.GenerationConfig(**{k: v for k, v in params.items() if v is not None})
+
+    def default_generation_config(self, **overrides) -> genai.types.GenerationConfig:
+        """GenerationConfig con los valores por defecto de GEMINI_MAX_TOKENS/GEMINI_TEMPERATURE"""
+        config = {'max_tokens': self.max_tokens, 'temperature': self.temperature}
+        config.update({k: v for k, v in overrides.items() if v is not None})
+        return self.build_generation_config(**config)
+
+    def generate(
+        self,
+        prompt: Any,
+        generation_config: Optional[Any] = None,
+        model_name: Optional[str] = None,
+        priority: Optional[str] = None,
+        **kwargs
+    ):
+        """
+        Generar contenido con el modelo compartido
+
+        Cada intento pasa por el controlador de admisión (concurrencia,
+        solicitudes y tokens por minuto, prioridad). Los 429 y errores
+        transitorios se reintentan con espera exponencial y jitter; si el
+        modelo resuelto deja de existir (404), se descarta y se reintenta
+        una vez con el siguiente modelo de la lista.
+
+        Args:
+            prompt: Prompt (texto o lista de partes)
+            generation_config: GenerationConfig o dict
+            model_name (str, optional): Forzar un modelo concreto
+            priority (str, optional): 'interactive' | 'batch' (por defecto la del contexto)
+            **kwargs: Argumentos adicionales para generate_content
+
+        Returns:
+            GenerateContentResponse: Respuesta de Gemini
+
+        Raises:
+            AdmissionTimeout: Si la solicitud no obtuvo turno dentro de su plazo
+        """
+        estimated_tokens = self.estimate_tokens(prompt)
+        attempt = 0
+        model_retry = True
+
+        while True:
+            model = self.get_model(model_name)
+            ticket = admission_controller.acquire(estimated_tokens, priority)
+            try:
+                response = model.generate_content(prompt, generation_config=generation_config, **kwargs)
+            except Exception as e:
+                admission_controller.release(ticket)
+
+                if model_retry and not model_name and self._is_not_found(e):
+                    model_retry = False
+                    self.invalidate_model(model.model_name.split('/')[-1])
+                    continue
+
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            admission_controller.release(ticket, self._response_tokens(response, estimated_tokens))
+            return response
+
+    async def generate_async(
+        self,
+        prompt: Any,
+        generation_config: Optional[Any] = None,
+        model_name: Optional[str] = None,
+        priority: Optional[str] = None,
+        **kwargs
+    ):
+        """
+        Versión asíncrona de generate (usa generate_content_async)
+
+        La resolución del modelo y la espera de admisión, que pueden
+        bloquear, se ejecutan en el executor por defecto.
+        """
+        loop = asyncio.get_running_loop()
+        estimated_tokens = self.estimate_tokens(prompt)
+        priority = priority or current_priority()
+        attempt = 0
+        model_retry = True
+
+        while True:
+            model = await loop.run_in_executor(None, self.get_model, model_name)
+            ticket = await loop.run_in_executor(
+                None, admission_controller.acquire, estimated_tokens, priority
+            )
+            try:
+                response = await model.generate_content_async(prompt, generation_config=generation_config, **kwargs)
+            except Exception as e:
+                admission_controller.release(ticket)
+
+                if model_retry and not model_name and self._is_not_found(e):
+                    model_retry = False
+                    self.invalidate_model(model.model_name.split('/')[-1])
+                    continue
+
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            admission_controller.release(ticket, self._response_tokens(response, estimated_tokens))
+            return response
+
+    def generate_stream(
+        self,
+        prompt: Any,
+        generation_config: Optional[Any] = None,
+        model_name: Optional[str] = None,
+        priority: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Generar contenido en stream (stream=True), fragmento a fragmento
+
+        El turno de admisión se mantiene hasta que el stream termina o el
+        consumidor lo cierra. Los reintentos (429, transitorios, 404) solo
+        se aplican antes del primer fragmento: después, el error se propaga
+        para no duplicar texto ya entregado.
+
+        Args:
+            prompt: Prompt (texto o lista de partes)
+            generation_config: GenerationConfig o dict
+            model_name (str, optional): Forzar un modelo concreto
+            priority (str, optional): 'interactive' | 'batch'
+            usage (dict, optional): Se completa al terminar con el uso de
+                tokens (ver usage)
+
+        Yields:
+            str: Fragmentos de texto en orden de llegada
+        """
+        estimated_tokens = self.estimate_tokens(prompt)
+        attempt = 0
+        model_retry = True
+
+        while True:
+            model = self.get_model(model_name)
+            ticket = admission_controller.acquire(estimated_tokens, priority)
+            released = False
+            produced = 0
+            try:
+                response = model.generate_content(
+                    prompt, generation_config=generation_config, stream=True, **kwargs
+                )
+                parts = []
+                for chunk in response:
+                    text = self._chunk_text(chunk)
+                    if text:
+                        produced += len(text)
+                        parts.append(text)
+                        yield text
+                if usage is not None:
+                    usage.update(self.usage(response, prompt, ''.join(parts)))
+            except Exception as e:
+                admission_controller.release(ticket)
+                released = True
+                if produced:
+                    raise
+
+                if model_retry and not model_name and self._is_not_found(e):
+                    model_retry = False
+                    self.invalidate_model(model.model_name.split('/')[-1])
+                    continue
+
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            finally:
+                # También al cerrar el generador antes de tiempo (GeneratorExit)
+                if not released:
+                    admission_controller.release(
+                        ticket, (usage or {}).get('total_tokens') or estimated_tokens + produced // 4
+                    )
+
+            return
+
+    def generate_text(self, prompt: Any, **config) -> str:
+        """
+        Generar y devolver únicamente el texto de la respuesta
+
+        Args:
+            prompt: Prompt para Gemini
+            **config: Parámetros de build_generation_config
+
+        Returns:
+            str: Texto de la respuesta
+        """
+        response = self.generate(prompt, generation_config=self.build_generation_config(**config))
+        return response.text
+
+    def status(self) -> Dict[str, Any]:
+        """Estado del cliente (para diagnósticos)"""
+        return {
+            'configured': self.is_configured,
+            'provider': self.provider,
+            'preferred_model': self.preferred_model,
+            'resolved_model': self._model_name,
+            'unavailable_models': sorted(self._unavailable),
+            'cached_models': list(self._models.keys()),
+            'admission': admission_controller.stats(),
+            **({'fake_llm': self._fake.stats()} if self._fake else {})
+        }
+
+    # ------------------------------------------------------------------
+    # Tokens
+    # ------------------------------------------------------------------
+
+    def input_token_limit(self, model_name: Optional[str] = None) -> Optional[int]:
+        """
+        Límite de tokens de entrada del modelo
+
+        GEMINI_MAX_INPUT_TOKENS tiene prioridad; si no, se usa el
+        input_token_limit de los metadatos leídos al resolver el modelo.
+        """
+        configured = os.getenv('GEMINI_MAX_INPUT_TOKENS')
+        if configured:
+            return int(configured)
+        return self._input_limits.get(model_name or self.model_name)
+
+    def count_tokens(self, prompt: Any, model_name: Optional[str] = None) -> int:
+        """
+        Contar tokens del prompt con el tokenizador del modelo (count_tokens)
+
+        Es una llamada ligera a la API (no genera ni consume cuota de
+        generación). Si falla, se devuelve la estimación local.
+
+        Args:
+            prompt: Prompt (texto o lista de partes)
+            model_name (str, optional): Modelo explícito
+
+        Returns:
+            int: Tokens del prompt
+        """
+        try:
+            return int(self.get_model(model_name).count_tokens(prompt).total_tokens)
+        except Exception as e:
+            print(f"   ⚠️ count_tokens no disponible, se usa estimación: {e}")
+            return self.estimate_tokens(prompt)
+
+    def trim_to_tokens(self, text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+        """
+        Recortar un texto de entrada para que no supere max_tokens
+
+        Si la estimación local queda holgadamente por debajo del límite no
+        se consulta la API. En otro caso se cuenta con count_tokens y se
+        recorta de forma proporcional en un límite de palabra, verificando
+        de nuevo (como máximo tres rondas).
+
+        Args:
+            text (str): Texto de entrada (no el prompt completo)
+            max_tokens (int): Presupuesto de tokens para el texto
+            model_name (str, optional): Modelo cuyo tokenizador se usa
+
+        Returns:
+            str: Texto completo o recortado
+        """
+        if not text or self.estimate_tokens(text) <= max_tokens // 2:
+            return text
+
+        for _ in range(3):
+            tokens = self.count_tokens(text, model_name)
+            if tokens <= max_tokens:
+                return text
+
+            cut = int(len(text) * max_tokens / tokens * 0.95)
+            boundary = text.rfind(' ', 0, cut)
+            text = text[:boundary if boundary > cut // 2 else cut]
+
+        return text
+
+    def usage(self, response: Any, prompt: Any = None, response_text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Uso de tokens de una respuesta
+
+        Usa usage_metadata (prompt_token_count / candidates_token_count) si
+        el SDK lo entrega; si no, estima a partir del texto.
+
+        Returns:
+            dict: {'prompt_tokens', 'completion_tokens', 'total_tokens', 'exact'}
+        """
+        metadata = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(metadata, 'prompt_token_count', None) if metadata is not None else None
+        completion_tokens = getattr(metadata, 'candidates_token_count', None) if metadata is not None else None
+
+        if prompt_tokens or completion_tokens:
+            prompt_tokens = int(prompt_tokens or 0)
+            completion_tokens = int(completion_tokens or 0)
+            total = int(getattr(metadata, 'total_token_count', 0) or prompt_tokens + completion_tokens)
+            return {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': total,
+                'exact': True
+            }
+
+        if response_text is None:
+            response_text = self._chunk_text(response)
+        prompt_tokens = self.estimate_tokens(prompt) if prompt is not None else 0
+        completion_tokens = len(response_text or '') // 4
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'exact': False
+        }
+
+    @staticmethod
+    def estimate_tokens(prompt: Any) -> int:
+        """Estimación rápida de tokens del prompt (1 token ≈ 4 caracteres)"""
+        if isinstance(prompt, str):
+            return len(prompt) // 4
+        if isinstance(prompt, (list, tuple)):
+            return sum(len(part) // 4 for part in prompt if isinstance(part, str))
+        return 0
+
+    def _response_tokens(self, response: Any, estimated_prompt_tokens: int) -> Optional[int]:
+        """Tokens consumidos por una respuesta (usage_metadata si existe)"""
+        usage = self.usage(response)
+        if usage['exact']:
+            return usage['total_tokens']
+        if not usage['completion_tokens']:
+            # Respuestas bloqueadas: mantener la estimación
+            return None
+        return estimated_prompt_tokens + usage['completion_tokens']
+
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """Texto de un fragmento del stream ('' si viene vacío o bloqueado)"""
+        try:
+            return chunk.text or ''
+        except (ValueError, AttributeError, IndexError):
+            return ''
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Segundos a esperar antes de reintentar, o None si no se reintenta
+
+        Los 429 pausan además todas las admisiones durante la espera.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if self._is_rate_limited(error):
+            delay = max(backoff_delay(attempt, self.retry_base_delay), self._retry_after(error))
+            admission_controller.cooldown(delay)
+            print(f"   ⏳ Gemini 429: reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+        elif self._is_transient(error):
+            delay = backoff_delay(attempt, self.retry_base_delay)
+            print(f"   ⏳ Error transitorio de Gemini: reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+        else:
+            return None
+
+        admission_controller.record_retry()
+        return delay
+
+    @staticmethod
+    def _is_rate_limited(error: Exception) -> bool:
+        """Detectar respuestas 429 / cuota agotada"""
+        if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+            return True
+        message = str(error).lower()
+        return '429' in message or 'quota' in message or 'rate limit' in message
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Detectar errores transitorios del servidor (500/503/timeout)"""
+        if type(error).__name__ in ('ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded'):
+            return True
+        message = str(error).lower()
+        return '503' in message or '500 internal' in message or 'unavailable' in message
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Espera sugerida por el proveedor ('retry in 12.3s' / retry_delay)"""
+        match = _RETRY_AFTER.search(str(error))
+        return float(match.group(1)) if match else 0.0
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        """Detectar errores de modelo inexistente (404 / NotFound)"""
+        if type(error).__name__ == 'NotFound':
+            return True
+        message = str(error).lower()
+        return '404' in message or 'not found' in message
+
+
+# Instancia global del cliente
+llm_client = LLMClient()
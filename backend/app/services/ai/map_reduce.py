@@ -0,0 +1,359 @@
+"""
+app/services/ai/map_reduce.py - Análisis Map-Reduce de Documentos Largos
+Plataforma Integral de Rendimiento Estudiantil
+
+Los documentos que no caben en un prompt se dividen con
+app.utils.text_chunker.chunk_text y cada fragmento se analiza por separado
+(map) en paralelo; los JSON parciales se combinan (reduce) en el mismo
+esquema que devuelve el análisis de un solo prompt, así los llamadores no
+cambian.
+
+Cada fragmento se analiza con su propio prompt, de modo que la caché de
+respuestas (prompt_cache) funciona por fragmento: al editar una sección
+solo se vuelve a llamar a Gemini para los fragmentos que cambiaron.
+
+La concurrencia la limita además el controlador de admisión
+(GEMINI_MAX_IN_FLIGHT); los hilos heredan el contexto (aplicación Flask y
+prioridad) del llamador.
+"""
+
+import os
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.utils.text_chunker import chunk_text
+
+
+# Tokens máximos del texto por fragmento (sílabos, mapas mentales)
+CHUNK_TOKENS = int(os.getenv('GEMINI_CHUNK_TOKENS', 2000))
+
+
+def analyze_document(
+    text: str,
+    max_tokens: int,
+    analyze: Callable[[Dict], Any],
+    schema_id: str,
+    **reduce_kwargs
+) -> Tuple[Optional[Dict], Dict]:
+    """
+    Dividir, analizar en paralelo y combinar en el esquema indicado
+
+    Si el texto cabe en un fragmento se analiza una sola vez (mismo prompt
+    que antes de dividir).
+
+    Args:
+        text (str): Documento completo
+        max_tokens (int): Tokens máximos del texto por fragmento
+        analyze (callable): chunk -> dict parcial en el esquema schema_id
+        schema_id (str): Clave de REDUCERS
+        **reduce_kwargs: Argumentos adicionales del reductor
+
+    Returns:
+        tuple: (resultado combinado o None, {'chunks', 'failed'})
+
+    Raises:
+        Exception: La primera excepción de analyze si ningún fragmento se
+            pudo analizar (p. ej. error de conexión)
+    """
+    chunks = chunk_text(text, max_tokens)
+    errors = []
+    partials = map_chunks(chunks, analyze, errors=errors)
+    failed = sum(1 for partial in partials if partial is None)
+    if errors and failed == len(partials):
+        raise errors[0]
+    info = {'chunks': len(chunks), 'failed': failed}
+
+    if len(chunks) > 1:
+        print(f"   🧩 {len(chunks)} fragmentos analizados ({failed} fallidos)")
+
+    if len(partials) == 1 and not reduce_kwargs:
+        return partials[0], info
+    return REDUCERS[schema_id](partials, chunks, **reduce_kwargs), info
+
+
+def map_chunks(
+    chunks: List[Dict],
+    analyze: Callable[[Dict], Any],
+    max_workers: Optional[int] = None,
+    errors: Optional[List[Exception]] = None
+) -> List[Any]:
+    """
+    Analizar fragmentos en paralelo conservando el orden
+
+    Args:
+        chunks (list): Fragmentos de chunk_text
+        analyze (callable): Función chunk -> resultado parcial (o None)
+        max_workers (int, optional): Hilos (por defecto GEMINI_MAX_IN_FLIGHT)
+        errors (list, optional): Recibe las excepciones de analyze
+
+    Returns:
+        list: Resultado por fragmento; None si falló
+    """
+    if not chunks:
+        return []
+
+    def safe(chunk):
+        try:
+            return analyze(chunk)
+        except Exception as e:
+            print(f"   ⚠️ Fragmento {chunk['index'] + 1}/{len(chunks)} falló: {e}")
+            if errors is not None:
+                errors.append(e)
+            return None
+
+    if len(chunks) == 1:
+        return [safe(chunks[0])]
+
+    max_workers = min(max_workers or int(os.getenv('GEMINI_MAX_IN_FLIGHT', 4)), len(chunks))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='map-reduce') as executor:
+        futures = [executor.submit(contextvars.copy_context().run, safe, chunk) for chunk in chunks]
+        return [future.result() for future in futures]
+
+
+# ----------------------------------------------------------------------
+# Utilidades de reducción
+# ----------------------------------------------------------------------
+
+def _weighted_mean(values: Iterable, weights: Iterable) -> Optional[float]:
+    total = weight_sum = 0.0
+    for value, weight in zip(values, weights):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            total += value * weight
+            weight_sum += weight
+    return round(total / weight_sum, 1) if weight_sum else None
+
+
+def _norm(value: Any) -> str:
+    return ' '.join(str(value).split()).casefold()
+
+
+def merge_strings(lists: Iterable[Optional[List]], limit: Optional[int] = None) -> List[str]:
+    """
+    Unir listas de textos sin duplicados, ordenadas por cuántos fragmentos
+    las mencionan (y después por primera aparición)
+    """
+    counts, first = Counter(), {}
+    for items in lists:
+        for item in items or []:
+            if not isinstance(item, str) or not item.strip():
+                continue
+            key = _norm(item)
+            counts[key] += 1
+            first.setdefault(key, item.strip())
+    order = {key: i for i, key in enumerate(first)}
+    ranked = sorted(first, key=lambda key: (-counts[key], order[key]))
+    return [first[key] for key in ranked[:limit]]
+
+
+def merge_records(lists: Iterable[Optional[List]], key: Callable[[Dict], Any]) -> List[Dict]:
+    """Unir listas de objetos en orden, descartando los de clave repetida"""
+    seen, merged = set(), []
+    for items in lists:
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            identity = key(item)
+            if identity in seen:
+                continue
+            seen.add(identity)
+            merged.append(item)
+    return merged
+
+
+def _join_summaries(partials: List[Dict], chunks: List[Dict], field: str = 'summary', limit: int = 6) -> str:
+    """Resumen combinado: los resúmenes parciales de los fragmentos más extensos, en orden"""
+    candidates = [
+        (chunk['tokens'], chunk['index'], chunk.get('heading'), partial.get(field))
+        for partial, chunk in zip(partials, chunks)
+        if isinstance(partial.get(field), str) and partial.get(field).strip()
+    ]
+    selected = sorted(sorted(candidates, reverse=True)[:limit], key=lambda item: item[1])
+    return ' '.join(
+        f"{heading}: {summary.strip()}" if heading else summary.strip()
+        for _, _, heading, summary in selected
+    )
+
+
+def _valid(partials: List[Any], chunks: List[Dict]):
+    pairs = [(p, c) for p, c in zip(partials, chunks) if isinstance(p, dict)]
+    return [p for p, _ in pairs], [c for _, c in pairs]
+
+
+# ----------------------------------------------------------------------
+# Reductores por esquema (mismo formato que el análisis de un prompt)
+# ----------------------------------------------------------------------
+
+def reduce_text_analysis(partials: List[Any], chunks: List[Dict]) -> Optional[Dict]:
+    """Esquema 'text_analysis': puntajes ponderados por tokens, listas unidas"""
+    partials, chunks = _valid(partials, chunks)
+    if not partials:
+        return None
+    weights = [chunk['tokens'] or 1 for chunk in chunks]
+
+    result = {}
+    for field in ('writing_quality_score', 'coherence_score', 'cohesion_score',
+                  'sentence_complexity_score', 'readability_score'):
+        value = _weighted_mean((p.get(field) for p in partials), weights)
+        if value is not None:
+            result[field] = value
+
+    levels = Counter()
+    for partial, weight in zip(partials, weights):
+        if isinstance(partial.get('academic_level'), str):
+            levels[partial['academic_level'].strip().lower()] += weight
+    if levels:
+        result['academic_level'] = levels.most_common(1)[0][0]
+
+    for field, limit in (('main_topics', 8), ('key_concepts', 12), ('technical_terms', 15),
+                         ('strengths', 6), ('weaknesses', 6), ('recommendations', 8)):
+        result[field] = merge_strings((p.get(field) for p in partials), limit)
+
+    result['summary'] = _join_summaries(partials, chunks)
+    return result
+
+
+def reduce_sentiment(partials: List[Any], chunks: List[Dict]) -> Optional[Dict]:
+    """Esquema 'sentiment_analysis': puntaje ponderado; 'mixed' si los fragmentos discrepan"""
+    partials, chunks = _valid(partials, chunks)
+    if not partials:
+        return None
+    weights = [chunk['tokens'] or 1 for chunk in chunks]
+
+    score = _weighted_mean((p.get('sentiment_score') for p in partials), weights)
+    labels = {p.get('sentiment') for p in partials if p.get('sentiment') in ('positive', 'negative')}
+    if len(labels) > 1 or any(p.get('sentiment') == 'mixed' for p in partials):
+        sentiment = 'mixed'
+    else:
+        sentiment = Counter(p.get('sentiment') for p in partials if p.get('sentiment')).most_common(1)[0][0]
+
+    result = {
+        'sentiment': sentiment,
+        'emotions_detected': merge_strings((p.get('emotions_detected') for p in partials), 6),
+        'keywords': merge_strings((p.get('keywords') for p in partials), 10),
+        'summary': _join_summaries(partials, chunks)
+    }
+    if score is not None:
+        result['sentiment_score'] = score
+    confidence = _weighted_mean((p.get('confidence') for p in partials), weights)
+    if confidence is not None:
+        result['confidence'] = confidence
+    return result
+
+
+def _merge_dicts(items: Iterable[Any]) -> Dict:
+    """Primer valor no vacío de cada clave"""
+    merged = {}
+    for item in items:
+        for key, value in (item or {}).items() if isinstance(item, dict) else ():
+            if value not in (None, '', [], {}, 'No especificado') and key not in merged:
+                merged[key] = value
+    return merged
+
+
+def reduce_syllabus(partials: List[Any], chunks: List[Dict]) -> Optional[Dict]:
+    """
+    Esquemas 'syllabus.process' y 'study_tools.syllabus': temas, tareas y
+    fechas concatenados en orden de documento sin duplicados
+    """
+    partials, chunks = _valid(partials, chunks)
+    if not partials:
+        return None
+
+    result = {
+        'course_info': _merge_dicts(p.get('course_info') for p in partials),
+        'topics': merge_records(
+            (p.get('topics') for p in partials),
+            key=lambda t: _norm(t.get('name') or t.get('title') or t)
+        )
+    }
+    # Renumerar los temas (cada fragmento empieza en 1)
+    for number, topic in enumerate(result['topics'], 1):
+        if 'id' in topic:
+            topic['id'] = number
+
+    if any('tasks' in p for p in partials):
+        result['tasks'] = merge_records(
+            (p.get('tasks') for p in partials),
+            key=lambda t: (_norm(t.get('title', '')), str(t.get('date', '')))
+        )
+    if any('key_dates' in p for p in partials):
+        result['key_dates'] = merge_records(
+            (p.get('key_dates') for p in partials),
+            key=lambda d: (str(d.get('date', '')), _norm(d.get('event', '')))
+        )
+    if any('dependencies_map' in p for p in partials):
+        result['dependencies_map'] = merge_records(
+            (p.get('dependencies_map') for p in partials),
+            key=lambda d: _norm(d.get('topic', ''))
+        )
+    if any('learning_path' in p for p in partials):
+        paths = [p.get('learning_path') or {} for p in partials]
+        result['learning_path'] = {
+            level: merge_strings(path.get(level) for path in paths)
+            for level in ('foundational_topics', 'intermediate_topics', 'advanced_topics')
+        }
+    for field in ('study_recommendations', 'assessment_methods'):
+        if any(field in p for p in partials):
+            result[field] = merge_strings((p.get(field) for p in partials), 10)
+    hours = [p.get('estimated_weekly_hours') for p in partials if p.get('estimated_weekly_hours')]
+    if hours:
+        result['estimated_weekly_hours'] = hours[0]
+
+    return result
+
+
+def _merge_nodes(nodes: Iterable[Dict]) -> List[Dict]:
+    """Unir ramas de mapas mentales por nombre, de forma recursiva"""
+    merged, index = [], {}
+    for node in nodes:
+        if not isinstance(node, dict) or not node.get('name'):
+            continue
+        key = _norm(node['name'])
+        if key not in index:
+            index[key] = {'name': node['name'], 'children': []}
+            merged.append(index[key])
+        index[key]['children'].extend(node.get('children') or [])
+
+    for node in merged:
+        node['children'] = _merge_nodes(node['children'])
+        if not node['children']:
+            del node['children']
+    return merged
+
+
+def reduce_mind_map(partials: List[Any], chunks: List[Dict], root: Optional[str] = None) -> Optional[Dict]:
+    """
+    Esquema 'study_tools.mind_map': una rama por fragmento (unidas por
+    nombre) bajo la raíz indicada o la más frecuente
+    """
+    partials, chunks = _valid(partials, chunks)
+    if not partials:
+        return None
+    if len(partials) == 1 and not root:
+        return partials[0]
+
+    roots = Counter(_norm(p.get('root')) for p in partials if p.get('root'))
+    if not root and roots:
+        common = roots.most_common(1)[0][0]
+        root = next(p['root'] for p in partials if _norm(p.get('root')) == common)
+
+    branches = []
+    for partial, chunk in zip(partials, chunks):
+        children = partial.get('children') or []
+        if chunk.get('heading') and _norm(partial.get('root', '')) != _norm(root or ''):
+            # Fragmento con raíz propia: cuelga como rama con el título de su sección
+            branches.append({'name': partial.get('root') or chunk['heading'], 'children': children})
+        else:
+            branches.extend(children)
+
+    return {'root': root or 'Mapa mental', 'children': _merge_nodes(branches)}
+
+
+REDUCERS = {
+    'text_analysis': reduce_text_analysis,
+    'sentiment_analysis': reduce_sentiment,
+    'syllabus.process': reduce_syllabus,
+    'study_tools.syllabus': reduce_syllabus,
+    'study_tools.mind_map': reduce_mind_map,
+}
@@ -0,0 +1,395 @@
+"""
+app/services/ai/prompt_cache.py - Caché de Respuestas de IA
+Plataforma Integral de Rendimiento Estudiantil
+
+Caché de prompt → respuesta delante de GeminiService.generate_content y de
+las herramientas de estudio. La clave combina el modelo, el identificador
+de la plantilla de prompt, las entradas normalizadas y la configuración de
+generación, de modo que un mapa mental, resumen o análisis repetido sobre
+el mismo material no vuelve a llamar a Gemini.
+
+Dos niveles:
+- Memoria:    LRU por número de entradas, con expiración (TTL)
+- Persistente: tabla ai_response_cache (MySQL/SQLite vía SQLAlchemy)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional
+from app import db
+from app.models.ai_interactions import AIResponseCache
+from app.services.ai.llm_client import llm_client
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class PromptCache:
+    """
+    Caché de respuestas de IA en dos niveles con TTL y métricas de acierto
+    """
+
+    def __init__(
+        self,
+        max_memory_entries: Optional[int] = None,
+        default_ttl: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        persistent: Optional[bool] = None
+    ):
+        """
+        Inicializar caché
+
+        Args:
+            max_memory_entries (int): Entradas máximas en memoria
+            default_ttl (int): Vigencia por defecto en segundos
+            enabled (bool): Activar/desactivar la caché
+            persistent (bool): Usar el nivel persistente en base de datos
+        """
+        self.max_memory_entries = max_memory_entries or int(os.getenv('AI_CACHE_MEMORY_ENTRIES', 512))
+        self.default_ttl = default_ttl or int(os.getenv('AI_CACHE_TTL', 7 * 24 * 3600))
+        if enabled is None:
+            enabled = os.getenv('AI_CACHE_ENABLED', 'True').lower() == 'true'
+        if persistent is None:
+            persistent = os.getenv('AI_CACHE_PERSISTENT', 'True').lower() == 'true'
+        self.enabled = enabled
+        self.persistent = persistent
+
+        self._memory = OrderedDict()  # key -> (expires_at_monotonic, value)
+        self._lock = threading.Lock()
+        self._metrics = {}  # template_id -> contadores
+
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def normalize(value: Any) -> Any:
+        """
+        Normalizar entradas para la clave
+
+        Los textos se recortan y se colapsan los espacios en blanco; los
+        diccionarios y listas se normalizan de forma recursiva.
+        """
+        if isinstance(value, str):
+            return _WHITESPACE.sub(' ', value).strip()
+        if isinstance(value, dict):
+            return {str(k): PromptCache.normalize(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            return [PromptCache.normalize(v) for v in value]
+        return value
+
+    @staticmethod
+    def make_key(
+        model: str,
+        template_id: str,
+        inputs: Any,
+        generation_config: Optional[Dict] = None
+    ) -> str:
+        """
+        Construir la clave de caché
+
+        Args:
+            model (str): Modelo de IA
+            template_id (str): Identificador de la plantilla de prompt
+            inputs: Entradas del prompt (o el prompt completo)
+            generation_config (dict): Parámetros de generación
+
+        Returns:
+            str: Clave hexadecimal (SHA-256)
+        """
+        payload = json.dumps({
+            'model': model,
+            'template': template_id,
+            'inputs': PromptCache.normalize(inputs),
+            'config': PromptCache.normalize(generation_config or {})
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lectura / escritura
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, template_id: str = 'default') -> Optional[Dict]:
+        """
+        Obtener una respuesta (memoria primero, luego base de datos)
+
+        Returns:
+            dict | None: {'content', 'tokens_used', 'model'} o None
+        """
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._record(template_id, 'memory_hits')
+                    return dict(value)
+                del self._memory[key]
+
+        value = self._db_get(key) if self.persistent else None
+
+        with self._lock:
+            if value is None:
+                self._record(template_id, 'misses')
+                return None
+
+            ttl, value = value
+            self._memory_put(key, value, ttl)
+            self._record(template_id, 'db_hits')
+        return dict(value)
+
+    def set(
+        self,
+        key: str,
+        content: str,
+        template_id: str = 'default',
+        model: Optional[str] = None,
+        tokens_used: int = 0,
+        ttl: Optional[int] = None
+    ):
+        """
+        Guardar una respuesta en ambos niveles
+
+        Args:
+            key (str): Clave generada con make_key
+            content (str): Texto de la respuesta
+            template_id (str): Identificador de la plantilla
+            model (str): Modelo que generó la respuesta
+            tokens_used (int): Tokens consumidos al generarla
+            ttl (int, optional): Vigencia en segundos
+        """
+        if not self.enabled or content is None:
+            return
+
+        ttl = ttl or self.default_ttl
+        value = {'content': content, 'tokens_used': tokens_used, 'model': model}
+
+        with self._lock:
+            self._memory_put(key, value, ttl)
+            self._record(template_id, 'stores')
+
+        if self.persistent:
+            self._db_set(key, value, template_id, ttl)
+
+    def get_or_generate(
+        self,
+        template_id: str,
+        prompt: str,
+        inputs: Any = None,
+        ttl: Optional[int] = None,
+        **config
+    ) -> str:
+        """
+        Devolver el texto cacheado o generarlo con el cliente compartido
+
+        Args:
+            template_id (str): Identificador de la plantilla de prompt
+            prompt (str): Prompt completo
+            inputs: Entradas normalizables (por defecto, el prompt completo)
+            ttl (int, optional): Vigencia en segundos
+            **config: Parámetros de generación (max_tokens, temperature...)
+
+        Returns:
+            str: Texto de la respuesta
+        """
+        model = llm_client.resolve_model_name()
+        key = self.make_key(model, template_id, prompt if inputs is None else inputs, config)
+
+        cached = self.get(key, template_id)
+        if cached is not None:
+            print(f"  ♻️  Respuesta en caché ({template_id})")
+            return cached['content']
+
+        response = llm_client.generate(prompt, generation_config=llm_client.build_generation_config(**config))
+        content = response.text
+        self.set(key, content, template_id=template_id, model=model, ttl=ttl)
+        return content
+
+    def stream_or_generate(
+        self,
+        template_id: str,
+        prompt: str,
+        inputs: Any = None,
+        ttl: Optional[int] = None,
+        **config
+    ) -> Iterator[str]:
+        """
+        Versión en stream de get_or_generate
+
+        Si la respuesta está en caché se entrega en un único fragmento; si no,
+        se transmite desde Gemini y se guarda al completarse (un stream
+        interrumpido no se cachea).
+
+        Yields:
+            str: Fragmentos de texto
+        """
+        model = llm_client.resolve_model_name()
+        key = self.make_key(model, template_id, prompt if inputs is None else inputs, config)
+
+        cached = self.get(key, template_id)
+        if cached is not None:
+            print(f"  ♻️  Respuesta en caché ({template_id})")
+            yield cached['content']
+            return
+
+        parts = []
+        for chunk in llm_client.generate_stream(prompt, generation_config=llm_client.build_generation_config(**config)):
+            parts.append(chunk)
+            yield chunk
+
+        self.set(key, ''.join(parts), template_id=template_id, model=model, ttl=ttl)
+
+    def forget(self, template_id: str, prompt: str, inputs: Any = None, **config):
+        """
+        Invalidar la respuesta de get_or_generate para estos argumentos
+
+        Se usa cuando la respuesta cacheada no pudo interpretarse (p. ej. JSON
+        inválido), para que el siguiente intento vuelva a consultar a Gemini.
+        """
+        self.invalidate(self.make_key(
+            llm_client.model_name, template_id, prompt if inputs is None else inputs, config
+        ))
+
+    def invalidate(self, key: str):
+        """Eliminar una entrada de ambos niveles"""
+        with self._lock:
+            self._memory.pop(key, None)
+
+        if self.persistent:
+            try:
+                table = AIResponseCache.__table__
+                with db.engine.begin() as conn:
+                    conn.execute(table.delete().where(table.c.cache_key == key))
+            except Exception as e:
+                print(f"⚠️  No se pudo invalidar caché de IA: {e}")
+
+    def purge_expired(self) -> int:
+        """
+        Eliminar entradas vencidas del nivel persistente
+
+        Returns:
+            int: Filas eliminadas
+        """
+        table = AIResponseCache.__table__
+        with db.engine.begin() as conn:
+            result = conn.execute(table.delete().where(table.c.expires_at <= datetime.utcnow()))
+        return result.rowcount or 0
+
+    def clear_memory(self):
+        """Vaciar el nivel en memoria"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict:
+        """
+        Métricas de acierto globales y por plantilla
+
+        Returns:
+            dict: {'enabled', 'memory_entries', 'hits', 'misses', 'hit_rate', 'templates'}
+        """
+        with self._lock:
+            templates = {}
+            totals = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0}
+
+            for template_id, counters in self._metrics.items():
+                hits = counters['memory_hits'] + counters['db_hits']
+                lookups = hits + counters['misses']
+                templates[template_id] = {
+                    **counters,
+                    'hit_rate': round(hits / lookups * 100, 2) if lookups else 0
+                }
+                for name in totals:
+                    totals[name] += counters[name]
+
+            hits = totals['memory_hits'] + totals['db_hits']
+            lookups = hits + totals['misses']
+            return {
+                'enabled': self.enabled,
+                'persistent': self.persistent,
+                'memory_entries': len(self._memory),
+                'hits': hits,
+                **totals,
+                'hit_rate': round(hits / lookups * 100, 2) if lookups else 0,
+                'templates': templates
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _record(self, template_id: str, counter: str):
+        """Incrementar un contador (requiere self._lock)"""
+        counters = self._metrics.get(template_id)
+        if counters is None:
+            counters = self._metrics[template_id] = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0}
+        counters[counter] += 1
+
+    def _memory_put(self, key: str, value: Dict, ttl: int):
+        """Insertar en el LRU en memoria (requiere self._lock)"""
+        self._memory[key] = (time.monotonic() + ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str) -> Optional[tuple]:
+        """
+        Leer del nivel persistente con una conexión propia (no toca db.session)
+
+        Returns:
+            tuple | None: (ttl restante en segundos, valor)
+        """
+        try:
+            table = AIResponseCache.__table__
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    table.select().where(table.c.cache_key == key)
+                ).first()
+        except Exception:
+            # Fuera de contexto de aplicación o tabla no disponible
+            return None
+
+        if row is None:
+            return None
+
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds() if row.expires_at else self.default_ttl
+        if remaining <= 0:
+            return None
+
+        return int(remaining), {
+            'content': row.response_text,
+            'tokens_used': row.tokens_used or 0,
+            'model': row.model_used
+        }
+
+    def _db_set(self, key: str, value: Dict, template_id: str, ttl: int):
+        """Escribir (reemplazar) en el nivel persistente en su propia transacción"""
+        try:
+            table = AIResponseCache.__table__
+            now = datetime.utcnow()
+            with db.engine.begin() as conn:
+                conn.execute(table.delete().where(table.c.cache_key == key))
+                conn.execute(table.insert().values(
+                    cache_key=key,
+                    template_id=template_id[:100],
+                    model_used=value['model'],
+                    response_text=value['content'],
+                    tokens_used=value['tokens_used'],
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=ttl)
+                ))
+        except Exception as e:
+            print(f"⚠️  No se pudo guardar caché de IA: {e}")
+
+
+# Instancia global de la caché
+prompt_cache = PromptCache()
@@ -0,0 +1,340 @@
+"""
+app/services/ai/rate_limiter.py - Control de Admisión para Gemini
+Plataforma Integral de Rendimiento Estudiantil
+
+Controlador central por el que pasa toda llamada saliente de llm_client:
+
+- Máximo de llamadas simultáneas (GEMINI_MAX_IN_FLIGHT)
+- Presupuestos de solicitudes y tokens por minuto (token buckets)
+- Clases de prioridad: 'interactive' (usuario esperando) antes que
+  'batch' (generación de reportes)
+- Cola con plazo máximo de espera por prioridad
+- Pausa global cuando el proveedor responde 429
+
+Las métricas de cola (profundidad, tiempos de espera) se exponen con
+`stats()` y se publican en /api/dashboard/health.
+"""
+
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+# Clases de prioridad (menor valor = se atiende antes)
+PRIORITIES = {
+    'interactive': 0,
+    'batch': 1
+}
+
+_current_priority: ContextVar[str] = ContextVar('llm_priority', default='interactive')
+
+
+class AdmissionTimeout(Exception):
+    """La solicitud superó su plazo de espera en la cola"""
+
+
+@contextmanager
+def priority_scope(priority: str):
+    """
+    Asignar una clase de prioridad a las llamadas de IA del bloque
+
+    Ejemplo:
+        with priority_scope('batch'):
+            report_service.generate_complete_report(...)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    """Clase de prioridad vigente en el contexto actual"""
+    return _current_priority.get()
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Espera exponencial con jitter completo
+
+    Args:
+        attempt (int): Número de reintento (0 = primero)
+        base (float): Espera base en segundos
+        cap (float): Espera máxima en segundos
+
+    Returns:
+        float: Segundos a esperar, uniforme en [0, min(cap, base * 2^attempt)]
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class _Ticket:
+    """Reserva de capacidad devuelta por acquire()"""
+
+    __slots__ = ('priority', 'reserved_tokens', 'admitted_at')
+
+    def __init__(self, priority: str, reserved_tokens: int, admitted_at: float):
+        self.priority = priority
+        self.reserved_tokens = reserved_tokens
+        self.admitted_at = admitted_at
+
+
+class AdmissionController:
+    """
+    Controlador de admisión con prioridades, plazos y token buckets
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Inicializar controlador
+
+        Args:
+            max_in_flight (int): Llamadas simultáneas permitidas
+            requests_per_minute (int): Presupuesto de solicitudes por minuto
+            tokens_per_minute (int): Presupuesto de tokens por minuto
+            enabled (bool): Activar/desactivar el control
+        """
+        self.max_in_flight = max_in_flight or int(os.getenv('GEMINI_MAX_IN_FLIGHT', 4))
+        self.requests_per_minute = requests_per_minute or int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', 60))
+        self.tokens_per_minute = tokens_per_minute or int(os.getenv('GEMINI_TOKENS_PER_MINUTE', 250000))
+        if enabled is None:
+            enabled = os.getenv('GEMINI_ADMISSION_ENABLED', 'True').lower() == 'true'
+        self.enabled = enabled
+
+        # Plazo máximo de espera en cola por prioridad (segundos)
+        self.deadlines = {
+            'interactive': float(os.getenv('GEMINI_INTERACTIVE_DEADLINE', 30)),
+            'batch': float(os.getenv('GEMINI_BATCH_DEADLINE', 300))
+        }
+
+        self._cond = threading.Condition()
+        self._queue = []  # heap de (prioridad, secuencia)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._request_bucket = float(self.requests_per_minute)
+        self._token_bucket = float(self.tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+
+        # Métricas
+        self._admitted = {name: 0 for name in PRIORITIES}
+        self._timeouts = {name: 0 for name in PRIORITIES}
+        self._waits = {name: deque(maxlen=500) for name in PRIORITIES}
+        self._max_queue_depth = 0
+        self._rate_limited = 0
+        self._retries = 0
+
+    # ------------------------------------------------------------------
+    # Admisión
+    # ------------------------------------------------------------------
+
+    def acquire(
+        self,
+        estimated_tokens: int = 0,
+        priority: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> _Ticket:
+        """
+        Esperar turno para una llamada
+
+        Args:
+            estimated_tokens (int): Tokens estimados de la llamada
+            priority (str, optional): 'interactive' | 'batch' (por defecto la del contexto)
+            timeout (float, optional): Plazo de espera (por defecto el de la prioridad)
+
+        Returns:
+            _Ticket: Reserva a devolver con release()
+
+        Raises:
+            AdmissionTimeout: Si el plazo vence antes de obtener turno
+        """
+        priority = priority if priority in PRIORITIES else current_priority()
+        if priority not in PRIORITIES:
+            priority = 'interactive'
+
+        # Una solicitud mayor que el presupuesto completo debe poder pasar con el bucket lleno
+        cost = min(max(int(estimated_tokens), 0), self.tokens_per_minute)
+
+        start = time.monotonic()
+        if not self.enabled:
+            return _Ticket(priority, 0, start)
+
+        deadline = start + (timeout if timeout is not None else self.deadlines[priority])
+        entry = (PRIORITIES[priority], next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    wait = float('inf')
+                    if self._queue[0] == entry:
+                        wait = self._time_until_admissible(now, cost)
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self._in_flight += 1
+                            self._request_bucket -= 1
+                            self._token_bucket -= cost
+                            break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts[priority] += 1
+                        raise AdmissionTimeout(
+                            f"Tiempo de espera agotado en la cola de Gemini ({priority}, "
+                            f"{len(self._queue)} en cola)"
+                        )
+                    self._cond.wait(min(remaining, wait))
+            finally:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                # El siguiente en la cola debe reevaluar su turno
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self._admitted[priority] += 1
+            self._waits[priority].append(waited)
+
+        return _Ticket(priority, cost, time.monotonic())
+
+    def release(self, ticket: _Ticket, actual_tokens: Optional[int] = None):
+        """
+        Liberar una reserva
+
+        Args:
+            ticket (_Ticket): Reserva devuelta por acquire()
+            actual_tokens (int, optional): Tokens reales consumidos; la
+                diferencia con la estimación se ajusta en el bucket
+        """
+        if not self.enabled:
+            return
+
+        with self._cond:
+            self._in_flight = max(self._in_flight - 1, 0)
+            if actual_tokens is not None:
+                self._token_bucket -= actual_tokens - ticket.reserved_tokens
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, estimated_tokens: int = 0, priority: Optional[str] = None):
+        """Context manager sobre acquire()/release()"""
+        ticket = self.acquire(estimated_tokens, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def cooldown(self, seconds: float):
+        """
+        Pausar nuevas admisiones tras un 429 del proveedor
+
+        Args:
+            seconds (float): Duración de la pausa
+        """
+        with self._cond:
+            self._rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def record_retry(self):
+        """Contabilizar un reintento"""
+        with self._cond:
+            self._retries += 1
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """
+        Métricas del controlador
+
+        Returns:
+            dict: Profundidad de cola, llamadas en curso, esperas por prioridad...
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            priorities = {}
+            for name in PRIORITIES:
+                waits = sorted(self._waits[name])
+                priorities[name] = {
+                    'admitted': self._admitted[name],
+                    'timeouts': self._timeouts[name],
+                    'avg_wait_ms': round(sum(waits) / len(waits) * 1000, 1) if waits else 0,
+                    'p95_wait_ms': round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0,
+                    'max_wait_ms': round(waits[-1] * 1000, 1) if waits else 0
+                }
+
+            return {
+                'enabled': self.enabled,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_queue_depth,
+                'in_flight': self._in_flight,
+                'max_in_flight': self.max_in_flight,
+                'requests_available': round(self._request_bucket, 2),
+                'tokens_available': int(self._token_bucket),
+                'paused_for_ms': max(int((self._paused_until - time.monotonic()) * 1000), 0),
+                'rate_limited': self._rate_limited,
+                'retries': self._retries,
+                'priorities': priorities
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _refill(self, now: float):
+        """Recargar los buckets según el tiempo transcurrido (requiere el lock)"""
+        elapsed = now - self._last_refill
+        if elapsed <= 0:
+            return
+        self._request_bucket = min(
+            float(self.requests_per_minute),
+            self._request_bucket + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_bucket = min(
+            float(self.tokens_per_minute),
+            self._token_bucket + elapsed * self.tokens_per_minute / 60.0
+        )
+        self._last_refill = now
+
+    def _time_until_admissible(self, now: float, cost: int) -> float:
+        """
+        Segundos hasta que la cabeza de la cola pueda pasar (requiere el lock)
+
+        Returns:
+            float: 0 si puede pasar ya; inf si depende de que termine otra llamada
+        """
+        if self._in_flight >= self.max_in_flight:
+            return float('inf')
+
+        wait = 0.0
+        if self._paused_until > now:
+            wait = max(wait, self._paused_until - now)
+        if self._request_bucket < 1:
+            wait = max(wait, (1 - self._request_bucket) * 60.0 / self.requests_per_minute)
+        if self._token_bucket < cost:
+            wait = max(wait, (cost - self._token_bucket) * 60.0 / self.tokens_per_minute)
+        return wait
+
+
+# Instancia global del controlador
+admission_controller = AdmissionController()
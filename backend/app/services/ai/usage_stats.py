@@ -0,0 +1,360 @@
+"""
+app/services/ai/usage_stats.py - Tokens, Costos y Latencia de IA
+Plataforma Integral de Rendimiento Estudiantil
+
+Contabilidad de uso de Gemini a partir de los tokens reales
+(usage_metadata) que registra interaction_logger:
+
+- estimate_cost(): costo en USD por modelo (precios por millón de tokens,
+  configurables con AI_PRICING_JSON)
+- apply_rollups(): suma un lote de interacciones a ai_usage_rollups
+  (día × tipo de interacción × usuario) dentro de la transacción del lote
+- usage_report(): agrega los rollups por tipo, usuario o día con
+  percentiles de latencia calculados desde histogramas, sin recorrer
+  ai_interactions
+- rebuild_rollups(): recalcula los rollups de un rango desde ai_interactions
+  (datos anteriores a esta contabilidad o tras corregir precios)
+"""
+
+import os
+import json
+import bisect
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import and_, select
+from app import db
+from app.models.ai_interactions import AIInteraction, AIUsageRollup
+
+
+# USD por millón de tokens (entrada, salida). Se elige el prefijo más largo
+# que coincida con el modelo.
+DEFAULT_PRICING = {
+    'gemini-2.5-pro': (1.25, 10.00),
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-1.5-pro': (1.25, 5.00),
+    'gemini-1.5-flash': (0.075, 0.30),
+    'gemini-pro': (0.50, 1.50),
+    'gemini-flash': (0.30, 2.50),
+}
+
+# Límites superiores (ms) de las cubetas del histograma de latencia; la
+# última cubeta (índice len(LATENCY_BUCKETS_MS)) acumula lo que los supera
+LATENCY_BUCKETS_MS = (
+    100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 5000, 7500,
+    10000, 15000, 20000, 30000, 45000, 60000, 90000, 120000
+)
+
+GROUP_FIELDS = ('interaction_type', 'user_id', 'day')
+
+
+def _load_pricing() -> Dict[str, tuple]:
+    pricing = dict(DEFAULT_PRICING)
+    configured = os.getenv('AI_PRICING_JSON')
+    if configured:
+        try:
+            pricing.update({k: tuple(v) for k, v in json.loads(configured).items()})
+        except (ValueError, TypeError) as e:
+            print(f"⚠️  AI_PRICING_JSON inválido, se usan precios por defecto: {e}")
+    return pricing
+
+
+PRICING = _load_pricing()
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Costo estimado en USD de una llamada
+
+    Args:
+        model (str): Modelo usado ('gemini-2.5-flash', 'models/gemini-pro'...)
+        prompt_tokens (int): Tokens de entrada
+        completion_tokens (int): Tokens generados
+
+    Returns:
+        float: Costo en USD (0 si el modelo no tiene precio)
+    """
+    name = (model or '').split('/')[-1]
+    prefix = max((p for p in PRICING if name.startswith(p)), key=len, default=None)
+    if prefix is None:
+        return 0.0
+    input_price, output_price = PRICING[prefix]
+    return round(((prompt_tokens or 0) * input_price + (completion_tokens or 0) * output_price) / 1_000_000, 6)
+
+
+def latency_bucket(processing_time_ms: Optional[int]) -> int:
+    """Índice de la cubeta del histograma para una latencia"""
+    return bisect.bisect_left(LATENCY_BUCKETS_MS, processing_time_ms or 0)
+
+
+def histogram_percentile(histogram: List[int], quantile: float, max_ms: int = 0) -> Optional[int]:
+    """
+    Percentil aproximado (límite superior de su cubeta)
+
+    Args:
+        histogram (list): Conteos por cubeta
+        quantile (float): 0-1
+        max_ms (int): Latencia máxima observada (para la última cubeta)
+
+    Returns:
+        int | None: Latencia en ms, o None sin datos
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+
+    target = quantile * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        cumulative += count
+        if cumulative >= target and count:
+            if index < len(LATENCY_BUCKETS_MS):
+                return min(LATENCY_BUCKETS_MS[index], max_ms) if max_ms else LATENCY_BUCKETS_MS[index]
+            return max_ms
+    return max_ms
+
+
+# ----------------------------------------------------------------------
+# Escritura de rollups
+# ----------------------------------------------------------------------
+
+def _empty_rollup() -> Dict[str, Any]:
+    return {
+        'calls': 0, 'failures': 0, 'exact_calls': 0,
+        'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0,
+        'cost_usd': 0.0, 'latency_sum_ms': 0, 'latency_max_ms': 0,
+        'latency_histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    }
+
+
+def _accumulate(records: Iterable[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """Agrupar registros de ai_interactions por (día, tipo, usuario)"""
+    groups = defaultdict(_empty_rollup)
+    for record in records:
+        created_at = record.get('created_at') or datetime.utcnow()
+        key = (created_at.date(), record['interaction_type'], record.get('user_id') or 0)
+        group = groups[key]
+        latency = int(record.get('processing_time_ms') or 0)
+
+        group['calls'] += 1
+        group['failures'] += 0 if record.get('success') else 1
+        group['exact_calls'] += 1 if record.get('tokens_exact') else 0
+        group['prompt_tokens'] += record.get('prompt_tokens') or 0
+        group['completion_tokens'] += record.get('completion_tokens') or 0
+        group['total_tokens'] += record.get('tokens_used') or 0
+        group['cost_usd'] += float(record.get('cost_estimate') or 0)
+        group['latency_sum_ms'] += latency
+        group['latency_max_ms'] = max(group['latency_max_ms'], latency)
+        group['latency_histogram'][latency_bucket(latency)] += 1
+    return groups
+
+
+def apply_rollups(conn, records: List[Dict[str, Any]]):
+    """
+    Sumar un lote de interacciones a ai_usage_rollups
+
+    Se ejecuta en la transacción del lote (conn de engine.begin()): si
+    falla, ni las interacciones ni los rollups quedan a medias. Las filas
+    existentes se bloquean (SELECT ... FOR UPDATE) para que varios procesos
+    puedan escribir a la vez.
+    """
+    table = AIUsageRollup.__table__
+    now = datetime.utcnow()
+
+    for (day, interaction_type, user_id), delta in _accumulate(records).items():
+        key = and_(
+            table.c.day == day,
+            table.c.interaction_type == interaction_type,
+            table.c.user_id == user_id
+        )
+        row = conn.execute(select(table).where(key).with_for_update()).first()
+
+        if row is None:
+            conn.execute(table.insert().values(
+                day=day, interaction_type=interaction_type, user_id=user_id,
+                updated_at=now, **delta
+            ))
+            continue
+
+        histogram = list(row.latency_histogram or [])
+        histogram += [0] * (len(delta['latency_histogram']) - len(histogram))
+        conn.execute(table.update().where(table.c.id == row.id).values(
+            calls=table.c.calls + delta['calls'],
+            failures=table.c.failures + delta['failures'],
+            exact_calls=table.c.exact_calls + delta['exact_calls'],
+            prompt_tokens=table.c.prompt_tokens + delta['prompt_tokens'],
+            completion_tokens=table.c.completion_tokens + delta['completion_tokens'],
+            total_tokens=table.c.total_tokens + delta['total_tokens'],
+            cost_usd=table.c.cost_usd + Decimal(str(round(delta['cost_usd'], 6))),
+            latency_sum_ms=table.c.latency_sum_ms + delta['latency_sum_ms'],
+            latency_max_ms=max(row.latency_max_ms or 0, delta['latency_max_ms']),
+            latency_histogram=[a + b for a, b in zip(histogram, delta['latency_histogram'])],
+            updated_at=now
+        ))
+
+
+def rebuild_rollups(start: Optional[date] = None, end: Optional[date] = None, chunk_size: int = 5000) -> int:
+    """
+    Recalcular ai_usage_rollups desde ai_interactions para un rango de días
+
+    Requiere contexto de aplicación. Las interacciones sin tokens separados
+    (anteriores a esta contabilidad) se cuentan con tokens_used como total.
+
+    Returns:
+        int: Interacciones procesadas
+    """
+    interactions = AIInteraction.__table__
+    rollups = AIUsageRollup.__table__
+
+    conditions = []
+    if start:
+        conditions.append(interactions.c.created_at >= datetime.combine(start, datetime.min.time()))
+    if end:
+        conditions.append(interactions.c.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+    columns = [
+        interactions.c.id, interactions.c.user_id, interactions.c.interaction_type,
+        interactions.c.model_used, interactions.c.tokens_used, interactions.c.prompt_tokens,
+        interactions.c.completion_tokens, interactions.c.tokens_exact,
+        interactions.c.processing_time_ms, interactions.c.cost_estimate,
+        interactions.c.success, interactions.c.created_at
+    ]
+
+    processed = 0
+    with db.engine.begin() as conn:
+        delete = rollups.delete()
+        if start:
+            delete = delete.where(rollups.c.day >= start)
+        if end:
+            delete = delete.where(rollups.c.day <= end)
+        conn.execute(delete)
+
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(*columns)
+                .where(and_(interactions.c.id > last_id, *conditions))
+                .order_by(interactions.c.id)
+                .limit(chunk_size)
+            ).mappings().all()
+            if not rows:
+                break
+
+            records = []
+            for row in rows:
+                record = dict(row)
+                if record['cost_estimate'] is None and record['prompt_tokens'] is not None:
+                    record['cost_estimate'] = estimate_cost(
+                        record['model_used'], record['prompt_tokens'], record['completion_tokens']
+                    )
+                records.append(record)
+
+            apply_rollups(conn, records)
+            processed += len(rows)
+            last_id = rows[-1]['id']
+
+    return processed
+
+
+# ----------------------------------------------------------------------
+# Lectura
+# ----------------------------------------------------------------------
+
+def usage_report(
+    group_by: str = 'interaction_type',
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    interaction_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Tokens, costo y latencia agregados desde ai_usage_rollups
+
+    Args:
+        group_by (str): 'interaction_type' | 'user_id' | 'day'
+        start (date, optional): Primer día (por defecto hace 30 días)
+        end (date, optional): Último día (por defecto hoy)
+        user_id (int, optional): Filtrar por usuario
+        interaction_type (str, optional): Filtrar por tipo
+
+    Returns:
+        dict: {'group_by', 'start', 'end', 'groups': [...], 'totals': {...}}
+
+    Raises:
+        ValueError: Si group_by no es válido
+    """
+    if group_by not in GROUP_FIELDS:
+        raise ValueError(f"group_by debe ser uno de: {', '.join(GROUP_FIELDS)}")
+
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=30)
+
+    table = AIUsageRollup.__table__
+    query = select(table).where(table.c.day >= start, table.c.day <= end)
+    if user_id is not None:
+        query = query.where(table.c.user_id == user_id)
+    if interaction_type:
+        query = query.where(table.c.interaction_type == interaction_type)
+
+    with db.engine.connect() as conn:
+        rows = conn.execute(query).mappings().all()
+
+    groups = defaultdict(_empty_rollup)
+    totals = _empty_rollup()
+    for row in rows:
+        for target in (groups[row[group_by]], totals):
+            _merge(target, row)
+
+    ordered = sorted(groups.items(), key=lambda item: item[0]) if group_by == 'day' else \
+        sorted(groups.items(), key=lambda item: item[1]['total_tokens'], reverse=True)
+
+    return {
+        'group_by': group_by,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'groups': [
+            {group_by: key.isoformat() if isinstance(key, date) else key, **_summary(values)}
+            for key, values in ordered
+        ],
+        'totals': _summary(totals)
+    }
+
+
+def _merge(target: Dict[str, Any], row) -> None:
+    """Sumar una fila de rollup a un acumulador"""
+    for field in ('calls', 'failures', 'exact_calls', 'prompt_tokens',
+                  'completion_tokens', 'total_tokens', 'latency_sum_ms'):
+        target[field] += row[field] or 0
+    target['cost_usd'] += float(row['cost_usd'] or 0)
+    target['latency_max_ms'] = max(target['latency_max_ms'], row['latency_max_ms'] or 0)
+    for index, count in enumerate(row['latency_histogram'] or []):
+        if index < len(target['latency_histogram']):
+            target['latency_histogram'][index] += count
+
+
+def _summary(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Formato de salida de un grupo"""
+    calls = values['calls']
+    histogram = values['latency_histogram']
+    max_ms = values['latency_max_ms']
+    return {
+        'calls': calls,
+        'failures': values['failures'],
+        'exact_token_coverage': round(values['exact_calls'] / calls * 100, 2) if calls else 0,
+        'prompt_tokens': values['prompt_tokens'],
+        'completion_tokens': values['completion_tokens'],
+        'total_tokens': values['total_tokens'],
+        'avg_tokens': round(values['total_tokens'] / calls, 1) if calls else 0,
+        'cost_usd': round(values['cost_usd'], 6),
+        'latency_ms': {
+            'avg': round(values['latency_sum_ms'] / calls, 1) if calls else None,
+            'p50': histogram_percentile(histogram, 0.50, max_ms),
+            'p95': histogram_percentile(histogram, 0.95, max_ms),
+            'p99': histogram_percentile(histogram, 0.99, max_ms),
+            'max': max_ms if calls else None
+        }
+    }
@@ -5,5 +5,8 @@
 Servicios de procesamiento de audio
 """
 from app.services.audio_processing.transcription import transcription_service
+from app.services.audio_processing.recognizers import get_recognizer_backend
+from app.services.audio_processing.transcription_cache import transcription_cache
+from app.services.audio_processing.speech_analyzer import speech_analyzer
 
-__all__ = ['transcription_service']
\ No newline at end of file
+__all__ = ['transcription_service', 'get_recognizer_backend', 'transcription_cache', 'speech_analyzer']
\ No newline at end of file
@@ -0,0 +1,333 @@
+"""
+app/services/audio_processing/recognizers.py
+Backends de Reconocimiento de Voz
+Plataforma Integral de Rendimiento Estudiantil - Módulo 2
+
+Define una interfaz común para los motores de reconocimiento y sus
+implementaciones:
+
+- google:  Google Web Speech (requiere red)
+- sphinx:  CMU PocketSphinx (offline)
+- vosk:    Vosk/Kaldi (offline, CPU)
+- whisper: faster-whisper / CTranslate2 con modelos int8 (offline, CPU)
+
+El backend por defecto se elige con la variable SPEECH_RECOGNIZER_BACKEND.
+Todos los backends reciben un `sr.AudioData` y retornan la confianza real
+que reporta el motor (o None si el motor no la entrega).
+"""
+
+import os
+import json
+import math
+import threading
+from typing import Dict, List, Optional
+
+import speech_recognition as sr
+
+# Motores offline opcionales
+try:
+    import vosk
+    VOSK_AVAILABLE = True
+except Exception:
+    vosk = None
+    VOSK_AVAILABLE = False
+
+try:
+    import numpy as np
+    from faster_whisper import WhisperModel
+    WHISPER_AVAILABLE = True
+except Exception:
+    WhisperModel = None
+    WHISPER_AVAILABLE = False
+
+
+# Frecuencia de muestreo que esperan los motores offline
+OFFLINE_SAMPLE_RATE = 16000
+
+
+class RecognizerBackend:
+    """
+    Interfaz base de un motor de reconocimiento de voz
+
+    Las subclases implementan `recognize`, que debe retornar:
+        {
+            'text': str,
+            'confidence': float | None,  # 0.0 - 1.0
+            'words': list,               # [{'word', 'start', 'end', 'confidence'}]
+            'backend': str
+        }
+
+    Si no se reconoce voz deben lanzar `sr.UnknownValueError`, y si el motor
+    no está disponible `sr.RequestError`, igual que SpeechRecognition.
+    """
+
+    name = 'base'
+    offline = False
+
+    def __init__(self, language: str):
+        self.language = language
+
+    def recognize(self, audio_data: sr.AudioData) -> Dict:
+        raise NotImplementedError
+
+    def _build_result(
+        self,
+        text: str,
+        confidence: Optional[float],
+        words: Optional[List[Dict]] = None
+    ) -> Dict:
+        """Construir el resultado estándar del backend"""
+        text = (text or '').strip()
+        if not text:
+            raise sr.UnknownValueError()
+
+        return {
+            'text': text,
+            'confidence': round(confidence, 4) if confidence is not None else None,
+            'words': words or [],
+            'backend': self.name
+        }
+
+    @staticmethod
+    def _mean_word_confidence(words: List[Dict]) -> Optional[float]:
+        """Promedio de confianza por palabra (None si no hay datos)"""
+        values = [w['confidence'] for w in words if w.get('confidence') is not None]
+        if not values:
+            return None
+        return sum(values) / len(values)
+
+    def __repr__(self):
+        return f'<RecognizerBackend {self.name} ({self.language})>'
+
+
+class GoogleRecognizer(RecognizerBackend):
+    """Google Web Speech API (en línea)"""
+
+    name = 'google'
+
+    def __init__(self, language: str, recognizer: Optional[sr.Recognizer] = None):
+        super().__init__(language)
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio_data: sr.AudioData) -> Dict:
+        # show_all=True retorna las alternativas con su confianza
+        raw = self.recognizer.recognize_google(
+            audio_data,
+            language=self.language,
+            show_all=True
+        )
+
+        alternatives = raw.get('alternative', []) if isinstance(raw, dict) else []
+        if not alternatives:
+            raise sr.UnknownValueError()
+
+        best = max(alternatives, key=lambda alt: alt.get('confidence', -1))
+        return self._build_result(best.get('transcript', ''), best.get('confidence'))
+
+
+class SphinxRecognizer(RecognizerBackend):
+    """CMU PocketSphinx (offline)"""
+
+    name = 'sphinx'
+    offline = True
+
+    def __init__(self, language: str, recognizer: Optional[sr.Recognizer] = None):
+        super().__init__(language)
+        self.recognizer = recognizer or sr.Recognizer()
+        # Idioma o tupla de rutas (acoustic_model, language_model, dictionary)
+        sphinx_language = os.getenv('SPHINX_LANGUAGE', language)
+        if ',' in sphinx_language:
+            sphinx_language = tuple(p.strip() for p in sphinx_language.split(','))
+        self.sphinx_language = sphinx_language
+
+    def recognize(self, audio_data: sr.AudioData) -> Dict:
+        decoder = self.recognizer.recognize_sphinx(
+            audio_data,
+            language=self.sphinx_language,
+            show_all=True
+        )
+
+        hypothesis = decoder.hyp()
+        if hypothesis is None:
+            raise sr.UnknownValueError()
+
+        # Probabilidad posterior de la hipótesis (prob está en escala log)
+        confidence = None
+        try:
+            confidence = min(1.0, decoder.get_logmath().exp(hypothesis.prob))
+        except Exception:
+            pass
+
+        return self._build_result(hypothesis.hypstr, confidence)
+
+
+class VoskRecognizer(RecognizerBackend):
+    """Vosk / Kaldi (offline, CPU)"""
+
+    name = 'vosk'
+    offline = True
+
+    _model = None
+    _model_lock = threading.Lock()
+
+    def __init__(self, language: str):
+        super().__init__(language)
+        self.model_path = os.getenv('VOSK_MODEL_PATH', 'models/vosk-model-small-es-0.42')
+        # Bloque de audio enviado al reconocedor en cada iteración (bytes)
+        self.chunk_bytes = int(os.getenv('VOSK_CHUNK_BYTES', 8000))
+
+    def _get_model(self):
+        """Cargar el modelo una sola vez por proceso"""
+        if not VOSK_AVAILABLE:
+            raise sr.RequestError('vosk no está instalado (pip install vosk)')
+
+        if VoskRecognizer._model is None:
+            with VoskRecognizer._model_lock:
+                if VoskRecognizer._model is None:
+                    if not os.path.isdir(self.model_path):
+                        raise sr.RequestError(f'Modelo Vosk no encontrado en {self.model_path}')
+                    vosk.SetLogLevel(-1)
+                    VoskRecognizer._model = vosk.Model(self.model_path)
+                    print(f"✅ Modelo Vosk cargado: {self.model_path}")
+
+        return VoskRecognizer._model
+
+    def recognize(self, audio_data: sr.AudioData) -> Dict:
+        model = self._get_model()
+
+        recognizer = vosk.KaldiRecognizer(model, OFFLINE_SAMPLE_RATE)
+        recognizer.SetWords(True)
+
+        pcm = audio_data.get_raw_data(convert_rate=OFFLINE_SAMPLE_RATE, convert_width=2)
+
+        results = []
+        for offset in range(0, len(pcm), self.chunk_bytes):
+            if recognizer.AcceptWaveform(pcm[offset:offset + self.chunk_bytes]):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+
+        words = []
+        for result in results:
+            for item in result.get('result', []):
+                words.append({
+                    'word': item['word'],
+                    'start': item['start'],
+                    'end': item['end'],
+                    'confidence': item.get('conf')
+                })
+
+        text = ' '.join(r.get('text', '') for r in results if r.get('text'))
+        return self._build_result(text, self._mean_word_confidence(words), words)
+
+
+class WhisperRecognizer(RecognizerBackend):
+    """faster-whisper (CTranslate2) con cuantización int8 en CPU (offline)"""
+
+    name = 'whisper'
+    offline = True
+
+    _model = None
+    _model_lock = threading.Lock()
+
+    def __init__(self, language: str):
+        super().__init__(language)
+        self.model_name = os.getenv('WHISPER_MODEL', 'small')
+        self.compute_type = os.getenv('WHISPER_COMPUTE_TYPE', 'int8')
+        self.cpu_threads = int(os.getenv('WHISPER_CPU_THREADS', 0))
+        self.beam_size = int(os.getenv('WHISPER_BEAM_SIZE', 1))
+        # Whisper usa códigos ISO 639-1 ('es-ES' -> 'es')
+        self.whisper_language = language.split('-')[0].lower()
+
+    def _get_model(self):
+        """Cargar el modelo una sola vez por proceso"""
+        if not WHISPER_AVAILABLE:
+            raise sr.RequestError('faster-whisper no está instalado (pip install faster-whisper)')
+
+        if WhisperRecognizer._model is None:
+            with WhisperRecognizer._model_lock:
+                if WhisperRecognizer._model is None:
+                    WhisperRecognizer._model = WhisperModel(
+                        self.model_name,
+                        device='cpu',
+                        compute_type=self.compute_type,
+                        cpu_threads=self.cpu_threads
+                    )
+                    print(f"✅ Modelo Whisper cargado: {self.model_name} ({self.compute_type})")
+
+        return WhisperRecognizer._model
+
+    def recognize(self, audio_data: sr.AudioData) -> Dict:
+        model = self._get_model()
+
+        pcm = audio_data.get_raw_data(convert_rate=OFFLINE_SAMPLE_RATE, convert_width=2)
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+        segments, _info = model.transcribe(
+            samples,
+            language=self.whisper_language,
+            beam_size=self.beam_size,
+            word_timestamps=True
+        )
+
+        texts = []
+        words = []
+        segment_confidences = []
+        for segment in segments:
+            texts.append(segment.text.strip())
+            segment_confidences.append(math.exp(segment.avg_logprob))
+            for word in segment.words or []:
+                words.append({
+                    'word': word.word.strip(),
+                    'start': word.start,
+                    'end': word.end,
+                    'confidence': word.probability
+                })
+
+        confidence = self._mean_word_confidence(words)
+        if confidence is None and segment_confidences:
+            confidence = sum(segment_confidences) / len(segment_confidences)
+
+        return self._build_result(' '.join(texts), confidence, words)
+
+
+# Registro de backends disponibles
+RECOGNIZER_BACKENDS = {
+    'google': GoogleRecognizer,
+    'sphinx': SphinxRecognizer,
+    'vosk': VoskRecognizer,
+    'whisper': WhisperRecognizer,
+}
+
+_backend_instances: Dict[tuple, RecognizerBackend] = {}
+_backend_lock = threading.Lock()
+
+
+def get_recognizer_backend(
+    name: Optional[str] = None,
+    language: Optional[str] = None
+) -> RecognizerBackend:
+    """
+    Obtener (y reutilizar) una instancia del backend de reconocimiento
+
+    Args:
+        name (str, optional): google, sphinx, vosk o whisper.
+            Por defecto SPEECH_RECOGNIZER_BACKEND (google)
+        language (str, optional): Idioma. Por defecto SPEECH_RECOGNITION_LANGUAGE
+
+    Returns:
+        RecognizerBackend: Instancia compartida del backend
+    """
+    name = (name or os.getenv('SPEECH_RECOGNIZER_BACKEND', 'google')).lower()
+    language = language or os.getenv('SPEECH_RECOGNITION_LANGUAGE', 'es-ES')
+
+    if name not in RECOGNIZER_BACKENDS:
+        raise ValueError(
+            f"Backend de reconocimiento desconocido: {name}. "
+            f"Opciones: {', '.join(RECOGNIZER_BACKENDS)}"
+        )
+
+    key = (name, language)
+    with _backend_lock:
+        if key not in _backend_instances:
+            _backend_instances[key] = RECOGNIZER_BACKENDS[name](language)
+        return _backend_instances[key]
@@ -0,0 +1,376 @@
+"""
+app/services/audio_processing/speech_analyzer.py
+Análisis Prosódico del Habla
+Plataforma Integral de Rendimiento Estudiantil - Módulo 2
+
+Calcula, a partir del PCM ya cargado para la transcripción, métricas de
+habla por segmento:
+
+- Velocidad de habla (palabras/segundo) y de articulación (sin pausas)
+- Distribución de pausas
+- Contornos de energía (dB) y tono (F0 por autocorrelación)
+- Densidad de muletillas ("eh", "o sea", "este..."...)
+
+Las características por frame se calculan en una sola pasada vectorizada
+(NumPy, por bloques de frames) sobre el archivo completo; cada segmento
+solo recorta los arreglos ya calculados.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils import text_scoring
+
+
+# Muletillas comunes en español hablado (se cuentan siempre)
+FILLER_TERMS = (
+    'eh', 'ehh', 'em', 'emm', 'mm', 'mmm', 'o sea', 'digamos', 'ajá', 'ah', 'uh', 'um'
+)
+
+# Palabras que solo son muletilla según el contexto ("este libro", "pues
+# bien", "tipo de dato"): se cuentan alargadas ("esteee", "puesss") o
+# seguidas de una pausa (coma, puntos suspensivos o final del segmento)
+CONTEXT_FILLER_TERMS = ('este', 'pues', 'tipo', 'como que')
+
+CONTEXT_FILLER_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(
+        r'{}(?:{}+\b|\b(?=\s*(?:[,;…]|\.\.|$)))'.format(re.escape(term).replace(r'\ ', r'\s+'), term[-1])
+        for term in CONTEXT_FILLER_TERMS
+    ) + ')',
+    re.IGNORECASE
+)
+
+# Límites de duración de pausa (segundos) para la distribución
+PAUSE_BINS = (0.25, 0.5, 1.0, 2.0, float('inf'))
+PAUSE_BIN_LABELS = ('0.25-0.5s', '0.5-1s', '1-2s', '>2s')
+
+# Campos del formato compacto por segmento (ver compact_features)
+COMPACT_FIELDS = (
+    'start_time', 'end_time', 'word_count', 'speaking_rate_wps',
+    'articulation_rate_wps', 'pause_count', 'pause_total_seconds',
+    'energy_mean_db', 'energy_std_db', 'pitch_mean_hz', 'pitch_std_hz',
+    'voiced_ratio', 'filler_count', 'filler_density'
+)
+
+
+class SpeechAnalyzer:
+    """
+    Motor de características prosódicas basado en NumPy
+
+    Uso típico:
+        analyzer.analyze_audio_segment(audio, segments)
+    donde `audio` es el AudioSegment completo y `segments` la lista de
+    segmentos de TranscriptionService.transcribe_with_segments.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 40,
+        hop_ms: int = 10,
+        pitch_min_hz: float = 75.0,
+        pitch_max_hz: float = 400.0,
+        min_pause_ms: int = 250,
+        contour_points: int = 10,
+        block_frames: int = 2048
+    ):
+        """
+        Inicializar analizador
+
+        Args:
+            frame_ms (int): Tamaño de ventana de análisis
+            hop_ms (int): Salto entre frames
+            pitch_min_hz (float): F0 mínima buscada
+            pitch_max_hz (float): F0 máxima buscada
+            min_pause_ms (int): Duración mínima de silencio para contar una pausa
+            contour_points (int): Puntos de los contornos compactos por segmento
+            block_frames (int): Frames procesados por bloque (limita memoria)
+        """
+        self.frame_ms = frame_ms
+        self.hop_ms = hop_ms
+        self.pitch_min_hz = pitch_min_hz
+        self.pitch_max_hz = pitch_max_hz
+        self.min_pause_ms = min_pause_ms
+        self.contour_points = contour_points
+        self.block_frames = block_frames
+
+        self.filler_matcher = text_scoring.PhraseMatcher({term: 1 for term in FILLER_TERMS})
+
+    # ------------------------------------------------------------------
+    # Entrada
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def audio_segment_to_array(audio, target_rate: int = 16000):
+        """
+        Convertir un pydub.AudioSegment a muestras float32 mono en [-1, 1]
+
+        Returns:
+            tuple: (samples, sample_rate)
+        """
+        mono = audio.set_channels(1)
+        if mono.frame_rate > target_rate:
+            mono = mono.set_frame_rate(target_rate)
+
+        samples = np.array(mono.get_array_of_samples(), dtype=np.float32)
+        samples /= float(1 << (8 * mono.sample_width - 1))
+        return samples, mono.frame_rate
+
+    def analyze_audio_segment(self, audio, segments: List[Dict]) -> Dict:
+        """Analizar un AudioSegment completo (ver analyze)"""
+        samples, sample_rate = self.audio_segment_to_array(audio)
+        return self.analyze(samples, sample_rate, segments)
+
+    # ------------------------------------------------------------------
+    # Análisis
+    # ------------------------------------------------------------------
+
+    def analyze(self, samples: np.ndarray, sample_rate: int, segments: List[Dict]) -> Dict:
+        """
+        Calcular características prosódicas por segmento y del archivo
+
+        Args:
+            samples (np.ndarray): Audio mono float32 en [-1, 1]
+            sample_rate (int): Frecuencia de muestreo
+            segments (list): [{'start_time', 'end_time', 'text', 'words'?}, ...]
+                con tiempos en segundos relativos al inicio del archivo
+
+        Returns:
+            dict: {'segments': [features...], 'summary': {...}}
+        """
+        frames = self.extract_frame_features(samples, sample_rate)
+
+        segment_features = [self._segment_features(frames, seg) for seg in segments]
+        summary = self._summarize(frames, segments, segment_features)
+
+        return {
+            'segments': segment_features,
+            'summary': summary
+        }
+
+    def extract_frame_features(self, samples: np.ndarray, sample_rate: int) -> Dict:
+        """
+        Energía, F0 y actividad por frame en una sola pasada vectorizada
+
+        Returns:
+            dict: {
+                'hop_seconds': float,
+                'energy_db': np.ndarray,
+                'pitch_hz': np.ndarray (0 en frames sin voz),
+                'speech': np.ndarray[bool] (frames con habla)
+            }
+        """
+        frame_len = int(sample_rate * self.frame_ms / 1000)
+        hop = int(sample_rate * self.hop_ms / 1000)
+
+        samples = np.asarray(samples, dtype=np.float32)
+        if len(samples) < frame_len:
+            samples = np.pad(samples, (0, frame_len - len(samples)))
+
+        # Vista (sin copia) de frames solapados
+        frames = np.lib.stride_tricks.sliding_window_view(samples, frame_len)[::hop]
+        n_frames = frames.shape[0]
+
+        window = np.hanning(frame_len).astype(np.float32)
+        n_fft = 1 << int(np.ceil(np.log2(2 * frame_len)))
+        min_lag = max(int(sample_rate / self.pitch_max_hz), 1)
+        max_lag = min(int(sample_rate / self.pitch_min_hz), frame_len - 1)
+
+        rms = np.empty(n_frames, dtype=np.float32)
+        periodicity = np.zeros(n_frames, dtype=np.float32)
+        lags = np.zeros(n_frames, dtype=np.float32)
+
+        for start in range(0, n_frames, self.block_frames):
+            block = frames[start:start + self.block_frames]
+            end = start + block.shape[0]
+
+            rms[start:end] = np.sqrt(np.mean(np.square(block), axis=1))
+
+            # Autocorrelación por FFT de todos los frames del bloque
+            spectrum = np.fft.rfft(block * window, n=n_fft, axis=1)
+            autocorr = np.fft.irfft(np.abs(spectrum) ** 2, n=n_fft, axis=1)[:, :max_lag + 1]
+            energy = autocorr[:, 0]
+            valid = energy > 0
+            normalized = np.zeros_like(autocorr)
+            normalized[valid] = autocorr[valid] / energy[valid, None]
+
+            search = normalized[:, min_lag:max_lag + 1]
+            best = np.argmax(search, axis=1)
+            periodicity[start:end] = search[np.arange(search.shape[0]), best]
+            lags[start:end] = best + min_lag
+
+        energy_db = 20 * np.log10(rms + 1e-10)
+
+        # Umbral de habla relativo al nivel del archivo
+        speech_threshold = max(float(np.percentile(energy_db, 95)) - 35.0, -60.0)
+        speech = energy_db > speech_threshold
+
+        voiced = speech & (periodicity > 0.45)
+        pitch_hz = np.where(voiced, sample_rate / np.maximum(lags, 1), 0.0).astype(np.float32)
+
+        return {
+            'hop_seconds': hop / sample_rate,
+            'energy_db': energy_db,
+            'pitch_hz': pitch_hz,
+            'speech': speech
+        }
+
+    def _segment_features(self, frames: Dict, segment: Dict) -> Dict:
+        """Características de un segmento a partir de los arreglos por frame"""
+        hop = frames['hop_seconds']
+        start_time = float(segment.get('start_time', 0))
+        end_time = float(segment.get('end_time', start_time))
+        duration = max(end_time - start_time, 0.0)
+
+        i0 = int(start_time / hop)
+        i1 = max(int(np.ceil(end_time / hop)), i0 + 1)
+        energy_db = frames['energy_db'][i0:i1]
+        pitch_hz = frames['pitch_hz'][i0:i1]
+        speech = frames['speech'][i0:i1]
+
+        # Texto: palabras y muletillas con una sola tokenización
+        text = segment.get('text', '')
+        tokens = text_scoring.tokenize(text)
+        word_count = len(tokens)
+        filler_count = len(self.filler_matcher.find(tokens)) + len(CONTEXT_FILLER_PATTERN.findall(text or ''))
+
+        pauses = self._pause_durations(speech, hop)
+        pause_total = float(pauses.sum()) if pauses.size else 0.0
+
+        # Si el backend entregó timestamps por palabra, la ventana de habla es más precisa
+        words = segment.get('words') or []
+        if words and words[-1].get('end') is not None and words[0].get('start') is not None:
+            spoken_span = max(float(words[-1]['end']) - float(words[0]['start']), 0.0)
+        else:
+            spoken_span = duration
+
+        articulation_time = max(spoken_span - pause_total, 0.0)
+
+        active_energy = energy_db[speech] if speech.any() else energy_db
+        voiced_pitch = pitch_hz[pitch_hz > 0]
+
+        return {
+            'start_time': round(start_time, 3),
+            'end_time': round(end_time, 3),
+            'word_count': word_count,
+            'speaking_rate_wps': round(word_count / duration, 3) if duration else 0,
+            'articulation_rate_wps': round(word_count / articulation_time, 3) if articulation_time else 0,
+            'pause_count': int(pauses.size),
+            'pause_total_seconds': round(pause_total, 3),
+            'pause_durations': [round(float(p), 3) for p in pauses],
+            'energy_mean_db': round(float(active_energy.mean()), 2) if active_energy.size else 0,
+            'energy_std_db': round(float(active_energy.std()), 2) if active_energy.size else 0,
+            'pitch_mean_hz': round(float(voiced_pitch.mean()), 1) if voiced_pitch.size else 0,
+            'pitch_std_hz': round(float(voiced_pitch.std()), 1) if voiced_pitch.size else 0,
+            'voiced_ratio': round(float(voiced_pitch.size / len(pitch_hz)), 3) if len(pitch_hz) else 0,
+            'filler_count': filler_count,
+            'filler_density': round(filler_count / word_count * 100, 2) if word_count else 0,
+            'energy_contour': self._contour(energy_db),
+            'pitch_contour': self._contour(pitch_hz, ignore_zeros=True)
+        }
+
+    def _pause_durations(self, speech: np.ndarray, hop: float) -> np.ndarray:
+        """Duración (s) de cada tramo de silencio >= min_pause_ms dentro de la ventana"""
+        if speech.size == 0:
+            return np.empty(0)
+
+        silent = (~speech).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], silent, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        # Los silencios al borde del segmento no son pausas internas
+        interior = (starts > 0) & (ends < speech.size)
+        durations = (ends - starts)[interior] * hop
+        return durations[durations >= self.min_pause_ms / 1000]
+
+    def _contour(self, values: np.ndarray, ignore_zeros: bool = False) -> List[float]:
+        """Contorno compacto: promedio en `contour_points` tramos iguales"""
+        if values.size == 0:
+            return []
+
+        points = min(self.contour_points, values.size)
+        contour = []
+        for chunk in np.array_split(values, points):
+            if ignore_zeros:
+                chunk = chunk[chunk > 0]
+            contour.append(round(float(chunk.mean()), 1) if chunk.size else 0)
+        return contour
+
+    def _summarize(self, frames: Dict, segments: List[Dict], features: List[Dict]) -> Dict:
+        """Métricas agregadas del archivo"""
+        total_words = sum(f['word_count'] for f in features)
+        total_fillers = sum(f['filler_count'] for f in features)
+        speaking_time = sum(f['end_time'] - f['start_time'] for f in features)
+
+        # Pausas internas + silencios entre segmentos consecutivos
+        pauses = [p for f in features for p in f['pause_durations']]
+        for prev, nxt in zip(segments, segments[1:]):
+            gap = float(nxt.get('start_time', 0)) - float(prev.get('end_time', 0))
+            if gap >= self.min_pause_ms / 1000:
+                pauses.append(gap)
+
+        pauses = np.asarray(pauses, dtype=np.float32)
+        if pauses.size:
+            edges = (self.min_pause_ms / 1000,) + PAUSE_BINS[1:]
+            histogram = np.histogram(pauses, bins=edges)[0]
+        else:
+            histogram = np.zeros(len(PAUSE_BIN_LABELS), dtype=int)
+
+        pitch = frames['pitch_hz'][frames['pitch_hz'] > 0]
+        speech_energy = frames['energy_db'][frames['speech']]
+
+        return {
+            'total_words': total_words,
+            'speaking_time_seconds': round(speaking_time, 2),
+            'speaking_rate_wps': round(total_words / speaking_time, 3) if speaking_time else 0,
+            'pause_count': int(pauses.size),
+            'pause_mean_seconds': round(float(pauses.mean()), 3) if pauses.size else 0,
+            'pause_median_seconds': round(float(np.median(pauses)), 3) if pauses.size else 0,
+            'pause_p90_seconds': round(float(np.percentile(pauses, 90)), 3) if pauses.size else 0,
+            'pause_distribution': dict(zip(PAUSE_BIN_LABELS, (int(c) for c in histogram))),
+            'pitch_mean_hz': round(float(pitch.mean()), 1) if pitch.size else 0,
+            'pitch_std_hz': round(float(pitch.std()), 1) if pitch.size else 0,
+            'energy_mean_db': round(float(speech_energy.mean()), 2) if speech_energy.size else 0,
+            'filler_count': total_fillers,
+            'filler_density': round(total_fillers / total_words * 100, 2) if total_words else 0
+        }
+
+
+def compact_features(prosody: Dict) -> Dict:
+    """
+    Formato compacto para persistir (AudioSession.meta_info['prosody'])
+
+    Cada segmento se guarda como una fila con los valores de COMPACT_FIELDS
+    más sus contornos, y se conserva el resumen del archivo.
+    """
+    return {
+        'fields': list(COMPACT_FIELDS),
+        'segments': [[f[field] for field in COMPACT_FIELDS] for f in prosody.get('segments', [])],
+        'energy_contours': [f['energy_contour'] for f in prosody.get('segments', [])],
+        'pitch_contours': [f['pitch_contour'] for f in prosody.get('segments', [])],
+        'summary': prosody.get('summary', {})
+    }
+
+
+def expand_features(compact: Optional[Dict]) -> List[Dict]:
+    """Reconstruir la lista de características por segmento desde el formato compacto"""
+    if not compact:
+        return []
+
+    fields = compact.get('fields', COMPACT_FIELDS)
+    energy_contours = compact.get('energy_contours', [])
+    pitch_contours = compact.get('pitch_contours', [])
+
+    expanded = []
+    for i, row in enumerate(compact.get('segments', [])):
+        features = dict(zip(fields, row))
+        features['energy_contour'] = energy_contours[i] if i < len(energy_contours) else []
+        features['pitch_contour'] = pitch_contours[i] if i < len(pitch_contours) else []
+        expanded.append(features)
+    return expanded
+
+
+# Instancia global del analizador
+speech_analyzer = SpeechAnalyzer()
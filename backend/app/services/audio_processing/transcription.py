@@ -7,9 +7,12 @@ Plataforma Integral de Rendimiento Estudiantil - Módulo 2
 import os
 import speech_recognition as sr
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+from pydub.silence import detect_nonsilent
 from typing import List, Dict, Optional, Tuple
 from app.services.ai.gemini_service import gemini_service
+from app.services.audio_processing.recognizers import get_recognizer_backend
+from app.services.audio_processing.transcription_cache import transcription_cache
+from app.services.audio_processing.speech_analyzer import speech_analyzer
 
 
 class TranscriptionService:
@@ -30,34 +33,58 @@ class TranscriptionService:
         self.recognizer.dynamic_energy_threshold = True
         self.recognizer.pause_threshold = 0.8
         
+        # Backend de reconocimiento (SPEECH_RECOGNIZER_BACKEND)
+        self.backend = get_recognizer_backend(language=self.language)
+        
         print(f"✅ TranscriptionService inicializado")
         print(f"   Idioma: {self.language}")
+        print(f"   Backend de reconocimiento: {self.backend.name}")
         print(f"   Objetivo de precisión: {self.target_accuracy * 100}%")
     
     def transcribe_audio_file(
         self,
         audio_path: str,
-        use_google: bool = True
+        use_google: Optional[bool] = None,
+        backend: Optional[str] = None
     ) -> Dict:
         """
         Transcribir archivo de audio completo
         
         Args:
             audio_path (str): Ruta al archivo de audio
-            use_google (bool): Usar Google Speech Recognition
+            use_google (bool, optional): True fuerza Google, False fuerza Sphinx
+                (compatibilidad). Por defecto se usa el backend configurado
+            backend (str, optional): Nombre del backend (google, sphinx, vosk, whisper)
         
         Returns:
             dict: Resultado de la transcripción
                 {
                     'success': bool,
                     'text': str,
-                    'confidence': float,
+                    'confidence': float | None,
                     'duration_seconds': float,
                     'word_count': int,
+                    'words': list,
+                    'backend': str,
+                    'cached': bool,
                     'error': str
                 }
         """
         try:
+            recognizer_backend = self._resolve_backend(use_google, backend)
+            
+            # Buscar en caché por contenido del archivo (antes de convertir)
+            cache_key = transcription_cache.make_key(
+                transcription_cache.hash_file(audio_path),
+                kind='file',
+                language=self.language,
+                backend=recognizer_backend.name
+            )
+            cached = transcription_cache.get(cache_key)
+            if cached is not None:
+                cached['cached'] = True
+                return cached
+            
             # Convertir a WAV si es necesario
             wav_path = self._convert_to_wav(audio_path)
             
@@ -74,26 +101,23 @@ class TranscriptionService:
                 audio_data = self.recognizer.record(source)
                 
                 # Transcribir
-                if use_google:
-                    text = self.recognizer.recognize_google(
-                        audio_data,
-                        language=self.language
-                    )
-                else:
-                    text = self.recognizer.recognize_sphinx(audio_data)
-                
-                # Calcular métricas
-                word_count = len(text.split())
-                confidence = 0.85  # Google no retorna confidence, estimamos
+                result = recognizer_backend.recognize(audio_data)
+                text = result['text']
                 
-                return {
+                transcription = {
                     'success': True,
                     'text': text,
-                    'confidence': confidence,
+                    'confidence': result['confidence'],
                     'duration_seconds': duration_seconds,
-                    'word_count': word_count,
+                    'word_count': len(text.split()),
+                    'words': result['words'],
+                    'backend': result['backend'],
+                    'cached': False,
                     'error': None
                 }
+                transcription_cache.set(cache_key, transcription)
+                
+                return transcription
         
         except sr.UnknownValueError:
             return {
@@ -118,15 +142,22 @@ class TranscriptionService:
         self,
         audio_path: str,
         min_silence_len: int = 500,
-        silence_thresh: int = -40
+        silence_thresh: int = -40,
+        backend: Optional[str] = None,
+        include_prosody: bool = True
     ) -> Dict:
         """
         Transcribir audio dividiéndolo en segmentos basados en silencios
         
+        Los tiempos de cada segmento corresponden a su posición real en el
+        archivo original.
+        
         Args:
             audio_path (str): Ruta al archivo de audio
             min_silence_len (int): Longitud mínima de silencio en ms
             silence_thresh (int): Umbral de silencio en dBFS
+            backend (str, optional): Nombre del backend de reconocimiento
+            include_prosody (bool): Calcular métricas prosódicas (speech_analyzer)
         
         Returns:
             dict: Resultado con segmentos transcritos
@@ -135,10 +166,35 @@ class TranscriptionService:
                     'full_text': str,
                     'segments': list,
                     'total_segments': int,
-                    'avg_confidence': float
+                    'avg_confidence': float,
+                    'cached_segments': int,
+                    'prosody': dict | None
                 }
         """
         try:
+            recognizer_backend = self._resolve_backend(None, backend)
+            
+            # Parámetros que afectan el resultado de cada segmento
+            cache_params = {
+                'language': self.language,
+                'backend': recognizer_backend.name
+            }
+            
+            # Archivo idéntico ya segmentado con los mismos umbrales
+            file_cache_key = transcription_cache.make_key(
+                transcription_cache.hash_file(audio_path),
+                kind='segmented_file',
+                min_silence_len=min_silence_len,
+                silence_thresh=silence_thresh,
+                target_accuracy=self.target_accuracy,
+                include_prosody=include_prosody,
+                **cache_params
+            )
+            cached = transcription_cache.get(file_cache_key)
+            if cached is not None:
+                cached['cached_segments'] = cached['total_chunks']
+                return cached
+            
             # Convertir a WAV
             wav_path = self._convert_to_wav(audio_path)
             
@@ -146,7 +202,7 @@ class TranscriptionService:
             audio = AudioSegment.from_wav(wav_path)
             
             # Dividir en segmentos basados en silencios
-            chunks = split_on_silence(
+            chunks = self._split_on_silence(
                 audio,
                 min_silence_len=min_silence_len,
                 silence_thresh=silence_thresh,
@@ -157,66 +213,91 @@ class TranscriptionService:
             
             segments = []
             full_text_parts = []
-            current_time = 0
+            cached_segments = 0
+            failed_segments = 0
             
-            for i, chunk in enumerate(chunks):
-                # Duración del chunk
+            for i, (chunk, start_ms, end_ms) in enumerate(chunks):
+                # Posición del chunk en el audio original
                 chunk_duration = len(chunk) / 1000.0
-                start_time = current_time
-                end_time = current_time + chunk_duration
+                start_time = start_ms / 1000.0
+                end_time = end_ms / 1000.0
                 
-                # Exportar chunk temporal
-                chunk_path = f"/tmp/chunk_{i}.wav"
-                chunk.export(chunk_path, format="wav")
+                # PCM mono del chunk (sin archivo temporal)
+                mono_chunk = chunk.set_channels(1)
+                pcm = mono_chunk.raw_data
                 
-                # Transcribir chunk
-                with sr.AudioFile(chunk_path) as source:
-                    audio_data = self.recognizer.record(source)
-                    
+                # Segmentos idénticos se reutilizan aunque el archivo cambie
+                segment_key = transcription_cache.make_key(
+                    transcription_cache.hash_pcm(pcm),
+                    kind='segment',
+                    frame_rate=mono_chunk.frame_rate,
+                    sample_width=mono_chunk.sample_width,
+                    **cache_params
+                )
+                result = transcription_cache.get(segment_key)
+                
+                if result is not None:
+                    cached_segments += 1
+                else:
+                    audio_data = sr.AudioData(pcm, mono_chunk.frame_rate, mono_chunk.sample_width)
                     try:
-                        text = self.recognizer.recognize_google(
-                            audio_data,
-                            language=self.language
-                        )
-                        
-                        segments.append({
-                            'segment_number': i + 1,
-                            'start_time': round(start_time, 3),
-                            'end_time': round(end_time, 3),
-                            'duration': round(chunk_duration, 3),
-                            'text': text,
-                            'confidence': 0.85,
-                            'word_count': len(text.split())
-                        })
-                        
-                        full_text_parts.append(text)
-                        
-                        print(f"   ✅ Segmento {i+1}/{len(chunks)}: {len(text)} caracteres")
-                        
+                        result = recognizer_backend.recognize(audio_data)
                     except sr.UnknownValueError:
-                        print(f"   ⚠️  Segmento {i+1}: No se entendió el audio")
+                        # Se guarda también el "sin voz" para no reintentarlo
+                        result = {'text': None, 'confidence': None, 'words': []}
                     except Exception as e:
                         print(f"   ❌ Segmento {i+1}: Error - {str(e)}")
+                        failed_segments += 1
+                        continue
+                    transcription_cache.set(segment_key, result)
                 
-                # Limpiar archivo temporal
-                if os.path.exists(chunk_path):
-                    os.remove(chunk_path)
+                text = result['text']
+                if not text:
+                    print(f"   ⚠️  Segmento {i+1}: No se entendió el audio")
+                    continue
+                
+                segments.append({
+                    'segment_number': i + 1,
+                    'start_time': round(start_time, 3),
+                    'end_time': round(end_time, 3),
+                    'duration': round(chunk_duration, 3),
+                    'text': text,
+                    'confidence': result['confidence'],
+                    'word_count': len(text.split()),
+                    'words': result['words']
+                })
                 
-                current_time = end_time
+                full_text_parts.append(text)
+                
+                print(f"   ✅ Segmento {i+1}/{len(chunks)}: {len(text)} caracteres")
+            
+            if cached_segments:
+                print(f"   ♻️  {cached_segments}/{len(chunks)} segmentos recuperados de caché")
             
             # Texto completo
             full_text = ' '.join(full_text_parts)
             
-            # Confianza promedio
-            if segments:
-                avg_confidence = sum(s['confidence'] for s in segments) / len(segments)
+            # Confianza promedio (solo segmentos con confianza reportada)
+            confidences = [s['confidence'] for s in segments if s['confidence'] is not None]
+            if confidences:
+                avg_confidence = sum(confidences) / len(confidences)
             else:
                 avg_confidence = 0
             
             # Calcular precisión (porcentaje de segmentos transcritos)
             accuracy_percentage = (len(segments) / len(chunks) * 100) if chunks else 0
             
-            return {
+            # Métricas prosódicas sobre el PCM ya cargado (una pasada por archivo)
+            prosody = None
+            if include_prosody and segments:
+                try:
+                    prosody = speech_analyzer.analyze_audio_segment(audio, segments)
+                    for segment, features in zip(segments, prosody['segments']):
+                        segment['prosody'] = features
+                except Exception as e:
+                    print(f"   ⚠️  No se pudieron calcular métricas prosódicas: {e}")
+            
+            transcription = {
                 'success': True,
                 'full_text': full_text,
                 'segments': segments,
@@ -225,8 +306,16 @@ class TranscriptionService:
                 'avg_confidence': round(avg_confidence, 2),
                 'accuracy_percentage': round(accuracy_percentage, 2),
                 'meets_target': accuracy_percentage >= (self.target_accuracy * 100),
+                'backend': recognizer_backend.name,
+                'cached_segments': cached_segments,
+                'prosody': prosody['summary'] if prosody else None,
                 'error': None
             }
+            # Errores transitorios (red, motor) no se guardan a nivel de archivo
+            if not failed_segments:
+                transcription_cache.set(file_cache_key, transcription)
+            
+            return transcription
             
         except Exception as e:
             return {
@@ -236,6 +325,37 @@ class TranscriptionService:
                 'error': str(e)
             }
     
+    def _split_on_silence(
+        self,
+        audio: AudioSegment,
+        min_silence_len: int,
+        silence_thresh: int,
+        keep_silence: int = 200
+    ) -> List[Tuple[AudioSegment, int, int]]:
+        """
+        Equivalente a pydub.silence.split_on_silence que además conserva la
+        posición (ms) de cada chunk en el audio original
+        
+        Returns:
+            list: [(chunk, start_ms, end_ms), ...]
+        """
+        ranges = [
+            [start - keep_silence, end + keep_silence]
+            for start, end in detect_nonsilent(audio, min_silence_len, silence_thresh)
+        ]
+        
+        # Repartir el silencio compartido entre rangos que se solapan
+        for current, following in zip(ranges, ranges[1:]):
+            if following[0] < current[1]:
+                current[1] = (current[1] + following[0]) // 2
+                following[0] = current[1]
+        
+        chunks = []
+        for start, end in ranges:
+            start, end = max(start, 0), min(end, len(audio))
+            chunks.append((audio[start:end], start, end))
+        return chunks
+    
     def analyze_transcription_with_ai(
         self,
         transcription_text: str,
@@ -258,6 +378,82 @@ class TranscriptionService:
         
         return result
     
+    def analyze_segments_with_ai(
+        self,
+        transcriptions: List,
+        user_id: Optional[int] = None,
+        audio_session_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Analizar sentimiento de los segmentos de una sesión en lote con Gemini
+        
+        Actualiza las columnas sentiment, sentiment_score y keywords de cada
+        AudioTranscription. Los segmentos que Gemini no devuelve se analizan
+        con el léxico local. No hace commit.
+        
+        Args:
+            transcriptions (list): Instancias de AudioTranscription
+            user_id (int): ID del usuario
+            audio_session_id (int): ID de la sesión de audio
+        
+        Returns:
+            dict: Resumen del análisis (segmentos, llamadas a la API, fallback)
+        """
+        from app.models.audio_transcription import AudioTranscription
+        
+        transcriptions = [t for t in transcriptions if t.text]
+        
+        result = gemini_service.analyze_segments_sentiment(
+            segments=[{'id': t.id, 'text': t.text} for t in transcriptions],
+            user_id=user_id,
+            audio_session_id=audio_session_id
+        )
+        
+        fallback = []
+        for transcription in transcriptions:
+            analysis = result['results'].get(transcription.id)
+            if analysis is None:
+                fallback.append(transcription)
+                continue
+            
+            transcription.sentiment = analysis['sentiment']
+            transcription.sentiment_score = analysis['sentiment_score']
+            transcription.keywords = analysis['keywords']
+        
+        if fallback:
+            AudioTranscription.analyze_batch(fallback)
+        
+        return {
+            'success': result['success'],
+            'total_segments': len(transcriptions),
+            'ai_segments': len(transcriptions) - len(fallback),
+            'fallback_segments': len(fallback),
+            'api_calls': result['api_calls'],
+            'tokens_used': result['tokens_used'],
+            'processing_time_ms': result['processing_time_ms']
+        }
+    
+    def _resolve_backend(
+        self,
+        use_google: Optional[bool] = None,
+        backend: Optional[str] = None
+    ):
+        """
+        Resolver el backend de reconocimiento a usar
+        
+        Args:
+            use_google (bool, optional): Parámetro heredado (True=google, False=sphinx)
+            backend (str, optional): Nombre explícito del backend
+        
+        Returns:
+            RecognizerBackend: Backend a utilizar
+        """
+        if backend:
+            return get_recognizer_backend(backend, self.language)
+        if use_google is not None:
+            return get_recognizer_backend('google' if use_google else 'sphinx', self.language)
+        return self.backend
+    
     def _convert_to_wav(self, audio_path: str) -> str:
         """
         Convertir archivo de audio a WAV si es necesario
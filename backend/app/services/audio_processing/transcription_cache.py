@@ -0,0 +1,279 @@
+"""
+app/services/audio_processing/transcription_cache.py
+Caché de Transcripciones por Contenido
+Plataforma Integral de Rendimiento Estudiantil - Módulo 2
+
+Guarda resultados de transcripción indexados por el hash del contenido
+(bytes del archivo o PCM decodificado de cada segmento) junto con los
+parámetros de reconocimiento (idioma, backend, umbrales). Un audio
+re-subido o reintentado se resuelve sin volver a convertir ni transcribir,
+y los segmentos idénticos de subidas parcialmente solapadas se reutilizan.
+
+Dos niveles:
+- Memoria: LRU acotado por tamaño (bytes)
+- Disco:   archivos JSON en TRANSCRIPTION_CACHE_DIR, acotado por tamaño
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class TranscriptionCache:
+    """
+    Caché de dos niveles (memoria + disco) para transcripciones
+
+    Las claves se construyen con `make_key(content_hash, **params)`, de modo
+    que cambiar cualquier parámetro de reconocimiento invalida la entrada.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_bytes: Optional[int] = None,
+        max_disk_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Inicializar caché
+
+        Args:
+            cache_dir (str): Carpeta del nivel en disco
+            max_memory_bytes (int): Tamaño máximo del nivel en memoria
+            max_disk_bytes (int): Tamaño máximo del nivel en disco
+            enabled (bool): Activar/desactivar la caché
+        """
+        self.cache_dir = cache_dir or os.getenv('TRANSCRIPTION_CACHE_DIR', 'generated/cache/transcriptions')
+        self.max_memory_bytes = max_memory_bytes or int(os.getenv('TRANSCRIPTION_CACHE_MEMORY_BYTES', 16 * 1024 * 1024))
+        self.max_disk_bytes = max_disk_bytes or int(os.getenv('TRANSCRIPTION_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+        if enabled is None:
+            enabled = os.getenv('TRANSCRIPTION_CACHE_ENABLED', 'True').lower() == 'true'
+        self.enabled = enabled
+
+        self._memory = OrderedDict()  # key -> (payload_json, size)
+        self._memory_bytes = 0
+        self._disk_bytes = None  # Se calcula en la primera escritura
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def hash_file(path: str, block_size: int = 1024 * 1024) -> str:
+        """Hash SHA-256 de los bytes de un archivo (lectura por bloques)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_pcm(raw_data: bytes) -> str:
+        """Hash SHA-256 de audio PCM decodificado"""
+        return hashlib.sha256(raw_data).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, **params) -> str:
+        """
+        Construir la clave de caché
+
+        Args:
+            content_hash (str): Hash del contenido (archivo o PCM)
+            **params: Parámetros de reconocimiento (language, backend, umbrales...)
+
+        Returns:
+            str: Clave hexadecimal
+        """
+        serialized = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f'{content_hash}:{serialized}'.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lectura / escritura
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Obtener una entrada (memoria primero, luego disco)
+
+        Returns:
+            dict | None: Resultado almacenado o None si no existe
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[0])
+
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = f.read()
+            value = json.loads(payload)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Promover al nivel en memoria y marcar uso reciente en disco
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, payload)
+
+        return value
+
+    def set(self, key: str, value: Dict):
+        """
+        Guardar una entrada en ambos niveles
+
+        Args:
+            key (str): Clave generada con make_key
+            value (dict): Resultado serializable a JSON
+        """
+        if not self.enabled:
+            return
+
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+
+        with self._lock:
+            self._memory_put(key, payload)
+
+        try:
+            self._disk_put(key, payload)
+        except OSError as e:
+            print(f"⚠️  No se pudo escribir caché de transcripción en disco: {e}")
+
+    def clear(self):
+        """Vaciar ambos niveles"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+            if os.path.isdir(self.cache_dir):
+                for root, _dirs, files in os.walk(self.cache_dir):
+                    for name in files:
+                        if name.endswith('.json'):
+                            try:
+                                os.remove(os.path.join(root, name))
+                            except OSError:
+                                pass
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict:
+        """Métricas de uso de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_bytes': self._disk_bytes
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _memory_put(self, key: str, payload: str):
+        """Insertar en el LRU en memoria (requiere self._lock)"""
+        size = len(payload)
+        if size > self.max_memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+
+        self._memory[key] = (payload, size)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _key, (_payload, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def _disk_put(self, key: str, payload: str):
+        """Escribir en disco de forma atómica y aplicar el límite de tamaño"""
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_usage()
+            else:
+                self._disk_bytes += len(payload.encode('utf-8'))
+
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _scan_disk_usage(self) -> int:
+        total = 0
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.json'):
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        pass
+        return total
+
+    def _evict_disk(self):
+        """Eliminar las entradas menos usadas hasta quedar en el 90% del límite"""
+        entries = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _mtime, size, _path in entries)
+        target = int(self.max_disk_bytes * 0.9)
+
+        for _mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        self._disk_bytes = total
+
+
+# Instancia global de la caché
+transcription_cache = TranscriptionCache()
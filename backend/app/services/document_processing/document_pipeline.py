@@ -0,0 +1,551 @@
+"""
+app/services/document_processing/document_pipeline.py - Pipeline de Análisis de Documentos
+Plataforma Integral de Rendimiento Estudiantil
+
+Procesa en segundo plano los documentos subidos (modelo Document) en
+etapas:
+
+    extract → metrics → ai_analysis → persist → vocabulary → similarity → profile
+
+1. extract: recorre el documento con el lector por párrafos (PDF, DOCX,
+   TXT, MD) escribiendo cada bloque en el punto de control y calculando
+   las métricas al mismo tiempo, sin tener el texto completo en memoria
+2. metrics: guarda las métricas de la extracción (al reanudar, las calcula
+   leyendo el punto de control por párrafos)
+3. ai_analysis: análisis con Gemini (por fragmentos si el texto es largo)
+4. persist: crea/actualiza el TextAnalysis y marca el documento completado
+5. vocabulary: actualiza el índice de vocabulario del estudiante
+6. similarity: busca entregas anteriores casi idénticas y añade el documento
+   al índice MinHash de entregas
+7. profile: regenera el perfil integral del estudiante
+
+Cada etapa guarda un punto de control en Document.meta_info['pipeline']
+(estado, intentos, duración y error por etapa; métricas y análisis de la
+IA) y el texto extraído en DOCUMENT_PIPELINE_DIR. Si una etapa falla, el
+reprocesamiento retoma en esa etapa sin repetir las anteriores (p. ej. un
+error de la IA no vuelve a extraer el PDF).
+
+Los documentos se procesan en un pool de hilos acotado
+(DOCUMENT_PIPELINE_WORKERS) con una cola limitada
+(DOCUMENT_PIPELINE_QUEUE_SIZE); un documento ya encolado no se encola dos
+veces.
+"""
+
+import os
+import copy
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from app import db
+from app.models.document import Document
+from app.models.text_analysis import TextAnalysis
+from app.services.document_processing import document_reader
+from app.utils.text_metrics import TextMetrics, compute_metrics
+
+
+STAGES = ('extract', 'metrics', 'ai_analysis', 'persist', 'vocabulary', 'similarity', 'profile')
+
+# Etapas posteriores a guardar el análisis: si fallan, el documento sigue completado
+POST_ANALYSIS_STAGES = ('vocabulary', 'similarity', 'profile')
+
+
+class DocumentPipeline:
+    """
+    Pool acotado que ejecuta las etapas de análisis de documentos con
+    puntos de control
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        checkpoint_dir: Optional[str] = None,
+        timeout: Optional[int] = None
+    ):
+        """
+        Inicializar pipeline
+
+        Args:
+            max_workers (int): Documentos procesados en paralelo
+            queue_size (int): Documentos en cola o en proceso como máximo
+            checkpoint_dir (str): Carpeta del texto extraído
+            timeout (int): Segundos tras los cuales un documento en
+                'processing' se considera interrumpido
+        """
+        self.max_workers = max_workers or int(os.getenv('DOCUMENT_PIPELINE_WORKERS', 2))
+        self.queue_size = queue_size or int(os.getenv('DOCUMENT_PIPELINE_QUEUE_SIZE', 50))
+        self.checkpoint_dir = checkpoint_dir or os.getenv(
+            'DOCUMENT_PIPELINE_DIR',
+            os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), '.pipeline')
+        )
+        self.timeout = timeout or int(os.getenv('DOCUMENT_PIPELINE_TIMEOUT_SECONDS', 1800))
+
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = set()  # IDs de documentos en cola o en proceso
+        self._stage_stats = {stage: self._empty_stats() for stage in STAGES}
+        self._counters = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    def init_app(self, app):
+        """
+        Vincular la aplicación y marcar como fallidos los documentos que
+        quedaron en proceso en una ejecución anterior (se pueden retomar)
+        """
+        self._app = app
+        app.extensions['document_pipeline'] = self
+
+        with app.app_context():
+            try:
+                stale = Document.query.filter(
+                    Document.processing_status == 'processing',
+                    Document.processing_started_at < datetime.utcnow() - timedelta(seconds=self.timeout)
+                ).update({
+                    'processing_status': 'failed',
+                    'error_message': 'Procesamiento interrumpido',
+                    'processing_completed_at': datetime.utcnow()
+                }, synchronize_session=False)
+                db.session.commit()
+                if stale:
+                    print(f"⚠️  {stale} documentos interrumpidos marcados como fallidos (se pueden reanudar)")
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  No se pudieron revisar documentos en proceso: {e}")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def submit(self, document_id: int, restart: bool = False) -> Dict:
+        """
+        Encolar un documento
+
+        Retoma en la primera etapa sin completar; con restart=True descarta
+        los puntos de control y procesa desde la extracción.
+
+        Returns:
+            dict: {'success', 'queued', 'pipeline'} o {'success': False, 'error'}
+        """
+        with self._lock:
+            if document_id in self._active:
+                return {'success': True, 'queued': False, 'already_queued': True}
+            if len(self._active) >= self.queue_size:
+                self._counters['rejected'] += 1
+                return {'success': False, 'error': 'Cola de procesamiento llena, intenta más tarde'}
+            self._active.add(document_id)
+            self._counters['submitted'] += 1
+
+        try:
+            document = db.session.get(Document, document_id)
+            if document is None:
+                raise LookupError('Documento no encontrado')
+
+            pipeline = self._load(document)
+            if restart:
+                self._remove_text(document_id)
+                pipeline = self._new_pipeline()
+            pipeline['status'] = 'queued'
+            pipeline['queued_at'] = datetime.utcnow().isoformat()
+            if not self._analysis_kept(document, pipeline):
+                document.processing_status = 'pending'
+                document.error_message = None
+            self._save(document, pipeline)
+        except Exception as e:
+            db.session.rollback()
+            with self._lock:
+                self._active.discard(document_id)
+            return {'success': False, 'error': str(e)}
+
+        self._get_executor().submit(self._run, document_id)
+        print(f"📥 Documento {document_id} encolado (desde {self.next_stage(pipeline) or 'inicio'})")
+        return {'success': True, 'queued': True, 'pipeline': self.describe(pipeline)}
+
+    def status(self, document: Document) -> Dict:
+        """Estado del pipeline de un documento (etapas, tiempos y etapa siguiente)"""
+        pipeline = self._load(document)
+        return {
+            **self.describe(pipeline),
+            'active': document.id in self._active
+        }
+
+    def describe(self, pipeline: Dict) -> Dict:
+        """Resumen público de un punto de control (sin métricas ni análisis)"""
+        return {
+            'status': pipeline.get('status'),
+            'stages': [
+                {'stage': stage, **pipeline['stages'].get(stage, {'status': 'pending'})}
+                for stage in STAGES
+            ],
+            'next_stage': self.next_stage(pipeline),
+            'failed_stage': pipeline.get('failed_stage'),
+            'runs': pipeline.get('runs', 0),
+            'total_ms': sum(info.get('duration_ms') or 0 for info in pipeline['stages'].values())
+        }
+
+    @staticmethod
+    def next_stage(pipeline: Dict) -> Optional[str]:
+        """Primera etapa sin completar (None si todas terminaron)"""
+        for stage in STAGES:
+            if pipeline['stages'].get(stage, {}).get('status') != 'completed':
+                return stage
+        return None
+
+    def forget(self, document_id: int):
+        """Eliminar el texto extraído de un documento (al borrarlo)"""
+        self._remove_text(document_id)
+
+    def stats(self) -> Dict:
+        """
+        Métricas del pipeline (para diagnósticos)
+
+        Returns:
+            dict: Contadores, documentos activos y tiempos por etapa
+        """
+        with self._lock:
+            stages = {}
+            for stage, data in self._stage_stats.items():
+                runs = data['runs']
+                stages[stage] = {
+                    'runs': runs,
+                    'failures': data['failures'],
+                    'avg_ms': round(data['total_ms'] / runs, 2) if runs else 0,
+                    'max_ms': round(data['max_ms'], 2),
+                    'last_ms': round(data['last_ms'], 2)
+                }
+            return {
+                **self._counters,
+                'active': len(self._active),
+                'workers': self.max_workers,
+                'queue_size': self.queue_size,
+                'stages': stages
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Detener el pool de hilos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='document-pipeline'
+                    )
+        return self._executor
+
+    def _run(self, document_id: int):
+        """Ejecutar las etapas pendientes de un documento en el contexto de la aplicación"""
+        if self._app is None:
+            raise RuntimeError("DocumentPipeline no inicializado: llame a document_pipeline.init_app(app)")
+
+        with self._app.app_context():
+            try:
+                self.process(document_id)
+            except Exception as e:
+                print(f"❌ Error en el pipeline del documento {document_id}: {e}")
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._active.discard(document_id)
+
+    def process(self, document_id: int) -> Dict:
+        """
+        Ejecutar las etapas pendientes de un documento (síncrono)
+
+        Returns:
+            dict: {'success', 'pipeline'} o {'success': False, 'error', 'stage'}
+        """
+        document = db.session.get(Document, document_id)
+        if document is None:
+            return {'success': False, 'error': 'Documento no encontrado'}
+
+        pipeline = self._load(document)
+        pipeline['status'] = 'running'
+        pipeline['runs'] = pipeline.get('runs', 0) + 1
+        pipeline['failed_stage'] = None
+        if not self._analysis_kept(document, pipeline):
+            document.start_processing()
+            document.error_message = None
+        self._save(document, pipeline)
+
+        print(f"\n⚙️  Procesando documento {document_id}: {document.title}")
+        context = {}
+        for stage in STAGES:
+            info = pipeline['stages'].get(stage, {})
+            if info.get('status') == 'completed' and self._can_skip(stage, document, pipeline):
+                continue
+
+            started = time.perf_counter()
+            info = {
+                'status': 'running',
+                'attempts': info.get('attempts', 0) + 1,
+                'started_at': datetime.utcnow().isoformat()
+            }
+            pipeline['stages'][stage] = info
+            self._save(document, pipeline)
+
+            try:
+                getattr(self, f'_stage_{stage}')(document, pipeline, context)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self._record(stage, elapsed_ms, failed=False)
+                info.update(status='completed', duration_ms=round(elapsed_ms, 2),
+                            completed_at=datetime.utcnow().isoformat(), error=None)
+                self._save(document, pipeline)
+                print(f"   ✅ {stage} ({elapsed_ms:.0f} ms)")
+
+            except Exception as e:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self._record(stage, elapsed_ms, failed=True)
+                print(f"   ❌ {stage}: {e}")
+                db.session.rollback()
+                document = db.session.get(Document, document_id)
+                pipeline['stages'][stage] = dict(
+                    info, status='failed', duration_ms=round(elapsed_ms, 2),
+                    completed_at=datetime.utcnow().isoformat(), error=str(e)
+                )
+                pipeline['status'] = 'failed'
+                pipeline['failed_stage'] = stage
+                if stage not in POST_ANALYSIS_STAGES:
+                    document.fail_processing(f"Etapa {stage}: {e}")
+                self._save(document, pipeline)
+                with self._lock:
+                    self._counters['failed'] += 1
+                return {'success': False, 'error': str(e), 'stage': stage, 'pipeline': self.describe(pipeline)}
+
+        pipeline['status'] = 'completed'
+        self._save(document, pipeline)
+        with self._lock:
+            self._counters['completed'] += 1
+        print(f"✅ Documento {document_id} procesado")
+        return {'success': True, 'pipeline': self.describe(pipeline)}
+
+    def _analysis_kept(self, document: Document, pipeline: Dict) -> bool:
+        """Solo faltan etapas posteriores al análisis: el documento conserva su análisis y estado"""
+        return self.next_stage(pipeline) in POST_ANALYSIS_STAGES and document.has_analysis
+
+    def _can_skip(self, stage: str, document: Document, pipeline: Dict) -> bool:
+        """Una etapa completada se omite solo si su resultado sigue disponible"""
+        if stage == 'extract':
+            # El texto solo hace falta para las métricas, el análisis, el vocabulario y la similitud
+            pending = [
+                name for name in ('metrics', 'ai_analysis', 'vocabulary', 'similarity')
+                if pipeline['stages'].get(name, {}).get('status') != 'completed'
+            ]
+            return os.path.exists(self._text_path(document.id)) or bool(
+                not pending and pipeline.get('metrics') and pipeline.get('analysis')
+            )
+        if stage == 'metrics':
+            return bool(pipeline.get('metrics'))
+        if stage == 'ai_analysis':
+            return bool(pipeline.get('analysis'))
+        if stage == 'persist':
+            return document.has_analysis
+        return True
+
+    # ------------------------------------------------------------------
+    # Etapas
+    # ------------------------------------------------------------------
+
+    def _stage_extract(self, document: Document, pipeline: Dict, context: Dict):
+        if not os.path.exists(document.file_path):
+            raise FileNotFoundError(f"El archivo {document.file_name} no existe")
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = self._text_path(document.id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        # Bloque a bloque: al punto de control (mismo formato que read_text) y a las métricas
+        metrics = TextMetrics()
+        characters = 0
+        has_text = False
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for block in document_reader.iter_blocks(document.file_path):
+                    paragraph = block['text']
+                    if block['index']:
+                        f.write('\n\n')
+                        characters += 2
+                    f.write(paragraph)
+                    characters += len(paragraph)
+                    metrics.add_paragraph(paragraph)
+                    has_text = has_text or bool(paragraph.strip())
+            if not has_text:
+                raise ValueError('El documento no contiene texto extraíble')
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+
+        context['metrics'] = metrics.result()
+        pipeline['stages']['extract']['characters'] = characters
+
+    def _stage_metrics(self, document: Document, pipeline: Dict, context: Dict):
+        metrics = context.pop('metrics', None)
+        if metrics is None:
+            # Reanudación: la extracción fue en otra ejecución
+            metrics = compute_metrics(document_reader.iter_blocks(self._text_path(document.id)))
+        pipeline['metrics'] = metrics
+
+    def _stage_ai_analysis(self, document: Document, pipeline: Dict, context: Dict):
+        from app.services.ai.gemini_service import gemini_service
+
+        result = gemini_service.analyze_text(
+            self._text(document, context),
+            user_id=document.user_id,
+            document_id=document.id
+        )
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'Error en el análisis con IA')
+        if not result.get('analysis'):
+            raise ValueError(result.get('parse_error') or 'Respuesta de la IA sin análisis')
+
+        pipeline['analysis'] = result['analysis']
+        pipeline['stages']['ai_analysis'].update(
+            chunks=result.get('chunks', 1),
+            tokens_used=result.get('tokens_used', 0),
+            cached=bool(result.get('cached'))
+        )
+
+    def _stage_persist(self, document: Document, pipeline: Dict, context: Dict):
+        analysis = document.text_analysis
+        if analysis is None:
+            analysis = TextAnalysis(document_id=document.id, user_id=document.user_id)
+            db.session.add(analysis)
+
+        analysis.apply_metrics(pipeline['metrics'])
+        analysis.apply_ai_analysis(pipeline['analysis'])
+        analysis.analysis_date = datetime.utcnow()
+
+        previous = TextAnalysis.query.filter(
+            TextAnalysis.user_id == document.user_id,
+            TextAnalysis.document_id != document.id
+        ).order_by(TextAnalysis.analysis_date.desc()).first()
+        analysis.compare_with_previous(previous)
+
+        document.text_analysis = analysis
+        document.complete_processing()
+        # El commit lo hace _save junto con el punto de control
+
+    def _stage_vocabulary(self, document: Document, pipeline: Dict, context: Dict):
+        from app.services.document_processing.vocabulary_analyzer import vocabulary_analyzer
+
+        analysis = pipeline.get('analysis') or {}
+        result = vocabulary_analyzer.index_document(
+            document,
+            self._text(document, context),
+            technical_terms=analysis.get('technical_terms'),
+            key_concepts=analysis.get('key_concepts'),
+            commit=False
+        )
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        pipeline['stages']['vocabulary'].update(
+            new_words=len(result['new_terms']['word']),
+            new_technical=len(result['new_terms']['technical']),
+            new_concepts=len(result['new_terms']['concept'])
+        )
+
+    def _stage_similarity(self, document: Document, pipeline: Dict, context: Dict):
+        from app.services.document_processing.similarity_detector import similarity_detector
+
+        result = similarity_detector.check_submission(
+            'document',
+            document.id,
+            document.user_id,
+            self._text(document, context),
+            title=document.title,
+            submitted_at=document.upload_date,
+            commit=False
+        )
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        pipeline['stages']['similarity'].update(
+            matches=len(result['matches']),
+            max_similarity=result['max_similarity'],
+            near_duplicate=result['near_duplicate']
+        )
+
+    def _stage_profile(self, document: Document, pipeline: Dict, context: Dict):
+        from app.services.profile_service import profile_service
+
+        result = profile_service.generate_profile(document.user_id, force_regenerate=True)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'No se pudo actualizar el perfil')
+
+    # ------------------------------------------------------------------
+    # Puntos de control
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _new_pipeline() -> Dict:
+        return {'status': 'pending', 'stages': {}, 'failed_stage': None, 'runs': 0}
+
+    def _load(self, document: Document) -> Dict:
+        """Punto de control del documento (copia editable)"""
+        pipeline = (document.meta_info or {}).get('pipeline')
+        if not isinstance(pipeline, dict) or not isinstance(pipeline.get('stages'), dict):
+            return self._new_pipeline()
+        return copy.deepcopy(pipeline)
+
+    @staticmethod
+    def _save(document: Document, pipeline: Dict):
+        # Se reasigna el dict: la columna JSON no detecta cambios internos
+        document.meta_info = {**(document.meta_info or {}), 'pipeline': copy.deepcopy(pipeline)}
+        db.session.commit()
+
+    def _text_path(self, document_id: int) -> str:
+        return os.path.join(self.checkpoint_dir, f"document_{document_id}.txt")
+
+    def load_text(self, document_id: int) -> Optional[str]:
+        """Texto extraído guardado de un documento (None si no hay punto de control)"""
+        try:
+            with open(self._text_path(document_id), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _text(self, document: Document, context: Dict) -> str:
+        """Texto extraído (de esta ejecución o del punto de control)"""
+        if 'text' not in context:
+            with open(self._text_path(document.id), 'r', encoding='utf-8') as f:
+                context['text'] = f.read()
+        return context['text']
+
+    def _remove_text(self, document_id: int):
+        try:
+            os.remove(self._text_path(document_id))
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'runs': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}
+
+    def _record(self, stage: str, elapsed_ms: float, failed: bool):
+        with self._lock:
+            data = self._stage_stats[stage]
+            data['runs'] += 1
+            data['failures'] += int(failed)
+            data['total_ms'] += elapsed_ms
+            data['max_ms'] = max(data['max_ms'], elapsed_ms)
+            data['last_ms'] = elapsed_ms
+
+
+# Instancia global del pipeline
+document_pipeline = DocumentPipeline()
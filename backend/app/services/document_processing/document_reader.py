@@ -0,0 +1,223 @@
+"""
+app/services/document_processing/document_reader.py - Lector de Documentos por Párrafos
+Plataforma Integral de Rendimiento Estudiantil
+
+Lectura perezosa de PDF, DOCX, TXT y MD como una secuencia de bloques
+(párrafos) con metadatos estructurales, para que las métricas y los
+divisores de texto consuman generadores en lugar de copias del documento
+completo.
+
+Cada bloque es un dict:
+    {
+        'index': posición del bloque en el documento,
+        'text': texto del párrafo,
+        'kind': 'heading' | 'paragraph' | 'list_item' | 'table_cell',
+        'level': nivel del título (1 = principal) o de la lista (0 = primer nivel),
+        'page': página (PDF, 1-indexed) o None,
+        'table', 'row', 'col': posición en la tabla (celdas) o None
+    }
+
+- TXT/MD se leen línea a línea; solo se retiene el párrafo en curso.
+- DOCX se lee con DOCXExtractor (streaming de document.xml).
+- PDF se emite página a página desde PDFExtractor.extract_pages (el
+  parser de PyPDF2 carga el archivo igualmente; las páginas salen de la
+  caché por hash si ya se procesó).
+"""
+
+import os
+import re
+from typing import Dict, Iterable, Iterator, Optional
+from app.utils.text_chunker import is_heading, split_paragraphs
+
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt', '.md')
+
+_MD_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_MD_LIST_ITEM = re.compile(r'^(\s*)(?:[-*+]|\d+[.)])\s+(.*)$')
+_MD_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+_MD_FENCE = re.compile(r'^\s*(```|~~~)')
+
+
+def _block(text: str, kind: str = 'paragraph', level: Optional[int] = None, **position) -> Dict:
+    return {
+        'text': text,
+        'kind': kind,
+        'level': level,
+        'page': position.get('page'),
+        'table': position.get('table'),
+        'row': position.get('row'),
+        'col': position.get('col')
+    }
+
+
+def iter_blocks(file_path: str) -> Iterator[Dict]:
+    """
+    Recorrer los párrafos de un documento de forma perezosa
+
+    Args:
+        file_path (str): Ruta a un PDF, DOCX, TXT o MD
+
+    Yields:
+        dict: Bloque con texto y metadatos estructurales (ver módulo)
+
+    Raises:
+        ValueError: Si el formato no está soportado
+        FileNotFoundError: Si el archivo no existe
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo {file_path} no existe")
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.txt':
+        blocks = _iter_plain_text(file_path)
+    elif ext == '.md':
+        blocks = _iter_markdown(file_path)
+    elif ext == '.docx':
+        from app.services.document_processing.docx_extractor import DOCXExtractor
+        blocks = DOCXExtractor.iter_blocks(file_path)
+    elif ext == '.pdf':
+        blocks = _iter_pdf(file_path)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {ext}")
+
+    for index, block in enumerate(blocks):
+        block['index'] = index
+        block.setdefault('page', None)
+        yield block
+
+
+def iter_paragraphs(file_path: str) -> Iterator[str]:
+    """Solo el texto de cada bloque (ver iter_blocks)"""
+    for block in iter_blocks(file_path):
+        yield block['text']
+
+
+def read_text(file_path: str) -> str:
+    """
+    Texto completo del documento con los párrafos separados por una línea en blanco
+
+    Para los consumidores que necesitan el texto entero (prompts); las
+    métricas y los fragmentos pueden usar iter_blocks directamente.
+    """
+    return '\n\n'.join(iter_paragraphs(file_path))
+
+
+def _open_text(file_path: str):
+    return open(file_path, 'r', encoding='utf-8', errors='ignore')
+
+
+def _iter_plain_text(file_path: str) -> Iterator[Dict]:
+    """TXT: párrafos separados por líneas en blanco; títulos por heurística"""
+    with _open_text(file_path) as f:
+        for paragraph in _group_lines(f):
+            if is_heading(paragraph):
+                yield _block(paragraph, 'heading', 1)
+            else:
+                yield _block(paragraph)
+
+
+def _group_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Unir líneas consecutivas hasta una línea en blanco"""
+    current = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped:
+            current.append(stripped)
+        elif current:
+            yield '\n'.join(current)
+            current = []
+    if current:
+        yield '\n'.join(current)
+
+
+def _iter_markdown(file_path: str) -> Iterator[Dict]:
+    """MD: títulos #, elementos de lista, celdas de tabla, bloques de código y párrafos"""
+    current = []
+    table = None
+    table_count = 0
+    row = -1
+    in_fence = False
+
+    def flush():
+        if current:
+            text = ' '.join(current)
+            current.clear()
+            return _block(text)
+        return None
+
+    with _open_text(file_path) as f:
+        for line in f:
+            stripped = line.strip()
+
+            if _MD_FENCE.match(line):
+                # El bloque de código se emite como un párrafo (se conserva su formato)
+                if in_fence:
+                    current.append(stripped)
+                    yield _block('\n'.join(current))
+                    current.clear()
+                else:
+                    pending = flush()
+                    if pending:
+                        yield pending
+                    current.append(stripped)
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                current.append(line.rstrip('\n'))
+                continue
+
+            if stripped.startswith('|'):
+                pending = flush()
+                if pending:
+                    yield pending
+                if table is None:
+                    table, row = table_count, -1
+                    table_count += 1
+                if _MD_TABLE_SEPARATOR.match(stripped):
+                    continue
+                row += 1
+                cells = [cell.strip() for cell in stripped.strip('|').split('|')]
+                for col, cell in enumerate(cells):
+                    if cell:
+                        yield _block(cell, 'table_cell', table=table, row=row, col=col)
+                continue
+            table = None
+
+            if not stripped:
+                pending = flush()
+                if pending:
+                    yield pending
+                continue
+
+            heading = _MD_HEADING.match(stripped)
+            if heading:
+                pending = flush()
+                if pending:
+                    yield pending
+                yield _block(heading.group(2), 'heading', len(heading.group(1)))
+                continue
+
+            item = _MD_LIST_ITEM.match(line.rstrip('\n'))
+            if item:
+                pending = flush()
+                if pending:
+                    yield pending
+                indent = len(item.group(1).expandtabs(4))
+                yield _block(item.group(2).strip(), 'list_item', indent // 2)
+                continue
+
+            current.append(stripped)
+
+    if current:
+        yield _block('\n'.join(current) if in_fence else ' '.join(current))
+
+
+def _iter_pdf(file_path: str) -> Iterator[Dict]:
+    """PDF: párrafos de cada página con su número de página"""
+    from app.services.document_processing.pdf_extractor import PDFExtractor
+    for page_number, page_text in enumerate(PDFExtractor.extract_pages(file_path), start=1):
+        for paragraph in split_paragraphs(page_text or ''):
+            if is_heading(paragraph):
+                yield _block(paragraph, 'heading', 1, page=page_number)
+            else:
+                yield _block(paragraph, page=page_number)
@@ -0,0 +1,153 @@
+"""
+Servicio para extraer texto de archivos DOCX
+Lee word/document.xml en streaming (iterparse) sin cargar el documento
+
+python-docx construye el árbol XML completo de document.xml; aquí cada
+párrafo se emite al cerrarse su elemento y se libera inmediatamente, así la
+memoria es proporcional a un párrafo. Se conserva la estructura: títulos
+(estilo Heading/Título N o nivel de esquema), elementos de lista (numPr) y
+celdas de tabla (tabla, fila, columna).
+"""
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_HEADING_STYLE = re.compile(r'(?:heading|t[íi]tulo|titre|überschrift)\s*(\d)', re.IGNORECASE)
+_TITLE_STYLE = re.compile(r'^(?:title|t[íi]tulo)$', re.IGNORECASE)
+
+
+class DOCXExtractor:
+    """Extractor de párrafos desde archivos DOCX"""
+
+    @staticmethod
+    def iter_blocks(docx_path):
+        """
+        Recorre los párrafos del documento en orden, de forma perezosa
+
+        Args:
+            docx_path (str): Ruta al archivo DOCX
+
+        Yields:
+            dict: {'text', 'kind' ('heading'|'paragraph'|'list_item'|'table_cell'),
+                   'level', 'table', 'row', 'col'}
+        """
+        try:
+            archive = zipfile.ZipFile(docx_path)
+        except zipfile.BadZipFile:
+            raise ValueError(f"El archivo {docx_path} no es un DOCX válido")
+
+        with archive:
+            heading_styles = DOCXExtractor._heading_styles(archive)
+
+            # Posición en tablas (anidadas): [tabla, fila, columna] por nivel
+            tables = []
+            table_count = 0
+            body = None
+
+            with archive.open('word/document.xml') as xml_file:
+                for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+                    tag = elem.tag
+                    if event == 'start':
+                        if tag == W + 'body':
+                            body = elem
+                        elif tag == W + 'tbl':
+                            tables.append([table_count, -1, -1])
+                            table_count += 1
+                        elif tag == W + 'tr' and tables:
+                            tables[-1][1] += 1
+                            tables[-1][2] = -1
+                        elif tag == W + 'tc' and tables:
+                            tables[-1][2] += 1
+                        continue
+
+                    if tag == W + 'p':
+                        block = DOCXExtractor._paragraph_block(elem, heading_styles, tables)
+                        elem.clear()
+                        if block is not None:
+                            yield block
+                    elif tag == W + 'tbl':
+                        tables.pop()
+                        elem.clear()
+
+                    # Los hijos ya procesados del cuerpo no se conservan
+                    if body is not None and not tables and tag in (W + 'p', W + 'tbl', W + 'sectPr'):
+                        body.clear()
+
+    @staticmethod
+    def extract_text(docx_path):
+        """
+        Extrae todo el texto de un archivo DOCX (un párrafo por línea)
+
+        Args:
+            docx_path (str): Ruta al archivo DOCX
+
+        Returns:
+            str: Texto extraído
+        """
+        return '\n'.join(block['text'] for block in DOCXExtractor.iter_blocks(docx_path))
+
+    @staticmethod
+    def _heading_styles(archive):
+        """styleId -> nivel de título según word/styles.xml"""
+        levels = {}
+        try:
+            root = ET.fromstring(archive.read('word/styles.xml'))
+        except (KeyError, ET.ParseError):
+            return levels
+
+        for style in root.iter(W + 'style'):
+            style_id = style.get(W + 'styleId') or ''
+            name_elem = style.find(W + 'name')
+            name = name_elem.get(W + 'val') if name_elem is not None else style_id
+            outline = style.find(f'{W}pPr/{W}outlineLvl')
+
+            match = _HEADING_STYLE.search(name) or _HEADING_STYLE.search(style_id)
+            if match:
+                levels[style_id] = int(match.group(1))
+            elif _TITLE_STYLE.match(name):
+                levels[style_id] = 1
+            elif outline is not None and (outline.get(W + 'val') or '').isdigit() and int(outline.get(W + 'val')) < 9:
+                levels[style_id] = int(outline.get(W + 'val')) + 1
+        return levels
+
+    @staticmethod
+    def _paragraph_block(paragraph, heading_styles, tables):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == W + 't' and node.text:
+                parts.append(node.text)
+            elif node.tag == W + 'tab':
+                parts.append('\t')
+            elif node.tag in (W + 'br', W + 'cr'):
+                parts.append('\n')
+        text = ''.join(parts).strip()
+        if not text:
+            return None
+
+        properties = paragraph.find(W + 'pPr')
+        level = None
+        list_level = None
+        if properties is not None:
+            style = properties.find(W + 'pStyle')
+            if style is not None:
+                level = heading_styles.get(style.get(W + 'val'))
+            outline = properties.find(W + 'outlineLvl')
+            if level is None and outline is not None and (outline.get(W + 'val') or '').isdigit():
+                value = int(outline.get(W + 'val'))
+                level = value + 1 if value < 9 else None
+            numbering = properties.find(W + 'numPr')
+            if numbering is not None:
+                ilvl = numbering.find(W + 'ilvl')
+                list_level = int(ilvl.get(W + 'val', 0)) if ilvl is not None else 0
+
+        block = {'text': text, 'kind': 'paragraph', 'level': None, 'table': None, 'row': None, 'col': None}
+        if tables:
+            block.update(kind='table_cell', table=tables[-1][0], row=tables[-1][1], col=tables[-1][2])
+        elif level is not None:
+            block.update(kind='heading', level=level)
+        elif list_level is not None:
+            block.update(kind='list_item', level=list_level)
+        return block
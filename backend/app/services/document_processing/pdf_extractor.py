@@ -1,114 +1,332 @@
 """
 Servicio para extraer texto de archivos PDF
 Utiliza PyPDF2 para procesar documentos PDF
+
+- Los PDF grandes se extraen por rangos de páginas en un pool de procesos
+  (la extracción de PyPDF2 es Python puro y no se paraleliza con hilos);
+  las páginas se unen una sola vez al final.
+- El texto por página, el número de páginas y los metadatos se guardan en
+  una caché por hash del contenido (memoria y, opcionalmente, disco), de
+  modo que SyllabusProcessor, WritingEvaluator y el análisis de documentos
+  no vuelven a procesar el mismo PDF aunque se suba con otro nombre.
+
+Configuración (variables de entorno):
+- PDF_EXTRACT_WORKERS: procesos del pool (defecto min(4, CPUs); 0 = sin pool)
+- PDF_PARALLEL_MIN_PAGES: páginas mínimas para usar el pool (defecto 24)
+- PDF_CACHE_ENTRIES: documentos en la caché en memoria (defecto 32)
+- PDF_CACHE_DIR: carpeta de la caché en disco (defecto uploads/.pdf_cache;
+  vacío = solo memoria)
+
+Los procesos del pool se crean con 'spawn' y ejecutan
+pdf_worker.extract_page_range (solo PyPDF2). 'spawn' vuelve a importar el
+script principal en cada proceso: un script que use el extractor debe
+crear la app dentro de `if __name__ == '__main__':` (como run.py).
 """
 import PyPDF2
 import os
+import json
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from app.services.document_processing.pdf_worker import extract_page_range
+
+
+EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 24))
+CACHE_ENTRIES = int(os.getenv('PDF_CACHE_ENTRIES', 32))
+CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), '.pdf_cache'))
+
+
+def _read_metadata(pdf_reader):
+    metadata = pdf_reader.metadata or {}
+    # str(): los valores de PyPDF2 son objetos PDF; la caché los guarda en JSON
+    return {
+        'title': str(metadata.get('/Title', 'Sin título')),
+        'author': str(metadata.get('/Author', 'Desconocido')),
+        'subject': str(metadata.get('/Subject', '')),
+        'creator': str(metadata.get('/Creator', '')),
+        'producer': str(metadata.get('/Producer', '')),
+        'pages': len(pdf_reader.pages)
+    }
+
+
+class _PDFCache:
+    """
+    Caché de documentos por hash de contenido
+
+    Entrada: {'metadata': {...}, 'pages': [texto por página] o None si solo
+    se leyeron los metadatos}. El hash de cada ruta se memoriza por
+    (tamaño, fecha de modificación) para no releer el archivo.
+    """
+
+    def __init__(self, max_entries, directory):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def content_hash(self, pdf_path):
+        stat = os.stat(pdf_path)
+        key = (os.path.realpath(pdf_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(pdf_path, 'rb') as file:
+                for block in iter(lambda: file.read(1 << 20), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self._lock:
+                if len(self._hashes) > 4 * self.max_entries:
+                    self._hashes.clear()
+                self._hashes[key] = digest
+        return digest
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(digest)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+                self._store(digest, entry)
+            else:
+                self.misses += 1
+        return entry
+
+    def set(self, digest, entry):
+        with self._lock:
+            self._store(digest, entry)
+        if entry.get('pages') is not None:
+            self._write_disk(digest, entry)
+
+    def _store(self, digest, entry):
+        self._entries[digest] = entry
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _read_disk(self, digest):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(digest), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, digest, entry):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(digest)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(entry, file, ensure_ascii=False)
+            os.replace(tmp_path, self._path(digest))
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché del PDF: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_cache = _PDFCache(CACHE_ENTRIES, CACHE_DIR)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Pool de procesos compartido (se crea al primer PDF grande)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: seguro con hilos (servidor Flask) y el único disponible en Windows.
+                # Cada proceso importa de nuevo el script principal (como __mp_main__)
+                # y pdf_worker: run.py solo crea la app como __main__
+                _pool = ProcessPoolExecutor(
+                    max_workers=EXTRACT_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
 
 class PDFExtractor:
     """Extractor de texto desde archivos PDF"""
-    
+
     @staticmethod
     def extract_text(pdf_path):
         """
         Extrae todo el texto de un archivo PDF
-        
+
         Args:
             pdf_path (str): Ruta al archivo PDF
-            
+
         Returns:
             str: Texto extraído del PDF
         """
+        return "\n".join(PDFExtractor.extract_pages(pdf_path)).strip()
+
+    @staticmethod
+    def extract_pages(pdf_path):
+        """
+        Extrae el texto de cada página (en paralelo si el PDF es grande)
+
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+
+        Returns:
+            list: Texto de cada página, en orden
+        """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"El archivo {pdf_path} no existe")
-        
+
         try:
-            text = ""
+            digest = _cache.content_hash(pdf_path)
+            entry = _cache.get(digest)
+            if entry is not None and entry.get('pages') is not None:
+                return list(entry['pages'])
+
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
-                
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-            
-            return text.strip()
-        
+                metadata = _read_metadata(pdf_reader)
+                num_pages = metadata['pages']
+
+                pages = None
+                if EXTRACT_WORKERS > 1 and num_pages >= PARALLEL_MIN_PAGES:
+                    pages = PDFExtractor._extract_parallel(pdf_path, num_pages)
+                if pages is None:
+                    pages = [page.extract_text() or '' for page in pdf_reader.pages]
+
+            _cache.set(digest, {'metadata': metadata, 'pages': pages})
+            return list(pages)
+
         except Exception as e:
             print(f"❌ Error extrayendo texto del PDF: {e}")
             raise Exception(f"Error al procesar el PDF: {str(e)}")
-    
+
+    @staticmethod
+    def _extract_parallel(pdf_path, num_pages):
+        """
+        Reparte las páginas en rangos contiguos entre los procesos del pool
+
+        Returns:
+            list | None: Texto por página, o None si el pool falló (se extrae
+            en serie)
+        """
+        # Varios rangos por proceso para equilibrar páginas de distinto costo
+        ranges_count = min(num_pages, EXTRACT_WORKERS * 4)
+        step = -(-num_pages // ranges_count)
+        ranges = [(start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
+
+        try:
+            pool = _get_pool()
+            futures = [pool.submit(extract_page_range, pdf_path, start, end) for start, end in ranges]
+            pages = []
+            for future in futures:
+                pages.extend(future.result())
+            print(f"   📄 {num_pages} páginas extraídas en {len(ranges)} rangos ({EXTRACT_WORKERS} procesos)")
+            return pages
+        except Exception as e:
+            print(f"⚠️ Extracción paralela no disponible, se usa extracción en serie: {e}")
+            return None
+
     @staticmethod
     def extract_text_from_page(pdf_path, page_number):
         """
         Extrae texto de una página específica
-        
+
         Args:
             pdf_path (str): Ruta al archivo PDF
             page_number (int): Número de página (0-indexed)
-            
+
         Returns:
             str: Texto de la página
         """
         try:
+            entry = _cache.get(_cache.content_hash(pdf_path))
+            if entry is not None and entry.get('pages') is not None:
+                if page_number >= len(entry['pages']):
+                    raise ValueError(f"La página {page_number} no existe en el PDF")
+                return entry['pages'][page_number].strip()
+
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                
+
                 if page_number >= len(pdf_reader.pages):
                     raise ValueError(f"La página {page_number} no existe en el PDF")
-                
+
                 page = pdf_reader.pages[page_number]
-                return page.extract_text().strip()
-        
+                return (page.extract_text() or '').strip()
+
         except Exception as e:
             print(f"❌ Error extrayendo página {page_number}: {e}")
             raise Exception(f"Error al procesar la página: {str(e)}")
-    
+
     @staticmethod
     def get_page_count(pdf_path):
         """
         Obtiene el número total de páginas del PDF
-        
+
         Args:
             pdf_path (str): Ruta al archivo PDF
-            
+
         Returns:
             int: Número de páginas
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                return len(pdf_reader.pages)
-        
+            return PDFExtractor._info(pdf_path)['pages']
+
         except Exception as e:
             print(f"❌ Error contando páginas: {e}")
             return 0
-    
+
     @staticmethod
     def get_metadata(pdf_path):
         """
         Extrae metadatos del PDF
-        
+
         Args:
             pdf_path (str): Ruta al archivo PDF
-            
+
         Returns:
             dict: Metadatos del PDF
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata = pdf_reader.metadata
-                
-                return {
-                    'title': metadata.get('/Title', 'Sin título'),
-                    'author': metadata.get('/Author', 'Desconocido'),
-                    'subject': metadata.get('/Subject', ''),
-                    'creator': metadata.get('/Creator', ''),
-                    'producer': metadata.get('/Producer', ''),
-                    'pages': len(pdf_reader.pages)
-                }
-        
+            return dict(PDFExtractor._info(pdf_path))
+
         except Exception as e:
             print(f"❌ Error extrayendo metadatos: {e}")
             return {}
+
+    @staticmethod
+    def _info(pdf_path):
+        """Metadatos y número de páginas desde la caché; el PDF se abre una sola vez"""
+        digest = _cache.content_hash(pdf_path)
+        entry = _cache.get(digest)
+        if entry is None:
+            with open(pdf_path, 'rb') as file:
+                entry = {'metadata': _read_metadata(PyPDF2.PdfReader(file)), 'pages': None}
+            _cache.set(digest, entry)
+        return entry['metadata']
+
+    @staticmethod
+    def cache_stats():
+        """Estado de la caché de extracción (para diagnósticos)"""
+        return _cache.stats()
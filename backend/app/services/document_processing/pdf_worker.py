@@ -0,0 +1,15 @@
+"""
+Función de los procesos del pool de extracción de PDF
+(ver app.services.document_processing.pdf_extractor)
+
+Los procesos 'spawn' importan este módulo para ejecutar la función: solo
+depende de PyPDF2 y de la biblioteca estándar, y no crea la app.
+"""
+import PyPDF2
+
+
+def extract_page_range(pdf_path, start, end):
+    """Extraer las páginas [start, end) (se ejecuta en un proceso del pool)"""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or '' for i in range(start, end)]
@@ -0,0 +1,511 @@
+"""
+app/services/document_processing/similarity_detector.py - Detección de Entregas Casi Duplicadas
+Plataforma Integral de Rendimiento Estudiantil
+
+Índice MinHash/LSH persistente (ver app.models.similarity y
+app.utils.minhash) sobre los textos entregados: documentos del pipeline y
+evaluaciones de escritura guardadas.
+
+- check_submission(): busca entregas anteriores parecidas y después indexa
+  la nueva. Cada texto se divide en ventanas de palabras solapadas; cada
+  ventana tiene firma MinHash y SIMILARITY_BANDS claves LSH. Los
+  candidatos salen de una consulta por (banda, clave) sobre el índice de
+  submission_lsh_buckets, así que el costo depende de las coincidencias y
+  no del número de entregas guardadas. Los pares de ventanas se confirman
+  con la similitud estimada de sus firmas (SIMILARITY_THRESHOLD) y, para
+  las mejores entregas candidatas, se alinean los textos para reportar los
+  pasajes coincidentes.
+- El índice es incremental: indexar una entrega solo inserta sus filas;
+  reindexar (texto cambiado) o eliminar una entrega borra solo las suyas.
+  Un texto ya indexado con los mismos parámetros no se vuelve a procesar.
+- Relación de cada coincidencia: 'revision' (mismo estudiante y mismo
+  título, p. ej. una nueva versión del borrador), 'self_reuse' (mismo
+  estudiante, otra entrega) u 'other_user'.
+"""
+
+import os
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import tuple_
+from app import db
+from app.models.similarity import (
+    SUBMISSION_SOURCES, SubmissionBucket, SubmissionFingerprint, SubmissionMatch, SubmissionSegment
+)
+from app.utils import minhash
+
+
+QUERY_BATCH = 500
+PASSAGE_CHARS = 300
+MAX_PASSAGES = 10
+
+
+class SimilarityDetector:
+    """Índice MinHash/LSH de entregas con búsqueda de candidatos por claves"""
+
+    def __init__(
+        self,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        shingle_words: Optional[int] = None,
+        segment_words: Optional[int] = None,
+        threshold: Optional[float] = None
+    ):
+        """
+        Inicializar detector
+
+        Args:
+            num_perm (int): Permutaciones de la firma MinHash
+            bands (int): Bandas LSH (num_perm debe ser múltiplo)
+            shingle_words (int): Palabras por shingle
+            segment_words (int): Palabras por ventana indexada
+            threshold (float): Similitud mínima entre ventanas para reportar
+        """
+        self.num_perm = num_perm or int(os.getenv('SIMILARITY_NUM_PERM', 128))
+        self.bands = bands or int(os.getenv('SIMILARITY_BANDS', 32))
+        self.shingle_words = shingle_words or int(os.getenv('SIMILARITY_SHINGLE_WORDS', 4))
+        self.segment_words = segment_words or int(os.getenv('SIMILARITY_SEGMENT_WORDS', 150))
+        self.threshold = threshold or float(os.getenv('SIMILARITY_THRESHOLD', 0.4))
+        self.max_results = int(os.getenv('SIMILARITY_MAX_RESULTS', 5))
+        self.min_passage_words = int(os.getenv('SIMILARITY_MIN_PASSAGE_WORDS', 12))
+        self.near_duplicate = float(os.getenv('SIMILARITY_NEAR_DUPLICATE', 0.8))
+
+        if self.num_perm % self.bands:
+            raise ValueError('SIMILARITY_NUM_PERM debe ser múltiplo de SIMILARITY_BANDS')
+        self.rows = self.num_perm // self.bands
+        self.params = f"{self.num_perm}x{self.bands}:{self.shingle_words}:{self.segment_words}"
+        self._hasher = None
+
+    @property
+    def hasher(self) -> minhash.MinHasher:
+        if self._hasher is None:
+            self._hasher = minhash.MinHasher(self.num_perm)
+        return self._hasher
+
+    # ------------------------------------------------------------------
+    # Firmas
+    # ------------------------------------------------------------------
+
+    def fingerprint_text(self, text: str) -> Dict:
+        """
+        Firma del texto completo y de cada ventana, con sus claves LSH
+
+        Returns:
+            dict: {'tokens', 'spans', 'hashes', 'signature', 'segments',
+                   'text_hash'}; cada segmento es {'position', 'start_word',
+                   'end_word', 'signature', 'keys'}
+        """
+        tokens, spans = minhash.words(text)
+        hashes = minhash.shingle_hashes(tokens, self.shingle_words)
+
+        # Un texto sin palabras no se indexa por ventanas (coincidiría con cualquier otro vacío)
+        windows = minhash.segments(len(tokens), self.segment_words) if tokens else []
+        segments = []
+        for position, (start, end) in enumerate(windows):
+            # Shingles que empiezan dentro de la ventana y terminan antes de su final
+            window = hashes[start:max(start + 1, end - self.shingle_words + 1)]
+            signature = self.hasher.signature(window)
+            segments.append({
+                'position': position,
+                'start_word': start,
+                'end_word': end,
+                'signature': signature,
+                'keys': minhash.band_keys(signature, self.bands)
+            })
+
+        return {
+            'text': text or '',
+            'tokens': tokens,
+            'spans': spans,
+            'hashes': hashes,
+            'signature': self.hasher.signature(hashes),
+            'segments': segments,
+            'text_hash': hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+        }
+
+    # ------------------------------------------------------------------
+    # Indexación
+    # ------------------------------------------------------------------
+
+    def check_submission(
+        self,
+        source: str,
+        source_id: int,
+        user_id: int,
+        text: str,
+        title: Optional[str] = None,
+        submitted_at: Optional[datetime] = None,
+        refresh: bool = False,
+        commit: bool = True
+    ) -> Dict:
+        """
+        Buscar entregas anteriores parecidas e indexar esta
+
+        Args:
+            source (str): 'document' o 'writing_evaluation'
+            source_id (int): ID del registro de origen
+            user_id (int): Estudiante que entrega
+            text (str): Texto extraído
+            title (str): Título o nombre del archivo (distingue revisiones)
+            submitted_at (datetime): Fecha de la entrega
+            refresh (bool): Recalcular aunque el texto ya esté indexado
+            commit (bool): Confirmar la transacción al terminar
+
+        Returns:
+            dict: Ver report(), más 'indexed' (False si el texto ya estaba
+            indexado) o {'success': False, 'error'}
+        """
+        try:
+            fingerprint = SubmissionFingerprint.query.filter_by(source=source, source_id=source_id).first()
+            text_hash = hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+            if (fingerprint is not None and not refresh and fingerprint.text_hash == text_hash
+                    and fingerprint.params == self.params):
+                return {'success': True, 'indexed': False, **self.report(fingerprint)}
+
+            data = self.fingerprint_text(text)
+            if fingerprint is not None:
+                self._remove_rows(fingerprint.id)
+            else:
+                fingerprint = SubmissionFingerprint(source=source, source_id=source_id)
+                db.session.add(fingerprint)
+
+            fingerprint.user_id = user_id
+            fingerprint.title = (title or '')[:255] or None
+            fingerprint.text_hash = data['text_hash']
+            fingerprint.word_count = len(data['tokens'])
+            fingerprint.segment_count = len(data['segments'])
+            fingerprint.signature = self.hasher.to_bytes(data['signature'])
+            fingerprint.params = self.params
+            fingerprint.submitted_at = submitted_at or fingerprint.submitted_at or datetime.utcnow()
+            fingerprint.indexed_at = datetime.utcnow()
+            db.session.flush()
+
+            matches = self._find_matches(data, fingerprint)
+            for match in matches:
+                db.session.add(SubmissionMatch(fingerprint_id=fingerprint.id, **match))
+
+            self._insert_segments(fingerprint.id, data['segments'])
+            if commit:
+                db.session.commit()
+
+            report = self.report(fingerprint)
+            if report['matches']:
+                print(f"   🔁 Similitud: {len(report['matches'])} entregas parecidas "
+                      f"(máx. {report['max_similarity']:.0%})")
+            return {'success': True, 'indexed': True, **report}
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error indexando similitud de {source} {source_id}: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def index_source(self, source: str, source_id: int, refresh: bool = False) -> Dict:
+        """
+        Indexar una entrega guardada leyendo su texto (reindexado y carga
+        inicial del índice)
+
+        Returns:
+            dict: Resultado de check_submission() o {'success': False, 'error'}
+        """
+        if source == 'document':
+            from app.models.document import Document
+
+            record = db.session.get(Document, source_id)
+            title = record.title if record else None
+            submitted_at = record.upload_date if record else None
+        elif source == 'writing_evaluation':
+            from app.models.writing_evaluation import WritingEvaluation
+
+            record = db.session.get(WritingEvaluation, source_id)
+            title = record.file_name if record else None
+            submitted_at = record.evaluated_at if record else None
+        else:
+            return {'success': False, 'error': f"source inválido. Permitidos: {', '.join(SUBMISSION_SOURCES)}"}
+
+        if record is None:
+            return {'success': False, 'error': 'Entrega no encontrada'}
+        text = self._load_text(source, source_id)
+        if not text:
+            return {'success': False, 'error': 'El texto de la entrega no está disponible'}
+
+        return self.check_submission(
+            source, source_id, record.user_id, text,
+            title=title, submitted_at=submitted_at, refresh=refresh
+        )
+
+    def remove_submission(self, source: str, source_id: int, commit: bool = True):
+        """Quitar una entrega del índice (antes de eliminarla)"""
+        fingerprint = SubmissionFingerprint.query.filter_by(source=source, source_id=source_id).first()
+        if fingerprint is None:
+            return
+        self._remove_rows(fingerprint.id)
+        SubmissionMatch.query.filter_by(matched_fingerprint_id=fingerprint.id).delete(synchronize_session=False)
+        db.session.delete(fingerprint)
+        db.session.flush()
+        if commit:
+            db.session.commit()
+
+    def _insert_segments(self, fingerprint_id: int, segments: List[Dict]):
+        """Guardar las ventanas y sus claves LSH (inserción por lotes)"""
+        rows = [
+            SubmissionSegment(
+                fingerprint_id=fingerprint_id,
+                position=segment['position'],
+                start_word=segment['start_word'],
+                end_word=segment['end_word'],
+                signature=self.hasher.to_bytes(segment['signature'])
+            )
+            for segment in segments
+        ]
+        db.session.add_all(rows)
+        db.session.flush()
+
+        buckets = [
+            {'band': band, 'bucket': key, 'segment_id': row.id, 'fingerprint_id': fingerprint_id}
+            for row, segment in zip(rows, segments)
+            for band, key in enumerate(segment['keys'])
+        ]
+        for start in range(0, len(buckets), QUERY_BATCH * 4):
+            db.session.execute(SubmissionBucket.__table__.insert(), buckets[start:start + QUERY_BATCH * 4])
+
+    @staticmethod
+    def _remove_rows(fingerprint_id: int):
+        """Borrar ventanas, claves y coincidencias propias de una entrega"""
+        SubmissionBucket.query.filter_by(fingerprint_id=fingerprint_id).delete(synchronize_session=False)
+        SubmissionSegment.query.filter_by(fingerprint_id=fingerprint_id).delete(synchronize_session=False)
+        SubmissionMatch.query.filter_by(fingerprint_id=fingerprint_id).delete(synchronize_session=False)
+        db.session.flush()
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    def _find_matches(self, data: Dict, fingerprint: SubmissionFingerprint) -> List[Dict]:
+        """
+        Entregas indexadas con ventanas parecidas a las del texto
+
+        Returns:
+            list: Campos de SubmissionMatch (sin fingerprint_id), las
+            SIMILARITY_MAX_RESULTS mejores por cobertura y similitud
+        """
+        segments_by_key = defaultdict(list)
+        for segment in data['segments']:
+            for band, key in enumerate(segment['keys']):
+                segments_by_key[(band, key)].append(segment['position'])
+
+        # 1. Candidatos: ventanas guardadas que comparten alguna banda
+        pairs = set()
+        keys = list(segments_by_key)
+        for start in range(0, len(keys), QUERY_BATCH):
+            rows = db.session.query(
+                SubmissionBucket.band, SubmissionBucket.bucket,
+                SubmissionBucket.segment_id, SubmissionBucket.fingerprint_id
+            ).filter(
+                tuple_(SubmissionBucket.band, SubmissionBucket.bucket).in_(keys[start:start + QUERY_BATCH])
+            ).all()
+            for band, bucket, segment_id, fingerprint_id in rows:
+                if fingerprint_id == fingerprint.id:
+                    continue
+                for position in segments_by_key[(band, bucket)]:
+                    pairs.add((position, segment_id, fingerprint_id))
+        if not pairs:
+            return []
+
+        # 2. Confirmación con la similitud estimada de las firmas de las ventanas
+        segment_ids = list({segment_id for _, segment_id, _ in pairs})
+        signatures = {}
+        for start in range(0, len(segment_ids), QUERY_BATCH):
+            for segment_id, signature in db.session.query(SubmissionSegment.id, SubmissionSegment.signature).filter(
+                SubmissionSegment.id.in_(segment_ids[start:start + QUERY_BATCH])
+            ):
+                signatures[segment_id] = self.hasher.from_bytes(signature)
+
+        hits = defaultdict(dict)  # entrega → {ventana propia: similitud}
+        for position, segment_id, fingerprint_id in pairs:
+            similarity = minhash.jaccard(data['segments'][position]['signature'], signatures[segment_id])
+            if similarity >= self.threshold:
+                hits[fingerprint_id][position] = max(similarity, hits[fingerprint_id].get(position, 0))
+        if not hits:
+            return []
+
+        # 3. Ranking por fracción de ventanas coincidentes y similitud del texto completo
+        candidates = []
+        for other in SubmissionFingerprint.query.filter(SubmissionFingerprint.id.in_(list(hits))).all():
+            if other.params != self.params:
+                continue
+            candidates.append({
+                'other': other,
+                'coverage': len(hits[other.id]) / len(data['segments']),
+                'similarity': minhash.jaccard(data['signature'], self.hasher.from_bytes(other.signature))
+            })
+        candidates.sort(key=lambda item: (item['coverage'], item['similarity']), reverse=True)
+
+        matches = []
+        for candidate in candidates[:self.max_results]:
+            other = candidate['other']
+            passages, containment = self._passages(data, other)
+            if containment is None:
+                containment = candidate['coverage']
+            matches.append({
+                'matched_fingerprint_id': other.id,
+                'relation': self._relation(fingerprint, other),
+                'similarity': round(candidate['similarity'], 4),
+                'containment': round(containment, 4),
+                'matched_segments': len(hits[other.id]),
+                'passages': passages
+            })
+        return matches
+
+    @staticmethod
+    def _relation(fingerprint: SubmissionFingerprint, other: SubmissionFingerprint) -> str:
+        if other.user_id != fingerprint.user_id:
+            return 'other_user'
+        if fingerprint.title and (other.title or '').casefold() == fingerprint.title.casefold():
+            return 'revision'
+        return 'self_reuse'
+
+    def _passages(self, data: Dict, other: SubmissionFingerprint):
+        """
+        Pasajes coincidentes con otra entrega (alineamiento exacto de shingles)
+
+        Returns:
+            tuple: (pasajes más largos primero, fracción de palabras del
+            texto cubierta) o ([], None) si el texto de la otra entrega ya
+            no está disponible
+        """
+        other_text = self._load_text(other.source, other.source_id)
+        if not other_text:
+            return [], None
+
+        other_tokens, other_spans = minhash.words(other_text)
+        other_hashes = minhash.shingle_hashes(other_tokens, self.shingle_words)
+        found = minhash.find_passages(data['hashes'], other_hashes, self.shingle_words, self.min_passage_words)
+
+        covered = sum(passage['words'] for passage in found)
+        passages = []
+        for passage in sorted(found, key=lambda item: item['words'], reverse=True)[:MAX_PASSAGES]:
+            passages.append({
+                'words': passage['words'],
+                'start_word': passage['start_a'],
+                'matched_start_word': passage['start_b'],
+                'text': self._excerpt(data['spans'], passage['start_a'], passage['words'], data.get('text')),
+                'matched_text': self._excerpt(other_spans, passage['start_b'], passage['words'], other_text)
+            })
+        return passages, min(1.0, covered / max(len(data['tokens']), 1))
+
+    @staticmethod
+    def _excerpt(spans, start: int, words: int, text: Optional[str]) -> Optional[str]:
+        """Fragmento del texto original de un pasaje (recortado a PASSAGE_CHARS)"""
+        if text is None:
+            return None
+        end = min(start + words, len(spans)) - 1
+        fragment = text[spans[start][0]:spans[end][1]]
+        return fragment if len(fragment) <= PASSAGE_CHARS else fragment[:PASSAGE_CHARS].rstrip() + '…'
+
+    @staticmethod
+    def _load_text(source: str, source_id: int) -> Optional[str]:
+        """Texto de una entrega indexada (punto de control del pipeline o archivo)"""
+        from app.services.document_processing import document_reader
+
+        try:
+            if source == 'document':
+                from app.models.document import Document
+                from app.services.document_processing.document_pipeline import document_pipeline
+
+                text = document_pipeline.load_text(source_id)
+                if text is not None:
+                    return text
+                document = db.session.get(Document, source_id)
+                path = document.file_path if document else None
+            else:
+                from app.models.writing_evaluation import WritingEvaluation
+
+                evaluation = db.session.get(WritingEvaluation, source_id)
+                path = evaluation.file_path if evaluation else None
+
+            if path and os.path.exists(path):
+                return document_reader.read_text(path)
+        except Exception as e:
+            print(f"⚠️  No se pudo leer el texto de {source} {source_id}: {e}")
+        return None
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def report(self, fingerprint: SubmissionFingerprint, full: bool = False) -> Dict:
+        """
+        Coincidencias de una entrega indexada
+
+        Las coincidencias con entregas de otros estudiantes solo incluyen la
+        relación, los scores y 'near_duplicate' salvo con full (uso interno
+        o de docentes): ni la entrega ajena ni sus pasajes.
+
+        Returns:
+            dict: {'fingerprint', 'matches' (entregas anteriores parecidas),
+                   'reused_in' (entregas posteriores que se le parecen),
+                   'max_similarity', 'max_containment', 'near_duplicate'}
+        """
+        matches = SubmissionMatch.query.filter_by(fingerprint_id=fingerprint.id).order_by(
+            SubmissionMatch.containment.desc(), SubmissionMatch.similarity.desc()
+        ).all()
+        reused_in = SubmissionMatch.query.filter_by(matched_fingerprint_id=fingerprint.id).order_by(
+            SubmissionMatch.detected_at.desc()
+        ).all()
+
+        return {
+            'fingerprint': fingerprint.to_dict(),
+            'matches': [
+                dict(match.to_dict(full=full), near_duplicate=self._is_near_duplicate(match))
+                for match in matches
+            ],
+            'reused_in': [
+                {
+                    'submission': match.submission.to_dict() if match.submission else None,
+                    'relation': match.relation,
+                    'similarity': round(match.similarity or 0, 3),
+                    'containment': round(match.containment or 0, 3),
+                    'detected_at': match.detected_at.isoformat() if match.detected_at else None
+                } if full or match.relation != 'other_user' else {
+                    'relation': match.relation,
+                    'similarity': round(match.similarity or 0, 3),
+                    'containment': round(match.containment or 0, 3)
+                }
+                for match in reused_in
+            ],
+            'max_similarity': max((match.similarity or 0 for match in matches), default=0),
+            'max_containment': max((match.containment or 0 for match in matches), default=0),
+            'near_duplicate': any(self._is_near_duplicate(match) for match in matches)
+        }
+
+    def _is_near_duplicate(self, match: SubmissionMatch) -> bool:
+        # Una nueva versión del mismo borrador no cuenta como reentrega; pocas
+        # palabras cambiadas alteran muchos shingles: cuenta también la cobertura de pasajes
+        return match.relation != 'revision' and \
+            max(match.similarity or 0, match.containment or 0) >= self.near_duplicate
+
+    def get_report(self, source: str, source_id: int, full: bool = False) -> Optional[Dict]:
+        """Coincidencias de una entrega por su origen (None si no está indexada; ver report)"""
+        fingerprint = SubmissionFingerprint.query.filter_by(source=source, source_id=source_id).first()
+        return self.report(fingerprint, full=full) if fingerprint else None
+
+    def stats(self) -> Dict:
+        """Tamaño del índice y coincidencias por relación"""
+        relations = dict(
+            db.session.query(SubmissionMatch.relation, db.func.count(SubmissionMatch.id))
+            .group_by(SubmissionMatch.relation).all()
+        )
+        return {
+            'submissions': SubmissionFingerprint.query.count(),
+            'segments': SubmissionSegment.query.count(),
+            'buckets': SubmissionBucket.query.count(),
+            'matches': relations,
+            'params': self.params,
+            'lsh_threshold': round(minhash.lsh_threshold(self.bands, self.rows), 3),
+            'threshold': self.threshold
+        }
+
+
+# Instancia global
+similarity_detector = SimilarityDetector()
@@ -0,0 +1,397 @@
+"""
+app/services/document_processing/vocabulary_analyzer.py - Índice de Vocabulario
+Plataforma Integral de Rendimiento Estudiantil
+
+Mantiene por estudiante un índice invertido de su vocabulario (ver
+app.models.vocabulary) que se actualiza al analizar cada documento, en
+lugar de cargar todos los TextAnalysis para calcular la evolución:
+
+- index_document(): palabras del texto (sin palabras vacías) y términos
+  técnicos / conceptos clave del análisis con IA → términos, apariciones
+  por documento y punto de la curva de crecimiento. Es idempotente:
+  reindexar un documento reemplaza sus apariciones anteriores.
+- growth_curve(): lectura directa de vocabulary_snapshots (una fila por
+  documento, ya acumulada).
+- new_terms(): términos cuya primera aparición es el documento (índice
+  por usuario y primer documento).
+- search() / term_documents(): búsqueda por prefijo y documentos de un
+  término sobre índices B-tree (tiempo logarítmico).
+
+Si un documento antiguo se indexa después de otros más recientes, se
+recalculan los puntos de la curva posteriores a su fecha.
+"""
+
+import os
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+from sqlalchemy import func
+from app import db
+from app.models.document import Document
+from app.models.vocabulary import TERM_KINDS, VocabularyPosting, VocabularySnapshot, VocabularyTerm
+
+
+MIN_WORD_LENGTH = int(os.getenv('MIN_WORD_LENGTH', 3))
+TERM_MAX_LENGTH = 100
+QUERY_BATCH = 500
+
+_WORD = re.compile(r'[^\W\d_]+')
+_SPACES = re.compile(r'\s+')
+_EDGE_PUNCTUATION = ' \t\n.,;:!?¡¿"\'()[]{}«»“”‘’-–—'
+
+# Palabras vacías del español (no aportan al vocabulario)
+STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes aquel aquella aquellas aquellos aqui aquí así asi aun aún
+bajo bien cada casi como cómo con contra cual cuales cuando cuándo cuanto de del desde donde dónde
+dos durante e el él ella ellas ellos en entre era eran eres es esa esas ese eso esos esta está
+estaba estaban estado estamos están estar estas este esto estos fue fueron ha había habían han
+hasta hay la las le les lo los más mas me mi mis mucho muy nada ni no nos nosotros o os otra
+otras otro otros para pero poco por porque puede pueden que qué quien quién quienes se sea ser
+si sí sido sin sobre son su sus también tan tanto te tiene tienen todo todos tras tu tus un una
+uno unos usted ustedes y ya yo
+""".split())
+
+
+def normalize_term(term: str) -> str:
+    """Forma normalizada de un término (minúsculas, espacios simples, sin puntuación en los bordes)"""
+    normalized = _SPACES.sub(' ', str(term or '')).strip(_EDGE_PUNCTUATION).casefold()
+    return normalized[:TERM_MAX_LENGTH]
+
+
+def count_words(source: Union[str, Iterable]) -> Counter:
+    """
+    Frecuencia de las palabras de contenido de un texto
+
+    Args:
+        source: Texto completo o iterable de párrafos / bloques del lector
+            de documentos (dicts con 'text')
+    """
+    words = Counter()
+    paragraphs = [source] if isinstance(source, str) else source
+    for paragraph in paragraphs:
+        text = paragraph['text'] if isinstance(paragraph, dict) else paragraph
+        words.update(
+            word for word in _WORD.findall(text.casefold())
+            if len(word) >= MIN_WORD_LENGTH and word not in STOPWORDS
+        )
+    return words
+
+
+def count_phrases(phrases: Optional[Iterable], text: Optional[str] = None) -> Counter:
+    """
+    Frecuencia de términos de varias palabras (técnicos, conceptos)
+
+    Se cuentan sus apariciones en el texto si se proporciona (mínimo 1:
+    la IA puede haberlos parafraseado).
+    """
+    folded = _SPACES.sub(' ', text.casefold()) if text else None
+    counts = Counter()
+    for phrase in phrases or []:
+        term = normalize_term(phrase if isinstance(phrase, str) else (phrase or {}).get('term', ''))
+        if not term or term in counts:
+            continue
+        counts[term] = max(1, folded.count(term)) if folded else 1
+    return counts
+
+
+class VocabularyAnalyzer:
+    """Índice invertido incremental del vocabulario de cada estudiante"""
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    def index_document(
+        self,
+        document: Document,
+        text: str,
+        technical_terms: Optional[Iterable] = None,
+        key_concepts: Optional[Iterable] = None,
+        commit: bool = True
+    ) -> Dict:
+        """
+        Indexar (o reindexar) el vocabulario de un documento
+
+        Args:
+            document (Document): Documento analizado
+            text (str): Texto extraído
+            technical_terms (list): Términos técnicos del análisis con IA
+            key_concepts (list): Conceptos clave del análisis con IA
+            commit (bool): Confirmar la transacción al terminar
+
+        Returns:
+            dict: {'success', 'new_terms': {tipo: [términos]}, 'snapshot'}
+                o {'success': False, 'error'}
+        """
+        try:
+            self._remove_postings(document.id)
+
+            words = count_words(text)
+            terms = {
+                'word': words,
+                'technical': count_phrases(technical_terms, text),
+                'concept': count_phrases(key_concepts, text)
+            }
+            seen_at = document.upload_date or datetime.utcnow()
+
+            new_terms = {}
+            for kind, counter in terms.items():
+                new_terms[kind] = self._upsert_terms(document, kind, counter, seen_at)
+
+            snapshot = VocabularySnapshot.query.filter_by(document_id=document.id).first()
+            if snapshot is None:
+                snapshot = VocabularySnapshot(user_id=document.user_id, document_id=document.id)
+                db.session.add(snapshot)
+            snapshot.document_date = seen_at
+            snapshot.document_words = sum(words.values())
+            snapshot.document_unique_words = len(words)
+            snapshot.indexed_at = datetime.utcnow()
+            db.session.flush()
+
+            self._refresh_snapshots(document.user_id, seen_at)
+            if commit:
+                db.session.commit()
+
+            print(f"   📚 Vocabulario: {len(new_terms['word'])} palabras nuevas, "
+                  f"{len(new_terms['technical'])} términos técnicos nuevos")
+            return {'success': True, 'new_terms': new_terms, 'snapshot': snapshot.to_dict()}
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error indexando vocabulario del documento {document.id}: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def remove_document(self, document_id: int, commit: bool = True):
+        """Quitar un documento del índice (antes de eliminarlo)"""
+        snapshot = VocabularySnapshot.query.filter_by(document_id=document_id).first()
+        self._remove_postings(document_id)
+        if snapshot is not None:
+            user_id, since = snapshot.user_id, snapshot.document_date
+            db.session.delete(snapshot)
+            db.session.flush()
+            self._refresh_snapshots(user_id, since)
+        if commit:
+            db.session.commit()
+
+    def _upsert_terms(self, document: Document, kind: str, counter: Counter, seen_at: datetime) -> List[str]:
+        """Actualizar términos y crear apariciones; devuelve los términos nuevos"""
+        existing = {}
+        keys = list(counter)
+        for start in range(0, len(keys), QUERY_BATCH):
+            rows = VocabularyTerm.query.filter(
+                VocabularyTerm.user_id == document.user_id,
+                VocabularyTerm.kind == kind,
+                VocabularyTerm.term.in_(keys[start:start + QUERY_BATCH])
+            ).all()
+            existing.update((row.term, row) for row in rows)
+
+        created = []
+        rows = []
+        for term, frequency in counter.items():
+            row = existing.get(term)
+            if row is None:
+                row = VocabularyTerm(
+                    user_id=document.user_id,
+                    kind=kind,
+                    term=term,
+                    first_seen_at=seen_at,
+                    first_document_id=document.id,
+                    last_seen_at=seen_at,
+                    document_count=0,
+                    frequency=0
+                )
+                db.session.add(row)
+                created.append(term)
+            elif seen_at < row.first_seen_at:
+                # Documento anterior indexado más tarde
+                row.first_seen_at = seen_at
+                row.first_document_id = document.id
+            row.last_seen_at = max(row.last_seen_at, seen_at)
+            row.document_count += 1
+            row.frequency += frequency
+            rows.append((row, frequency))
+
+        db.session.flush()
+        db.session.add_all([
+            VocabularyPosting(
+                term_id=row.id,
+                document_id=document.id,
+                user_id=document.user_id,
+                frequency=frequency,
+                seen_at=seen_at
+            )
+            for row, frequency in rows
+        ])
+        return created
+
+    def _remove_postings(self, document_id: int):
+        """Descontar las apariciones de un documento de sus términos"""
+        postings = VocabularyPosting.query.filter_by(document_id=document_id).all()
+        if not postings:
+            return
+
+        frequencies = {posting.term_id: posting.frequency for posting in postings}
+        term_ids = list(frequencies)
+        VocabularyPosting.query.filter_by(document_id=document_id).delete(synchronize_session=False)
+
+        for start in range(0, len(term_ids), QUERY_BATCH):
+            for row in VocabularyTerm.query.filter(VocabularyTerm.id.in_(term_ids[start:start + QUERY_BATCH])):
+                row.document_count -= 1
+                row.frequency -= frequencies[row.id]
+                if row.document_count <= 0:
+                    db.session.delete(row)
+                elif row.first_document_id == document_id:
+                    self._reset_first_seen(row)
+        db.session.flush()
+
+    @staticmethod
+    def _reset_first_seen(row: VocabularyTerm):
+        """Primera y última aparición a partir de las apariciones restantes"""
+        first = VocabularyPosting.query.filter_by(term_id=row.id).order_by(
+            VocabularyPosting.seen_at, VocabularyPosting.document_id
+        ).first()
+        last = db.session.query(func.max(VocabularyPosting.seen_at)).filter(
+            VocabularyPosting.term_id == row.id
+        ).scalar()
+        row.first_seen_at = first.seen_at
+        row.first_document_id = first.document_id
+        row.last_seen_at = last or first.seen_at
+
+    def _refresh_snapshots(self, user_id: int, since: datetime):
+        """
+        Recalcular los puntos de la curva desde una fecha
+
+        new_* = términos cuyo primer documento es el del punto; total_* =
+        suma acumulada en orden de fecha del documento.
+        """
+        snapshots = VocabularySnapshot.query.filter(
+            VocabularySnapshot.user_id == user_id,
+            VocabularySnapshot.document_date >= since
+        ).order_by(VocabularySnapshot.document_date, VocabularySnapshot.document_id).all()
+        if not snapshots:
+            return
+
+        previous = VocabularySnapshot.query.filter(
+            VocabularySnapshot.user_id == user_id,
+            VocabularySnapshot.document_date < since
+        ).order_by(VocabularySnapshot.document_date.desc(), VocabularySnapshot.document_id.desc()).first()
+
+        counts = {}
+        document_ids = [snapshot.document_id for snapshot in snapshots]
+        for start in range(0, len(document_ids), QUERY_BATCH):
+            rows = db.session.query(
+                VocabularyTerm.first_document_id, VocabularyTerm.kind, func.count(VocabularyTerm.id)
+            ).filter(
+                VocabularyTerm.user_id == user_id,
+                VocabularyTerm.first_document_id.in_(document_ids[start:start + QUERY_BATCH])
+            ).group_by(VocabularyTerm.first_document_id, VocabularyTerm.kind).all()
+            counts.update(((document_id, kind), count) for document_id, kind, count in rows)
+
+        totals = {
+            'word': previous.total_words if previous else 0,
+            'technical': previous.total_technical if previous else 0,
+            'concept': previous.total_concepts if previous else 0
+        }
+        for snapshot in snapshots:
+            new = {kind: counts.get((snapshot.document_id, kind), 0) for kind in TERM_KINDS}
+            for kind in TERM_KINDS:
+                totals[kind] += new[kind]
+            snapshot.new_words, snapshot.total_words = new['word'], totals['word']
+            snapshot.new_technical, snapshot.total_technical = new['technical'], totals['technical']
+            snapshot.new_concepts, snapshot.total_concepts = new['concept'], totals['concept']
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def growth_curve(self, user_id: int, since: Optional[datetime] = None) -> List[Dict]:
+        """
+        Curva de crecimiento del vocabulario (un punto por documento)
+
+        Returns:
+            list: Snapshots en orden de fecha del documento
+        """
+        query = VocabularySnapshot.query.filter(VocabularySnapshot.user_id == user_id)
+        if since is not None:
+            query = query.filter(VocabularySnapshot.document_date >= since)
+        snapshots = query.order_by(VocabularySnapshot.document_date, VocabularySnapshot.document_id).all()
+        return [snapshot.to_dict() for snapshot in snapshots]
+
+    def new_terms(self, user_id: int, document_id: int, kind: Optional[str] = None, limit: int = 200) -> List[Dict]:
+        """Términos que aparecieron por primera vez en el documento (los más frecuentes primero)"""
+        query = VocabularyTerm.query.filter(
+            VocabularyTerm.user_id == user_id,
+            VocabularyTerm.first_document_id == document_id
+        )
+        if kind:
+            query = query.filter(VocabularyTerm.kind == kind)
+        rows = query.order_by(VocabularyTerm.frequency.desc()).limit(limit).all()
+        return [row.to_dict() for row in rows]
+
+    def search(self, user_id: int, prefix: str, kind: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """
+        Términos del estudiante que empiezan por prefix (orden alfabético)
+        """
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = VocabularyTerm.query.filter(
+            VocabularyTerm.user_id == user_id,
+            VocabularyTerm.term.like(f'{escaped}%', escape='\\')
+        )
+        if kind:
+            query = query.filter(VocabularyTerm.kind == kind)
+        rows = query.order_by(VocabularyTerm.term).limit(limit).all()
+        return [row.to_dict() for row in rows]
+
+    def term_documents(self, user_id: int, term: str, kind: Optional[str] = None) -> Optional[Dict]:
+        """
+        Documentos en que aparece un término
+
+        Returns:
+            dict | None: Término con 'documents' [{document_id, title,
+            frequency, seen_at}] en orden cronológico, o None si no existe
+        """
+        query = VocabularyTerm.query.filter_by(user_id=user_id, term=normalize_term(term))
+        if kind:
+            query = query.filter_by(kind=kind)
+        rows = query.all()
+        if not rows:
+            return None
+
+        result = {'term': rows[0].term, 'kinds': {}}
+        for row in rows:
+            postings = db.session.query(VocabularyPosting, Document.title).join(
+                Document, Document.id == VocabularyPosting.document_id
+            ).filter(VocabularyPosting.term_id == row.id).order_by(VocabularyPosting.seen_at).all()
+            result['kinds'][row.kind] = {
+                **row.to_dict(),
+                'documents': [
+                    {
+                        'document_id': posting.document_id,
+                        'title': title,
+                        'frequency': posting.frequency,
+                        'seen_at': posting.seen_at.isoformat() if posting.seen_at else None
+                    }
+                    for posting, title in postings
+                ]
+            }
+        return result
+
+    def summary(self, user_id: int) -> Dict:
+        """Totales actuales del vocabulario (último punto de la curva)"""
+        latest = VocabularySnapshot.query.filter_by(user_id=user_id).order_by(
+            VocabularySnapshot.document_date.desc(), VocabularySnapshot.document_id.desc()
+        ).first()
+        return {
+            'documents_indexed': VocabularySnapshot.query.filter_by(user_id=user_id).count(),
+            'total_words': latest.total_words if latest else 0,
+            'total_technical': latest.total_technical if latest else 0,
+            'total_concepts': latest.total_concepts if latest else 0
+        }
+
+
+# Instancia global
+vocabulary_analyzer = VocabularyAnalyzer()
@@ -0,0 +1,280 @@
+"""
+app/services/job_runner.py - Ejecución de Trabajos en Segundo Plano
+Plataforma Integral de Rendimiento Estudiantil
+
+Ejecuta en un pool de hilos las operaciones que bloquean durante decenas de
+segundos esperando a Gemini (evaluación de escritura, mapas mentales,
+líneas de tiempo, sílabos y reportes). El endpoint devuelve un ID de
+trabajo de inmediato y el cliente consulta /api/jobs/<id> o se suscribe a
+/api/jobs/<id>/events (SSE).
+
+El estado se persiste en la tabla background_jobs. Los envíos duplicados
+(misma clave de entradas) mientras el trabajo sigue activo se unen al
+trabajo existente en lugar de crear uno nuevo.
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+from app import db
+from app.models.background_job import BackgroundJob
+
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class JobRunner:
+    """
+    Ejecutor de trabajos en segundo plano con coalescencia de duplicados
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, job_timeout: Optional[int] = None):
+        """
+        Inicializar ejecutor
+
+        Args:
+            max_workers (int): Hilos del pool
+            job_timeout (int): Segundos tras los cuales un trabajo activo se
+                considera abandonado (no se coalesce y se marca como fallido
+                al reiniciar)
+        """
+        self.max_workers = max_workers or int(os.getenv('JOB_RUNNER_WORKERS', 4))
+        self.job_timeout = job_timeout or int(os.getenv('JOB_TIMEOUT_SECONDS', 1800))
+
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._events = {}  # job_id -> threading.Event
+
+    def init_app(self, app):
+        """
+        Vincular la aplicación (los trabajos corren en su app_context) y
+        cerrar los trabajos que quedaron abandonados en una ejecución anterior
+        """
+        self._app = app
+        app.extensions['job_runner'] = self
+
+        with app.app_context():
+            try:
+                stale = BackgroundJob.query.filter(
+                    BackgroundJob.status.in_(ACTIVE_STATUSES),
+                    BackgroundJob.created_at < self._active_since()
+                ).update({
+                    'status': 'failed',
+                    'error_message': 'Trabajo interrumpido',
+                    'completed_at': datetime.utcnow()
+                }, synchronize_session=False)
+                db.session.commit()
+                if stale:
+                    print(f"⚠️  {stale} trabajos abandonados marcados como fallidos")
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  No se pudieron revisar trabajos pendientes: {e}")
+
+    # ------------------------------------------------------------------
+    # Claves de coalescencia
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(job_type: str, *parts: Any) -> str:
+        """
+        Clave de coalescencia a partir del tipo de trabajo y sus entradas
+
+        Returns:
+            str: Hash SHA-256 hexadecimal
+        """
+        payload = json.dumps([job_type, *parts], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def hash_upload(file_storage, block_size: int = 1024 * 1024) -> Optional[str]:
+        """
+        Hash del contenido de un archivo subido (FileStorage) sin consumirlo
+
+        Returns:
+            str | None: Hash SHA-256 o None si no hay archivo
+        """
+        if not file_storage or not file_storage.filename:
+            return None
+
+        stream = file_storage.stream
+        position = stream.tell()
+        digest = hashlib.sha256()
+        for block in iter(lambda: stream.read(block_size), b''):
+            digest.update(block)
+        stream.seek(position)
+        return digest.hexdigest()
+
+    # ------------------------------------------------------------------
+    # Envío y consulta
+    # ------------------------------------------------------------------
+
+    def find_active(self, dedup_key: str) -> Optional[BackgroundJob]:
+        """Trabajo activo (no abandonado) con la misma clave, si existe"""
+        return BackgroundJob.query.filter(
+            BackgroundJob.dedup_key == dedup_key,
+            BackgroundJob.status.in_(ACTIVE_STATUSES),
+            BackgroundJob.created_at >= self._active_since()
+        ).order_by(BackgroundJob.created_at.desc()).first()
+
+    def submit(
+        self,
+        job_type: str,
+        func: Callable[..., Any],
+        kwargs: Optional[Dict] = None,
+        user_id: Optional[int] = None,
+        dedup_key: Optional[str] = None,
+        prepare: Optional[Callable[[], Dict]] = None
+    ) -> Tuple[Dict, bool]:
+        """
+        Encolar un trabajo
+
+        Args:
+            job_type (str): Tipo de trabajo ('evaluate_writing', 'mindmap'...)
+            func (callable): Función a ejecutar; devuelve el cuerpo de la
+                respuesta o una tupla (cuerpo, código HTTP)
+            kwargs (dict): Argumentos para func
+            user_id (int, optional): Usuario propietario
+            dedup_key (str, optional): Clave de coalescencia (ver make_key)
+            prepare (callable, optional): Se llama solo si se crea un trabajo
+                nuevo (p. ej. guardar el archivo subido); su resultado se
+                añade a kwargs
+
+        Returns:
+            tuple: (trabajo como dict, True si se unió a un trabajo existente)
+        """
+        with self._lock:
+            if dedup_key:
+                existing = self.find_active(dedup_key)
+                if existing is not None:
+                    print(f"🔗 Trabajo {existing.id} reutilizado ({job_type})")
+                    return existing.to_dict(include_result=False), True
+
+            kwargs = dict(kwargs or {})
+            if prepare is not None:
+                kwargs.update(prepare())
+
+            job = BackgroundJob(
+                id=uuid.uuid4().hex,
+                job_type=job_type,
+                dedup_key=dedup_key,
+                user_id=user_id,
+                status='pending'
+            )
+            db.session.add(job)
+            db.session.commit()
+            self._events[job.id] = threading.Event()
+
+        self._get_executor().submit(self._run, job.id, func, kwargs)
+        print(f"📥 Trabajo {job.id} encolado ({job_type})")
+
+        return job.to_dict(include_result=False), False
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Estado actual de un trabajo
+
+        Returns:
+            dict | None: Trabajo como dict (con resultado si terminó)
+        """
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None:
+            return None
+        db.session.refresh(job)
+        return job.to_dict()
+
+    def is_local(self, job_id: str) -> bool:
+        """Indica si el trabajo sigue en ejecución en este proceso"""
+        return job_id in self._events
+
+    def wait(self, job_id: str, timeout: float) -> bool:
+        """
+        Esperar a que un trabajo de este proceso termine
+
+        Returns:
+            bool: True si terminó (o no se ejecuta en este proceso) antes del timeout
+        """
+        event = self._events.get(job_id)
+        if event is None:
+            return True
+        return event.wait(timeout)
+
+    def shutdown(self, wait: bool = True):
+        """Detener el pool de hilos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _active_since(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.job_timeout)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='job-runner'
+                    )
+        return self._executor
+
+    def _run(self, job_id: str, func: Callable[..., Any], kwargs: Dict):
+        """Ejecutar un trabajo dentro del contexto de la aplicación"""
+        if self._app is None:
+            raise RuntimeError("JobRunner no inicializado: llame a job_runner.init_app(app)")
+
+        with self._app.app_context():
+            try:
+                job = db.session.get(BackgroundJob, job_id)
+                job.status = 'running'
+                job.started_at = datetime.utcnow()
+                db.session.commit()
+
+                try:
+                    result = func(**kwargs)
+                    body, status_code = result if isinstance(result, tuple) else (result, 200)
+
+                    # Asegurar que el resultado sea serializable en la columna JSON
+                    job.result = json.loads(json.dumps(body, default=str))
+                    job.result_status = status_code
+                    if status_code < 400:
+                        job.status = 'completed'
+                    else:
+                        job.status = 'failed'
+                        if isinstance(body, dict):
+                            job.error_message = body.get('error') or body.get('message')
+                except Exception as e:
+                    print(f"❌ Error en trabajo {job_id}: {e}")
+                    traceback.print_exc()
+                    db.session.rollback()
+                    job = db.session.get(BackgroundJob, job_id)
+                    job.status = 'failed'
+                    job.result_status = 500
+                    job.error_message = str(e)
+
+                job.completed_at = datetime.utcnow()
+                db.session.commit()
+                print(f"✅ Trabajo {job_id} terminado: {job.status}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ No se pudo actualizar el trabajo {job_id}: {e}")
+            finally:
+                db.session.remove()
+
+                event = self._events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+
+# Instancia global del ejecutor
+job_runner = JobRunner()
@@ -0,0 +1,39 @@
+"""
+app/utils/helpers.py - Utilidades Generales
+Plataforma Integral de Rendimiento Estudiantil
+"""
+
+import json
+from typing import Any, Iterable
+from flask import Response, stream_with_context
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Formatear un evento Server-Sent Events
+
+    Args:
+        event (str): Nombre del evento
+        data: Contenido serializable a JSON
+
+    Returns:
+        str: Evento listo para escribir en el stream
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def sse_response(events: Iterable[str]) -> Response:
+    """
+    Respuesta text/event-stream sin buffering intermedio
+
+    Args:
+        events: Generador de eventos (ver sse_event)
+
+    Returns:
+        Response: Respuesta en stream con el contexto de la petición
+    """
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,406 @@
+"""
+app/utils/json_stream.py - Extracción y Reparación de JSON
+Plataforma Integral de Rendimiento Estudiantil
+
+Punto único para obtener JSON de la salida de Gemini:
+
+- extract_json():  localiza el primer valor JSON válido dentro del texto
+  (vallas ```json, preámbulos, texto posterior) y lo repara si está
+  truncado o trae comas finales / saltos de línea sin escapar.
+- repair_json():   reparación de un fragmento en una sola pasada.
+- IncrementalJSONParser: versión en stream (stream=True) que entrega cada
+  campo de primer nivel en cuanto su valor se cierra.
+
+Todas las funciones recorren el texto una sola vez saltando entre
+caracteres estructurales con una expresión regular sin retroceso, de modo
+que el coste es lineal incluso con respuestas grandes (a diferencia de
+`re.search(r'{.*}', ..., re.DOTALL)`).
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Caracteres con significado estructural (fuera y dentro de cadenas)
+_STRUCTURAL = re.compile(r'[\\"{}\[\],:]')
+
+# Delimitadores relevantes para extracción y reparación
+_BRACKETS = re.compile(r'[\\"{}\[\]]')
+_INSIDE = re.compile(r'[\\"\x00-\x1f]')
+_OPENERS = {'{': '}', '[': ']'}
+_CLOSERS = {'}': '{', ']': '['}
+_DECODER = json.JSONDecoder()
+_CONTROL_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+
+
+class JSONExtractionError(json.JSONDecodeError):
+    """
+    No se pudo obtener JSON válido de la respuesta
+
+    Hereda de json.JSONDecodeError para que los manejadores existentes
+    (que invalidan la caché y usan la respuesta de fallback) la capturen.
+    """
+
+    def __init__(self, msg: str, doc: str = '', pos: int = 0):
+        super().__init__(msg, doc or '', min(pos, len(doc or '')))
+
+
+def extract_json(text: str, expect: Optional[str] = None, repair: bool = True) -> Any:
+    """
+    Extraer el primer valor JSON válido de la salida de un modelo
+
+    Args:
+        text (str): Respuesta completa del modelo
+        expect (str, optional): 'object' o 'array' para limitar el tipo buscado
+        repair (bool): Intentar reparar candidatos inválidos o truncados
+
+    Returns:
+        dict | list: Valor decodificado
+
+    Raises:
+        JSONExtractionError: Si no hay ningún valor JSON recuperable
+    """
+    if not text:
+        raise JSONExtractionError("Respuesta vacía", text or '', 0)
+
+    openers = {'object': '{', 'array': '['}.get(expect, '{[')
+
+    # Camino rápido: la respuesta ya es JSON puro
+    stripped = text.strip()
+    if stripped[:1] in openers:
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+
+    start_pattern = re.compile('[' + re.escape(openers) + ']')
+    pos = 0
+    last_error = "No se encontró JSON en la respuesta"
+
+    while True:
+        match = start_pattern.search(text, pos)
+        if match is None:
+            break
+
+        start = match.start()
+        try:
+            # Decodificador en C: acepta texto posterior al valor
+            return _DECODER.raw_decode(text, start)[0]
+        except ValueError as e:
+            last_error = getattr(e, 'msg', str(e))
+
+        end, balanced = _scan_value(text, start)
+        candidate = text[start:end]
+
+        if repair:
+            try:
+                return json.loads(repair_json(candidate))
+            except ValueError as e:
+                last_error = getattr(e, 'msg', str(e))
+
+        if not balanced:
+            # Truncado hasta el final del texto: no hay más candidatos
+            break
+        # Continuar después del candidato (no dentro de él) para mantener el coste lineal
+        pos = end
+
+    raise JSONExtractionError(f"No se pudo extraer JSON: {last_error}", text, pos)
+
+
+def repair_json(fragment: str) -> str:
+    """
+    Reparar un fragmento JSON en una sola pasada
+
+    Corrige:
+    - Comas finales antes de '}' o ']'
+    - Saltos de línea y tabuladores sin escapar dentro de cadenas
+    - Cierres desparejados ('{"a": [1, 2}')
+    - Respuestas truncadas: se recorta hasta el último valor completo y se
+      cierran las cadenas y contenedores abiertos
+
+    Args:
+        fragment (str): Texto que empieza en '{' o '['
+
+    Returns:
+        str: Texto reparado (puede seguir sin ser JSON válido)
+    """
+    out = []
+    stack = []  # [cierre, estado] ; estado de objeto: key | colon | value
+    in_string = False
+    string_is_key = False
+    pending_comma = False
+    safe_len, safe_depth = 0, 0  # último punto donde el texto es un prefijo completo
+    pos = 0
+    length = len(fragment)
+
+    def emit_comma():
+        nonlocal pending_comma
+        if pending_comma:
+            out.append(',')
+            pending_comma = False
+
+    while pos < length:
+        pattern = _INSIDE if in_string else _STRUCTURAL
+        match = pattern.search(fragment, pos)
+        end = match.start() if match else length
+        segment = fragment[pos:end]
+
+        if segment:
+            if not in_string and segment.strip():
+                emit_comma()
+            out.append(segment)
+        if match is None:
+            break
+
+        char = fragment[end]
+        pos = end + 1
+
+        if in_string:
+            if char == '\\':
+                if pos >= length:
+                    break
+                out.append(fragment[end:pos + 1])
+                pos += 1
+            elif char == '"':
+                out.append(char)
+                in_string = False
+                if string_is_key:
+                    stack[-1][1] = 'colon'
+                else:
+                    safe_len, safe_depth = len(out), len(stack)
+            else:
+                out.append(_CONTROL_ESCAPES.get(char, f'\\u{ord(char):04x}'))
+            continue
+
+        if char == '"':
+            emit_comma()
+            in_string = True
+            string_is_key = bool(stack) and stack[-1][0] == '}' and stack[-1][1] == 'key'
+            out.append(char)
+        elif char in _OPENERS:
+            emit_comma()
+            out.append(char)
+            stack.append([_OPENERS[char], 'key'])
+            safe_len, safe_depth = len(out), len(stack)
+        elif char in _CLOSERS:
+            pending_comma = False
+            if not any(entry[0] == char for entry in stack):
+                continue  # cierre sin apertura: descartar
+            while stack[-1][0] != char:
+                out.append(stack.pop()[0])
+            out.append(stack.pop()[0])
+            safe_len, safe_depth = len(out), len(stack)
+            if not stack:
+                break  # valor raíz cerrado: ignorar el resto
+            if stack[-1][0] == '}':
+                stack[-1][1] = 'value'
+        elif char == ',':
+            if stack and not pending_comma:
+                safe_len, safe_depth = len(out), len(stack)
+                pending_comma = True
+                if stack[-1][0] == '}':
+                    stack[-1][1] = 'key'
+        elif char == ':':
+            out.append(char)
+            if stack and stack[-1][0] == '}':
+                stack[-1][1] = 'value'
+
+    if stack or in_string:
+        # Truncado: conservar solo hasta el último valor completo
+        del out[safe_len:]
+        closers = [entry[0] for entry in stack[:safe_depth]]
+        out.extend(reversed(closers))
+
+    return ''.join(out)
+
+
+def _scan_value(text: str, start: int) -> Tuple[int, bool]:
+    """
+    Recorrer un valor JSON desde su apertura
+
+    Returns:
+        tuple: (posición final exclusiva, True si los delimitadores se
+        equilibraron; si no, la posición es el final del texto)
+    """
+    depth = 0
+    in_string = False
+    pos = start
+    length = len(text)
+
+    while True:
+        match = _BRACKETS.search(text, pos)
+        if match is None:
+            return length, False
+
+        i = match.start()
+        char = text[i]
+        pos = i + 1
+
+        if in_string:
+            if char == '\\':
+                pos = i + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _OPENERS:
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos, True
+
+        if pos >= length:
+            return length, False
+
+
+class IncrementalJSONParser:
+    """
+    Parser incremental de un objeto JSON de primer nivel
+
+    Uso:
+        parser = IncrementalJSONParser()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...  # campo completo
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.errors: List[str] = []
+        self.complete = False
+
+        self._text = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._started = False
+
+        # Estado del miembro actual del objeto de primer nivel
+        self._state = 'key'  # key | colon | value
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Añadir un fragmento de texto
+
+        Args:
+            chunk (str): Texto recibido
+
+        Returns:
+            list: [(clave, valor), ...] campos que se completaron con este fragmento
+        """
+        if self.complete or not chunk:
+            return []
+
+        self._text += chunk
+        emitted = []
+        text = self._text
+        pos = self._pos
+
+        if not self._started:
+            start = text.find('{', pos)
+            if start == -1:
+                # Descartar el preámbulo ya revisado
+                self._text, self._pos = '', 0
+                return []
+            self._started = True
+            self._depth = 1
+            pos = start + 1
+
+        while True:
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                pos = len(text)
+                break
+
+            i = match.start()
+            char = text[i]
+
+            if self._in_string:
+                if char == '\\':
+                    if i + 1 >= len(text):
+                        # El carácter escapado llegará en el siguiente fragmento
+                        pos = i
+                        break
+                    pos = i + 2
+                    continue
+                if char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == 'key' and self._key_start is not None:
+                        self._key = self._decode(text[self._key_start:i + 1])
+                        self._key_start = None
+                        self._state = 'colon'
+                pos = i + 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state == 'key':
+                    self._key_start = i
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._state == 'value':
+                        self._emit(text[self._value_start:i], emitted)
+                    self.complete = True
+                    pos = i + 1
+                    break
+            elif self._depth == 1:
+                if char == ':' and self._state == 'colon':
+                    self._state = 'value'
+                    self._value_start = i + 1
+                elif char == ',' and self._state == 'value':
+                    self._emit(text[self._value_start:i], emitted)
+                    self._state = 'key'
+
+            pos = i + 1
+
+        # Descartar el texto ya consumido cuando no hay un miembro a medias
+        if self._state == 'key' and self._key_start is None:
+            self._text = text[pos:]
+            self._pos = 0
+        else:
+            self._pos = pos
+
+        return emitted
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finalizar el stream
+
+        Returns:
+            dict: Todos los campos completados
+        """
+        return dict(self.fields)
+
+    def _emit(self, raw_value: str, emitted: List[Tuple[str, Any]]):
+        key = self._key
+        self._key = None
+        self._value_start = None
+        if key is None:
+            return
+
+        try:
+            value = json.loads(raw_value)
+        except ValueError as e:
+            try:
+                value = extract_json(raw_value) if raw_value.strip()[:1] in _OPENERS else json.loads(raw_value.strip())
+            except ValueError:
+                self.errors.append(f"{key}: {e}")
+                return
+
+        self.fields[key] = value
+        emitted.append((key, value))
+
+    @staticmethod
+    def _decode(raw_string: str) -> Any:
+        try:
+            return json.loads(raw_string)
+        except ValueError:
+            return raw_string.strip('"')
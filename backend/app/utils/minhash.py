@@ -0,0 +1,228 @@
+"""
+app/utils/minhash.py - MinHash y LSH para Textos Casi Duplicados
+Plataforma Integral de Rendimiento Estudiantil
+
+Piezas puras (sin base de datos) del detector de similitud entre entregas
+(ver app.services.document_processing.similarity_detector):
+
+- words(): palabras normalizadas (minúsculas, sin tildes) con su posición
+  en el texto, para poder citar los pasajes coincidentes.
+- shingle_hashes(): n-gramas de palabras (shingles) como hashes de 32 bits
+  (crc32, estable entre procesos a diferencia de hash()).
+- MinHasher: firma MinHash de num_perm valores con permutaciones
+  (a·x + b) mod p vectorizadas con numpy. Las permutaciones salen de un
+  RandomState con semilla fija: las firmas guardadas siguen siendo
+  comparables entre procesos y versiones de numpy.
+- band_keys(): claves LSH de una firma (bandas de filas consecutivas →
+  entero de 64 bits). Dos textos con similitud de Jaccard s comparten
+  alguna banda con probabilidad 1 - (1 - s^r)^b.
+- segments(): ventanas de palabras solapadas a la mitad; indexar por
+  ventanas detecta secciones reutilizadas dentro de documentos más largos.
+- find_passages(): alineamiento exacto de shingles entre dos textos
+  (tramos consecutivos comunes) para reportar los pasajes coincidentes.
+"""
+
+import re
+import hashlib
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+_WORD = re.compile(r'[^\W_]+')
+
+# Primo de Mersenne 2^61 - 1 (como datasketch); a < 2^31 y x < 2^32 evitan desbordar uint64
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_BLOCK = 4096
+
+
+def fold(word: str) -> str:
+    """Palabra en minúsculas y sin tildes (conserva la ñ)"""
+    word = word.lower()
+    if word.isascii():
+        return word
+    return ''.join(
+        char for char in unicodedata.normalize('NFD', word.replace('ñ', '\0'))
+        if unicodedata.category(char) != 'Mn'
+    ).replace('\0', 'ñ')
+
+
+# Letras latinas con diacrítico → letra base (un carácter por otro: conserva las posiciones)
+_ACCENTS = {
+    code: unicodedata.normalize('NFD', chr(code))[0]
+    for code in range(0xC0, 0x250)
+    if chr(code) not in 'ñÑ' and len(unicodedata.normalize('NFD', chr(code))) > 1
+}
+
+
+def words(text: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Palabras normalizadas del texto y su posición
+
+    Returns:
+        tuple: ([palabra normalizada], [(inicio, fin) en caracteres])
+    """
+    text = text or ''
+    folded = text.lower()
+    if len(folded) != len(text):
+        # lower() cambió la longitud (caracteres poco comunes): palabra por palabra
+        tokens, spans = [], []
+        for match in _WORD.finditer(text):
+            tokens.append(fold(match.group()))
+            spans.append(match.span())
+        return tokens, spans
+
+    folded = folded.translate(_ACCENTS)
+    tokens, spans = [], []
+    for match in _WORD.finditer(folded):
+        token = match.group()
+        tokens.append(token if token.isascii() else fold(token))
+        spans.append(match.span())
+    return tokens, spans
+
+
+def shingle_hashes(tokens: List[str], size: int) -> List[int]:
+    """
+    Hash de 32 bits de cada shingle (n-grama de size palabras), en orden
+
+    Un texto más corto que size produce un único shingle con todo el texto.
+    """
+    if not tokens:
+        return []
+    if len(tokens) < size:
+        return [zlib.crc32(' '.join(tokens).encode('utf-8'))]
+    return [
+        zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+        for i in range(len(tokens) - size + 1)
+    ]
+
+
+def segments(word_count: int, window: int) -> List[Tuple[int, int]]:
+    """
+    Ventanas [inicio, fin) de window palabras con paso window / 2
+
+    La última ventana termina en el final del texto; un texto más corto que
+    la ventana es un solo segmento.
+    """
+    if word_count <= window:
+        return [(0, word_count)]
+    step = max(1, window // 2)
+    starts = list(range(0, word_count - window + 1, step))
+    if starts[-1] + window < word_count:
+        starts.append(word_count - window)
+    return [(start, start + window) for start in starts]
+
+
+class MinHasher:
+    """
+    Firmas MinHash de conjuntos de shingles
+
+    La fracción de posiciones iguales entre dos firmas estima la similitud
+    de Jaccard de los conjuntos (error típico ~ 1 / sqrt(num_perm)).
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        self.seed = seed
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes) -> np.ndarray:
+        """
+        Firma de un conjunto de hashes de shingles
+
+        Returns:
+            np.ndarray: num_perm valores uint32 (todos al máximo si no hay shingles)
+        """
+        values = np.unique(np.asarray(hashes, dtype=np.uint64))
+        result = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(values), _BLOCK):
+            block = values[start:start + _BLOCK]
+            permuted = ((np.outer(block, self._a) + self._b) % _PRIME) & _MAX_HASH
+            np.minimum(result, permuted.min(axis=0), out=result)
+        return result.astype(np.uint32)
+
+    def to_bytes(self, signature: np.ndarray) -> bytes:
+        """Firma serializada (4 bytes por permutación)"""
+        return signature.astype('<u4').tobytes()
+
+    def from_bytes(self, data: bytes) -> np.ndarray:
+        """Firma desde su forma serializada"""
+        return np.frombuffer(data, dtype='<u4').astype(np.uint32)
+
+
+def jaccard(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """Similitud de Jaccard estimada entre dos firmas del mismo MinHasher"""
+    if signature_a.shape != signature_b.shape:
+        return 0.0
+    return float(np.count_nonzero(signature_a == signature_b)) / len(signature_a)
+
+
+def band_keys(signature: np.ndarray, bands: int) -> List[int]:
+    """
+    Clave de cada banda de la firma (entero con signo de 64 bits, apto
+    para BIGINT)
+
+    Returns:
+        list: bands claves, en orden de banda
+    """
+    rows = len(signature) // bands
+    data = signature.astype('<u4')
+    return [
+        int.from_bytes(
+            hashlib.blake2b(data[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(),
+            'little', signed=True
+        )
+        for band in range(bands)
+    ]
+
+
+def lsh_threshold(bands: int, rows: int) -> float:
+    """Similitud aproximada a partir de la cual dos textos suelen compartir banda"""
+    return (1 / bands) ** (1 / rows)
+
+
+def find_passages(
+    hashes_a: List[int],
+    hashes_b: List[int],
+    shingle_size: int,
+    min_words: int
+) -> List[Dict]:
+    """
+    Tramos de shingles consecutivos comunes a dos textos
+
+    Recorre el texto A una vez; en cada shingle presente en B extiende la
+    coincidencia más larga con cualquiera de sus apariciones en B y salta
+    al final del tramo.
+
+    Returns:
+        list: [{'start_a', 'start_b', 'words'}] en palabras, en orden de A,
+        con al menos min_words palabras
+    """
+    positions = defaultdict(list)
+    for index, value in enumerate(hashes_b):
+        positions[value].append(index)
+
+    passages = []
+    i, n, m = 0, len(hashes_a), len(hashes_b)
+    while i < n:
+        candidates = positions.get(hashes_a[i])
+        if not candidates:
+            i += 1
+            continue
+        best_length, best_j = 0, None
+        for j in candidates[:32]:
+            length = 1
+            while i + length < n and j + length < m and hashes_a[i + length] == hashes_b[j + length]:
+                length += 1
+            if length > best_length:
+                best_length, best_j = length, j
+        span = best_length + shingle_size - 1
+        if span >= min_words:
+            passages.append({'start_a': i, 'start_b': best_j, 'words': span})
+        i += best_length
+    return passages
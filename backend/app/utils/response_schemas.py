@@ -0,0 +1,234 @@
+"""
+app/utils/response_schemas.py - Esquemas de Respuestas de IA
+Plataforma Integral de Rendimiento Estudiantil
+
+Esquema mínimo por tipo de prompt (mismo identificador que la plantilla de
+caché: 'writing.evaluate', 'study_tools.mind_map', 'text_analysis'...).
+parse_response() extrae el JSON con extract_json() y lo valida:
+
+- Campos requeridos ausentes o con tipo incorrecto -> JSONExtractionError
+  (los servicios ya la tratan como respuesta inválida: invalidan la caché
+  y usan su fallback)
+- Campos opcionales con tipo incorrecto -> se descartan
+- Números recibidos como texto ("85") -> se convierten
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.json_stream import JSONExtractionError, extract_json
+
+
+NUMBER = (int, float)
+TEXT = (str,)
+LIST = (list,)
+OBJECT = (dict,)
+
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    'writing.evaluate': {
+        'type': 'object',
+        'required': {
+            'overall_score': NUMBER,
+            'grammar_score': NUMBER,
+            'coherence_score': NUMBER,
+            'vocabulary_score': NUMBER,
+            'structure_score': NUMBER,
+            'strengths': LIST,
+            'weaknesses': LIST,
+            'recommendations': LIST,
+            'summary': TEXT
+        },
+        'optional': {
+            'improvement_percentage': NUMBER,
+            'tone_analysis': TEXT,
+            'formality_score': NUMBER,
+            'complexity_level': TEXT,
+            'specific_errors': LIST,
+            'suggestions': LIST,
+            'improvements_made': LIST
+        }
+    },
+    'study_tools.mind_map': {
+        'type': 'object',
+        'required': {'root': TEXT},
+        'optional': {'children': LIST}
+    },
+    'study_tools.timeline': {
+        'type': 'object',
+        'required': {'milestones': LIST},
+        'optional': {
+            'title': TEXT,
+            'type': TEXT,
+            'estimated_total_time': TEXT,
+            'recommendations': LIST
+        }
+    },
+    'study_tools.syllabus': {
+        'type': 'object',
+        'required': {'topics': LIST},
+        'optional': {
+            'course_info': OBJECT,
+            'learning_path': OBJECT,
+            'dependencies_map': LIST,
+            'study_recommendations': LIST,
+            'estimated_weekly_hours': TEXT + NUMBER,
+            'assessment_methods': LIST,
+            'key_dates': LIST
+        }
+    },
+    'syllabus.process': {
+        'type': 'object',
+        'required': {},
+        'optional': {
+            'course_info': OBJECT,
+            'topics': LIST,
+            'tasks': LIST
+        }
+    },
+    'text_analysis': {
+        'type': 'object',
+        'required': {'writing_quality_score': NUMBER},
+        'optional': {
+            'academic_level': TEXT,
+            'main_topics': LIST,
+            'key_concepts': LIST,
+            'technical_terms': LIST,
+            'coherence_score': NUMBER,
+            'cohesion_score': NUMBER,
+            'sentence_complexity_score': NUMBER,
+            'readability_score': NUMBER,
+            'strengths': LIST,
+            'weaknesses': LIST,
+            'recommendations': LIST,
+            'summary': TEXT
+        }
+    },
+    'sentiment_analysis': {
+        'type': 'object',
+        'required': {'sentiment': TEXT},
+        'optional': {
+            'sentiment_score': NUMBER,
+            'emotions_detected': LIST,
+            'confidence': NUMBER,
+            'keywords': LIST,
+            'summary': TEXT
+        }
+    },
+    'segment_sentiment': {
+        'type': 'array'
+    },
+    'profile_generation': {
+        'type': 'object',
+        'required': {'profile_summary': TEXT},
+        'optional': {'personalized_advice': TEXT + LIST}
+    },
+    'report_generation': {
+        'type': 'object',
+        'required': {'executive_summary': TEXT},
+        'optional': {
+            'main_insights': LIST,
+            'detailed_analysis': TEXT + OBJECT,
+            'key_recommendations': LIST,
+            'areas_of_excellence': LIST,
+            'areas_for_improvement': LIST,
+            'action_plan': TEXT + LIST + OBJECT
+        }
+    },
+    'audio_summary': {
+        'type': 'object',
+        'required': {},
+        'optional': {
+            'temas_principales': LIST,
+            'puntos_clave': LIST,
+            'dudas': LIST,
+            'nivel_comprension': TEXT,
+            'recomendaciones': LIST
+        }
+    }
+}
+
+
+def parse_response(text: str, schema_id: Optional[str] = None) -> Any:
+    """
+    Extraer y validar el JSON de una respuesta de IA
+
+    Args:
+        text (str): Respuesta del modelo
+        schema_id (str, optional): Tipo de prompt (clave de SCHEMAS)
+
+    Returns:
+        dict | list: Datos validados
+
+    Raises:
+        JSONExtractionError: Si no hay JSON o no cumple el esquema
+    """
+    schema = SCHEMAS.get(schema_id) if schema_id else None
+    data = extract_json(text, expect=schema['type'] if schema else None)
+
+    if schema is None:
+        return data
+
+    data, errors = validate(data, schema)
+    if errors:
+        raise JSONExtractionError(
+            f"Respuesta inválida para '{schema_id}': {'; '.join(errors)}", text, 0
+        )
+    return data
+
+
+def validate(data: Any, schema: Dict[str, Any]) -> Tuple[Any, List[str]]:
+    """
+    Validar datos contra un esquema de SCHEMAS
+
+    Args:
+        data: Valor decodificado
+        schema (dict): Esquema
+
+    Returns:
+        tuple: (datos normalizados, lista de errores)
+    """
+    expected = dict if schema['type'] == 'object' else list
+    if not isinstance(data, expected):
+        return data, [f"se esperaba {schema['type']}"]
+
+    if expected is list:
+        return data, []
+
+    errors = []
+    normalized = dict(data)
+
+    for field, types in schema.get('required', {}).items():
+        if field not in normalized or normalized[field] is None:
+            errors.append(f"falta '{field}'")
+            continue
+        value, ok = _coerce(normalized[field], types)
+        if ok:
+            normalized[field] = value
+        else:
+            errors.append(f"'{field}' tiene tipo {type(normalized[field]).__name__}")
+
+    for field, types in schema.get('optional', {}).items():
+        if field not in normalized:
+            continue
+        value, ok = _coerce(normalized[field], types)
+        if ok:
+            normalized[field] = value
+        else:
+            del normalized[field]
+
+    return normalized, errors
+
+
+def _coerce(value: Any, types: Tuple[type, ...]) -> Tuple[Any, bool]:
+    """Aceptar el valor si cumple el tipo; convertir números en texto"""
+    if isinstance(value, bool):
+        # bool es subclase de int: no aceptarlo como número
+        return value, bool in types
+    if isinstance(value, types):
+        return value, True
+    if int in types and isinstance(value, str):
+        try:
+            number = float(value.strip().rstrip('%'))
+        except ValueError:
+            return value, False
+        return (int(number) if number.is_integer() else number), True
+    return value, False
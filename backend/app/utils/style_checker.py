@@ -0,0 +1,603 @@
+"""
+app/utils/style_checker.py - Revisión Local de Ortografía y Estilo
+Plataforma Integral de Rendimiento Estudiantil
+
+Motor de reglas para textos académicos en español. Detecta sin llamar a la
+IA los errores deterministas que antes se pedían a Gemini (tildes, faltas
+frecuentes, puntuación, palabras duplicadas, muletillas, redundancias y
+expresiones repetidas) para que WritingEvaluator los incluya al instante
+en specific_errors y el prompt se limite a lo que las reglas no pueden
+juzgar (concordancia, coherencia, precisión léxica...).
+
+- Expresiones: un PhraseMatcher (trie de tokens, ver app.utils.text_scoring)
+  con todas las reglas de frases; cada párrafo se recorre una sola vez con
+  coincidencia más larga.
+- Patrones: dos expresiones regulares (de palabras y de oraciones)
+  compiladas al importar el módulo, con un grupo con nombre por regla (la
+  regla se identifica con lastgroup).
+- Repeticiones: n-gramas de 1 a 4 palabras por oración contados en todo el
+  documento; solo se señalan los formados por palabras de relleno o
+  fórmulas ('es importante', 'sin embargo'), no los términos del tema.
+- Ortografía: índice de borrados tipo SymSpell (SpellIndex) sobre un
+  diccionario de frecuencias (WRITING_SPELL_DICTIONARY, una línea
+  "palabra frecuencia") y un vocabulario básico integrado. Con solo el
+  vocabulario integrado se señalan únicamente las tildes omitidas en
+  palabras cuya forma sin tilde no existe; con diccionario completo,
+  también las erratas hasta WRITING_SPELL_MAX_DISTANCE ediciones.
+
+Los hallazgos usan el formato de specific_errors (type, error, correction,
+location "párrafo N", explanation) más 'source': 'reglas'.
+"""
+
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.utils.text_chunker import split_paragraphs
+from app.utils.text_scoring import STOP_WORDS, TOKEN_PATTERN, PhraseMatcher
+
+
+SPELL_DICTIONARY = os.getenv('WRITING_SPELL_DICTIONARY', '')
+SPELL_MAX_DISTANCE = int(os.getenv('WRITING_SPELL_MAX_DISTANCE', 2))
+REPETITION_MIN = int(os.getenv('WRITING_REPETITION_MIN', 3))
+MAX_FINDINGS = int(os.getenv('WRITING_LOCAL_MAX_ERRORS', 25))
+
+SOURCE = 'reglas'
+LONG_SENTENCE_WORDS = 45
+MIN_SPELL_LENGTH = 4
+MAX_NGRAM = 4
+
+_LETTERS = re.compile(r'[^\W\d_]+')
+_SENTENCE = re.compile(r'[^.!?;:\n]+')
+_LOCATION = re.compile(r'p[áa]rrafo\s+(\d+)', re.IGNORECASE)
+
+
+# ============================================
+# REGLAS DE EXPRESIONES
+# ============================================
+
+# frase -> (tipo, corrección, explicación)
+PHRASE_RULES = {
+    # Faltas frecuentes (palabras mal unidas o separadas y formas no normativas)
+    'osea': ('ortografía', 'o sea', "Se escribe en dos palabras"),
+    'sinembargo': ('ortografía', 'sin embargo', "Se escribe en dos palabras"),
+    'atravez': ('ortografía', 'a través', "Se escribe en dos palabras y con tilde"),
+    'aveces': ('ortografía', 'a veces', "Se escribe en dos palabras"),
+    'apesar': ('ortografía', 'a pesar', "Se escribe en dos palabras"),
+    'talvez': ('ortografía', 'tal vez', "Se escribe en dos palabras"),
+    'enserio': ('ortografía', 'en serio', "Se escribe en dos palabras"),
+    'porfavor': ('ortografía', 'por favor', "Se escribe en dos palabras"),
+    'haber si': ('ortografía', 'a ver si', "'A ver' (de ver) no es el verbo 'haber'"),
+    'haiga': ('gramática', 'haya', "Forma no normativa del subjuntivo de 'haber'"),
+    'hubieron': ('gramática', 'hubo', "'Haber' impersonal no tiene plural"),
+    'habemos': ('gramática', 'somos / estamos', "Forma no normativa en registro académico"),
+    'nadies': ('gramática', 'nadie', "'Nadie' no tiene plural"),
+    'mas sin embargo': ('redundancia', 'sin embargo', "'Mas' y 'sin embargo' expresan lo mismo"),
+    # Redundancias
+    'subir arriba': ('redundancia', 'subir', "'Subir' ya indica hacia arriba"),
+    'bajar abajo': ('redundancia', 'bajar', "'Bajar' ya indica hacia abajo"),
+    'salir afuera': ('redundancia', 'salir', "'Salir' ya indica hacia fuera"),
+    'entrar adentro': ('redundancia', 'entrar', "'Entrar' ya indica hacia dentro"),
+    'volver a repetir': ('redundancia', 'repetir', "'Repetir' ya significa volver a hacer"),
+    'lapso de tiempo': ('redundancia', 'lapso', "'Lapso' ya es un periodo de tiempo"),
+    'prever de antemano': ('redundancia', 'prever', "'Prever' ya significa ver con anticipación"),
+    'previsión de futuro': ('redundancia', 'previsión', "Toda previsión se refiere al futuro"),
+    'hace años atrás': ('redundancia', 'hace años', "'Hace' ya indica tiempo pasado"),
+    'persona humana': ('redundancia', 'persona', "Toda persona es humana"),
+    'totalmente gratis': ('redundancia', 'gratis', "'Gratis' no admite grados"),
+    'a grosso modo': ('redundancia', 'grosso modo', "La locución latina no lleva 'a'"),
+    # Construcciones desaconsejadas en textos académicos
+    'en base a': ('estilo', 'con base en / a partir de', "Construcción desaconsejada por la RAE"),
+    'a nivel de': ('estilo', 'en cuanto a / en el ámbito de', "Solo es correcta cuando hay niveles o alturas"),
+    'de cara a': ('estilo', 'con vistas a / ante', "Uso coloquial en registro académico"),
+    'bajo mi punto de vista': ('estilo', 'desde mi punto de vista', "Los puntos de vista se adoptan 'desde'"),
+    'en relación a': ('estilo', 'en relación con / con relación a', "Cruce de dos locuciones"),
+    'es por eso que': ('estilo', 'por eso', "Galicismo; basta con el conector"),
+    'es por ello que': ('estilo', 'por ello', "Galicismo; basta con el conector"),
+    # Registro informal y muletillas
+    'o sea': ('registro', 'es decir', "Muletilla coloquial"),
+    'un montón de': ('registro', 'numerosos / gran cantidad de', "Expresión coloquial"),
+    'un montón': ('registro', 'mucho', "Expresión coloquial"),
+    'súper': ('registro', 'muy', "Intensificador coloquial"),
+    'básicamente': ('registro', 'en esencia / (suprimir)', "Muletilla que no aporta contenido"),
+    'obviamente': ('registro', 'como se observa / (suprimir)', "Presupone acuerdo del lector; evítalo en textos académicos"),
+    'cosa': ('vocabulario', 'elemento / aspecto / factor', "Palabra genérica; usa un término específico"),
+    'cosas': ('vocabulario', 'elementos / aspectos / factores', "Palabra genérica; usa un término específico"),
+    'yo pienso que': ('registro', 'se considera que / cabe sostener que', "En textos académicos se prefiere la forma impersonal"),
+    'yo creo que': ('registro', 'se considera que / cabe sostener que', "En textos académicos se prefiere la forma impersonal"),
+}
+
+_PHRASE_MATCHER = PhraseMatcher(PHRASE_RULES)
+
+
+# ============================================
+# REGLAS DE PATRONES
+# ============================================
+
+# nombre -> (patrón, tipo, explicación). Las reglas de palabras y las de
+# oraciones van en expresiones separadas para que una oración completa no
+# oculte los errores que contiene
+PATTERN_RULES = {
+    'duplicated': (
+        r'(?i:\b(?P<word>[^\W\d_]+)\s+(?P=word)\b)',
+        'repetición', "Palabra duplicada"
+    ),
+    'contraction': (
+        r'\b(?:[Aa]|[Dd]e) el\b',
+        'gramática', "'A el' y 'de el' se contraen en 'al' y 'del'"
+    ),
+    'accent_ion': (
+        r'\b[^\W\d_]*[^\W\d_s][cs]ion\b',
+        'ortografía', "Las palabras agudas terminadas en -ión llevan tilde"
+    ),
+    'space_before': (
+        r'[^\W\d_]+[ \t]+[,;:.](?=\s|$)',
+        'puntuación', "No se deja espacio antes de los signos de puntuación"
+    ),
+    'space_after': (
+        r'[^\W\d_]+[,;][^\W\d_]+|[a-záéíóúñ]{2,}\.[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+',
+        'puntuación', "Falta un espacio después del signo de puntuación"
+    ),
+}
+
+SENTENCE_RULES = {
+    'question': (
+        r'(?:^|(?<=[.!?:\n]))[^.!?¿¡:\n]+\?',
+        'puntuación', "En español las preguntas llevan signo de apertura (¿)"
+    ),
+    'exclamation': (
+        r'(?:^|(?<=[.!?:\n]))[^.!?¿¡:\n]+!',
+        'puntuación', "En español las exclamaciones llevan signo de apertura (¡)"
+    ),
+}
+
+
+
+def _compile_rules(rules: Dict[str, Tuple[str, str, str]]):
+    """Una expresión con un grupo con nombre por regla"""
+    return re.compile('|'.join(
+        f'(?P<{name}>{pattern})' for name, (pattern, _type, _explanation) in rules.items()
+    ))
+
+
+_PATTERN = _compile_rules(PATTERN_RULES)
+_SENTENCE_PATTERN = _compile_rules(SENTENCE_RULES)
+_RULES = {**PATTERN_RULES, **SENTENCE_RULES}
+
+
+def _pattern_correction(rule: str, match: str) -> str:
+    """Corrección propuesta para una coincidencia de PATTERN_RULES o SENTENCE_RULES"""
+    if rule == 'duplicated':
+        return match.split()[0]
+    if rule == 'contraction':
+        first = match.split()[0]
+        return first[0] + ('l' if first.lower() == 'a' else 'el')
+    if rule == 'accent_ion':
+        return match[:-3] + 'ión'
+    if rule == 'space_before':
+        return re.sub(r'[ \t]+(?=[,;:.]$)', '', match)
+    if rule == 'space_after':
+        return re.sub(r'([,;.])', r'\1 ', match, count=1)
+    if rule == 'question':
+        return '¿' + match
+    if rule == 'exclamation':
+        return '¡' + match
+    return match
+
+
+# ============================================
+# REPETICIONES
+# ============================================
+
+# Palabras de relleno y fórmulas cuya repetición empobrece el estilo
+FORMULAIC_WORDS = frozenset("""
+importante importantes fundamental fundamentales necesario necesaria
+esencial relevante destacar mencionar señalar resaltar cabe embargo tanto
+lado manera forma modo hecho través además asimismo también básicamente
+realmente claramente obviamente finalmente conclusión general decir
+""".split())
+
+# Palabras con las que no empieza una expresión repetida
+_NGRAM_BREAKS = frozenset(('y', 'e', 'o', 'u', 'que', 'pero'))
+
+# Conectores que se señalan aunque aparezcan solos
+REPEATED_CONNECTORS = frozenset("""
+además asimismo también entonces básicamente realmente claramente
+obviamente finalmente
+""".split())
+
+
+def find_repetitions(paragraphs: List[str], min_count: int = REPETITION_MIN) -> List[Dict]:
+    """
+    Expresiones de relleno repetidas en el documento
+
+    Cuenta los n-gramas (1 a MAX_NGRAM palabras, sin cruzar oraciones) que
+    solo contienen palabras de FORMULAIC_WORDS y stop words y terminan en
+    una de las primeras ('es importante', 'por lo tanto'); un n-grama
+    contenido en otro con la misma frecuencia se descarta.
+
+    Returns:
+        list: [{'phrase', 'count', 'paragraphs'}] por frecuencia descendente
+    """
+    counts = Counter()
+    where = defaultdict(list)
+    for index, paragraph in enumerate(paragraphs):
+        for sentence in _SENTENCE.findall(paragraph.lower()):
+            tokens = TOKEN_PATTERN.findall(sentence)
+            for size in range(1, MAX_NGRAM + 1):
+                for start in range(len(tokens) - size + 1):
+                    gram = tokens[start:start + size]
+                    if size == 1 and gram[0] not in REPEATED_CONNECTORS:
+                        continue
+                    if gram[-1] not in FORMULAIC_WORDS or gram[0] in _NGRAM_BREAKS:
+                        continue
+                    if not all(token in FORMULAIC_WORDS or token in STOP_WORDS for token in gram):
+                        continue
+                    phrase = ' '.join(gram)
+                    counts[phrase] += 1
+                    if not where[phrase] or where[phrase][-1] != index:
+                        where[phrase].append(index)
+
+    repeated = sorted(
+        ((phrase, count) for phrase, count in counts.items() if count >= min_count),
+        key=lambda item: (-len(item[0].split()), -item[1])
+    )
+    selected = []
+    for phrase, count in repeated:
+        if any(count == kept['count'] and f' {phrase} ' in f" {kept['phrase']} " for kept in selected):
+            continue
+        selected.append({'phrase': phrase, 'count': count, 'paragraphs': where[phrase]})
+    return sorted(selected, key=lambda item: -item['count'])
+
+
+# ============================================
+# ORTOGRAFÍA (ÍNDICE TIPO SYMSPELL)
+# ============================================
+
+def strip_accents(word: str) -> str:
+    """Palabra sin tildes ni diéresis (conserva la ñ)"""
+    return ''.join(
+        char for char in unicodedata.normalize('NFD', word.replace('ñ', '\0'))
+        if unicodedata.category(char) != 'Mn'
+    ).replace('\0', 'ñ')
+
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein (alineamiento óptimo) con corte
+
+    Devuelve max_distance + 1 en cuanto la distancia lo supera.
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    previous_row = None
+    row = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = source[i - 1] != target[j - 1]
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+    return row[-1]
+
+
+class SpellIndex:
+    """
+    Diccionario con índice de borrados (algoritmo SymSpell)
+
+    Cada palabra se indexa por todas las variantes de su prefijo con hasta
+    max_distance letras borradas; una consulta genera los borrados de la
+    palabra buscada y solo calcula la distancia de edición con las palabras
+    que comparten alguna variante, en lugar de recorrer el diccionario.
+    """
+
+    def __init__(self, max_distance: int = SPELL_MAX_DISTANCE, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = {}
+        self._deletes = defaultdict(list)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def add(self, word: str, frequency: int = 1):
+        """Añadir una palabra (o sumar frecuencia si ya existe)"""
+        if word in self.words:
+            self.words[word] += frequency
+            return
+        self.words[word] = frequency
+        for variant in self._variants(word[:self.prefix_length]):
+            self._deletes[variant].append(word)
+
+    def load(self, path: str) -> int:
+        """
+        Cargar un diccionario de frecuencias ("palabra frecuencia" por
+        línea; la frecuencia es opcional)
+
+        Returns:
+            int: Palabras leídas
+        """
+        loaded = 0
+        with open(path, 'r', encoding='utf-8') as handle:
+            for line in handle:
+                parts = line.split()
+                if not parts:
+                    continue
+                frequency = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+                self.add(parts[0].lower(), frequency)
+                loaded += 1
+        return loaded
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Palabra del diccionario más cercana
+
+        Returns:
+            tuple: (sugerencia, distancia) con la menor distancia y, a igual
+            distancia, la mayor frecuencia; None si no hay ninguna
+        """
+        if word in self.words:
+            return word, 0
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+
+        candidates = set()
+        for variant in self._variants(word[:self.prefix_length]):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best = None
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            key = (distance, -self.words[candidate])
+            if best is None or key < best[0]:
+                best = (key, candidate)
+        return (best[1], best[0][0]) if best else None
+
+    def _variants(self, word: str) -> set:
+        """La palabra y todos sus borrados hasta max_distance letras"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(self.max_distance):
+            frontier = {
+                variant[:i] + variant[i + 1:]
+                for variant in frontier if len(variant) > 1
+                for i in range(len(variant))
+            } - variants
+            variants |= frontier
+        return variants
+
+
+# Vocabulario integrado: palabras con tilde cuya forma sin tilde no existe.
+# No van aquí las que tienen pareja sin tilde (estás/estas, irá/ira): se
+# señalarían palabras correctas; las que existen como verbo van en BUILTIN_VALID
+BUILTIN_WORDS = """
+también después además así través según aquí allí ahí allá acá jamás quizá quizás
+detrás atrás demás país países están será serán habrá habrán podrá podrán
+deberá deberán tendrá tendrán hará harán dirá irán estará estarán
+análisis síntesis hipótesis tesis énfasis paréntesis crisis
+método métodos metodológico página páginas párrafo párrafos capítulo capítulos
+término términos fenómeno fenómenos sílaba sílabas
+artículo artículos vehículo vehículos título títulos cálculos
+difícil difíciles fácil fáciles útil útiles móvil móviles débil débiles
+árbol árboles lápiz cárcel azúcar carácter caracteres
+rápido rápida rápidamente rápidos rápidas
+régimen exámenes imágenes orígenes márgenes volúmenes
+número números máximo máxima mínimo mínima óptimo óptima
+último últimos última últimas
+más
+""".split()
+
+# Adjetivos esdrújulos en -ico: se generan las cuatro formas
+BUILTIN_ICO = """
+académ económ polít histór científ técn teór lóg bás práct públ crít
+específ característ estratég democrát pedagóg psicológ tecnológ biológ
+ecológ geográf gráf ét estét dinám sistemát problemát temát matemát
+automát clás fís quím méd juríd
+""".split()
+
+# Formas sin tilde que sí existen (verbos, diacríticas): nunca se señalan
+BUILTIN_VALID = """
+publico publica publicas practico practica practicas critico critica
+criticas especifico especifica especificas medico medica medicas calculo
+numero ultimo ultima ultimas termino pagina paginas articulo titulo
+capitulo silaba silabas grafico grafica graficas periodo periodos mas
+""".split()
+
+
+@lru_cache(maxsize=1)
+def spell_index() -> Tuple[SpellIndex, bool]:
+    """
+    Índice ortográfico del proceso (se construye una vez)
+
+    Returns:
+        tuple: (índice, True si se cargó WRITING_SPELL_DICTIONARY)
+    """
+    index = SpellIndex()
+    full = False
+    if SPELL_DICTIONARY and os.path.exists(SPELL_DICTIONARY):
+        try:
+            loaded = index.load(SPELL_DICTIONARY)
+            full = loaded > 0
+            print(f"📖 Diccionario ortográfico: {loaded} palabras")
+        except (OSError, ValueError) as e:
+            print(f"⚠️  No se pudo cargar el diccionario ortográfico: {e}")
+
+    words = list(BUILTIN_WORDS)
+    for stem in BUILTIN_ICO:
+        words.extend(stem + suffix for suffix in ('ico', 'ica', 'icos', 'icas'))
+    for rank, word in enumerate(words):
+        index.add(word, len(words) - rank)
+    for word in BUILTIN_VALID:
+        index.add(word, 1)
+    return index, full
+
+
+def find_misspellings(paragraphs: List[str]) -> List[Dict]:
+    """
+    Palabras mal escritas con su corrección
+
+    Con solo el vocabulario integrado se señalan las tildes omitidas o
+    sobrantes. Con diccionario completo también las erratas de palabras en
+    minúscula que aparecen una sola vez en el documento (las que se repiten
+    suelen ser términos del tema ausentes del diccionario).
+
+    Returns:
+        list: [{'word', 'correction', 'paragraph', 'accent'}] una por palabra
+    """
+    index, full = spell_index()
+    occurrences = Counter()
+    first_seen = {}
+    for position, paragraph in enumerate(paragraphs):
+        for token in _LETTERS.findall(paragraph):
+            occurrences[token.lower()] += 1
+            first_seen.setdefault(token.lower(), (position, token))
+
+    findings = []
+    for word, (position, token) in first_seen.items():
+        if len(word) < MIN_SPELL_LENGTH or word in index:
+            continue
+        suggestion = index.lookup(word)
+        if suggestion is None:
+            continue
+        correction = suggestion[0]
+        accent = strip_accents(word) == strip_accents(correction)
+        if not accent and (not full or token[0].isupper() or occurrences[word] > 1):
+            continue
+        if token[0].isupper():
+            correction = correction[0].upper() + correction[1:]
+        findings.append({'word': token, 'correction': correction, 'paragraph': position, 'accent': accent})
+    return findings
+
+
+# ============================================
+# REVISIÓN COMPLETA
+# ============================================
+
+def _finding(type_: str, error: str, correction: str, paragraph: int, explanation: str) -> Dict:
+    return {
+        'type': type_,
+        'error': error,
+        'correction': correction,
+        'location': f"párrafo {paragraph + 1}",
+        'explanation': explanation,
+        'source': SOURCE
+    }
+
+
+def _snippet(text: str, words: int = 8) -> str:
+    """Inicio de un fragmento largo (attribute_errors ignora los puntos suspensivos)"""
+    tokens = text.split()
+    return ' '.join(tokens[:words]) + ('…' if len(tokens) > words else '')
+
+
+def check_paragraphs(paragraphs: List[str], max_findings: int = MAX_FINDINGS) -> List[Dict]:
+    """
+    Aplicar todas las reglas a una lista de párrafos
+
+    Las expresiones y patrones repetidos se agrupan en un solo hallazgo con
+    el número de apariciones.
+
+    Returns:
+        list: Errores con el formato de specific_errors, en orden de párrafo
+    """
+    grouped = {}
+
+    def add(key, type_, error, correction, paragraph, explanation):
+        if key in grouped:
+            grouped[key]['count'] += 1
+            return
+        grouped[key] = {
+            'count': 1,
+            'finding': _finding(type_, error, correction, paragraph, explanation)
+        }
+
+    for index, paragraph in enumerate(paragraphs):
+        for phrase, (type_, correction, explanation) in _PHRASE_MATCHER.find(TOKEN_PATTERN.findall(paragraph.lower())):
+            add(('phrase', phrase), type_, phrase, correction, index, explanation)
+
+        matches = list(_PATTERN.finditer(paragraph)) + list(_SENTENCE_PATTERN.finditer(paragraph))
+        for match in matches:
+            rule = match.lastgroup
+            _pattern, type_, explanation = _RULES[rule]
+            text = match.group(rule).strip()
+            if rule in SENTENCE_RULES:
+                text = _snippet(text)
+            # Una palabra sin tilde en -ión es también un hallazgo ortográfico
+            key = ('spell', text.lower()) if rule == 'accent_ion' else ('pattern', rule, text.lower())
+            add(key, type_, text, _pattern_correction(rule, text), index, explanation)
+
+        for sentence in re.findall(r'[^.!?]+[.!?]?', paragraph):
+            length = len(TOKEN_PATTERN.findall(sentence))
+            if length > LONG_SENTENCE_WORDS:
+                add(('long', index, sentence[:40]), 'estilo', _snippet(sentence.strip()),
+                    'Dividir en dos o más oraciones', index,
+                    f"Oración de {length} palabras; las oraciones largas dificultan la lectura")
+
+    for misspelling in find_misspellings(paragraphs):
+        if ('spell', misspelling['word'].lower()) in grouped:
+            continue
+        explanation = ("Falta o sobra la tilde" if misspelling['accent']
+                       else "Posible error ortográfico (no está en el diccionario)")
+        add(('spell', misspelling['word'].lower()), 'ortografía', misspelling['word'],
+            misspelling['correction'], misspelling['paragraph'], explanation)
+
+    findings = []
+    for entry in grouped.values():
+        finding = entry['finding']
+        if entry['count'] > 1:
+            finding['explanation'] += f" (aparece {entry['count']} veces)"
+        findings.append(finding)
+
+    for repetition in find_repetitions(paragraphs):
+        places = ', '.join(str(index + 1) for index in repetition['paragraphs'][:5])
+        label = 'párrafos' if len(repetition['paragraphs']) > 1 else 'párrafo'
+        findings.append(_finding(
+            'repetición', repetition['phrase'], 'Variar la expresión o suprimirla',
+            repetition['paragraphs'][0],
+            f"Aparece {repetition['count']} veces en el texto ({label} {places})"
+        ))
+
+    findings.sort(key=paragraph_of)
+    return findings[:max_findings]
+
+
+def check_text(text: str, max_findings: int = MAX_FINDINGS) -> List[Dict]:
+    """
+    Revisión local de un texto completo
+
+    Los párrafos se dividen igual que en writing_revisions, así que la
+    ubicación "párrafo N" coincide con el índice de párrafos del reporte.
+    """
+    return check_paragraphs(split_paragraphs(text or ''), max_findings)
+
+
+def paragraph_of(error: Dict) -> int:
+    """Índice de párrafo de un error (los que no tienen ubicación van al final)"""
+    match = _LOCATION.search(str(error.get('location') or '')) if isinstance(error, dict) else None
+    return int(match.group(1)) - 1 if match else 1 << 30
+
+
+def merge_errors(local_errors: Optional[List[Dict]], errors: Optional[Iterable]) -> List[Dict]:
+    """
+    Combinar los hallazgos locales con los errores de la IA
+
+    Se descartan los errores de la IA cuyo fragmento ya señalaron las
+    reglas; el resultado queda en orden de párrafo.
+    """
+    local_errors = list(local_errors or [])
+    seen = {str(error.get('error') or '').strip(' .…"\'').casefold() for error in local_errors}
+    merged = local_errors + [
+        error for error in errors or []
+        if not isinstance(error, dict) or str(error.get('error') or '').strip(' .…"\'').casefold() not in seen
+    ]
+    return sorted(merged, key=paragraph_of)
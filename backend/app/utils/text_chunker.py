@@ -0,0 +1,238 @@
+"""
+app/utils/text_chunker.py - División de Documentos por Presupuesto de Tokens
+Plataforma Integral de Rendimiento Estudiantil
+
+Divide un texto largo en fragmentos que respetan su estructura (títulos y
+párrafos) sin superar un presupuesto de tokens. Sustituye a los recortes
+por caracteres (text[:5000], syllabus_text[:8000]...) que ignoraban el
+resto del documento.
+
+- Un título abre una sección; cada fragmento lleva el título de su sección
+  (también las continuaciones) para que el modelo conserve el contexto.
+- Los párrafos se empaquetan dentro de la sección; un párrafo que excede
+  el presupuesto se divide por oraciones y, en último caso, por palabras.
+- Las secciones pequeñas se unen con la siguiente solo si el fragmento
+  actual no llega a la mitad del presupuesto, de modo que editar una
+  sección cambia únicamente sus fragmentos (y su hash): el resto sigue
+  acertando en la caché de respuestas.
+- iter_chunks hace el mismo empaquetado sobre los bloques del lector de
+  documentos (generador), sin tener el texto completo en memoria.
+"""
+
+import re
+import hashlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_END = re.compile(r'(?<=[.!?…:;])\s+')
+_HEADING = re.compile(
+    r'^(?:#{1,6}\s+\S'
+    r'|(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.)\s+[A-ZÁÉÍÓÚÑ¿¡]'
+    r'|(?:cap[ií]tulo|unidad|secci[oó]n|tema|m[oó]dulo|semana|parte|anexo)\b)',
+    re.IGNORECASE
+)
+
+HEADING_MAX_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación local de tokens (1 token ≈ 4 caracteres, igual que LLMClient)"""
+    return len(text) // 4
+
+
+def is_heading(block: str) -> bool:
+    """
+    Detectar un título: línea única y corta con marcador de Markdown,
+    numeración (1., 2.3, IV.), palabra clave (Capítulo, Unidad, Semana...)
+    o escrita en mayúsculas sin punto final
+    """
+    line = block.strip()
+    if not line or '\n' in line or len(line) > HEADING_MAX_CHARS:
+        return False
+    if _HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and line.isupper() and not line.endswith('.')
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Párrafos del texto
+
+    Usa las líneas en blanco; si el texto no tiene (extracción de PDF con
+    un salto por línea), cada línea cuenta como bloque.
+    """
+    blocks = [b.strip() for b in _PARAGRAPH_BREAK.split(text) if b.strip()]
+    if len(blocks) <= 1 and text.count('\n') > 1:
+        blocks = [line.strip() for line in text.splitlines() if line.strip()]
+    return blocks
+
+
+def split_sections(text: str) -> List[Tuple[Optional[str], List[str]]]:
+    """
+    Agrupar párrafos en secciones encabezadas por títulos
+
+    Returns:
+        list: [(título o None, [párrafos]), ...]
+    """
+    return list(iter_sections(split_paragraphs(text)))
+
+
+def _split_oversized(paragraph: str, max_tokens: int, count: Callable[[str], int]) -> List[str]:
+    """Dividir un párrafo que excede el presupuesto por oraciones y palabras"""
+    pieces, current = [], ''
+    for sentence in _SENTENCE_END.split(paragraph):
+        if count(sentence) > max_tokens:
+            words = sentence.split()
+            sentence_parts, part = [], []
+            for word in words:
+                if part and count(' '.join(part + [word])) > max_tokens:
+                    sentence_parts.append(' '.join(part))
+                    part = []
+                part.append(word)
+            if part:
+                sentence_parts.append(' '.join(part))
+        else:
+            sentence_parts = [sentence]
+
+        for part in sentence_parts:
+            candidate = f"{current} {part}".strip()
+            if current and count(candidate) > max_tokens:
+                pieces.append(current)
+                current = part
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def iter_sections(blocks: Iterable) -> Iterator[Tuple[Optional[str], List[str]]]:
+    """
+    Agrupar en secciones los bloques de un lector de documentos
+
+    Mantiene en memoria solo la sección en curso.
+
+    Args:
+        blocks: Bloques de app.services.document_processing.document_reader
+            (dicts con 'text' y 'kind') o párrafos (str, títulos por heurística)
+
+    Yields:
+        tuple: (título o None, [párrafos])
+    """
+    heading, paragraphs = None, []
+    for block in blocks:
+        if isinstance(block, dict):
+            text, block_is_heading = block['text'], block.get('kind') == 'heading'
+        else:
+            text, block_is_heading = block, is_heading(block)
+        if block_is_heading:
+            if heading is not None or paragraphs:
+                yield heading, paragraphs
+            heading, paragraphs = text.lstrip('#').strip(), []
+        elif text:
+            paragraphs.append(text)
+
+    if heading is not None or paragraphs:
+        yield heading, paragraphs
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int,
+    count: Optional[Callable[[str], int]] = None
+) -> List[Dict]:
+    """
+    Dividir un documento en fragmentos estructurales dentro del presupuesto
+
+    Args:
+        text (str): Documento completo
+        max_tokens (int): Tokens máximos por fragmento (sin contar el prompt)
+        count (callable, optional): Contador de tokens (por defecto la
+            estimación local; se llama muchas veces, no usar la API)
+
+    Returns:
+        list: [{'index', 'heading', 'text', 'tokens', 'hash'}, ...] en orden
+    """
+    count = count or estimate_tokens
+    text = (text or '').strip()
+    if not text:
+        return []
+    if count(text) <= max_tokens:
+        return [_make_chunk(0, None, text, count)]
+    return list(_pack_sections(split_sections(text), max_tokens, count))
+
+
+def iter_chunks(
+    blocks: Iterable,
+    max_tokens: int,
+    count: Optional[Callable[[str], int]] = None
+) -> Iterator[Dict]:
+    """
+    Fragmentos de un documento leído por bloques, a medida que se completan
+
+    Mismo empaquetado que chunk_text, pero consumiendo un generador (ver
+    iter_sections): la memoria es proporcional a una sección y a un
+    fragmento, no al documento. A diferencia de chunk_text, un documento
+    corto no se devuelve como un único texto sin títulos procesados.
+
+    Yields:
+        dict: {'index', 'heading', 'text', 'tokens', 'hash'}
+    """
+    return _pack_sections(iter_sections(blocks), max_tokens, count or estimate_tokens)
+
+
+def _pack_sections(
+    sections: Iterable[Tuple[Optional[str], List[str]]],
+    max_tokens: int,
+    count: Callable[[str], int]
+) -> Iterator[Dict]:
+    """Empaquetar secciones en fragmentos dentro del presupuesto"""
+    index = 0
+    current_heading, current_parts, current_tokens = None, [], 0
+
+    for heading, paragraphs in sections:
+        heading_tokens = count(heading) + 1 if heading else 0
+        section_tokens = heading_tokens + sum(count(p) + 1 for p in paragraphs)
+
+        # Nueva sección: empieza fragmento salvo que el actual sea pequeño y quepa entera
+        if current_parts and (current_tokens >= max_tokens // 2 or current_tokens + section_tokens > max_tokens):
+            yield _make_chunk(index, current_heading, '\n\n'.join(current_parts), count)
+            index += 1
+            current_parts, current_tokens = [], 0
+        if not current_parts:
+            current_heading = heading
+        if heading:
+            current_parts.append(heading)
+            current_tokens += heading_tokens
+
+        budget = max(max_tokens - heading_tokens, max_tokens // 2)
+        for paragraph in paragraphs:
+            pieces = [paragraph] if count(paragraph) <= budget else _split_oversized(paragraph, budget, count)
+            for piece in pieces:
+                piece_tokens = count(piece) + 1
+                if current_parts and current_tokens + piece_tokens > max_tokens:
+                    yield _make_chunk(index, current_heading, '\n\n'.join(current_parts), count)
+                    index += 1
+                    current_parts, current_tokens = [], 0
+                    current_heading = heading
+                    if heading:
+                        # Continuación de la sección: repetir el título como contexto
+                        current_parts.append(heading)
+                        current_tokens += heading_tokens
+                current_parts.append(piece)
+                current_tokens += piece_tokens
+
+    if current_parts:
+        yield _make_chunk(index, current_heading, '\n\n'.join(current_parts), count)
+
+
+def _make_chunk(index: int, heading: Optional[str], text: str, count: Callable[[str], int]) -> Dict:
+    return {
+        'index': index,
+        'heading': heading,
+        'text': text,
+        'tokens': count(text),
+        'hash': hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    }
@@ -0,0 +1,197 @@
+"""
+app/utils/text_metrics.py - Métricas Básicas de Texto en una Pasada
+Plataforma Integral de Rendimiento Estudiantil
+
+Motor único de métricas (palabras, oraciones, párrafos, vocabulario,
+palabras largas, sílabas y legibilidad) compartido por
+WritingEvaluator.calculate_basic_metrics y TextAnalysis.set_basic_metrics,
+que antes usaban tokenizadores distintos y recorrían el texto varias veces.
+
+- TextMetrics consume el texto por fragmentos (feed), así que funciona
+  sobre generadores de líneas/párrafos de documentos grandes sin tener el
+  documento entero en memoria; los fragmentos pueden cortar palabras u
+  oraciones en cualquier punto.
+- El vocabulario se acumula en un Counter; las sílabas se calculan una vez
+  por palabra distinta (y se memorizan entre documentos), no por aparición.
+- compute_metrics() sobre un str memoriza el resultado de los últimos
+  textos: comparar con la versión anterior o recurrir a la evaluación
+  heurística no vuelve a analizar el mismo documento.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, Union
+
+
+# Palabras (equivalente a \b\w+\b)
+_WORD = re.compile(r'\w+')
+# Fin de oración
+_SENTENCE_END = re.compile(r'[.!?]+')
+# Línea en blanco entre párrafos
+_PARAGRAPH_BREAK = re.compile(r'\n[^\S\n]*\n\s*')
+_VOWEL_GROUP = re.compile(r'[aeiouáéíóúü]+')
+
+LONG_WORD_CHARS = 7
+DEFAULT_READABILITY = 50
+
+
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """Sílabas aproximadas de una palabra en minúsculas (grupos de vocales, mínimo 1)"""
+    return max(1, len(_VOWEL_GROUP.findall(word)))
+
+
+def readability(word_count: int, sentence_count: int, syllable_count: int) -> float:
+    """
+    Índice de legibilidad (Flesch simplificado, 0-100)
+
+    Menor = más difícil, mayor = más fácil.
+    """
+    if not sentence_count or not word_count:
+        return DEFAULT_READABILITY
+    score = 206.835 - 1.015 * (word_count / sentence_count) - 84.6 * (syllable_count / word_count)
+    return max(0, min(100, score))
+
+
+class TextMetrics:
+    """
+    Acumulador de métricas que recorre el texto una sola vez
+
+    Uso:
+        metrics = TextMetrics()
+        for chunk in chunks:
+            metrics.feed(chunk)
+        result = metrics.result()
+    """
+
+    def __init__(self):
+        self.words = Counter()
+        self.word_count = 0
+        self.sentence_count = 0
+        self.paragraph_count = 0
+        self._carry = ''
+        self._in_sentence = False
+        self._in_paragraph = False
+
+    def feed(self, chunk: str) -> 'TextMetrics':
+        """Consumir un fragmento del texto"""
+        if not chunk:
+            return self
+        buffer = self._carry + chunk
+        # El último token (y los espacios que lo siguen) puede continuar en el próximo fragmento
+        cut = len(buffer.rstrip())
+        while cut and not buffer[cut - 1].isspace():
+            cut -= 1
+        self._carry = buffer[cut:]
+        if cut:
+            self._consume(buffer[:cut])
+        return self
+
+    def add_paragraph(self, paragraph: str) -> 'TextMetrics':
+        """Consumir un párrafo completo (p. ej. de un lector de documentos por párrafos)"""
+        return self.feed(paragraph + '\n\n')
+
+    def close(self) -> 'TextMetrics':
+        """Procesar lo pendiente y cerrar la última oración y párrafo"""
+        if self._carry:
+            self._consume(self._carry)
+            self._carry = ''
+        self._end_paragraph()
+        return self
+
+    def _consume(self, text: str):
+        for index, paragraph in enumerate(_PARAGRAPH_BREAK.split(text)):
+            if index:
+                self._end_paragraph()
+            if not paragraph or paragraph.isspace():
+                continue
+            self._in_paragraph = True
+
+            words = _WORD.findall(paragraph.lower())
+            self.words.update(words)
+            self.word_count += len(words)
+
+            pieces = _SENTENCE_END.split(paragraph)
+            # Cada terminador cierra la oración abierta; un trozo con texto abre otra
+            for piece_index, piece in enumerate(pieces):
+                if piece_index and self._in_sentence:
+                    self.sentence_count += 1
+                    self._in_sentence = False
+                if piece and not piece.isspace():
+                    self._in_sentence = True
+
+    def _end_paragraph(self):
+        if self._in_sentence:
+            self.sentence_count += 1
+            self._in_sentence = False
+        if self._in_paragraph:
+            self.paragraph_count += 1
+            self._in_paragraph = False
+
+    def result(self) -> Dict:
+        """
+        Métricas finales (cierra el acumulador)
+
+        Returns:
+            dict: Mismas claves que WritingEvaluator.calculate_basic_metrics
+                más avg_word_length, syllable_count y avg_syllables_per_word
+        """
+        self.close()
+        word_count = self.word_count
+        sentence_count = self.sentence_count
+        vocabulary_size = len(self.words)
+
+        long_word_count = 0
+        syllable_count = 0
+        character_count = 0
+        for word, occurrences in self.words.items():
+            length = len(word)
+            character_count += length * occurrences
+            syllable_count += count_syllables(word) * occurrences
+            if length > LONG_WORD_CHARS:
+                long_word_count += occurrences
+
+        avg_words_per_sentence = word_count / sentence_count if sentence_count else 0
+        return {
+            'word_count': word_count,
+            'sentence_count': sentence_count,
+            'paragraph_count': self.paragraph_count,
+            'vocabulary_size': vocabulary_size,
+            'long_word_count': long_word_count,
+            'avg_words_per_sentence': round(avg_words_per_sentence, 2),
+            'vocabulary_richness': round(vocabulary_size / word_count * 100, 2) if word_count else 0,
+            'readability_score': round(readability(word_count, sentence_count, syllable_count), 2),
+            'avg_word_length': round(character_count / word_count, 2) if word_count else 0,
+            'syllable_count': syllable_count,
+            'avg_syllables_per_word': round(syllable_count / word_count, 2) if word_count else 0
+        }
+
+
+@lru_cache(maxsize=16)
+def _text_metrics(text: str) -> Dict:
+    return TextMetrics().feed(text).result()
+
+
+def compute_metrics(source: Union[str, Iterable[Union[str, Dict]]]) -> Dict:
+    """
+    Métricas básicas de un texto o de un iterable de fragmentos
+
+    Args:
+        source: Texto completo, generador de fragmentos que conserven sus
+            separadores (líneas con su salto, páginas...) o de bloques del
+            lector de documentos (dicts con 'text', uno por párrafo)
+
+    Returns:
+        dict: Ver TextMetrics.result
+    """
+    if isinstance(source, str):
+        return dict(_text_metrics(source))
+
+    metrics = TextMetrics()
+    for chunk in source:
+        if isinstance(chunk, dict):
+            metrics.add_paragraph(chunk['text'])
+        else:
+            metrics.feed(chunk)
+    return metrics.result()
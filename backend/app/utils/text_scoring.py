@@ -0,0 +1,213 @@
+"""
+app/utils/text_scoring.py - Puntuación Léxica de Texto
+Plataforma Integral de Rendimiento Estudiantil
+
+Sentimiento por léxico y extracción de palabras clave compartidos por
+AudioTranscription y AudioService (cada uno con su lista de términos de
+siempre, para no cambiar los scores ya guardados). Los léxicos, las stop words y el
+reconocedor de frases se compilan una sola vez al importar el módulo, y
+cada texto se tokeniza en una única pasada que alimenta tanto el
+sentimiento como el conteo de palabras clave.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Palabras (con guiones/apóstrofes internos) en minúsculas
+TOKEN_PATTERN = re.compile(r"\w+(?:[-']\w+)*", re.UNICODE)
+
+# Palabras positivas en español (AudioTranscription)
+POSITIVE_TERMS = (
+    'excelente', 'bien', 'bueno', 'genial', 'perfecto', 'me gusta',
+    'interesante', 'increíble', 'fantástico', 'maravilloso', 'claro',
+    'entiendo', 'comprendo', 'sí', 'correcto', 'gracias'
+)
+
+# Palabras negativas en español (AudioTranscription)
+NEGATIVE_TERMS = (
+    'mal', 'malo', 'terrible', 'difícil', 'complicado', 'confuso',
+    'no entiendo', 'problema', 'error', 'fallo', 'aburrido',
+    'cansado', 'frustrado', 'no', 'nunca', 'imposible'
+)
+
+# Léxico reducido de AudioService.analyze_sentiment
+SERVICE_POSITIVE_TERMS = ('bien', 'bueno', 'excelente', 'feliz', 'genial', 'perfecto')
+SERVICE_NEGATIVE_TERMS = ('mal', 'malo', 'triste', 'horrible', 'terrible', 'pésimo')
+
+# Palabras comunes a ignorar (stop words básicos en español)
+STOP_WORDS = frozenset({
+    'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'ser', 'se', 'no',
+    'haber', 'por', 'con', 'su', 'para', 'como', 'estar', 'tener',
+    'le', 'lo', 'todo', 'pero', 'más', 'hacer', 'o', 'poder', 'decir',
+    'este', 'ir', 'otro', 'ese', 'si', 'me', 'ya', 'ver', 'porque',
+    'dar', 'cuando', 'él', 'muy', 'sin', 'vez', 'mucho', 'saber', 'qué',
+    'sobre', 'mi', 'alguno', 'mismo', 'yo', 'también', 'hasta', 'año',
+    'dos', 'querer', 'entre', 'así', 'primero', 'desde', 'grande', 'eso',
+    'ni', 'nos', 'llegar', 'pasar', 'tiempo', 'ella', 'sí', 'día', 'uno',
+    'bien', 'poco', 'deber', 'entonces', 'poner', 'cosa', 'tanto', 'hombre',
+    'parecer', 'nuestro', 'tan', 'donde', 'ahora', 'parte', 'después', 'vida',
+    'es', 'son', 'del', 'los', 'las', 'una', 'al'
+})
+
+MIN_KEYWORD_LENGTH = 4
+
+# Umbral (en puntos de -100 a +100) para clasificar positivo/negativo
+SENTIMENT_THRESHOLD = 30
+
+
+class PhraseMatcher:
+    """
+    Reconocedor de frases sobre secuencias de tokens
+
+    Construye un trie de tokens (dict token -> nodo; la clave None guarda
+    (frase, valor) cuando una frase termina en ese nodo) y lo recorre en una
+    sola pasada aplicando la coincidencia más larga, sin solapamientos.
+    """
+
+    def __init__(self, phrases: Dict[str, object]):
+        self._trie = {}
+        for phrase, value in phrases.items():
+            node = self._trie
+            for token in TOKEN_PATTERN.findall(phrase.lower()):
+                node = node.setdefault(token, {})
+            node[None] = (phrase, value)
+
+    def find(self, tokens: List[str]) -> List[Tuple[str, object]]:
+        """
+        Buscar frases en la secuencia de tokens
+
+        Returns:
+            list: [(frase, valor), ...] en orden de aparición
+        """
+        matches = []
+        i, n = 0, len(tokens)
+
+        while i < n:
+            node = self._trie
+            match, match_end = None, i
+            j = i
+            while j < n and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if None in node:
+                    match, match_end = node[None], j
+
+            if match is None:
+                i += 1
+                continue
+
+            matches.append(match)
+            i = match_end
+
+        return matches
+
+
+def lexicon_matcher(positive_terms: Iterable[str], negative_terms: Iterable[str]) -> PhraseMatcher:
+    """Reconocedor de un léxico de sentimiento (polaridad 1 / -1)"""
+    return PhraseMatcher({
+        **{term: 1 for term in positive_terms},
+        **{term: -1 for term in negative_terms},
+    })
+
+
+_LEXICON_MATCHER = lexicon_matcher(POSITIVE_TERMS, NEGATIVE_TERMS)
+SERVICE_LEXICON = lexicon_matcher(SERVICE_POSITIVE_TERMS, SERVICE_NEGATIVE_TERMS)
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizar texto en minúsculas (una sola pasada)"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def match_lexicon(tokens: List[str], lexicon: Optional[PhraseMatcher] = None) -> Tuple[set, set]:
+    """
+    Buscar términos del léxico en la secuencia de tokens
+
+    Recorre los tokens una vez aplicando la coincidencia más larga
+    ('no entiendo' tiene prioridad sobre 'no'). Sin lexicon se usa el de
+    AudioTranscription.
+
+    Returns:
+        tuple: (términos positivos encontrados, términos negativos encontrados)
+    """
+    positive, negative = set(), set()
+    for phrase, polarity in (lexicon or _LEXICON_MATCHER).find(tokens):
+        (positive if polarity > 0 else negative).add(phrase)
+
+    return positive, negative
+
+
+def score_sentiment(tokens: List[str], lexicon: Optional[PhraseMatcher] = None) -> Dict:
+    """
+    Sentimiento léxico a partir de tokens (ver match_lexicon)
+
+    Returns:
+        dict: {'sentiment', 'sentiment_score' (-100 a +100),
+               'positive_count', 'negative_count'}
+    """
+    positive, negative = match_lexicon(tokens, lexicon)
+    positive_count, negative_count = len(positive), len(negative)
+
+    total = positive_count + negative_count
+    if total == 0:
+        score = 0
+    else:
+        score = round((positive_count - negative_count) / total * 100, 2)
+
+    if score > SENTIMENT_THRESHOLD:
+        sentiment = 'positive'
+    elif score < -SENTIMENT_THRESHOLD:
+        sentiment = 'negative'
+    else:
+        sentiment = 'neutral'
+
+    return {
+        'sentiment': sentiment,
+        'sentiment_score': score,
+        'positive_count': positive_count,
+        'negative_count': negative_count
+    }
+
+
+def extract_keywords(tokens: List[str], top_n: int = 5) -> List[str]:
+    """
+    Palabras clave más frecuentes (sin stop words ni palabras cortas)
+
+    A igual frecuencia se conserva el orden de aparición.
+    """
+    counts = Counter(
+        token for token in tokens
+        if len(token) >= MIN_KEYWORD_LENGTH and token not in STOP_WORDS
+    )
+    return [word for word, _freq in counts.most_common(top_n)]
+
+
+def score_text(text: str, top_n: int = 5) -> Dict:
+    """
+    Sentimiento y palabras clave de un texto con una sola tokenización
+
+    Returns:
+        dict: Resultado de score_sentiment más 'keywords'
+    """
+    tokens = tokenize(text)
+    result = score_sentiment(tokens)
+    result['keywords'] = extract_keywords(tokens, top_n)
+    return result
+
+
+def score_texts(texts: Iterable[str], top_n: int = 5) -> List[Dict]:
+    """
+    Procesar un lote de textos (p. ej. todos los segmentos de una sesión)
+
+    Args:
+        texts (iterable): Textos a puntuar
+        top_n (int): Palabras clave por texto
+
+    Returns:
+        list: Un resultado de score_text por texto, en el mismo orden
+    """
+    return [score_text(text, top_n) for text in texts]
@@ -0,0 +1,219 @@
+"""
+Fuzz y benchmark de la extracción de JSON de respuestas de IA
+
+Usa respuestas grabadas (tabla ai_response_cache / ai_interactions, o una
+carpeta de archivos .txt/.json) y, si no hay, muestras sintéticas con el
+formato de cada esquema.
+
+Fuzz: aplica mutaciones típicas de los modelos (vallas ```json, texto antes
+y después, comas finales, saltos de línea sin escapar, truncado) y verifica
+que extract_json() recupere el mismo valor o falle solo con
+JSONExtractionError; también alimenta IncrementalJSONParser en fragmentos
+aleatorios.
+
+Benchmark: compara extract_json() con la extracción anterior
+(re.search(r'\\{.*\\}', ..., re.DOTALL)) en respuestas grandes y en entradas
+patológicas (muchas '{' sin cerrar).
+
+Uso:
+    python benchmark_json_extraction.py [--samples DIR] [--from-db] [--fuzz 2000] [--seed 1]
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.json_stream import IncrementalJSONParser, JSONExtractionError, extract_json
+
+
+SYNTHETIC_SAMPLES = [
+    {
+        "overall_score": 78, "grammar_score": 80, "coherence_score": 72,
+        "vocabulary_score": 75, "structure_score": 81,
+        "specific_errors": [{"type": "ortografía", "error": "havía", "correction": "había",
+                             "location": "párrafo 2", "explanation": "La 'h' es necesaria"}],
+        "strengths": ["Ideas claras", "Buen uso de \"conectores\""],
+        "weaknesses": ["Párrafos {largos}", "Uso de [corchetes] y \\ barras"],
+        "recommendations": ["Dividir oraciones largas"],
+        "summary": "Texto sólido.\nNecesita revisión de puntuación."
+    },
+    {"root": "Fotosíntesis", "children": [
+        {"name": "Fase luminosa", "children": [{"name": "Fotólisis"}, {"name": "ATP"}]},
+        {"name": "Ciclo de Calvin", "children": [{"name": "Fijación de CO2"}]}
+    ]},
+    {"title": "Tesis", "type": "academic", "milestones": [
+        {"id": i, "title": f"Fase {i}", "tasks": ["a", "b"], "dependencies": [i - 1] if i else []}
+        for i in range(6)
+    ], "recommendations": ["Empezar temprano"]},
+    [{"segment_id": i, "sentiment": "neutral", "sentiment_score": 0.5 * i, "keywords": ["x"]} for i in range(20)]
+]
+
+
+def load_samples(samples_dir=None, from_db=False, limit=500):
+    """Respuestas grabadas (texto crudo del modelo)"""
+    samples = []
+
+    if samples_dir:
+        for name in sorted(os.listdir(samples_dir)):
+            if name.endswith(('.txt', '.json')):
+                with open(os.path.join(samples_dir, name), encoding='utf-8', errors='ignore') as f:
+                    samples.append(f.read())
+
+    if from_db:
+        from sqlalchemy import text
+        from app import create_app, db
+        app = create_app()
+        with app.app_context():
+            for query in (
+                "SELECT response_text FROM ai_response_cache LIMIT :limit",
+                "SELECT response_text FROM ai_interactions WHERE success = 1 "
+                "AND response_text IS NOT NULL ORDER BY id DESC LIMIT :limit"
+            ):
+                try:
+                    rows = db.session.execute(text(query), {'limit': limit}).fetchall()
+                    samples.extend(row[0] for row in rows if row[0])
+                except Exception as e:
+                    print(f"⚠️  No se pudieron leer respuestas grabadas: {e}")
+
+    if not samples:
+        samples = [json.dumps(s, ensure_ascii=False, indent=2) for s in SYNTHETIC_SAMPLES]
+
+    # Conservar solo las que contienen JSON recuperable (sirven de referencia)
+    reference = []
+    for raw in samples:
+        try:
+            reference.append((raw, extract_json(raw)))
+        except JSONExtractionError:
+            pass
+    return reference
+
+
+def dump(value):
+    return json.dumps(value, ensure_ascii=False, indent=random.choice([None, 2]))
+
+
+def _trailing_commas(text):
+    return re.sub(r'([}\]])', r',\1', text, count=3).replace('{,', '{').replace('[,', '[')
+
+
+MUTATIONS = {
+    'fence': lambda text: f"```json\n{text}\n```",
+    'preamble': lambda text: f"Claro, aquí tienes el JSON {{solicitado}}:\n{text}\n\nEspero que sirva.",
+    'trailing_commas': _trailing_commas,
+    'raw_newlines': lambda text: text.replace('\\n', '\n'),
+}
+
+
+def fuzz(reference, iterations):
+    """Mutaciones que deben recuperar el mismo valor + truncados que no deben romper"""
+    failures = {name: 0 for name in MUTATIONS}
+    truncated_ok = truncated_total = stream_failures = unexpected = 0
+
+    for _ in range(iterations):
+        _, expected = random.choice(reference)
+        text = dump(expected)
+
+        name = random.choice(list(MUTATIONS))
+        try:
+            if extract_json(MUTATIONS[name](text)) != expected:
+                failures[name] += 1
+        except JSONExtractionError:
+            failures[name] += 1
+        except Exception as e:
+            unexpected += 1
+            print(f"❌ Excepción inesperada ({name}): {type(e).__name__}: {e}")
+
+        # Truncado en un punto aleatorio: debe devolver un prefijo o JSONExtractionError
+        truncated_total += 1
+        cut = random.randint(1, max(len(text) - 1, 1))
+        try:
+            extract_json(text[:cut])
+            truncated_ok += 1
+        except JSONExtractionError:
+            pass
+        except Exception as e:
+            unexpected += 1
+            print(f"❌ Excepción inesperada (truncado): {type(e).__name__}: {e}")
+
+        # Stream en fragmentos aleatorios
+        if isinstance(expected, dict):
+            parser = IncrementalJSONParser()
+            fields, pos = [], 0
+            fenced = MUTATIONS['fence'](text)
+            while pos < len(fenced):
+                size = random.randint(1, 64)
+                fields += parser.feed(fenced[pos:pos + size])
+                pos += size
+            if dict(fields) != expected:
+                stream_failures += 1
+
+    print(f"\n🧪 FUZZ ({iterations} iteraciones, {len(reference)} respuestas de referencia)")
+    for name, count in failures.items():
+        print(f"   {'✅' if not count else '❌'} {name}: {count} fallos")
+    print(f"   {'✅' if not stream_failures else '❌'} stream: {stream_failures} fallos")
+    print(f"   ℹ️  truncados recuperados: {truncated_ok}/{truncated_total}")
+    print(f"   {'✅' if not unexpected else '❌'} excepciones inesperadas: {unexpected}")
+    return not unexpected and not stream_failures and not any(failures.values())
+
+
+def legacy_extract(text):
+    """Extracción anterior: regex codiciosa con DOTALL"""
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    return json.loads(match.group()) if match else None
+
+
+def timed(func, text, runs=3):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            func(text)
+        except Exception:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark(reference):
+    """Tiempos de extract_json frente a la regex anterior"""
+    _, sample = max(reference, key=lambda item: len(dump(item[1])))
+    cases = []
+    for copies in (1, 100, 2000):
+        payload = json.dumps({'items': [sample] * copies}, ensure_ascii=False)
+        cases.append((f"válido {len(payload) // 1024} KB", f"Respuesta:\n```json\n{payload}\n```"))
+    for size in (2000, 8000, 32000):
+        cases.append((f"patológico {size} '{{'", 'x {' * size))
+
+    print("\n⏱️  BENCHMARK (mejor de 3, ms)")
+    print(f"   {'caso':<24}{'extract_json':>14}{'regex anterior':>16}")
+    for label, text in cases:
+        print(f"   {label:<24}{timed(extract_json, text):>14.2f}{timed(legacy_extract, text):>16.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz y benchmark de extracción de JSON')
+    parser.add_argument('--samples', help='Carpeta con respuestas grabadas (.txt/.json)')
+    parser.add_argument('--from-db', action='store_true', help='Leer respuestas de la base de datos')
+    parser.add_argument('--fuzz', type=int, default=2000, help='Iteraciones de fuzz')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    reference = load_samples(args.samples, args.from_db)
+
+    print("\n" + "=" * 60)
+    print("🔎 EXTRACCIÓN DE JSON - FUZZ Y BENCHMARK")
+    print("=" * 60)
+
+    ok = fuzz(reference, args.fuzz)
+    benchmark(reference)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de backends de reconocimiento de voz
+
+Mide el Real-Time Factor (RTF = tiempo de procesamiento / duración del audio)
+de cada backend sobre un archivo WAV. RTF < 1 significa más rápido que tiempo real.
+
+Uso:
+    python benchmark_recognizers.py audio.wav [--backends vosk,whisper] [--runs 3]
+"""
+
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import speech_recognition as sr
+from app.services.audio_processing.recognizers import get_recognizer_backend
+
+
+def benchmark_backend(backend_name, audio_data, duration_seconds, runs, language):
+    """Ejecutar un backend varias veces y calcular su RTF"""
+    backend = get_recognizer_backend(backend_name, language)
+
+    # Calentamiento (carga del modelo fuera de la medición)
+    try:
+        result = backend.recognize(audio_data)
+    except sr.UnknownValueError:
+        result = {'text': '', 'confidence': None}
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            backend.recognize(audio_data)
+        except sr.UnknownValueError:
+            pass
+        timings.append(time.perf_counter() - start)
+
+    avg_time = sum(timings) / len(timings)
+    return {
+        'backend': backend_name,
+        'avg_seconds': avg_time,
+        'rtf': avg_time / duration_seconds if duration_seconds else 0,
+        'confidence': result.get('confidence'),
+        'text': result.get('text', '')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark RTF de reconocedores de voz')
+    parser.add_argument('audio', help='Archivo WAV (PCM) a transcribir')
+    parser.add_argument('--backends', default='vosk,whisper,sphinx',
+                        help='Backends separados por coma')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--language', default=os.getenv('SPEECH_RECOGNITION_LANGUAGE', 'es-ES'))
+    args = parser.parse_args()
+
+    with sr.AudioFile(args.audio) as source:
+        audio_data = sr.Recognizer().record(source)
+    duration_seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+
+    print("\n" + "=" * 60)
+    print(f"🎤 BENCHMARK DE RECONOCIMIENTO - {args.audio} ({duration_seconds:.1f}s)")
+    print("=" * 60)
+
+    for backend_name in [b.strip() for b in args.backends.split(',') if b.strip()]:
+        try:
+            stats = benchmark_backend(backend_name, audio_data, duration_seconds, args.runs, args.language)
+        except sr.RequestError as e:
+            print(f"\n⚠️  {backend_name}: no disponible ({e})")
+            continue
+
+        confidence = stats['confidence']
+        print(f"\n✅ {backend_name}")
+        print(f"   Tiempo promedio: {stats['avg_seconds']:.2f}s")
+        print(f"   RTF: {stats['rtf']:.3f} ({1 / stats['rtf']:.1f}x tiempo real)" if stats['rtf'] else "   RTF: n/a")
+        print(f"   Confianza: {confidence:.2f}" if confidence is not None else "   Confianza: n/a")
+        print(f"   Texto: {stats['text'][:80]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Benchmark del detector de entregas casi duplicadas (MinHash/LSH)
+
+Genera un corpus sintético (por defecto 100.000 entregas) con
+reentregas casi idénticas (copias con ~5% de palabras cambiadas) y
+reutilización parcial (un pasaje de una entrega anterior dentro de un
+texto nuevo), calcula las firmas con SimilarityDetector.fingerprint_text y
+mide:
+
+- rendimiento del cálculo de firmas (entregas/s);
+- construcción del índice de bandas y su tamaño (filas y bytes);
+- latencia de búsqueda por entrega con LSH frente a la comparación por
+  fuerza bruta (firma del texto completo y firmas de todas las ventanas);
+- recall frente a la fuerza bruta por ventanas y sobre los pares plantados,
+  y falsos positivos sobre entregas sin relación.
+
+El índice de submission_lsh_buckets se modela en memoria con un arreglo
+ordenado por banda y búsqueda binaria (equivalente a la búsqueda por el
+índice (band, bucket) de la tabla), para medir el algoritmo sin MySQL.
+
+Uso:
+    python benchmark_similarity.py [--docs 100000] [--words 300] [--queries 500] [--brute 100] [--seed 1]
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import resource
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app.utils import minhash
+from app.services.document_processing.similarity_detector import SimilarityDetector
+
+
+SYLLABLES = (
+    "ma me mi mo mu pa pe pi po pu ta te ti to tu la le li lo lu ra re ri ro ru "
+    "ca co cu sa se si so su na ne ni no nu da de di do du ga go gu ba be bi bo "
+    "ción dad mente ble tor ral gía"
+).split()
+
+DUPLICATE_RATE = 0.02
+REUSE_RATE = 0.02
+DUPLICATE_EDITS = 0.05
+
+
+class Corpus:
+    """Entregas sintéticas reproducibles por semilla (no se guardan los textos)"""
+
+    def __init__(self, docs, words, seed, vocabulary_size=20000):
+        rng = random.Random(seed)
+        vocabulary = set()
+        while len(vocabulary) < vocabulary_size:
+            vocabulary.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+        self.vocabulary = sorted(vocabulary)
+        # Frecuencias tipo Zipf, como en un texto real
+        weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+        total = sum(weights)
+        acc, self.cum_weights = 0.0, []
+        for weight in weights:
+            acc += weight / total
+            self.cum_weights.append(acc)
+
+        self.docs, self.words, self.seed = docs, words, seed
+        # Relación plantada de cada entrega: (tipo, entrega de origen)
+        self.planted = {}
+        for doc_id in range(1, docs):
+            roll = rng.random()
+            if roll < DUPLICATE_RATE:
+                self.planted[doc_id] = ('duplicate', rng.randrange(doc_id))
+            elif roll < DUPLICATE_RATE + REUSE_RATE:
+                self.planted[doc_id] = ('reuse', rng.randrange(doc_id))
+
+    def families(self):
+        """Entrega raíz de la que deriva cada entrega (ella misma si no fue plantada)"""
+        root = list(range(self.docs))
+        for doc_id in sorted(self.planted):
+            root[doc_id] = root[self.planted[doc_id][1]]
+        return root
+
+    def _random_words(self, rng, count):
+        return rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def tokens(self, doc_id):
+        rng = random.Random(self.seed * 1_000_003 + doc_id)
+        length = max(40, int(rng.gauss(self.words, self.words * 0.25)))
+        kind, source = self.planted.get(doc_id, (None, None))
+        if kind == 'duplicate':
+            tokens = self.tokens(source)
+            for index in rng.sample(range(len(tokens)), int(len(tokens) * DUPLICATE_EDITS)):
+                tokens[index] = rng.choice(self.vocabulary)
+            return tokens
+        tokens = self._random_words(rng, length)
+        if kind == 'reuse':
+            original = self.tokens(source)
+            size = min(len(original), rng.randint(150, 200))
+            start = rng.randrange(len(original) - size + 1)
+            at = rng.randrange(len(tokens) + 1)
+            tokens[at:at] = original[start:start + size]
+        return tokens
+
+    def text(self, doc_id):
+        tokens = self.tokens(doc_id)
+        # Párrafos de ~60 palabras con puntuación, como un documento
+        return '\n\n'.join(
+            ' '.join(tokens[i:i + 60]).capitalize() + '.'
+            for i in range(0, len(tokens), 60)
+        )
+
+
+class BandIndex:
+    """Modelo en memoria de submission_lsh_buckets: claves ordenadas por banda"""
+
+    def __init__(self, bands):
+        self.bands = bands
+        self._keys = [[] for _ in range(bands)]
+        self._segments = [[] for _ in range(bands)]
+
+    def add(self, segment_id, keys):
+        for band, key in enumerate(keys):
+            self._keys[band].append(key)
+            self._segments[band].append(segment_id)
+
+    def freeze(self):
+        for band in range(self.bands):
+            keys = np.asarray(self._keys[band], dtype=np.int64)
+            segments = np.asarray(self._segments[band], dtype=np.int64)
+            order = np.argsort(keys, kind='stable')
+            self._keys[band], self._segments[band] = keys[order], segments[order]
+
+    def lookup(self, keys):
+        """Segmentos que comparten alguna banda con las claves dadas"""
+        found = []
+        for band, key in enumerate(keys):
+            array = self._keys[band]
+            left = np.searchsorted(array, key, side='left')
+            right = np.searchsorted(array, key, side='right')
+            if right > left:
+                found.append(self._segments[band][left:right])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    @property
+    def rows(self):
+        return sum(len(keys) for keys in self._keys)
+
+    @property
+    def nbytes(self):
+        return sum(keys.nbytes + segments.nbytes for keys, segments in zip(self._keys, self._segments))
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def build(corpus, detector):
+    """Firmas de todas las entregas e índice de bandas"""
+    index = BandIndex(detector.bands)
+    doc_signatures = np.empty((corpus.docs, detector.num_perm), dtype=np.uint32)
+    segment_signatures, segment_doc = [], []
+
+    text_time = fingerprint_time = 0.0
+    for doc_id in range(corpus.docs):
+        t0 = time.perf_counter()
+        text = corpus.text(doc_id)
+        t1 = time.perf_counter()
+        data = detector.fingerprint_text(text)
+        t2 = time.perf_counter()
+        text_time += t1 - t0
+        fingerprint_time += t2 - t1
+
+        doc_signatures[doc_id] = data['signature']
+        for segment in data['segments']:
+            index.add(len(segment_doc), segment['keys'])
+            segment_signatures.append(segment['signature'])
+            segment_doc.append(doc_id)
+        if (doc_id + 1) % 10000 == 0:
+            print(f"   {doc_id + 1:>7,} entregas ({(doc_id + 1) / fingerprint_time:,.0f}/s en firmas)")
+
+    t0 = time.perf_counter()
+    index.freeze()
+    freeze_time = time.perf_counter() - t0
+    return {
+        'index': index,
+        'doc_signatures': doc_signatures,
+        'segment_signatures': np.vstack(segment_signatures),
+        'segment_doc': np.asarray(segment_doc, dtype=np.int64),
+        'text_time': text_time,
+        'fingerprint_time': fingerprint_time,
+        'freeze_time': freeze_time
+    }
+
+
+def query_lsh(detector, built, data, doc_id):
+    """Entregas con alguna ventana similar (búsqueda por bandas + confirmación)"""
+    matches = set()
+    for segment in data['segments']:
+        candidates = built['index'].lookup(segment['keys'])
+        if not len(candidates):
+            continue
+        candidates = candidates[built['segment_doc'][candidates] != doc_id]
+        similarity = (built['segment_signatures'][candidates] == segment['signature']).mean(axis=1)
+        matches.update(built['segment_doc'][candidates[similarity >= detector.threshold]].tolist())
+    return matches
+
+
+def query_brute_segments(detector, built, data, doc_id):
+    """Referencia: todas las ventanas contra todas las ventanas guardadas"""
+    matches = set()
+    others = built['segment_doc'] != doc_id
+    for segment in data['segments']:
+        similarity = (built['segment_signatures'] == segment['signature']).mean(axis=1)
+        matches.update(built['segment_doc'][others & (similarity >= detector.threshold)].tolist())
+    return matches
+
+
+def query_brute_documents(detector, built, data, doc_id):
+    """Referencia: firma del texto completo contra todas las entregas"""
+    similarity = (built['doc_signatures'] == data['signature']).mean(axis=1)
+    similarity[doc_id] = 0
+    return set(np.nonzero(similarity >= detector.threshold)[0].tolist())
+
+
+def run(docs, words, queries, brute, seed):
+    detector = SimilarityDetector()
+    corpus = Corpus(docs, words, seed)
+    print(f"📚 {docs:,} entregas de ~{words} palabras; plantadas: "
+          f"{sum(kind == 'duplicate' for kind, _ in corpus.planted.values()):,} casi duplicadas, "
+          f"{sum(kind == 'reuse' for kind, _ in corpus.planted.values()):,} con pasaje reutilizado")
+    print(f"⚙️  Parámetros {detector.params}, umbral de ventanas {detector.threshold}, "
+          f"umbral LSH ≈ {minhash.lsh_threshold(detector.bands, detector.rows):.2f}\n")
+
+    built = build(corpus, detector)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    segments = len(built['segment_doc'])
+    signature_bytes = built['segment_signatures'].nbytes + built['doc_signatures'].nbytes
+    print(f"\n🧮 Firmas: {docs / built['fingerprint_time']:,.0f} entregas/s "
+          f"({built['fingerprint_time'] * 1e6 / docs:,.0f} µs/entrega; texto sintético aparte: "
+          f"{built['text_time']:.1f} s)")
+    print(f"🗂️  Índice: {segments:,} ventanas, {built['index'].rows:,} filas de bandas, "
+          f"ordenado en {built['freeze_time'] * 1000:,.0f} ms")
+    print(f"💾 Memoria: bandas {built['index'].nbytes / 2**20:,.1f} MiB, firmas {signature_bytes / 2**20:,.1f} MiB, "
+          f"RSS máximo del proceso {peak / 2**20:,.1f} MiB")
+
+    rng = random.Random(seed)
+    planted_ids = sorted(corpus.planted)
+    plain_ids = [doc_id for doc_id in range(docs) if doc_id not in corpus.planted]
+    sample = rng.sample(planted_ids, min(len(planted_ids), queries // 2))
+    sample += rng.sample(plain_ids, min(len(plain_ids), queries - len(sample)))
+
+    lsh_ms, found = [], {}
+    for doc_id in sample:
+        data = detector.fingerprint_text(corpus.text(doc_id))
+        t0 = time.perf_counter()
+        found[doc_id] = query_lsh(detector, built, data, doc_id)
+        lsh_ms.append((time.perf_counter() - t0) * 1000)
+
+    # Recall sobre los pares plantados (la entrega de origen debe aparecer)
+    by_kind = {'duplicate': [0, 0], 'reuse': [0, 0]}
+    for doc_id in sample:
+        if doc_id in corpus.planted:
+            kind, source = corpus.planted[doc_id]
+            by_kind[kind][0] += source in found[doc_id]
+            by_kind[kind][1] += 1
+    unrelated = [doc_id for doc_id in sample if doc_id not in corpus.planted]
+    # Una entrega sin plantar solo debería coincidir con su familia (copias de ella y copias de esas copias)
+    families = corpus.families()
+    false_positives = sum(
+        any(families[match] != families[doc_id] for match in found[doc_id])
+        for doc_id in unrelated
+    )
+
+    brute_segment_ms, brute_document_ms = [], []
+    agree = reference = 0
+    document_recall = [0, 0]
+    for doc_id in sample[:brute]:
+        data = detector.fingerprint_text(corpus.text(doc_id))
+        t0 = time.perf_counter()
+        expected = query_brute_segments(detector, built, data, doc_id)
+        brute_segment_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        whole = query_brute_documents(detector, built, data, doc_id)
+        brute_document_ms.append((time.perf_counter() - t0) * 1000)
+
+        agree += len(expected & found[doc_id])
+        reference += len(expected)
+        if doc_id in corpus.planted:
+            document_recall[0] += corpus.planted[doc_id][1] in whole
+            document_recall[1] += 1
+
+    print(f"\n🔎 Búsqueda ({len(sample)} consultas, la mitad con relación plantada)")
+    print(f"   LSH:                        p50 {percentile(lsh_ms, 50):8.2f} ms   p95 {percentile(lsh_ms, 95):8.2f} ms")
+    print(f"   Fuerza bruta (ventanas):    p50 {percentile(brute_segment_ms, 50):8.2f} ms   "
+          f"p95 {percentile(brute_segment_ms, 95):8.2f} ms")
+    print(f"   Fuerza bruta (texto entero): p50 {percentile(brute_document_ms, 50):7.2f} ms   "
+          f"p95 {percentile(brute_document_ms, 95):8.2f} ms")
+
+    print("\n🎯 Calidad")
+    for kind, label in (('duplicate', 'casi duplicadas'), ('reuse', 'pasaje reutilizado')):
+        hits, total = by_kind[kind]
+        print(f"   Recall {label:<20} {hits}/{total} ({hits / max(total, 1):.1%})")
+    print(f"   Recall frente a fuerza bruta por ventanas: {agree}/{reference} ({agree / max(reference, 1):.1%})")
+    print(f"   Falsos positivos en entregas sin relación: {false_positives}/{len(unrelated)}")
+    print(f"   Recall de la firma del texto entero (sin ventanas): "
+          f"{document_recall[0]}/{document_recall[1]} ({document_recall[0] / max(document_recall[1], 1):.1%})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark del detector de similitud MinHash/LSH")
+    parser.add_argument('--docs', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--brute', type=int, default=100, help="Consultas comparadas con fuerza bruta")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    run(args.docs, args.words, args.queries, args.brute, args.seed)
@@ -0,0 +1,214 @@
+"""
+Benchmark del motor de métricas de texto de una pasada
+
+Compara app.utils.text_metrics con las implementaciones anteriores
+(WritingEvaluator.calculate_basic_metrics con sílabas carácter a carácter
+por aparición, y TextAnalysis.set_basic_metrics con split()) sobre tesis
+sintéticas de ~100 páginas o sobre archivos TXT/MD indicados. Mide también
+la evaluación con versión anterior (dos documentos) y el consumo por
+generador de líneas.
+
+Uso:
+    python benchmark_text_metrics.py [--pages 100] [--repeat 5] [--files tesis.txt ...] [--seed 1]
+"""
+
+import sys
+import os
+import re
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.text_metrics import TextMetrics, compute_metrics, _text_metrics, count_syllables
+
+
+WORDS_PER_PAGE = 400
+
+VOCABULARY = (
+    "la el de que y en los se del las un por con no una su para es al lo como más "
+    "investigación análisis resultados metodología hipótesis variables muestra datos "
+    "estudiantes aprendizaje rendimiento académico evaluación desarrollo proceso "
+    "significativamente correlación estadística interpretación conocimiento sistema "
+    "educación universidad competencias estrategias herramientas digitales modelo "
+    "teórico práctico contexto social cultural económico fundamental importante "
+    "características específicas procedimiento experimental cuantitativo cualitativo"
+).split()
+
+
+def synthetic_thesis(pages, seed):
+    """Tesis sintética: capítulos, párrafos y oraciones de longitud variable"""
+    rng = random.Random(seed)
+    parts = []
+    words = 0
+    chapter = 0
+    while words < pages * WORDS_PER_PAGE:
+        if rng.random() < 0.03 or chapter == 0:
+            chapter += 1
+            parts.append(f"CAPÍTULO {chapter}")
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            length = rng.randint(8, 30)
+            sentence = ' '.join(rng.choice(VOCABULARY) for _ in range(length))
+            words += length
+            sentences.append(sentence.capitalize() + rng.choice(['.', '.', '.', '?', '!', '...']))
+        parts.append(' '.join(sentences))
+    return '\n\n'.join(parts)
+
+
+# ----------------------------------------------------------------------
+# Implementaciones anteriores (referencia)
+# ----------------------------------------------------------------------
+
+def _legacy_count_syllables(word):
+    vowels = 'aeiouáéíóúü'
+    word = word.lower()
+    syllable_count = 0
+    previous_was_vowel = False
+    for char in word:
+        is_vowel = char in vowels
+        if is_vowel and not previous_was_vowel:
+            syllable_count += 1
+        previous_was_vowel = is_vowel
+    return max(1, syllable_count)
+
+
+def legacy_writing_metrics(text):
+    words = re.findall(r'\b\w+\b', text.lower())
+    word_count = len(words)
+    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+    sentence_count = len(sentences)
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    vocabulary_size = len(set(words))
+    long_word_count = len([w for w in words if len(w) > 7])
+    avg_words_per_sentence = word_count / sentence_count if sentence_count > 0 else 0
+    if sentence_count > 0 and word_count > 0:
+        avg_syllables = sum(_legacy_count_syllables(w) for w in words) / word_count
+        readability = max(0, min(100, 206.835 - 1.015 * avg_words_per_sentence - 84.6 * avg_syllables))
+    else:
+        readability = 50
+    return {
+        'word_count': word_count,
+        'sentence_count': sentence_count,
+        'paragraph_count': len(paragraphs),
+        'vocabulary_size': vocabulary_size,
+        'long_word_count': long_word_count,
+        'readability_score': round(readability, 2)
+    }
+
+
+def legacy_text_analysis_metrics(text):
+    words = text.split()
+    sentences = [s.strip() for s in text.split('.') if s.strip()]
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    return {
+        'total_words': len(words),
+        'unique_words': len(set(word.lower() for word in words)),
+        'avg_word_length': round(sum(len(w) for w in words) / len(words), 2) if words else 0,
+        'sentence_count': len(sentences),
+        'avg_sentence_length': round(sum(len(s.split()) for s in sentences) / len(sentences), 2) if sentences else 0,
+        'paragraph_count': len(paragraphs)
+    }
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cold_new(text):
+    """Motor nuevo sin memoria previa (caché de textos y de sílabas vacías)"""
+    _text_metrics.cache_clear()
+    count_syllables.cache_clear()
+    return compute_metrics(text)
+
+
+def streamed(text):
+    metrics = TextMetrics()
+    for line in text.splitlines(keepends=True):
+        metrics.feed(line)
+    return metrics.result()
+
+
+def check_parity(name, text):
+    old = legacy_writing_metrics(text)
+    new = cold_new(text)
+    stream = streamed(text)
+    mismatches = [key for key in ('word_count', 'vocabulary_size', 'long_word_count') if old[key] != new[key]]
+    stream_mismatches = [key for key in new if new[key] != stream[key]]
+    print(f"\n🔎 {name}: {new['word_count']} palabras, {new['sentence_count']} oraciones, "
+          f"{new['paragraph_count']} párrafos, legibilidad {new['readability_score']} "
+          f"(anterior: {old['sentence_count']} oraciones, {old['paragraph_count']} párrafos, "
+          f"legibilidad {old['readability_score']})")
+    if mismatches:
+        print(f"  ❌ Difieren del cálculo anterior: {mismatches}")
+    if stream_mismatches:
+        print(f"  ❌ Por líneas difiere del texto completo: {stream_mismatches}")
+    if not mismatches and not stream_mismatches:
+        print("  ✅ Palabras/vocabulario/palabras largas idénticos; por líneas = texto completo")
+    return not mismatches and not stream_mismatches
+
+
+def benchmark(name, text, previous, repeat):
+    print(f"\n⏱️  {name} ({len(text) / 1024:.0f} KB, mejor de {repeat})")
+    rows = [
+        ("WritingEvaluator anterior", lambda: legacy_writing_metrics(text)),
+        ("TextAnalysis anterior", lambda: legacy_text_analysis_metrics(text)),
+        ("Motor nuevo (en frío)", lambda: cold_new(text)),
+        ("Motor nuevo (por líneas)", lambda: streamed(text)),
+        ("Anterior: actual + previa + fallback", lambda: [legacy_writing_metrics(t) for t in (text, previous, text, previous)]),
+        ("Nuevo: actual + previa + fallback", lambda: (cold_new(text), [compute_metrics(t) for t in (previous, text, previous)])),
+    ]
+    baseline = None
+    for label, fn in rows:
+        elapsed = best_of(fn, repeat)
+        # Cada fila se compara con la implementación anterior equivalente
+        if label.startswith(("WritingEvaluator anterior", "Anterior:")):
+            baseline = elapsed
+        speedup = f"{baseline / elapsed:5.1f}x" if baseline else ''
+        print(f"  {label:<40}{elapsed * 1000:>10.1f} ms  {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de métricas de texto")
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--files', nargs='*', default=[])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    documents = []
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            documents.append((os.path.basename(path), f.read()))
+    if not documents:
+        documents.append((f"Tesis sintética de {args.pages} páginas", synthetic_thesis(args.pages, args.seed)))
+
+    print("=" * 70)
+    print("📊 BENCHMARK DE MÉTRICAS DE TEXTO")
+    print("=" * 70)
+
+    ok = True
+    for name, text in documents:
+        # Versión anterior: el mismo documento con ~10% de párrafos distintos
+        paragraphs = text.split('\n\n')
+        rng = random.Random(args.seed)
+        previous = '\n\n'.join(p for p in paragraphs if rng.random() > 0.1)
+        ok &= check_parity(name, text)
+        benchmark(name, text, previous, args.repeat)
+
+    print("\n" + "=" * 70)
+    print("✅ Benchmark completado" if ok else "⚠️  Benchmark completado con diferencias")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Script para construir el índice de similitud de las entregas ya guardadas
+
+Indexa los documentos completados y las evaluaciones de escritura en orden
+de fecha de entrega, de modo que cada entrega se compara con las
+anteriores. Es idempotente: una entrega ya indexada con el mismo texto y
+los mismos parámetros se omite (con --refresh se recalcula; necesario tras
+cambiar SIMILARITY_NUM_PERM, SIMILARITY_BANDS, SIMILARITY_SHINGLE_WORDS o
+SIMILARITY_SEGMENT_WORDS).
+
+Uso:
+    python build_similarity_index.py [--user-id 3] [--source document|writing_evaluation] [--refresh]
+"""
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models.document import Document
+from app.models.similarity import SUBMISSION_SOURCES
+from app.models.writing_evaluation import WritingEvaluation
+from app.services.document_processing.similarity_detector import similarity_detector
+
+
+def build_similarity_index(user_id=None, source=None, refresh=False):
+    """Indexa las entregas guardadas, de la más antigua a la más reciente"""
+    app = create_app()
+
+    with app.app_context():
+        submissions = []
+        if source in (None, 'document'):
+            query = Document.query.filter_by(processing_status='completed')
+            if user_id:
+                query = query.filter_by(user_id=user_id)
+            submissions += [
+                (document.upload_date, 'document', document.id)
+                for document in query.with_entities(Document.id, Document.upload_date)
+            ]
+        if source in (None, 'writing_evaluation'):
+            query = WritingEvaluation.query
+            if user_id:
+                query = query.filter_by(user_id=user_id)
+            submissions += [
+                (evaluation.evaluated_at, 'writing_evaluation', evaluation.id)
+                for evaluation in query.with_entities(WritingEvaluation.id, WritingEvaluation.evaluated_at)
+            ]
+        submissions.sort(key=lambda item: (item[0] is None, item[0], item[2]))
+        print(f"🔁 {len(submissions)} entregas por indexar (parámetros {similarity_detector.params})")
+
+        done = skipped = failed = flagged = 0
+        for _, kind, source_id in submissions:
+            result = similarity_detector.index_source(kind, source_id, refresh=refresh)
+            if not result['success']:
+                print(f"⚠️  {kind} {source_id}: {result['error']}")
+                failed += 1
+                continue
+            if result['indexed']:
+                done += 1
+            else:
+                skipped += 1
+            if result['near_duplicate']:
+                flagged += 1
+
+        print(f"\n✅ Indexadas: {done}, omitidas: {skipped}, con error: {failed}, casi duplicadas: {flagged}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Construir el índice de similitud entre entregas")
+    parser.add_argument('--user-id', type=int, default=None)
+    parser.add_argument('--source', choices=SUBMISSION_SOURCES, default=None)
+    parser.add_argument('--refresh', action='store_true', help="Recalcular también las ya indexadas")
+    args = parser.parse_args()
+    build_similarity_index(args.user_id, args.source, args.refresh)
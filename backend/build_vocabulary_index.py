@@ -0,0 +1,74 @@
+"""
+Script para construir el índice de vocabulario de los documentos ya analizados
+
+Los documentos procesados antes del índice (o cuyo índice se quiere
+regenerar) se indexan en orden de fecha de subida. Es idempotente:
+reindexar un documento reemplaza sus apariciones anteriores.
+
+Uso:
+    python build_vocabulary_index.py [--user-id 3] [--reindex]
+"""
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models.document import Document
+from app.models.vocabulary import VocabularySnapshot
+from app.services.document_processing import document_reader
+from app.services.document_processing.vocabulary_analyzer import vocabulary_analyzer
+
+
+def build_vocabulary_index(user_id=None, reindex=False):
+    """Indexa el vocabulario de los documentos completados"""
+    app = create_app()
+
+    with app.app_context():
+        query = Document.query.filter_by(processing_status='completed')
+        if user_id:
+            query = query.filter_by(user_id=user_id)
+        documents = query.order_by(Document.upload_date, Document.id).all()
+
+        indexed = {row.document_id for row in VocabularySnapshot.query.with_entities(VocabularySnapshot.document_id)}
+        print(f"📚 {len(documents)} documentos completados, {len(indexed)} ya indexados")
+
+        done = skipped = failed = 0
+        for document in documents:
+            if document.id in indexed and not reindex:
+                skipped += 1
+                continue
+            if not os.path.exists(document.file_path):
+                print(f"⚠️  Documento {document.id}: archivo no encontrado ({document.file_name})")
+                failed += 1
+                continue
+
+            try:
+                text = document_reader.read_text(document.file_path)
+            except Exception as e:
+                print(f"⚠️  Documento {document.id}: no se pudo extraer el texto ({e})")
+                failed += 1
+                continue
+
+            analysis = document.text_analysis
+            result = vocabulary_analyzer.index_document(
+                document,
+                text,
+                technical_terms=analysis.technical_terms if analysis else None,
+                key_concepts=analysis.key_concepts if analysis else None
+            )
+            if result['success']:
+                done += 1
+            else:
+                failed += 1
+
+        print(f"\n✅ Indexados: {done}, omitidos: {skipped}, con error: {failed}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Construir el índice de vocabulario")
+    parser.add_argument('--user-id', type=int, default=None)
+    parser.add_argument('--reindex', action='store_true', help="Reindexar también los ya indexados")
+    args = parser.parse_args()
+    build_vocabulary_index(args.user_id, args.reindex)
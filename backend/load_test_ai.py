@@ -0,0 +1,276 @@
+"""
+Prueba de carga de los endpoints de IA con el LLM simulado
+
+Lanza N usuarios concurrentes contra los endpoints de herramientas de
+estudio y evaluación de escritura y reporta p50/p95/p99, throughput y tasa
+de error por endpoint. Sirve para medir el efecto de la caché, el control
+de admisión, los reintentos y el registro asíncrono sin gastar cuota de
+Gemini ni depender de la red.
+
+Modos:
+- En proceso (por defecto): crea la app con LLM_PROVIDER=fake y usa un
+  test_client por usuario. Requiere la base de datos configurada.
+- Remoto (--base-url): peticiones HTTP a un servidor ya levantado; el
+  servidor debe arrancarse con LLM_PROVIDER=fake (y las variables
+  LLM_FAKE_* deseadas).
+
+Uso:
+    python load_test_ai.py --users 20 --duration 60
+    python load_test_ai.py --users 50 --requests 500 --scenarios mindmap,summary
+    python load_test_ai.py --base-url http://localhost:5000 --users 10 --duration 30
+    python load_test_ai.py --latency lognormal:800:3000 --errors 429:0.05,500:0.02,malformed:0.03 --seed 7
+
+Por defecto cada petición lleva un texto distinto (--unique) para que la
+caché de respuestas no oculte la latencia del modelo; --repeat envía
+siempre el mismo texto para medir el camino con caché.
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+BASE_TEXT = (
+    "La fotosíntesis es el proceso mediante el cual las plantas transforman la energía "
+    "luminosa en energía química. Ocurre en los cloroplastos y requiere agua, dióxido de "
+    "carbono y luz solar. Como resultado se producen glucosa y oxígeno, que son esenciales "
+    "para la vida en el planeta.\n\n"
+    "Este proceso se divide en dos fases: la fase luminosa, donde se captura la energía, "
+    "y el ciclo de Calvin, donde se fija el carbono. Ambas fases están estrechamente "
+    "relacionadas y dependen de las condiciones ambientales."
+)
+
+SYLLABUS_TEXT = (
+    "CURSO: Biología General\nProfesor: Dra. Pérez\nCréditos: 4\n\n"
+    "Semana 1: Introducción a la célula\nSemana 2: Metabolismo y fotosíntesis\n"
+    "Semana 3: Genética mendeliana\nSemana 4: Evolución\n\n"
+    "Evaluación: Examen parcial (30%), Proyecto final (40%), Tareas (30%)"
+)
+
+
+def _variant(text, n, unique):
+    return f"{text}\n\nVariante {n}." if unique else text
+
+
+def _json(path):
+    def build(n, unique):
+        return path, payloads[path.rsplit('/', 1)[-1]](n, unique), None
+    return build
+
+
+payloads = {
+    'mindmap': lambda n, u: {'text': _variant(BASE_TEXT, n, u), 'context': 'Biología'},
+    'summary': lambda n, u: {'text': _variant(BASE_TEXT, n, u), 'type': 'general'},
+    'timeline': lambda n, u: {'topic': f"Proyecto de biología {n if u else ''}".strip(), 'type': 'project'},
+    'analyze-syllabus': lambda n, u: {'text': _variant(SYLLABUS_TEXT, n, u), 'course_name': 'Biología General'},
+}
+
+
+def _writing(n, unique):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_writing.txt')
+    with open(path, 'r', encoding='utf-8') as f:
+        content = _variant(f.read(), n, unique)
+    return '/api/academic/tools/evaluate-writing', {'save_to_history': 'false'}, ('test_writing.txt', content.encode('utf-8'))
+
+
+SCENARIOS = {
+    'mindmap': _json('/api/academic/tools/mindmap'),
+    'summary': _json('/api/academic/tools/summary'),
+    'timeline': _json('/api/academic/tools/timeline'),
+    'syllabus': _json('/api/academic/tools/analyze-syllabus'),
+    'writing': _writing,
+}
+
+
+# ----------------------------------------------------------------------
+# Clientes
+# ----------------------------------------------------------------------
+
+class InProcessClient:
+    """Un test_client de Flask por usuario"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def post(self, path, data, upload):
+        if upload:
+            import io
+            filename, content = upload
+            form = dict(data, document=(io.BytesIO(content), filename))
+            response = self.client.post(path, data=form, content_type='multipart/form-data')
+        else:
+            response = self.client.post(path, json=data)
+        return response.status_code
+
+
+class HttpClient:
+    """Sesión HTTP por usuario contra un servidor remoto"""
+
+    def __init__(self, base_url, timeout):
+        import requests
+        self.session = requests.Session()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def post(self, path, data, upload):
+        url = self.base_url + path
+        if upload:
+            filename, content = upload
+            response = self.session.post(url, data=data, files={'document': (filename, content)}, timeout=self.timeout)
+        else:
+            response = self.session.post(url, json=data, timeout=self.timeout)
+        return response.status_code
+
+
+# ----------------------------------------------------------------------
+# Ejecución
+# ----------------------------------------------------------------------
+
+def percentile(values, pct):
+    """Percentil por rango más cercano (values ordenados)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def run_load(make_client, scenarios, users, duration=None, total_requests=None, unique=True, seed=1):
+    """
+    Ejecutar la prueba de carga
+
+    Returns:
+        tuple: (resultados [(escenario, status, latencia_s)], segundos totales)
+    """
+    results = []
+    results_lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+    deadline = time.monotonic() + duration if duration else None
+
+    def next_request():
+        with counter_lock:
+            n = next(counter)
+        if total_requests is not None and n >= total_requests:
+            return None
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+        return n
+
+    def user(user_index):
+        rng = random.Random(seed * 1000 + user_index)
+        client = make_client()
+        while True:
+            n = next_request()
+            if n is None:
+                return
+            name = rng.choice(scenarios)
+            path, data, upload = SCENARIOS[name](n, unique)
+            start = time.perf_counter()
+            try:
+                status = client.post(path, data, upload)
+            except Exception as e:
+                status = f"exc:{type(e).__name__}"
+            elapsed = time.perf_counter() - start
+            with results_lock:
+                results.append((name, status, elapsed))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for future in [pool.submit(user, i) for i in range(users)]:
+            future.result()
+    return results, time.perf_counter() - started
+
+
+def report(results, wall_seconds):
+    """Imprimir la tabla de resultados por endpoint"""
+    by_scenario = {}
+    for name, status, elapsed in results:
+        by_scenario.setdefault(name, []).append((status, elapsed))
+    by_scenario['TOTAL'] = [(status, elapsed) for _, status, elapsed in results]
+
+    print("\n" + "=" * 92)
+    print(f"{'Endpoint':<12}{'Peticiones':>11}{'Errores':>9}{'% Error':>9}{'RPS':>8}"
+          f"{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'max (ms)':>11}")
+    print("-" * 92)
+    for name, items in by_scenario.items():
+        latencies = sorted(elapsed * 1000 for _, elapsed in items)
+        errors = sum(1 for status, _ in items if not (isinstance(status, int) and status < 400))
+        print(f"{name:<12}{len(items):>11}{errors:>9}{errors / max(len(items), 1):>9.1%}"
+              f"{len(items) / max(wall_seconds, 1e-9):>8.1f}"
+              f"{percentile(latencies, 50):>11.0f}{percentile(latencies, 95):>11.0f}"
+              f"{percentile(latencies, 99):>11.0f}{(latencies[-1] if latencies else 0):>11.0f}")
+    print("=" * 92)
+
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    print(f"Códigos: {json.dumps(statuses, sort_keys=True)}")
+    print(f"Duración: {wall_seconds:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de endpoints de IA con LLM simulado")
+    parser.add_argument('--users', type=int, default=10, help="Usuarios concurrentes")
+    parser.add_argument('--duration', type=float, help="Segundos de prueba (defecto 30 si no se indica --requests)")
+    parser.add_argument('--requests', type=int, help="Número total de peticiones")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Escenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument('--base-url', help="Servidor remoto (por defecto, app en proceso)")
+    parser.add_argument('--timeout', type=float, default=120, help="Timeout HTTP en modo remoto")
+    parser.add_argument('--latency', help="LLM_FAKE_LATENCY (solo en proceso)")
+    parser.add_argument('--errors', help="LLM_FAKE_ERRORS (solo en proceso)")
+    parser.add_argument('--seed', type=int, default=1, help="Semilla del LLM simulado y de la mezcla de escenarios")
+    parser.add_argument('--repeat', action='store_true', help="Repetir el mismo texto (mide el camino con caché)")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+    duration = args.duration if args.duration or args.requests else 30
+
+    if args.base_url:
+        make_client = lambda: HttpClient(args.base_url, args.timeout)
+        target = args.base_url
+    else:
+        os.environ['LLM_PROVIDER'] = 'fake'
+        os.environ['LLM_FAKE_SEED'] = str(args.seed)
+        if args.latency:
+            os.environ['LLM_FAKE_LATENCY'] = args.latency
+        if args.errors is not None:
+            os.environ['LLM_FAKE_ERRORS'] = args.errors
+        from app import create_app
+        app = create_app()
+        make_client = lambda: InProcessClient(app)
+        target = 'app en proceso (LLM_PROVIDER=fake)'
+
+    print("=" * 92)
+    print("🚀 PRUEBA DE CARGA - ENDPOINTS DE IA")
+    print(f"   Destino: {target}")
+    print(f"   Usuarios: {args.users} | Escenarios: {', '.join(scenarios)} | "
+          f"{'Peticiones: ' + str(args.requests) if args.requests else ''}"
+          f"{' Duración: ' + str(duration) + 's' if duration else ''} | "
+          f"Texto {'repetido' if args.repeat else 'único'}")
+    print("=" * 92)
+
+    results, wall_seconds = run_load(
+        make_client, scenarios, args.users,
+        duration=duration, total_requests=args.requests,
+        unique=not args.repeat, seed=args.seed
+    )
+    report(results, wall_seconds)
+
+    if not args.base_url:
+        from app.services.ai.llm_client import llm_client
+        status = llm_client.status()
+        print(f"LLM simulado: {json.dumps(status.get('fake_llm', {}), ensure_ascii=False)}")
+        print(f"Admisión: {json.dumps(status.get('admission', {}), ensure_ascii=False, default=str)}")
+
+
+if __name__ == '__main__':
+    main()
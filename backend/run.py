@@ -6,9 +6,11 @@ Plataforma Integral de Rendimiento Estudiantil
 from app import create_app
 import os
 
-app = create_app()
-
+# La app se crea solo al ejecutar el script: `flask run` (FLASK_APP=run.py) usa
+# la fábrica create_app, y los procesos 'spawn' del pool de extracción de PDF,
+# que vuelven a importar este módulo, no la crean (conexión a BD, hilos)
 if __name__ == '__main__':
+    app = create_app()
     port = int(os.getenv('PORT', 5000))
     
     print(f"""
@@ -0,0 +1,134 @@
+"""
+Pruebas de la extracción y reparación de JSON de la IA (app.utils.json_stream)
+"""
+import json
+import random
+
+import pytest
+
+from app.utils.json_stream import IncrementalJSONParser, JSONExtractionError, extract_json, repair_json
+
+
+RESPONSE = {
+    'overall_score': 82,
+    'summary': 'Texto "claro" con\nsaltos y barra \\ invertida; acentos: también, ñandú \u00e9',
+    'specific_errors': [
+        {'type': 'concordancia', 'error': 'los datos muestra', 'location': 'párrafo 2'},
+        {'type': 'puntuación', 'error': 'a, b', 'location': 'párrafo 3'}
+    ],
+    'scores': {'grammar': 80, 'nested': {'ok': True, 'none': None}},
+    'strengths': [],
+    'ratio': -1.5e-3
+}
+
+
+def _feed(chunks):
+    parser = IncrementalJSONParser()
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(parser.feed(chunk))
+    return parser, emitted
+
+
+# ----------------------------------------------------------------------
+# extract_json
+# ----------------------------------------------------------------------
+
+def test_extract_fenced_json():
+    text = 'Aquí está la evaluación:\n```json\n' + json.dumps(RESPONSE) + '\n```\n'
+    assert extract_json(text) == RESPONSE
+
+
+def test_extract_json_with_preamble_and_trailing_text():
+    text = 'Claro, {no es json} aquí va: ' + json.dumps(RESPONSE) + ' Espero que sirva {"otro": 1}'
+    assert extract_json(text) == RESPONSE
+
+
+def test_extract_json_expected_array():
+    assert extract_json('Resultado: {"a": 1} y la lista [1, 2, 3]', expect='array') == [1, 2, 3]
+
+
+def test_extract_json_without_json_raises():
+    with pytest.raises(JSONExtractionError):
+        extract_json('Sin nada que decodificar')
+    with pytest.raises(json.JSONDecodeError):
+        extract_json('')
+
+
+# ----------------------------------------------------------------------
+# repair_json
+# ----------------------------------------------------------------------
+
+def test_repair_trailing_commas():
+    assert json.loads(repair_json('{"a": [1, 2, ], "b": {"c": 3,},}')) == {'a': [1, 2], 'b': {'c': 3}}
+
+
+def test_repair_raw_newlines_in_strings():
+    fragment = '{"summary": "línea uno\nlínea dos\tfin", "n": 1}'
+    assert json.loads(repair_json(fragment)) == {'summary': 'línea uno\nlínea dos\tfin', 'n': 1}
+    assert extract_json('```json\n' + fragment + '\n```') == {'summary': 'línea uno\nlínea dos\tfin', 'n': 1}
+
+
+def test_repair_mismatched_closer():
+    assert json.loads(repair_json('{"a": [1, 2}')) == {'a': [1, 2]}
+
+
+@pytest.mark.parametrize('fragment, expected', [
+    ('{"a": 1, "b": {"c": [1, 2', {'a': 1, 'b': {'c': [1]}}),
+    ('{"a": 1, "b": {"c": [1, 2]', {'a': 1, 'b': {'c': [1, 2]}}),
+    ('{"a": 1, "b": {"c": "texto cort', {'a': 1, 'b': {}}),
+    ('{"a": 1, "b": {"c', {'a': 1, 'b': {}}),
+    ('{"a": 1, "b":', {'a': 1}),
+    ('[{"x": 1}, {"y": [', [{'x': 1}, {'y': []}]),
+])
+def test_repair_truncated_nested(fragment, expected):
+    assert json.loads(repair_json(fragment)) == expected
+    assert extract_json('Respuesta: ' + fragment) == expected
+
+
+# ----------------------------------------------------------------------
+# IncrementalJSONParser
+# ----------------------------------------------------------------------
+
+def test_incremental_whole_text_matches_json_loads():
+    text = json.dumps(RESPONSE, ensure_ascii=False, indent=2)
+    parser, emitted = _feed([text])
+    assert parser.complete
+    assert parser.close() == json.loads(text)
+    assert [key for key, _ in emitted] == list(RESPONSE)
+
+
+def test_incremental_random_chunks_match_json_loads():
+    rng = random.Random(7)
+    text = 'Evaluación:\n```json\n' + json.dumps(RESPONSE, ensure_ascii=False) + '\n```'
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, 40)))
+        chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+        parser, emitted = _feed(chunks)
+        assert parser.close() == RESPONSE
+        assert dict(emitted) == RESPONSE
+        assert not parser.errors
+
+
+def test_incremental_split_inside_escape_sequence():
+    text = json.dumps({'summary': 'comillas \\"dentro\\" y \u00e9', 'n': 1})
+    for split in (text.index('\\'), text.index('\\') + 1, text.index('\\u') + 3):
+        parser, _ = _feed([text[:split], text[split:]])
+        assert parser.close() == json.loads(text), split
+
+
+def test_incremental_split_inside_key():
+    text = '{"overall_score": 80, "grammar_score": 75}'
+    split = text.index('grammar') + 3
+    parser, first = _feed([text[:split]])
+    assert first == [('overall_score', 80)]
+    assert parser.feed(text[split:]) == [('grammar_score', 75)]
+    assert parser.complete
+
+
+def test_incremental_emits_fields_as_they_close():
+    parser = IncrementalJSONParser()
+    assert parser.feed('Preámbulo {"a": [1, ') == []
+    assert parser.feed('2], "b": "x"') == [('a', [1, 2])]
+    assert parser.feed('}') == [('b', 'x')]
+    assert parser.feed('{"c": 1}') == []
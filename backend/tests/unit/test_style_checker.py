@@ -0,0 +1,34 @@
+"""
+Pruebas del vocabulario integrado del revisor ortográfico (app.utils.style_checker)
+"""
+from app.utils.style_checker import BUILTIN_VALID, check_text, find_misspellings
+
+
+# Palabras frecuentes sin tilde que son correctas (demostrativos, verbos,
+# sustantivos): el vocabulario integrado no debe "corregirlas"
+COMMON_UNACCENTED = """
+este esta estas esto estos solo mas aun tu el mi se te de si
+publico publica practica critica especifica medico grafica graficas grafico
+calculo numero ultimo ultima termino pagina paginas articulo titulo capitulo
+silaba silabas periodo ira
+""".split()
+
+
+def test_common_unaccented_words_are_not_flagged():
+    findings = find_misspellings([' '.join(COMMON_UNACCENTED)])
+    assert findings == []
+
+
+def test_builtin_valid_words_are_not_flagged():
+    assert find_misspellings([' '.join(BUILTIN_VALID)]) == []
+
+
+def test_demonstrative_estas_is_kept():
+    errors = check_text("Estas ideas son claras. Él grafica los datos de estas tablas.")
+    assert not [e for e in errors if e['error'].lower() in ('estas', 'grafica')]
+
+
+def test_missing_accent_is_flagged():
+    findings = find_misspellings(["Tambien revisamos el metodo y la tecnica."])
+    corrections = {item['word']: item['correction'] for item in findings}
+    assert corrections == {'Tambien': 'También', 'metodo': 'método', 'tecnica': 'técnica'}
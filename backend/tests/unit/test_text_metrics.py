@@ -0,0 +1,72 @@
+"""
+Pruebas del acumulador de métricas por fragmentos (app.utils.text_metrics)
+"""
+import random
+
+from app.utils.text_metrics import TextMetrics, compute_metrics
+
+
+ALPHABET = list('abcdeáéíñú ') + ['.', '!', '?', '...', ' ', '  ', '\n', '\n\n', ' \n \n', '\t', 'palabra', 'extraordinario']
+
+SAMPLE = """Introducción
+
+La educación digital cambió la manera de aprender. ¿Qué opinan los docentes?
+Muchos creen que sí... otros no!
+
+Conclusión: se necesitan políticas públicas.  Fin"""
+
+
+def _random_text(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 120)))
+
+
+def _random_chunks(rng, text):
+    if len(text) < 2:
+        return [text]
+    cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, min(len(text) - 1, 20))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+def _feed(chunks):
+    metrics = TextMetrics()
+    for chunk in chunks:
+        metrics.feed(chunk)
+    return metrics.result()
+
+
+def test_sample_metrics():
+    metrics = compute_metrics(SAMPLE)
+    assert metrics['paragraph_count'] == 3
+    assert metrics['sentence_count'] == 7
+    assert metrics['word_count'] == 25
+
+
+def test_result_does_not_depend_on_chunking():
+    rng = random.Random(41)
+    for _ in range(2000):
+        text = _random_text(rng)
+        assert _feed(_random_chunks(rng, text)) == _feed([text]), repr(text)
+
+
+def test_sample_in_random_chunks():
+    rng = random.Random(5)
+    expected = compute_metrics(SAMPLE)
+    for _ in range(200):
+        assert _feed(_random_chunks(rng, SAMPLE)) == expected
+    assert _feed(list(SAMPLE)) == expected
+
+
+def test_compute_metrics_over_reader_blocks():
+    paragraphs = SAMPLE.split('\n\n')
+    blocks = ({'text': paragraph, 'kind': 'paragraph', 'index': i} for i, paragraph in enumerate(paragraphs))
+    assert compute_metrics(blocks) == compute_metrics('\n\n'.join(paragraphs))
+
+
+def test_compute_metrics_over_line_generator():
+    lines = (line for line in SAMPLE.splitlines(keepends=True))
+    assert compute_metrics(lines) == compute_metrics(SAMPLE)
+
+
+def test_empty_text():
+    assert compute_metrics('')['word_count'] == 0
+    assert compute_metrics(iter([]))['paragraph_count'] == 0
@@ -0,0 +1,129 @@
+"""
+Pruebas de la reevaluación incremental por párrafos (app.services.academic.writing_revisions)
+"""
+from types import SimpleNamespace
+
+from app.services.academic import writing_revisions
+
+
+PARAGRAPHS = [
+    "La educación digital cambió la manera en que los estudiantes acceden a la información.",
+    "Los docentes incorporaron plataformas virtuales y recursos interactivos en sus clases diarias.",
+    "Sin embargo, la brecha de conectividad sigue afectando a las zonas rurales del país.",
+    "En conclusión, se necesitan políticas públicas que garanticen el acceso equitativo."
+]
+
+
+def _text(paragraphs):
+    return '\n\n'.join(paragraphs)
+
+
+def _evaluation(paragraphs, errors=None):
+    """Evaluación guardada de prueba con índice de párrafos y errores por párrafo"""
+    _, entries = writing_revisions.index_paragraphs(_text(paragraphs))
+    for index, paragraph_errors in (errors or {}).items():
+        entries[index]['errors'] = paragraph_errors
+    return SimpleNamespace(
+        id=1,
+        additional_metrics={'paragraphs': entries},
+        overall_score=70, grammar_score=70, coherence_score=70, vocabulary_score=70, structure_score=70,
+        tone_analysis='académico', formality_score=75, complexity_level='intermedio',
+        suggestions=[], strengths=['Buena estructura'], weaknesses=[], recommendations=[],
+        summary='Texto claro'
+    )
+
+
+def _error(text, paragraph):
+    return {'type': 'gramática', 'error': text, 'correction': text, 'location': f'párrafo {paragraph}'}
+
+
+def test_unchanged_document_reuses_evaluation():
+    base = _evaluation(PARAGRAPHS, {2: [_error('brecha de conectividad', 3)]})
+    plan = writing_revisions.plan_revision(_text(PARAGRAPHS), base)
+
+    assert plan['pending'] == []
+    assert plan['diff']['removed'] == []
+    assert writing_revisions.is_unchanged(plan)
+    evaluation = writing_revisions.unchanged_evaluation(plan)
+    assert evaluation['overall_score'] == 70
+    assert [e['location'] for e in evaluation['specific_errors']] == ['párrafo 3']
+
+
+def test_paragraph_edited_in_place():
+    edited = list(PARAGRAPHS)
+    edited[1] = "Los docentes incorporaron plataformas virtuales en sus clases."
+    plan = writing_revisions.plan_revision(_text(edited), _evaluation(PARAGRAPHS))
+
+    assert plan['diff']['changed'] == [(1, 1)]
+    assert plan['diff']['reused'] == [(0, 0), (2, 2), (3, 3)]
+    assert plan['pending'] == [1]
+    assert not writing_revisions.is_unchanged(plan)
+
+
+def test_insertion_shifts_reused_errors():
+    inserted = PARAGRAPHS[:1] + ["Un párrafo nuevo sobre el uso de tabletas."] + PARAGRAPHS[1:]
+    base = _evaluation(PARAGRAPHS, {2: [_error('brecha de conectividad', 3)]})
+    plan = writing_revisions.plan_revision(_text(inserted), base)
+
+    assert plan['diff']['added'] == [1]
+    assert plan['diff']['reused'] == [(0, 0), (1, 2), (2, 3), (3, 4)]
+    assert plan['pending'] == [1]
+    assert [(index, error['location']) for index, error in plan['reused_errors']] == [(3, 'párrafo 4')]
+
+
+def test_deletion_only_is_not_unchanged():
+    remaining = PARAGRAPHS[:1] + PARAGRAPHS[2:]
+    base = _evaluation(PARAGRAPHS, {2: [_error('brecha de conectividad', 3)]})
+    plan = writing_revisions.plan_revision(_text(remaining), base)
+
+    assert plan['pending'] == []
+    assert plan['diff']['removed'] == [1]
+    assert not writing_revisions.is_unchanged(plan)
+    assert [(index, error['location']) for index, error in plan['reused_errors']] == [(1, 'párrafo 2')]
+
+
+def test_large_change_falls_back_to_full_evaluation():
+    rewritten = [
+        "Un texto completamente distinto sobre la historia de la imprenta y su impacto cultural.",
+        "Gutenberg desarrolló tipos móviles que abarataron la producción de libros en Europa.",
+        "La alfabetización creció en los siglos siguientes gracias a la circulación de impresos.",
+        PARAGRAPHS[3]
+    ]
+    assert writing_revisions.plan_revision(_text(rewritten), _evaluation(PARAGRAPHS)) is None
+
+
+def test_previous_text_must_match_base():
+    edited = list(PARAGRAPHS)
+    edited[1] = "Los docentes incorporaron plataformas virtuales en sus clases."
+    other_previous = _text(PARAGRAPHS[:3])
+    assert writing_revisions.plan_revision(_text(edited), _evaluation(PARAGRAPHS), other_previous) is None
+
+
+def test_merge_revision_keeps_only_errors_of_reevaluated_paragraphs():
+    edited = list(PARAGRAPHS)
+    edited[1] = "Los docentes incorporaron plataformas virtuales en sus clases."
+    base = _evaluation(PARAGRAPHS, {2: [_error('brecha de conectividad', 3)]})
+    plan = writing_revisions.plan_revision(_text(edited), base)
+
+    new_error = _error('plataformas virtuales', 2)
+    reused_paragraph_error = _error('políticas públicas', 4)
+    unlocated_error = {'type': 'coherencia', 'error': 'x', 'correction': 'y', 'location': 'general'}
+    evaluation = writing_revisions.merge_revision({
+        'overall_score': 75,
+        'specific_errors': [reused_paragraph_error, unlocated_error, new_error, 'no es un dict'],
+        'strengths': []
+    }, plan)
+
+    assert evaluation['specific_errors'] == [new_error, _error('brecha de conectividad', 3), unlocated_error]
+    assert evaluation['strengths'] == ['Buena estructura']
+    assert evaluation['tone_analysis'] == 'académico'
+
+
+def test_attribute_errors_by_snippet_then_location():
+    paragraphs, entries = writing_revisions.index_paragraphs(_text(PARAGRAPHS))
+    found = _error('Brecha de conectividad', 1)
+    by_location = _error('no aparece en el texto', 2)
+    out_of_range = _error('tampoco aparece', 9)
+    writing_revisions.attribute_errors(paragraphs, entries, [found, by_location, out_of_range, None])
+
+    assert [entry['errors'] for entry in entries] == [[], [by_location], [found], []]